@@ -22,7 +22,8 @@ def set_default_bili_config():
     default_config = {
         "video_quality": 80,  # 1080p
         "download_path": "uploads",  # 下载到 uploads 目录
-        "download_interval": 2,  # 下载间隔2秒
+        "max_concurrent_downloads": 3,  # 同时下载的视频数
+        "api_rate_limit": 2,  # api.bilibili.com 每秒请求数（令牌桶限速）
         "headless": False,  # 不使用无头模式
     }
     
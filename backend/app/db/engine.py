@@ -1,17 +1,75 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 
 # SQLite 数据库路径
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./video_note.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite 需要这个参数
-)
+# 多个后台任务同时写库时，等待写锁而不是立刻报 "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1").lower() not in {"0", "false", "no"}
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(128 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "8"))
+
+
+def sqlite_pragmas(wal: bool = SQLITE_WAL) -> list:
+    pragmas = [f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}"]
+    if wal:
+        # WAL 下读写互不阻塞；NORMAL 只在检查点时 fsync，断电最多丢最后几个事务，不会损坏数据库
+        pragmas += ["PRAGMA journal_mode = WAL", "PRAGMA synchronous = NORMAL"]
+    pragmas += [
+        f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_KB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    return pragmas
+
+
+def configure_sqlite_connection(dbapi_connection, wal: bool = SQLITE_WAL) -> None:
+    """新建连接时设置 PRAGMA；journal_mode 会持久化到数据库文件，其余只对当前连接生效"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas(wal):
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def create_database_engine(url: str = DATABASE_URL, tuned: bool = True):
+    """
+    创建数据库引擎；SQLite 文件库使用连接池复用连接并在连接时调优，
+    内存库所有会话必须共用同一个连接
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True)
+
+    connect_args = {
+        "check_same_thread": False,  # SQLite 需要这个参数
+        "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+    in_memory = url in {"sqlite://", "sqlite:///:memory:"} or "mode=memory" in url
+    if in_memory:
+        db_engine = create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+    else:
+        db_engine = create_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=SQLITE_POOL_SIZE,
+            max_overflow=SQLITE_MAX_OVERFLOW,
+        )
+    if tuned:
+        # 内存库没有 WAL
+        wal = SQLITE_WAL and not in_memory
+        event.listen(db_engine, "connect", lambda conn, _record: configure_sqlite_connection(conn, wal))
+    return db_engine
+
+
+engine = create_database_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
-
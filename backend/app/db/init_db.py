@@ -1,6 +1,8 @@
 from app.db.engine import Base, engine
-from app.db.migrate import migrate_add_screenshot_column
+from app.db.migrate import migrate_add_screenshot_column, migrate_add_task_indexes
 from app.db.bili_dao import set_default_bili_config
+from app.db.video_task_dao import move_inline_markdown_to_blobs, referenced_blob_ids
+from app.utils.blob_store import blob_store
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -14,6 +16,15 @@ def init_db():
         
         # 执行迁移
         migrate_add_screenshot_column()
+        migrate_add_task_indexes()
+
+        # 旧数据的笔记移出任务行，再清理不再被任何任务引用的 blob
+        moved = move_inline_markdown_to_blobs()
+        if moved:
+            logger.info(f"已将 {moved} 条笔记移到 blob 存储")
+        removed = blob_store.sweep(referenced_blob_ids())
+        if removed:
+            logger.info(f"已清理 {removed} 个无引用的 blob")
         
         # 设置 B站下载默认配置
         set_default_bili_config()
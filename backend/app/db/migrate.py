@@ -40,6 +40,8 @@ def migrate_add_screenshot_column():
         ("error_message", "ALTER TABLE video_tasks ADD COLUMN error_message TEXT"),
         ("source", "ALTER TABLE video_tasks ADD COLUMN source TEXT NOT NULL DEFAULT 'upload'"),
         ("source_url", "ALTER TABLE video_tasks ADD COLUMN source_url TEXT"),
+        ("markdown_blob", "ALTER TABLE video_tasks ADD COLUMN markdown_blob TEXT"),
+        ("transcript_blob", "ALTER TABLE video_tasks ADD COLUMN transcript_blob TEXT"),
     ]
 
     try:
@@ -63,6 +65,48 @@ def migrate_add_screenshot_column():
         raise
 
 
+TASK_INDEXES = [
+    ("ix_video_tasks_created_id", "CREATE INDEX IF NOT EXISTS ix_video_tasks_created_id ON video_tasks (created_at, id)"),
+    (
+        "ix_video_tasks_status_created_id",
+        "CREATE INDEX IF NOT EXISTS ix_video_tasks_status_created_id ON video_tasks (status, created_at, id)",
+    ),
+    (
+        "ix_video_tasks_source_created_id",
+        "CREATE INDEX IF NOT EXISTS ix_video_tasks_source_created_id ON video_tasks (source, created_at, id)",
+    ),
+]
+
+
+def migrate_add_task_indexes():
+    """Add the composite indexes used by cursor-paginated task listing."""
+    if not Path(DB_PATH).exists():
+        return
+
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'video_tasks'")
+        existing = {row[0] for row in cursor.fetchall()}
+
+        created = False
+        for name, statement in TASK_INDEXES:
+            if name not in existing:
+                logger.info(f"Creating index {name}...")
+                cursor.execute(statement)
+                conn.commit()
+                created = True
+        if created:
+            # 让查询规划器拿到新索引的统计信息
+            cursor.execute("ANALYZE video_tasks")
+            conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Database index migration failed: {e}")
+        raise
+
+
 if __name__ == "__main__":
     migrate_add_screenshot_column()
+    migrate_add_task_indexes()
 
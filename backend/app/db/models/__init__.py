@@ -2,5 +2,6 @@ from .video_task import VideoTask
 from .bili_config import BiliConfig
 from .bili_video import BiliVideo
 from .bili_download_history import BiliDownloadHistory
+from .note_job import NoteJob
 
-__all__ = ["VideoTask", "BiliConfig", "BiliVideo", "BiliDownloadHistory"]
+__all__ = ["VideoTask", "BiliConfig", "BiliVideo", "BiliDownloadHistory", "NoteJob"]
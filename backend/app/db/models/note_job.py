@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
+from app.db.engine import Base
+
+
+class NoteJob(Base):
+    """笔记任务队列表"""
+    __tablename__ = "note_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, unique=True, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # note_step, web_import
+    task_id = Column(String, nullable=True, index=True)
+    payload = Column(String, nullable=False, default="{}")  # JSON
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed, canceled
+    priority = Column(Integer, nullable=False, default=0)  # 数值越大越先执行
+    attempts = Column(Integer, nullable=False, default=0)
+    error_message = Column(String, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_note_jobs_status_priority", "status", "priority", "id"),
+    )
@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 from app.db.engine import Base
+from app.utils.blob_store import blob_store
 
 
 class VideoTask(Base):
@@ -11,10 +14,26 @@ class VideoTask(Base):
     filename = Column(String, nullable=False)
     status = Column(String, nullable=False, default="pending")
     error_message = Column(String, nullable=True)
-    markdown = Column(String, nullable=True)
+    # 旧数据的笔记直接存在 markdown 列；新写入的笔记压缩存到 blob_store，这里只存 id
+    markdown_inline = Column("markdown", String, nullable=True)
+    markdown_blob = Column(String, nullable=True)
+    transcript_blob = Column(String, nullable=True)
     screenshot = Column(Integer, default=0)  # 0=False, 1=True
     source = Column(String, nullable=False, default="upload")
     source_url = Column(String, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    @property
+    def markdown(self) -> Optional[str]:
+        """笔记正文，首次访问时才从 blob_store 读取；写入由 DAO 先存 blob 再设置 markdown_blob"""
+        if self.markdown_blob:
+            return blob_store.get_text(self.markdown_blob)
+        return self.markdown_inline
+
+    # 任务列表按创建时间倒序做游标分页，可再按状态/来源筛选；索引名与 migrate.py 中保持一致
+    __table_args__ = (
+        Index("ix_video_tasks_created_id", "created_at", "id"),
+        Index("ix_video_tasks_status_created_id", "status", "created_at", "id"),
+        Index("ix_video_tasks_source_created_id", "source", "created_at", "id"),
+    )
@@ -0,0 +1,172 @@
+import json
+import uuid
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+
+from app.db.engine import Base, SessionLocal, engine
+from app.db.models.note_job import NoteJob
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+def ensure_note_job_table() -> None:
+    """确保队列表存在（队列可能先于 init_db 被使用）"""
+    Base.metadata.create_all(bind=engine, tables=[NoteJob.__table__])
+
+
+def create_job(
+    kind: str,
+    payload: dict,
+    task_id: str = None,
+    priority: int = 0,
+    job_id: str = None,
+) -> NoteJob:
+    """创建排队中的任务"""
+    db = SessionLocal()
+    try:
+        job = NoteJob(
+            job_id=job_id or str(uuid.uuid4()),
+            kind=kind,
+            task_id=task_id,
+            payload=json.dumps(payload or {}, ensure_ascii=False),
+            status="queued",
+            priority=priority,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+    except Exception as e:
+        db.rollback()
+        logger.error(f"创建队列任务失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def get_job(job_id: str) -> Optional[NoteJob]:
+    """根据 job_id 获取队列任务"""
+    db = SessionLocal()
+    try:
+        return db.query(NoteJob).filter(NoteJob.job_id == job_id).first()
+    finally:
+        db.close()
+
+
+def claim_next_job(kinds: Iterable[str]) -> Optional[NoteJob]:
+    """按优先级领取下一个排队任务，并标记为 running"""
+    kinds = list(kinds)
+    if not kinds:
+        return None
+
+    db = SessionLocal()
+    try:
+        while True:
+            candidate = (
+                db.query(NoteJob)
+                .filter(NoteJob.status == "queued", NoteJob.kind.in_(kinds))
+                .order_by(NoteJob.priority.desc(), NoteJob.id.asc())
+                .first()
+            )
+            if not candidate:
+                return None
+
+            # 条件更新保证同一任务只会被一个 worker 领取
+            claimed = (
+                db.query(NoteJob)
+                .filter(NoteJob.id == candidate.id, NoteJob.status == "queued")
+                .update(
+                    {
+                        NoteJob.status: "running",
+                        NoteJob.attempts: NoteJob.attempts + 1,
+                        NoteJob.started_at: func.now(),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed:
+                db.refresh(candidate)
+                return candidate
+    except Exception as e:
+        db.rollback()
+        logger.error(f"领取队列任务失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def finish_job(job_id: str, status: str, error_message: str = None) -> None:
+    """记录任务结束状态"""
+    db = SessionLocal()
+    try:
+        job = db.query(NoteJob).filter(NoteJob.job_id == job_id).first()
+        if job:
+            # 已取消的任务不再被 worker 的结束状态覆盖
+            if job.status == "canceled" and status != "canceled":
+                return
+            job.status = status
+            job.error_message = error_message if status == "failed" else None
+            job.finished_at = func.now()
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"更新队列任务失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def requeue_interrupted_jobs() -> int:
+    """把上次进程退出时仍在运行的任务放回队列"""
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(NoteJob)
+            .filter(NoteJob.status == "running")
+            .update({NoteJob.status: "queued", NoteJob.started_at: None}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+    except Exception as e:
+        db.rollback()
+        logger.error(f"恢复队列任务失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def cancel_jobs_for_task(task_id: str) -> int:
+    """取消某个笔记任务下所有未完成的队列任务"""
+    db = SessionLocal()
+    try:
+        count = (
+            db.query(NoteJob)
+            .filter(NoteJob.task_id == task_id, NoteJob.status.in_(ACTIVE_JOB_STATUSES))
+            .update(
+                {NoteJob.status: "canceled", NoteJob.finished_at: func.now()},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return count
+    except Exception as e:
+        db.rollback()
+        logger.error(f"取消队列任务失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def count_jobs_by_status() -> Dict[str, int]:
+    """统计各状态的队列任务数量"""
+    db = SessionLocal()
+    try:
+        rows = db.query(NoteJob.status, func.count(NoteJob.id)).group_by(NoteJob.status).all()
+        return {status: count for status, count in rows}
+    finally:
+        db.close()
@@ -0,0 +1,95 @@
+"""
+批量任务状态写入
+处理中的状态（processing/transcribing/summarizing 等）变化频繁且只有最后一次有意义：
+先记在内存里，由后台线程定期合并成一个事务写入，避免多个工作线程各自开事务争抢 SQLite 写锁
+"""
+import threading
+from typing import Callable, Dict, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StatusWriter:
+    def __init__(self, write_batch: Callable[[Dict[str, str]], None], interval: float = 0.5):
+        """
+        :param write_batch: 在一个事务里写入 {task_id: status} 的函数
+        :param interval: 两次批量写入之间的间隔（秒）
+        """
+        self._write_batch = write_batch
+        self.interval = interval
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # 保证同一时刻只有一个批次在写，discard 可借此等待写入中的批次完成
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._submitted = 0
+        self._written = 0
+        self._batches = 0
+        self._failures = 0
+
+    def submit(self, task_id: str, status: str) -> None:
+        with self._lock:
+            self._pending[task_id] = status
+            self._submitted += 1
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name="task-status-writer", daemon=True)
+                self._thread.start()
+
+    def pending_status(self, task_id: str) -> Optional[str]:
+        with self._lock:
+            return self._pending.get(task_id)
+
+    def discard(self, task_id: str) -> None:
+        """丢弃任务尚未写入的状态；调用方随后会直接写入更新的状态"""
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(task_id, None)
+
+    def flush(self) -> int:
+        """立即写入所有待写状态，返回写入条数"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self._write_batch(batch)
+            except Exception as exc:
+                # 处理中的状态很快会被后续状态覆盖，写入失败不重试，避免数据库异常时反复报错
+                logger.error(f"批量写入任务状态失败，丢弃 {len(batch)} 条: {exc}")
+                with self._lock:
+                    self._failures += 1
+                return 0
+            with self._lock:
+                self._written += len(batch)
+                self._batches += 1
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        self._stopped = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "submitted": self._submitted,
+                "written": self._written,
+                "batches": self._batches,
+                "failures": self._failures,
+                "interval": self.interval,
+            }
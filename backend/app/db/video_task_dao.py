@@ -1,10 +1,41 @@
+import atexit
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, func, or_, update
 from sqlalchemy.orm import Session
 from app.db.engine import SessionLocal
 from app.db.models.video_task import VideoTask
+from app.db.status_writer import StatusWriter
+from app.utils.blob_store import blob_store
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+TASK_STATUS_FLUSH_SECONDS = float(os.getenv("TASK_STATUS_FLUSH_SECONDS", "0.5"))
+
+# 状态变化的监听方 (task_id, status, error_message)，由服务层注册（如推送给进度订阅方），数据层不依赖服务层
+StatusListener = Callable[[str, str, Optional[str]], None]
+_status_listeners: List[StatusListener] = []
+
+
+def add_status_listener(listener: StatusListener) -> None:
+    """注册任务状态变化的监听方，重复注册同一个函数只生效一次"""
+    if listener not in _status_listeners:
+        _status_listeners.append(listener)
+
+
+def _notify_status(task_id: str, status: str, error_message: Optional[str]) -> None:
+    for listener in list(_status_listeners):
+        try:
+            listener(task_id, status, error_message)
+        except Exception as e:
+            # 通知失败不影响状态本身已经写入
+            logger.warning(f"任务状态通知失败: task_id={task_id}, status={status}, {e}")
+
 
 def create_task(
     task_id: str,
@@ -44,26 +75,37 @@ def get_task_by_id(task_id: str) -> VideoTask:
         # 如果任务存在但没有 screenshot 字段，设置默认值
         if task and not hasattr(task, 'screenshot'):
             task.screenshot = 0
-        return task
     finally:
         db.close()
+    # 已提交但尚未落库的处理中状态以内存中的为准（task 已脱离会话，不会被写回）
+    pending = task_status_writer.pending_status(task_id) if task else None
+    if pending:
+        task.status = pending
+        task.error_message = None
+    return task
 
 
 def update_task_status(task_id: str, status: str, markdown: str = None, error_message: str = None):
     """更新任务状态"""
+    # 这次直接写入的状态比排队中的更新，先等写入中的批次完成并丢掉排队的状态
+    task_status_writer.discard(task_id)
+    # 先在会话外写好 blob，事务只记录引用；回滚留下的 blob 没有引用，由 sweep 清理
+    markdown_blob = blob_store.put_text(markdown) if markdown else None
     db = SessionLocal()
     try:
         task = db.query(VideoTask).filter(VideoTask.task_id == task_id).first()
         if task:
             task.status = status
-            if markdown:
-                task.markdown = markdown
+            if markdown_blob:
+                task.markdown_blob = markdown_blob
+                task.markdown_inline = None
             if status == "failed" and error_message:
                 task.error_message = error_message
             elif status != "failed":
                 task.error_message = None
             db.commit()
             db.refresh(task)
+            _notify_status(task_id, status, task.error_message)
             return task
         return None
     except Exception as e:
@@ -74,15 +116,216 @@ def update_task_status(task_id: str, status: str, markdown: str = None, error_me
         db.close()
 
 
+# 列表只需要这些列，不加载可能很大的 markdown
+TASK_SUMMARY_COLUMNS = (
+    VideoTask.id,
+    VideoTask.task_id,
+    VideoTask.filename,
+    VideoTask.status,
+    VideoTask.error_message,
+    VideoTask.source,
+    VideoTask.source_url,
+    VideoTask.created_at,
+    VideoTask.updated_at,
+)
+
+
 def get_all_tasks(limit: int = 50):
-    """获取所有任务"""
+    """获取所有任务（摘要列）"""
+    db = SessionLocal()
+    try:
+        return (
+            db.query(*TASK_SUMMARY_COLUMNS)
+            .order_by(VideoTask.created_at.desc(), VideoTask.id.desc())
+            .limit(limit)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def encode_task_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_task_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标；格式不对时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def list_task_summaries(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    statuses: Optional[Sequence[str]] = None,
+    source: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Tuple[List, Optional[str]]:
+    """
+    按创建时间倒序的游标分页任务列表，只查询摘要列
+
+    :param limit: 每页条数
+    :param cursor: 上一页返回的 next_cursor
+    :param statuses: 状态筛选（任一匹配）
+    :param source: 来源筛选（upload/bilibili/web）
+    :param created_from: 创建时间下限（含）
+    :param created_to: 创建时间上限（不含）
+    :return: (本页任务, 下一页游标；没有更多时为 None)
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(*TASK_SUMMARY_COLUMNS)
+        if statuses:
+            query = query.filter(VideoTask.status.in_(list(statuses)))
+        if source:
+            query = query.filter(VideoTask.source == source)
+        if created_from:
+            query = query.filter(VideoTask.created_at >= created_from)
+        if created_to:
+            query = query.filter(VideoTask.created_at < created_to)
+        if cursor:
+            # keyset 分页：从上一页最后一行 (created_at, id) 之后继续，不用 OFFSET 扫描前面的行
+            cursor_created_at, cursor_id = decode_task_cursor(cursor)
+            query = query.filter(
+                or_(
+                    VideoTask.created_at < cursor_created_at,
+                    and_(VideoTask.created_at == cursor_created_at, VideoTask.id < cursor_id),
+                )
+            )
+        rows = query.order_by(VideoTask.created_at.desc(), VideoTask.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_task_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+    finally:
+        db.close()
+
+
+def _write_status_batch(updates: Dict[str, str]) -> None:
+    table = VideoTask.__table__
+    statement = (
+        update(table)
+        .where(table.c.task_id == bindparam("b_task_id"))
+        .values(status=bindparam("b_status"), error_message=None, updated_at=func.now())
+    )
+    db = SessionLocal()
+    try:
+        db.execute(statement, [{"b_task_id": task_id, "b_status": status} for task_id, status in updates.items()])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+task_status_writer = StatusWriter(_write_status_batch, interval=TASK_STATUS_FLUSH_SECONDS)
+atexit.register(task_status_writer.close)
+
+
+def queue_task_status(task_id: str, status: str) -> None:
+    """
+    提交处理中的状态：立即推送给前端，数据库由 task_status_writer 合并后批量写入。
+    完成、失败等需要立即落库或带笔记、错误信息的状态仍使用 update_task_status
+    """
+    _notify_status(task_id, status, None)
+    task_status_writer.submit(task_id, status)
+
+
+def get_task_blob_refs(task_id: str) -> Optional[dict]:
+    """只查询任务的 blob 引用列；任务不存在时返回 None"""
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(VideoTask.markdown_blob, VideoTask.transcript_blob)
+            .filter(VideoTask.task_id == task_id)
+            .first()
+        )
+        if row is None:
+            return None
+        return {"markdown_blob": row.markdown_blob, "transcript_blob": row.transcript_blob}
+    finally:
+        db.close()
+
+
+def set_task_transcript_blob(task_id: str, blob_id: Optional[str]) -> bool:
+    """更新任务引用的转写 blob，返回任务是否存在"""
+    db = SessionLocal()
+    try:
+        updated = (
+            db.query(VideoTask)
+            .filter(VideoTask.task_id == task_id)
+            .update({VideoTask.transcript_blob: blob_id}, synchronize_session=False)
+        )
+        db.commit()
+        return bool(updated)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"更新转写引用失败: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def referenced_blob_ids() -> set:
+    """所有任务仍在引用的 blob id，用于清理无主 blob"""
     db = SessionLocal()
     try:
-        return db.query(VideoTask).order_by(VideoTask.created_at.desc()).limit(limit).all()
+        referenced = set()
+        for markdown_blob, transcript_blob in db.query(VideoTask.markdown_blob, VideoTask.transcript_blob):
+            referenced.update(blob_id for blob_id in (markdown_blob, transcript_blob) if blob_id)
+        return referenced
     finally:
         db.close()
 
 
+def move_inline_markdown_to_blobs(batch_size: int = 200) -> int:
+    """把旧数据直接存在 markdown 列里的笔记移到 blob_store，分批提交，返回迁移条数"""
+    table = VideoTask.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"), table.c.markdown_blob.is_(None))
+        .values(markdown_blob=bindparam("b_blob"), markdown=None)
+    )
+    moved = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(VideoTask.id, VideoTask.markdown_inline)
+                .filter(VideoTask.markdown_inline.isnot(None), VideoTask.markdown_blob.is_(None))
+                .limit(batch_size)
+                .all()
+            )
+        finally:
+            db.close()
+        if not rows:
+            return moved
+        # 文件 I/O 放在会话外，每批只用一个短事务写回引用
+        params = [
+            {"b_id": row.id, "b_blob": blob_store.put_text(row.markdown_inline) if row.markdown_inline else None}
+            for row in rows
+        ]
+        db = SessionLocal()
+        try:
+            db.execute(statement, params)
+            db.commit()
+            moved += len(rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"迁移笔记到 blob 存储失败: {e}")
+            raise
+        finally:
+            db.close()
+
+
 def delete_task_by_id(task_id: str) -> bool:
     """根据 task_id 删除任务"""
     db = SessionLocal()
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from app.models.transcriber_model import TranscriptResult
 
@@ -16,3 +17,8 @@ class GPT(ABC):
         """
         pass
 
+    async def summarize_async(self, transcript: TranscriptResult, filename: str = "", *args, **kwargs) -> str:
+        """
+        异步生成笔记；默认在线程池中调用同步的 summarize，子类可改为原生异步请求
+        """
+        return await asyncio.to_thread(self.summarize, transcript, filename, *args, **kwargs)
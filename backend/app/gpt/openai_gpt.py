@@ -1,45 +1,175 @@
+import asyncio
 import os
 import re
-from typing import Callable, Iterable, List, Optional, Sequence
+import threading
+import weakref
+from typing import AsyncIterable, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 from openai import APIConnectionError, APIStatusError, APITimeoutError
 
 from app.gpt.base import GPT
+from app.gpt.token_budget import TokenBudget
 from app.models.transcriber_model import TranscriptResult
-from app.services.openai_client import create_openai_client
+from app.services.llm_cache import llm_cache_enabled, llm_cache_key, load_llm_response, store_llm_response
+from app.services.llm_loop import run_on_llm_loop
+from app.services.llm_resilience import (
+    CircuitOpenError,
+    call_with_retries_async,
+    record_failover,
+    should_fail_over,
+)
+from app.services.model_provider import provider_concurrency
+from app.services.openai_client import create_async_openai_client
+from app.services.summary_checkpoint import SummaryCheckpoint
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-# Keep direct generation as the default for long-context models. A 256k-token
-# model can normally handle prompts far above 24k characters, so chunking is a
-# fallback instead of the first path.
-MAX_DIRECT_PROMPT_CHARS = int(os.getenv("NOTE_DIRECT_PROMPT_CHARS", "180000"))
-CHUNK_TARGET_CHARS = 12000
-MERGE_TARGET_CHARS = 18000
+# Keep direct generation as the default whenever the prompt fits the model's
+# context window (see token_budget); chunking is only chosen up front when the
+# estimated prompt tokens exceed the budget, with the context-limit error
+# fallback kept for models whose window is unknown or misreported.
 NOTE_GENERATION_MODE = os.getenv("NOTE_GENERATION_MODE", "auto").strip().lower()
 ProgressCallback = Callable[[str, str], None]
+T = TypeVar("T")
+# Chunk summaries are checkpointed under a key that includes the temperature.
+CHUNK_SUMMARY_TEMPERATURE = 0.35
+
+# One semaphore per provider endpoint, shared by every task in the process, so
+# concurrent chunk requests from several notes still respect the provider limit.
+# asyncio semaphores belong to one event loop, so slots are kept per loop.
+_provider_slots_lock = threading.Lock()
+_async_provider_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_provider_slot(key: str, limit: int) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _provider_slots_lock:
+        slots = _async_provider_slots.setdefault(loop, {})
+        slot = slots.get(key)
+        if slot is None:
+            slot = asyncio.Semaphore(limit)
+            slots[key] = slot
+        return slot
+
+
+class _ThreadedProgress:
+    """Run a progress callback in a worker thread so its file I/O never blocks the event loop.
+
+    Updates are delivered in call order; ones that arrive while a write is in
+    flight are handed over together in the next thread hop.
+    """
+
+    def __init__(self, callback: ProgressCallback):
+        self._callback = callback
+        self._pending: List[Tuple[str, str]] = []
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def __call__(self, message: str, partial: str) -> None:
+        self._pending.append((message, partial))
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._deliver, batch)
+
+    def _deliver(self, batch: List[Tuple[str, str]]) -> None:
+        for message, partial in batch:
+            try:
+                self._callback(message, partial)
+            except Exception as exc:
+                logger.warning("Note progress callback failed: %s", exc)
+
+    async def flush(self) -> None:
+        if self._drain_task is not None:
+            await self._drain_task
+
+
+class _ConcurrentProgress:
+    """Merge streaming progress from concurrent requests into one ordered view."""
+
+    def __init__(
+        self,
+        progress_callback: ProgressCallback,
+        total: int,
+        running_heading: Callable[[int], str],
+    ):
+        self._callback = progress_callback
+        self._total = total
+        self._running_heading = running_heading
+        self._done: Dict[int, str] = {}
+        self._running: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def start(self, index: int, message: str) -> None:
+        with self._lock:
+            self._running[index] = ""
+            self._emit(message)
+
+    def item_callback(self, index: int) -> ProgressCallback:
+        def callback(message: str, partial: str) -> None:
+            with self._lock:
+                self._running[index] = partial
+                self._emit(message)
+
+        return callback
+
+    def finish(self, index: int, section: str, message: str) -> None:
+        with self._lock:
+            self._running.pop(index, None)
+            self._done[index] = section
+            done = len(self._done)
+            self._emit(f"{message}（已完成 {done}/{self._total}，剩余 {self._total - done}）")
+
+    def _emit(self, message: str) -> None:
+        sections = []
+        for index in range(1, self._total + 1):
+            if index in self._done:
+                sections.append(self._done[index])
+            elif index in self._running:
+                sections.append(f"{self._running_heading(index)}\n\n{self._running[index] or '…'}")
+        if len(self._running) > 1:
+            message = f"{message}（{len(self._running)} 段并行中）"
+        self._callback(message, "\n\n".join(sections))
 
 
 class OpenAIGPT(GPT):
     """Generate video notes through an OpenAI-compatible chat API."""
 
-    def __init__(self, api_key: str = None, base_url: str = None, model: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str = None,
+        model: str = None,
+        provider_type: str = "openai",
+        max_concurrency: Optional[int] = None,
+        fallbacks: Optional[Sequence[dict]] = None,
+    ):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.base_url = base_url or os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
         self.model = model or os.getenv("GPT_MODEL", "gpt-4o-mini")
+        self.provider_type = provider_type or "openai"
+        self.budget = TokenBudget.for_model(self.model)
+        self.max_concurrency = max(1, max_concurrency or provider_concurrency(self.provider_type))
+        self._slot_key = f"{self.provider_type}|{self.base_url}"
 
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY is not configured")
 
-        self.client = create_openai_client(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=600.0,
-            max_retries=0,
-        )
+        # AsyncOpenAI clients are bound to an event loop; see _get_async_client
+        self._async_client = None
+        self._async_client_loop = None
+        # Secondary models (see model_provider.fallback_model_configs), created on first failover
+        self._fallback_configs = list(fallbacks or [])
+        self._fallback_gpts: Optional[List["OpenAIGPT"]] = None
 
-        logger.info(f"Initialized OpenAI-compatible GPT: model={self.model}")
+        logger.info(
+            f"Initialized OpenAI-compatible GPT: model={self.model}, concurrency={self.max_concurrency}"
+        )
 
     def summarize(
         self,
@@ -48,127 +178,329 @@ class OpenAIGPT(GPT):
         screenshot: bool = False,
         note_style: str = "simple",
         progress_callback: Optional[ProgressCallback] = None,
+        refresh: bool = False,
+        bypass_cache: bool = False,
+        checkpoint: Optional[SummaryCheckpoint] = None,
+    ) -> str:
+        """Blocking wrapper around summarize_async for worker threads; runs on the shared LLM event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("summarize() blocks the calling thread; await summarize_async() inside an event loop")
+        return run_on_llm_loop(self.summarize_async(
+            transcript,
+            filename,
+            screenshot,
+            note_style,
+            progress_callback=progress_callback,
+            refresh=refresh,
+            bypass_cache=bypass_cache,
+            checkpoint=checkpoint,
+        )).result()
+
+    async def summarize_async(
+        self,
+        transcript: TranscriptResult,
+        filename: str = "",
+        screenshot: bool = False,
+        note_style: str = "simple",
+        progress_callback: Optional[ProgressCallback] = None,
+        refresh: bool = False,
+        bypass_cache: bool = False,
+        checkpoint: Optional[SummaryCheckpoint] = None,
     ) -> str:
+        """
+        Stream the note through the pooled AsyncOpenAI client on the running event loop.
+        refresh re-requests the final note but reuses cached chunk summaries;
+        bypass_cache re-requests every prompt. New responses are cached either way.
+        checkpoint records each finished chunk summary of a long transcript so a
+        failed run resumes at the first missing chunk, even when bypassing the cache.
+        """
         logger.info(f"Start note generation (screenshot={screenshot}, style={note_style})")
 
         prompt = self._build_prompt(transcript, filename, screenshot, note_style)
-        system_content = (
-            "You are a professional video-note assistant. Write clear, well-structured, "
-            "information-rich Chinese Markdown notes from video transcripts."
-        )
-        if screenshot:
-            system_content += (
-                "\n\nWhen screenshot markers are requested, insert useful markers in the exact "
-                "format `*Screenshot-[mm:ss]` near the relevant content."
-            )
+        system_content = self._system_content(screenshot)
+        threaded_progress = _ThreadedProgress(progress_callback) if progress_callback else None
+        progress_callback = threaded_progress
 
         try:
             mode = self._generation_mode()
-            should_chunk_first = (
-                transcript.segments
-                and (
-                    mode == "chunk"
-                    or (mode == "auto" and len(prompt) > MAX_DIRECT_PROMPT_CHARS)
-                )
-            )
-
-            if should_chunk_first:
-                logger.info(
-                    "Transcript prompt is long (%s chars, %s segments, mode=%s); using chunked note generation",
-                    len(prompt),
-                    len(transcript.segments),
-                    mode,
-                )
-                markdown = self._summarize_long_transcript(
+            # Token counting is CPU-bound and the first call may load BPE files; keep it off the shared loop
+            if await asyncio.to_thread(self._should_chunk_first, transcript, system_content, prompt, mode):
+                markdown = await self._summarize_long_transcript(
                     transcript=transcript,
                     filename=filename,
                     screenshot=screenshot,
                     note_style=note_style,
                     system_content=system_content,
                     progress_callback=progress_callback,
+                    reuse_chunks=not bypass_cache,
+                    reuse_final=not (refresh or bypass_cache),
+                    checkpoint=checkpoint,
                 )
             else:
                 try:
-                    markdown = self._complete_markdown(
+                    markdown = await self._complete_markdown(
                         system_content,
                         prompt,
                         temperature=0.7,
                         progress_callback=progress_callback,
                         progress_message="正在生成笔记",
+                        use_cache=not (refresh or bypass_cache),
                     )
                 except Exception as exc:
-                    if mode == "auto" and transcript.segments and self._is_context_limit_error(exc):
-                        logger.info(
-                            "Direct note generation hit a context limit (%s chars); retrying with chunked generation",
-                            len(prompt),
-                        )
-                        markdown = self._summarize_long_transcript(
+                    if await asyncio.to_thread(self._should_retry_chunked, exc, transcript, prompt, mode):
+                        markdown = await self._summarize_long_transcript(
                             transcript=transcript,
                             filename=filename,
                             screenshot=screenshot,
                             note_style=note_style,
                             system_content=system_content,
                             progress_callback=progress_callback,
+                            reuse_chunks=not bypass_cache,
+                            reuse_final=not (refresh or bypass_cache),
+                            checkpoint=checkpoint,
                         )
                     else:
                         raise
 
-            logger.info("Note generation completed")
-
-            if screenshot:
-                pattern = r"\*Screenshot-\[(\d{2}):(\d{2})\]|\*Screenshot-(\d{2}):(\d{2})"
-                matches = list(re.finditer(pattern, markdown))
-                if matches:
-                    logger.info(f"Generated note contains {len(matches)} screenshot markers")
-                else:
-                    logger.warning("Screenshot was enabled, but no screenshot markers were found in the note")
-
+            self._log_completion(markdown, screenshot)
             return markdown
         except Exception as exc:
             friendly_error = self._friendly_error(exc)
             logger.error(f"Note generation failed: {friendly_error}", exc_info=True)
             raise RuntimeError(friendly_error) from exc
+        finally:
+            if threaded_progress is not None:
+                await threaded_progress.flush()
+
+    def _system_content(self, screenshot: bool) -> str:
+        system_content = (
+            "You are a professional video-note assistant. Write clear, well-structured, "
+            "information-rich Chinese Markdown notes from video transcripts."
+        )
+        if screenshot:
+            system_content += (
+                "\n\nWhen screenshot markers are requested, insert useful markers in the exact "
+                "format `*Screenshot-[mm:ss]` near the relevant content."
+            )
+        return system_content
+
+    def _should_chunk_first(self, transcript: TranscriptResult, system_content: str, prompt: str, mode: str) -> bool:
+        if not transcript.segments or mode == "direct":
+            return False
+        if mode == "chunk":
+            logger.info("NOTE_GENERATION_MODE=chunk; using chunked note generation")
+            return True
+        prompt_tokens = self.budget.count(system_content) + self.budget.count(prompt)
+        if prompt_tokens <= self.budget.prompt_tokens:
+            return False
+        logger.info(
+            "Transcript prompt is long (~%s tokens, budget %s of %s-token window, %s segments); "
+            "using chunked note generation",
+            prompt_tokens,
+            self.budget.prompt_tokens,
+            self.budget.context_tokens,
+            len(transcript.segments),
+        )
+        return True
+
+    def _should_retry_chunked(self, exc: Exception, transcript: TranscriptResult, prompt: str, mode: str) -> bool:
+        if mode == "auto" and transcript.segments and self._is_context_limit_error(exc):
+            logger.info(
+                "Direct note generation hit a context limit (~%s tokens, assumed window %s); "
+                "retrying with chunked generation",
+                self.budget.count(prompt),
+                self.budget.context_tokens,
+            )
+            return True
+        return False
+
+    def _log_completion(self, markdown: str, screenshot: bool) -> None:
+        logger.info("Note generation completed")
 
-    def _complete_markdown(
+        if screenshot:
+            pattern = r"\*Screenshot-\[(\d{2}):(\d{2})\]|\*Screenshot-(\d{2}):(\d{2})"
+            matches = list(re.finditer(pattern, markdown))
+            if matches:
+                logger.info(f"Generated note contains {len(matches)} screenshot markers")
+            else:
+                logger.warning("Screenshot was enabled, but no screenshot markers were found in the note")
+
+    async def _complete_markdown(
         self,
         system_content: str,
         prompt: str,
         temperature: float = 0.7,
         progress_callback: Optional[ProgressCallback] = None,
         progress_message: str = "正在生成笔记",
+        use_cache: bool = True,
+        failover: bool = True,
     ) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_content},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=temperature,
-            stream=True,
-        )
+        cache_key = llm_cache_key(self.model, self.base_url, system_content, prompt, temperature)
+        # Skip the thread hops while caching is off; each one is a point where sibling chunks reorder or cancel.
+        if use_cache and llm_cache_enabled():
+            cached = await asyncio.to_thread(load_llm_response, cache_key)
+            if cached is not None:
+                return self._cached_markdown(cached, progress_callback, progress_message)
+
+        async def request() -> str:
+            async with _async_provider_slot(self._slot_key, self.max_concurrency):
+                response = await self._get_async_client().chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_content},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=temperature,
+                    stream=True,
+                )
 
-        markdown = self._read_streaming_markdown(
-            response,
-            progress_callback=progress_callback,
-            progress_message=progress_message,
-        ).strip()
-        if not markdown:
-            raise RuntimeError("AI did not return note content. Please check whether this model supports chat streaming.")
+                markdown = (await self._read_streaming_markdown(
+                    response,
+                    progress_callback=progress_callback,
+                    progress_message=progress_message,
+                )).strip()
+            if not markdown:
+                raise RuntimeError("AI did not return note content. Please check whether this model supports chat streaming.")
+            return markdown
+
+        try:
+            markdown = await call_with_retries_async(
+                self._slot_key, request, on_retry=self._retry_notifier(progress_callback, progress_message)
+            )
+        except Exception as exc:
+            if not failover:
+                raise
+            for fallback in self._fallbacks_for(exc):
+                try:
+                    return await fallback._complete_markdown(
+                        system_content, prompt, temperature, progress_callback, progress_message, use_cache,
+                        failover=False,
+                    )
+                except Exception as fallback_exc:
+                    logger.warning("Fallback model %s failed: %s", fallback.model, fallback_exc)
+            raise
+        if llm_cache_enabled():
+            await asyncio.to_thread(store_llm_response, cache_key, markdown)
         return markdown
 
-    def _read_streaming_markdown(
+    @staticmethod
+    def _retry_notifier(progress_callback: Optional[ProgressCallback], progress_message: str):
+        if not progress_callback:
+            return None
+
+        def on_retry(attempt: int, delay: float, exc: BaseException) -> None:
+            # The partial text of the failed attempt is discarded; the retry streams from the start
+            progress_callback(f"{progress_message}（请求失败，{delay:.0f} 秒后第 {attempt + 1} 次尝试）", "")
+
+        return on_retry
+
+    def _fallbacks_for(self, exc: BaseException) -> List["OpenAIGPT"]:
+        """Fallback models to try after exc; empty unless the provider itself is unavailable."""
+        if not self._fallback_configs or not should_fail_over(exc):
+            return []
+        if self._fallback_gpts is None:
+            fallbacks = []
+            for config in self._fallback_configs:
+                try:
+                    fallbacks.append(OpenAIGPT(**config))
+                except ValueError as config_exc:
+                    logger.warning("Skipping fallback model %s: %s", config.get("model"), config_exc)
+            self._fallback_gpts = fallbacks
+        if self._fallback_gpts:
+            record_failover(self._slot_key)
+            logger.warning(
+                "Provider %s unavailable (%s); failing over to %s",
+                self._slot_key, exc, ", ".join(gpt.model for gpt in self._fallback_gpts),
+            )
+        return self._fallback_gpts
+
+    def _cached_markdown(
+        self,
+        markdown: str,
+        progress_callback: Optional[ProgressCallback],
+        progress_message: str,
+    ) -> str:
+        logger.info("LLM response cache hit (%s)", progress_message)
+        if progress_callback:
+            progress_callback(progress_message, markdown)
+        return markdown
+
+    def _checkpoint_key(self, system_content: str, prompt: str, temperature: float) -> str:
+        return llm_cache_key(self.model, self.base_url, system_content, prompt, temperature)
+
+    def _resumed_count(self, checkpoint: Optional[SummaryCheckpoint], system_content: str, prompts: Sequence[str]) -> int:
+        if checkpoint is None:
+            return 0
+        return checkpoint.count(self._checkpoint_key(system_content, prompt, CHUNK_SUMMARY_TEMPERATURE) for prompt in prompts)
+
+    @staticmethod
+    def _split_message(total: int, resumed: int) -> str:
+        if resumed:
+            return f"正在拆分长视频：共 {total} 段，已完成 {resumed} 段，从第一个未完成的分段继续"
+        return f"正在拆分长视频：共 {total} 段"
+
+    async def _checkpointed_markdown(
         self,
-        response: Iterable,
+        checkpoint: Optional[SummaryCheckpoint],
+        system_content: str,
+        prompt: str,
+        temperature: float,
+        progress_callback: Optional[ProgressCallback] = None,
+        progress_message: str = "正在生成笔记",
+        use_cache: bool = True,
+    ) -> str:
+        """_complete_markdown for intermediate summaries: reuse a checkpointed result, otherwise record the new one."""
+        if checkpoint is None:
+            return await self._complete_markdown(
+                system_content, prompt, temperature, progress_callback, progress_message, use_cache
+            )
+        key = self._checkpoint_key(system_content, prompt, temperature)
+        # The checkpoint file was already loaded by _resumed_count, so this is an in-memory lookup.
+        saved = checkpoint.get(key)
+        if saved is not None:
+            logger.info("Resuming from summary checkpoint (%s)", progress_message)
+            if progress_callback:
+                progress_callback(progress_message, saved)
+            return saved
+        markdown = await self._complete_markdown(
+            system_content, prompt, temperature, progress_callback, progress_message, use_cache
+        )
+        put = asyncio.ensure_future(asyncio.to_thread(checkpoint.put, key, markdown))
+        try:
+            await asyncio.shield(put)
+        except asyncio.CancelledError:
+            # A sibling chunk failed: still record this finished summary so the retry can skip it.
+            await put
+            raise
+        return markdown
+
+    def _get_async_client(self):
+        # The pooled http client is bound to the current event loop, so look it up per loop.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = create_async_openai_client(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=600.0,
+                max_retries=0,
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def _read_streaming_markdown(
+        self,
+        response: AsyncIterable,
         progress_callback: Optional[ProgressCallback] = None,
         progress_message: str = "正在生成笔记",
     ) -> str:
         chunks = []
         last_emit_len = 0
-        for event in response:
-            if not getattr(event, "choices", None):
-                continue
-            delta = event.choices[0].delta
-            content = getattr(delta, "content", None)
+        async for event in response:
+            content = self._event_content(event)
             if content:
                 chunks.append(content)
                 current = "".join(chunks)
@@ -179,6 +511,12 @@ class OpenAIGPT(GPT):
             progress_callback(progress_message, "".join(chunks))
         return "".join(chunks)
 
+    @staticmethod
+    def _event_content(event) -> Optional[str]:
+        if not getattr(event, "choices", None):
+            return None
+        return getattr(event.choices[0].delta, "content", None)
+
     def _friendly_error(self, exc: Exception) -> str:
         message = str(exc).strip()
         cause = getattr(exc, "__cause__", None)
@@ -196,10 +534,17 @@ class OpenAIGPT(GPT):
                 "Please regenerate with simple mode or use a more stable model/provider."
             )
 
+        if isinstance(exc, CircuitOpenError):
+            return (
+                "AI provider failed repeatedly and is paused for "
+                f"{exc.retry_in:.0f}s to avoid wasting requests. Configure a fallback model or regenerate later."
+            )
+
         if self._is_context_limit_error(exc):
             return (
                 "AI model context window is too small for this transcript. "
-                "Use a long-context model, or set NOTE_GENERATION_MODE=auto/chunk to allow segmented note generation."
+                "Use a long-context model, set NOTE_MODEL_CONTEXT_TOKENS to the model's real window, "
+                "or set NOTE_GENERATION_MODE=auto/chunk to allow segmented note generation."
             )
 
         if isinstance(exc, APIStatusError):
@@ -239,7 +584,17 @@ class OpenAIGPT(GPT):
         )
         return any(marker in message for marker in context_markers)
 
-    def _summarize_long_transcript(
+    def _concurrent_progress(
+        self,
+        progress_callback: Optional[ProgressCallback],
+        total: int,
+        running_heading: Callable[[int], str],
+    ) -> Optional[_ConcurrentProgress]:
+        if not progress_callback:
+            return None
+        return _ConcurrentProgress(progress_callback, total, running_heading)
+
+    async def _summarize_long_transcript(
         self,
         transcript: TranscriptResult,
         filename: str,
@@ -247,99 +602,127 @@ class OpenAIGPT(GPT):
         note_style: str,
         system_content: str,
         progress_callback: Optional[ProgressCallback] = None,
+        reuse_chunks: bool = True,
+        reuse_final: bool = True,
+        checkpoint: Optional[SummaryCheckpoint] = None,
     ) -> str:
-        chunks = self._chunk_segments(transcript.segments, CHUNK_TARGET_CHARS)
-        chunk_summaries: List[str] = []
+        chunks = await asyncio.to_thread(self._chunk_segments, transcript.segments, self.budget.chunk_target_tokens)
+        total = len(chunks)
+        prompts = [
+            self._build_chunk_prompt(chunk, filename, index, total, screenshot)
+            for index, chunk in enumerate(chunks, start=1)
+        ]
         if progress_callback:
-            progress_callback(f"正在拆分长视频：共 {len(chunks)} 段", "")
+            progress_callback(self._split_message(total, self._resumed_count(checkpoint, system_content, prompts)), "")
+        tracker = self._concurrent_progress(
+            progress_callback,
+            total,
+            lambda index: f"## 正在生成第 {index}/{total} 段摘要",
+        )
 
-        for index, chunk in enumerate(chunks, start=1):
-            message = f"正在生成第 {index}/{len(chunks)} 段摘要"
-            logger.info("Generating intermediate note chunk %s/%s (%s segments)", index, len(chunks), len(chunk))
-            chunk_prompt = self._build_chunk_prompt(chunk, filename, index, len(chunks), screenshot)
-            chunk_summary = self._complete_markdown(
+        async def summarize_chunk(index: int, chunk: List) -> str:
+            logger.info("Generating intermediate note chunk %s/%s (%s segments)", index, total, len(chunk))
+            chunk_prompt = prompts[index - 1]
+            message = f"正在生成第 {index}/{total} 段摘要"
+            if tracker:
+                tracker.start(index, message)
+            chunk_summary = await self._checkpointed_markdown(
+                checkpoint,
                 system_content,
                 chunk_prompt,
-                temperature=0.35,
-                progress_callback=self._chunk_progress_callback(
-                    progress_callback,
-                    chunk_summaries,
-                    index,
-                    len(chunks),
-                ),
+                temperature=CHUNK_SUMMARY_TEMPERATURE,
+                progress_callback=tracker.item_callback(index) if tracker else None,
                 progress_message=message,
+                use_cache=reuse_chunks,
             )
-            chunk_summaries.append(f"## 第 {index}/{len(chunks)} 段摘要\n\n{chunk_summary}")
-            if progress_callback:
-                progress_callback(f"已完成第 {index}/{len(chunks)} 段摘要", "\n\n".join(chunk_summaries))
+            section = f"## 第 {index}/{total} 段摘要\n\n{chunk_summary}"
+            if tracker:
+                tracker.finish(index, section, f"已完成第 {index}/{total} 段摘要")
+            return section
+
+        chunk_summaries = await self._gather_in_order(chunks, summarize_chunk)
 
-        merged_summaries = self._compress_summaries_if_needed(chunk_summaries, system_content, progress_callback)
+        merged_summaries = await self._compress_summaries_if_needed(
+            chunk_summaries, system_content, progress_callback, use_cache=reuse_chunks, checkpoint=checkpoint
+        )
         final_prompt = self._build_final_prompt(merged_summaries, filename, screenshot, note_style)
-        return self._complete_markdown(
+        return await self._complete_markdown(
             system_content,
             final_prompt,
             temperature=0.55,
             progress_callback=progress_callback,
             progress_message="正在合并全片笔记",
+            use_cache=reuse_final,
         )
 
-    def _chunk_progress_callback(
-        self,
-        progress_callback: Optional[ProgressCallback],
-        completed_summaries: Sequence[str],
-        index: int,
-        total: int,
-    ) -> Optional[ProgressCallback]:
-        if not progress_callback:
-            return None
-
-        def callback(message: str, partial: str) -> None:
-            sections = list(completed_summaries)
-            if partial:
-                sections.append(f"## 正在生成第 {index}/{total} 段摘要\n\n{partial}")
-            progress_callback(message, "\n\n".join(sections))
-
-        return callback
-
-    def _compress_summaries_if_needed(
+    async def _gather_in_order(self, items: Sequence[T], worker: Callable[[int, T], Awaitable[str]]) -> List[str]:
+        """Await worker(index, item) for every item; concurrency is bounded by the provider slot."""
+        tasks = [asyncio.ensure_future(worker(index, item)) for index, item in enumerate(items, start=1)]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _compress_summaries_if_needed(
         self,
         summaries: List[str],
         system_content: str,
         progress_callback: Optional[ProgressCallback] = None,
+        use_cache: bool = True,
+        checkpoint: Optional[SummaryCheckpoint] = None,
     ) -> List[str]:
         current = summaries
-        while len("\n\n".join(current)) > MAX_DIRECT_PROMPT_CHARS and len(current) > 1:
-            grouped = self._chunk_text_blocks(current, MERGE_TARGET_CHARS)
+        while len(current) > 1 and not await asyncio.to_thread(self.budget.fits, "\n\n".join(current)):
+            grouped = await asyncio.to_thread(self._chunk_text_blocks, current, self.budget.merge_target_tokens)
             if progress_callback:
                 progress_callback(f"中间摘要过长，正在压缩为 {len(grouped)} 组", "\n\n".join(current))
-            next_round: List[str] = []
-            for index, group in enumerate(grouped, start=1):
-                prompt = (
-                    "The following are intermediate Chinese video-note summaries from a long video.\n"
-                    "Compress them into a denser Chinese outline while preserving timestamps, facts, examples, "
-                    "names, parameters, and decisions. Do not add a final conclusion yet.\n\n"
-                    f"Group {index}/{len(grouped)}:\n---\n{chr(10).join(group)}\n---"
-                )
-                next_round.append(
-                    self._complete_markdown(
-                        system_content,
-                        prompt,
-                        temperature=0.25,
-                        progress_callback=progress_callback,
-                        progress_message=f"正在压缩中间摘要 {index}/{len(grouped)}",
-                    )
+            total = len(grouped)
+            tracker = self._concurrent_progress(
+                progress_callback,
+                total,
+                lambda index: f"## 正在压缩中间摘要 {index}/{total}",
+            )
+
+            async def compress_group(index: int, group: List[str]) -> str:
+                message = f"正在压缩中间摘要 {index}/{total}"
+                if tracker:
+                    tracker.start(index, message)
+                compressed = await self._checkpointed_markdown(
+                    checkpoint,
+                    system_content,
+                    self._build_compress_prompt(group, index, total),
+                    temperature=0.25,
+                    progress_callback=tracker.item_callback(index) if tracker else None,
+                    progress_message=message,
+                    use_cache=use_cache,
                 )
-            current = next_round
+                if tracker:
+                    tracker.finish(index, compressed, f"已压缩中间摘要 {index}/{total}")
+                return compressed
+
+            current = await self._gather_in_order(grouped, compress_group)
         return current
 
-    def _chunk_segments(self, segments: Sequence, target_chars: int) -> List[List]:
+    def _build_compress_prompt(self, group: Sequence[str], index: int, total: int) -> str:
+        return (
+            "The following are intermediate Chinese video-note summaries from a long video.\n"
+            "Compress them into a denser Chinese outline while preserving timestamps, facts, examples, "
+            "names, parameters, and decisions. Do not add a final conclusion yet.\n\n"
+            f"Group {index}/{total}:\n---\n{chr(10).join(group)}\n---"
+        )
+
+    def _chunk_segments(self, segments: Sequence, target_tokens: int) -> List[List]:
+        """Greedily pack consecutive segments into chunks of at most target_tokens."""
         chunks: List[List] = []
         current: List = []
         current_len = 0
 
         for segment in segments:
-            formatted_len = len(self._format_segment(segment))
-            if current and current_len + formatted_len > target_chars:
+            formatted_len = self.budget.count(self._format_segment(segment))
+            if current and current_len + formatted_len > target_tokens:
                 chunks.append(current)
                 current = []
                 current_len = 0
@@ -350,14 +733,14 @@ class OpenAIGPT(GPT):
             chunks.append(current)
         return chunks or [list(segments)]
 
-    def _chunk_text_blocks(self, blocks: Sequence[str], target_chars: int) -> List[List[str]]:
+    def _chunk_text_blocks(self, blocks: Sequence[str], target_tokens: int) -> List[List[str]]:
         groups: List[List[str]] = []
         current: List[str] = []
         current_len = 0
 
         for block in blocks:
-            block_len = len(block)
-            if current and current_len + block_len > target_chars:
+            block_len = self.budget.count(block)
+            if current and current_len + block_len > target_tokens:
                 groups.append(current)
                 current = []
                 current_len = 0
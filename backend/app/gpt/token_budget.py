@@ -0,0 +1,153 @@
+"""Token budgeting for note prompts.
+
+Character counts badly misjudge Chinese transcripts (roughly one token per Han
+character versus ~4 characters per token for English), so prompt sizing goes
+through this module: a per-model context window plus a local token estimate.
+"""
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+# Packaged builds ship the BPE files pre-fetched by video_note_ai.spec; point tiktoken at them
+# before import so encoder lookups never hit the network.
+_BUNDLED_TIKTOKEN_CACHE = Path(getattr(sys, "_MEIPASS", "")) / "tiktoken_cache"
+if hasattr(sys, "_MEIPASS") and _BUNDLED_TIKTOKEN_CACHE.is_dir():
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(_BUNDLED_TIKTOKEN_CACHE))
+
+try:
+    import tiktoken
+except ImportError:  # pinned in requirements.txt; the CJK-aware heuristic below covers broken installs
+    tiktoken = None
+
+logger = get_logger(__name__)
+
+DEFAULT_CONTEXT_TOKENS = int(os.getenv("NOTE_DEFAULT_CONTEXT_TOKENS", "65536"))
+CHUNK_TARGET_TOKENS = int(os.getenv("NOTE_CHUNK_TARGET_TOKENS", "6000"))
+MERGE_TARGET_TOKENS = int(os.getenv("NOTE_MERGE_TARGET_TOKENS", "9000"))
+# Room kept for the generated note itself, capped so huge windows still get a sane reserve.
+MAX_OUTPUT_RESERVE_TOKENS = 16384
+# Headroom for estimator error and chat-format overhead.
+SAFETY_RATIO = 0.9
+
+# Matched in order at the start of the lower-cased model name or after a "/", "-", ":" or "_"
+# separator (relay names like "openai/gpt-4o"); put specific names before families.
+MODEL_CONTEXT_WINDOWS: Tuple[Tuple[str, int], ...] = (
+    ("gpt-4.1", 1_047_576),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4-32k", 32_768),
+    ("gpt-4", 8_192),
+    ("gpt-3.5-turbo", 16_385),
+    ("o1", 200_000),
+    ("o3", 200_000),
+    ("o4", 200_000),
+    ("deepseek", 65_536),
+    ("qwen-long", 1_000_000),
+    ("qwen-turbo", 1_000_000),
+    ("qwen-plus", 131_072),
+    ("qwen-max", 32_768),
+    ("qwen", 32_768),
+    ("claude", 200_000),
+    ("gemini-1.5-pro", 2_000_000),
+    ("gemini", 1_048_576),
+    ("moonshot-v1-8k", 8_192),
+    ("moonshot-v1-32k", 32_768),
+    ("moonshot-v1-128k", 131_072),
+    ("kimi", 131_072),
+    ("glm-4-long", 1_000_000),
+    ("glm-4", 128_000),
+    ("doubao", 131_072),
+    ("llama3", 8_192),
+    ("llama-3", 131_072),
+    ("mixtral", 32_768),
+)
+
+_CJK_RE = re.compile("[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+_encoders: Dict[str, object] = {}
+_encoders_lock = threading.Lock()
+
+
+def context_window(model: str) -> int:
+    """Context window in tokens; NOTE_MODEL_CONTEXT_TOKENS overrides the table."""
+    override = os.getenv("NOTE_MODEL_CONTEXT_TOKENS", "").strip()
+    if override:
+        try:
+            return max(1024, int(override))
+        except ValueError:
+            logger.warning("Invalid NOTE_MODEL_CONTEXT_TOKENS=%s; using the model table", override)
+    name = (model or "").lower()
+    for marker, tokens in MODEL_CONTEXT_WINDOWS:
+        if re.search(rf"(^|[/:_-]){re.escape(marker)}", name):
+            return tokens
+    return DEFAULT_CONTEXT_TOKENS
+
+
+def estimate_tokens(text: str) -> int:
+    """Heuristic count: one token per CJK character, one per ~4 other characters."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _encoder_for(model: str):
+    """Resolve and memoize the encoder; may read or download BPE files, so keep it off event loops."""
+    if tiktoken is None:
+        return None
+    with _encoders_lock:
+        if model in _encoders:
+            return _encoders[model]
+    try:
+        try:
+            encoder = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoder = tiktoken.get_encoding("o200k_base")
+    except Exception as exc:
+        # tiktoken downloads BPE files on first use; offline installs keep the heuristic
+        logger.warning("tiktoken unavailable for %s (%s); using heuristic token estimate", model, exc)
+        encoder = None
+    with _encoders_lock:
+        _encoders[model] = encoder
+    return encoder
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    model: str
+    context_tokens: int
+    output_reserve: int
+    prompt_tokens: int
+    chunk_target_tokens: int
+    merge_target_tokens: int
+
+    @classmethod
+    def for_model(cls, model: str, context_tokens: Optional[int] = None) -> "TokenBudget":
+        context = context_tokens or context_window(model)
+        reserve = min(MAX_OUTPUT_RESERVE_TOKENS, context // 4)
+        prompt_tokens = int((context - reserve) * SAFETY_RATIO)
+        # Chunk and merge prompts carry instructions too, so each block gets at most half the budget.
+        return cls(
+            model=model,
+            context_tokens=context,
+            output_reserve=reserve,
+            prompt_tokens=prompt_tokens,
+            chunk_target_tokens=max(256, min(CHUNK_TARGET_TOKENS, prompt_tokens // 2)),
+            merge_target_tokens=max(256, min(MERGE_TARGET_TOKENS, prompt_tokens // 2)),
+        )
+
+    def count(self, text: str) -> int:
+        """Blocking (encoder load and BPE work); async callers go through asyncio.to_thread."""
+        encoder = _encoder_for(self.model)
+        if encoder is None:
+            return estimate_tokens(text)
+        return len(encoder.encode(text, disallowed_special=()))
+
+    def fits(self, *texts: str) -> bool:
+        return sum(self.count(text) for text in texts) <= self.prompt_tokens
@@ -5,7 +5,7 @@ B站视频下载 API 路由
 from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.db import bili_dao
 from app.services.bili_task_manager import task_manager
@@ -34,7 +34,9 @@ class ConfigUpdate(BaseModel):
     """配置更新模型"""
     video_quality: Optional[int] = None
     download_path: Optional[str] = None
-    download_interval: Optional[int] = None
+    download_interval: Optional[int] = None  # 已由 api_rate_limit 取代，保留以兼容旧客户端
+    max_concurrent_downloads: Optional[int] = Field(None, ge=1, le=8)
+    api_rate_limit: Optional[float] = Field(None, gt=0, le=20)
     headless: Optional[bool] = None
 
 
@@ -1,17 +1,43 @@
+import asyncio
+import hashlib
+import json
 import os
 import uuid
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, HTTPException, Body, Request
-from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from pydantic import AliasChoices, BaseModel, Field
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from app.db.video_task_dao import create_task, get_task_by_id, get_all_tasks, update_task_status, delete_task_by_id
+from app.db.note_job_dao import cancel_jobs_for_task as cancel_queued_jobs_for_task
+from app.db.video_task_dao import (
+    create_task,
+    delete_task_by_id,
+    get_all_tasks,
+    get_task_by_id,
+    list_task_summaries,
+    queue_task_status,
+    task_status_writer,
+    update_task_status,
+)
+from app.services.http_pool import web_http_stats
+from app.services.llm_cache import llm_cache
+from app.services.llm_resilience import llm_call_stats
+from app.services.media_cache import cache_stats, clear_caches
 from app.services.note import NoteGenerator
+from app.services.note_job_queue import PRIORITY_INTERACTIVE, note_job_queue
+from app.services.note_pipeline import note_pipeline
+from app.services.openai_client import http_pool_stats
 from app.services.model_settings import load_active_model_config
-from app.services.note_progress import read_note_progress
+from app.services.note_progress import note_progress_version, read_note_progress
+from app.services.progress_bus import progress_bus
+from app.services.summary_checkpoint import checkpoint_file
+from app.services.task_artifacts import delete_transcript, load_transcript, transcript_exists, transcript_version
+from app.services.transcript_pages import DEFAULT_PAGE_SIZE, read_task_transcript_page
 from app.services.web_video import cancel_jobs_for_task
+from app.utils.blob_store import blob_store
 from app.utils.response import ResponseWrapper as R
 from app.utils.logger import get_logger
 
@@ -24,6 +50,8 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
 
+TASK_PAGE_MAX_LIMIT = 200
+
 # 支持的文件类型
 ALLOWED_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm', '.m4v', '.mp3', '.wav', '.m4a'}
 
@@ -49,8 +77,12 @@ def _write_task_model_config(task_id: str, model_config: Optional[dict]) -> None
         json.dump(model_config, f, ensure_ascii=False, indent=2)
 
 
-def run_note_task_step(task_id: str, video_path: str, filename: str, step: str, screenshot: bool = False):
-    """执行单个步骤"""
+def run_note_task_step(task_id: str, video_path: str, filename: str, step: str, screenshot: bool = False, refresh: bool = False, bypass_cache: bool = False):
+    """
+    执行单个步骤；refresh=True 表示用户要求重新生成，不使用笔记内容缓存（分段摘要仍可复用）；
+    bypass_cache=True 时连分段摘要的模型响应缓存也不使用
+    失败时把任务标记为 failed 后重新抛出异常
+    """
     try:
         # 尝试读取模型配置
         model_config = None
@@ -86,12 +118,12 @@ def run_note_task_step(task_id: str, video_path: str, filename: str, step: str,
         if step == "extract":
             # 提取音频
             audio_path = generator._extract_audio(video_path, task_id)
-            update_task_status(task_id, "processing")
+            queue_task_status(task_id, "processing")
             logger.info(f"音频提取完成: {task_id}")
             
         elif step == "transcribe":
             # 转写音频
-            update_task_status(task_id, "transcribing")
+            queue_task_status(task_id, "transcribing")
             transcript = generator._transcribe_audio(
                 generator._extract_audio(video_path, task_id),
                 task_id
@@ -101,11 +133,9 @@ def run_note_task_step(task_id: str, video_path: str, filename: str, step: str,
             
         elif step == "summarize":
             # 检查转录是否完成
-            transcript_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-            if not transcript_file.exists():
+            if not transcript_exists(NOTE_OUTPUT_DIR, task_id):
                 logger.error(f"转录文件不存在: {task_id}")
-                update_task_status(task_id, "failed", error_message="转录文件不存在，请先重新执行音频转写")
-                return
+                raise RuntimeError("转录文件不存在，请先重新执行音频转写")
             
             # 如果启用了截图，删除缓存强制重新生成（确保包含截图标记）
             if screenshot:
@@ -115,11 +145,20 @@ def run_note_task_step(task_id: str, video_path: str, filename: str, step: str,
                     logger.info(f"已删除缓存以重新生成带截图的笔记: {cache_file}")
             
             # 生成笔记
-            update_task_status(task_id, "summarizing")
+            queue_task_status(task_id, "summarizing")
             audio_path = generator._extract_audio(video_path, task_id)
             transcript = generator._transcribe_audio(audio_path, task_id)
             # 如果启用了截图，禁用缓存确保重新生成
-            markdown = generator._summarize_text(transcript, filename, task_id, screenshot, use_cache=not screenshot, note_style=note_style)
+            markdown = generator._summarize_text(
+                transcript,
+                filename,
+                task_id,
+                screenshot,
+                use_cache=not screenshot,
+                note_style=note_style,
+                refresh=refresh,
+                bypass_cache=bypass_cache,
+            )
             
             # 清理 AI 输出中的思考过程标签（redacted_reasoning）
             import re
@@ -138,6 +177,41 @@ def run_note_task_step(task_id: str, video_path: str, filename: str, step: str,
     except Exception as e:
         logger.error(f"步骤执行失败: {task_id}, step={step}, 错误: {e}", exc_info=True)
         update_task_status(task_id, "failed", error_message=str(e))
+        # 交给任务队列记录为失败
+        raise
+
+
+def _run_note_step_job(job_id: str, payload: dict) -> None:
+    run_note_task_step(**payload)
+
+
+note_job_queue.register("note_step", _run_note_step_job)
+
+
+def _submit_note_step(
+    task_id: str,
+    video_path: str,
+    filename: str,
+    step: str,
+    screenshot: bool = False,
+    refresh: bool = False,
+    bypass_cache: bool = False,
+) -> str:
+    """把单个步骤放入持久化队列，由 worker 池按阶段并发上限执行"""
+    return note_job_queue.submit(
+        "note_step",
+        {
+            "task_id": task_id,
+            "video_path": video_path,
+            "filename": filename,
+            "step": step,
+            "screenshot": screenshot,
+            "refresh": refresh,
+            "bypass_cache": bypass_cache,
+        },
+        task_id=task_id,
+        priority=PRIORITY_INTERACTIVE,
+    )
 
 
 @router.post("/upload")
@@ -238,13 +312,58 @@ async def upload_video(
         return R.error(f"上传失败: {str(e)}")
 
 
+# GET /task/{task_id}?fields= 可选的字段组；不传时返回全部（兼容旧客户端）
+TASK_FIELD_GROUPS = {"status", "progress", "markdown", "transcript"}
+
+
+def _parse_task_fields(fields: Optional[str]) -> Optional[set]:
+    if not fields:
+        return set(TASK_FIELD_GROUPS)
+    selected = {item.strip() for item in fields.split(",") if item.strip()}
+    unknown = selected - TASK_FIELD_GROUPS
+    if unknown:
+        return None
+    # 状态字段总是返回，客户端据此判断是否继续轮询
+    return selected | {"status"}
+
+
+def _task_etag(task, selected: set) -> str:
+    parts = [
+        task.updated_at.isoformat() if task.updated_at else "",
+        task.status or "",
+        # 笔记在 blob 中时用 blob id 代表内容，不必为算 ETag 读出正文
+        task.markdown_blob or str(len(task.markdown or "")),
+        ",".join(sorted(selected)),
+    ]
+    if "progress" in selected:
+        parts.append(note_progress_version(NOTE_OUTPUT_DIR, task.task_id))
+    if "transcript" in selected:
+        parts.append(transcript_version(NOTE_OUTPUT_DIR, task.task_id))
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
 @router.get("/task/{task_id}")
-def get_task(task_id: str):
-    """获取任务状态和结果"""
+def get_task(task_id: str, fields: Optional[str] = None, request: Request = None, response: Response = None):
+    """
+    获取任务状态和结果
+    - fields: 逗号分隔的字段组 status,progress,markdown,transcript；轮询时只取 status,progress
+    - 支持 If-None-Match，内容未变化时返回 304
+    """
     try:
+        selected = _parse_task_fields(fields)
+        if selected is None:
+            return R.error(f"fields 仅支持: {', '.join(sorted(TASK_FIELD_GROUPS))}", code=400)
+
         task = get_task_by_id(task_id)
         if not task:
             return R.error("任务不存在")
+
+        etag = _task_etag(task, selected)
+        if request is not None and request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        if response is not None:
+            response.headers["ETag"] = etag
         
         result = {
             "task_id": task.task_id,
@@ -258,20 +377,19 @@ def get_task(task_id: str):
         }
         
         # 如果任务已完成或有 markdown，都返回 markdown
-        if task.markdown:
+        if "markdown" in selected and task.markdown:
             result["markdown"] = task.markdown
 
-        progress = read_note_progress(NOTE_OUTPUT_DIR, task_id)
-        if progress:
-            result["progress_message"] = progress.get("message")
-            result["partial_markdown"] = progress.get("partial_markdown") or ""
+        if "progress" in selected:
+            progress = read_note_progress(NOTE_OUTPUT_DIR, task_id)
+            if progress:
+                result["progress_message"] = progress.get("message")
+                result["partial_markdown"] = progress.get("partial_markdown") or ""
         
         # 尝试获取转写结果
-        transcript_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-        if transcript_file.exists():
-            import json
-            with open(transcript_file, 'r', encoding='utf-8') as f:
-                transcript_data = json.load(f)
+        if "transcript" in selected:
+            transcript_data = load_transcript(NOTE_OUTPUT_DIR, task_id)
+            if transcript_data is not None:
                 result["transcript"] = transcript_data
         
         return R.success(result)
@@ -281,38 +399,187 @@ def get_task(task_id: str):
         return R.error(f"获取任务失败: {str(e)}")
 
 
+@router.get("/task/{task_id}/transcript")
+def get_task_transcript(
+    task_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+):
+    """按时间范围分页获取转写片段：start/end 为秒数，offset/limit 在该范围内翻页"""
+    try:
+        page = read_task_transcript_page(
+            NOTE_OUTPUT_DIR, task_id, start=start, end=end, offset=offset, limit=limit
+        )
+        if page is None:
+            return R.error("转写结果不存在")
+        return R.success(page)
+    except Exception as e:
+        logger.error(f"获取转写片段失败: {e}", exc_info=True)
+        return R.error(f"获取转写片段失败: {str(e)}")
+
+
+# 到达这些状态后当前步骤结束，进度流随之关闭
+TERMINAL_EVENT_STATUSES = {"completed", "failed", "transcribed"}
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+
+def _format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/task/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """
+    以 SSE 推送任务进度：先发一次完整快照，之后只推送增量
+    - progress: {seq, message, offset, text}，客户端把已有笔记截断到 offset 再拼接 text
+    - status: 任务状态变化；completed/failed/transcribed 后关闭连接
+    """
+    task = get_task_by_id(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    subscription = progress_bus.subscribe(task_id)
+
+    async def event_stream():
+        try:
+            yield _format_event({"type": "status", "status": task.status, "error_message": task.error_message})
+            if task.status in TERMINAL_EVENT_STATUSES:
+                return
+            yield _format_event(progress_bus.snapshot_event(task_id))
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if event["type"] == "resync":
+                    event = progress_bus.snapshot_event(task_id)
+                yield _format_event(event)
+                if event["type"] == "status" and event["status"] in TERMINAL_EVENT_STATUSES:
+                    return
+        finally:
+            progress_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/queue/stats")
+def get_queue_stats():
+    """获取任务队列和各阶段并发状态"""
+    try:
+        stats = note_job_queue.stats()
+        stats["pipeline"] = note_pipeline.stats()
+        stats["llm_http"] = http_pool_stats()
+        stats["llm_calls"] = llm_call_stats()
+        stats["web_http"] = web_http_stats()
+        stats["progress_bus"] = progress_bus.stats()
+        stats["status_writer"] = task_status_writer.stats()
+        return R.success(stats)
+    except Exception as e:
+        logger.error(f"获取队列状态失败: {e}", exc_info=True)
+        return R.error(f"获取队列状态失败: {str(e)}")
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """获取转写/笔记内容缓存和模型响应缓存的命中率和占用"""
+    try:
+        stats = cache_stats()
+        stats["llm"] = llm_cache.stats()
+        stats["blobs"] = blob_store.stats()
+        return R.success(stats)
+    except Exception as e:
+        logger.error(f"获取缓存状态失败: {e}", exc_info=True)
+        return R.error(f"获取缓存状态失败: {str(e)}")
+
+
+@router.delete("/cache")
+def clear_media_cache():
+    """清空转写/笔记内容缓存和模型响应缓存（不影响已生成的任务）"""
+    try:
+        removed = clear_caches()
+        removed["llm"] = llm_cache.clear()
+        return R.success(removed, msg="缓存已清空")
+    except Exception as e:
+        logger.error(f"清空缓存失败: {e}", exc_info=True)
+        return R.error(f"清空缓存失败: {str(e)}")
+
+
+def _task_summary(task) -> dict:
+    return {
+        "task_id": task.task_id,
+        "filename": task.filename,
+        "status": task.status,
+        "error_message": getattr(task, "error_message", None),
+        "source": getattr(task, "source", "upload"),
+        "source_url": getattr(task, "source_url", None),
+        "created_at": task.created_at.isoformat() if task.created_at else None,
+    }
+
+
 @router.get("/tasks")
 def list_tasks(limit: int = 50):
     """获取任务列表"""
     try:
         tasks = get_all_tasks(limit=limit)
-        result = [
-            {
-                "task_id": task.task_id,
-                "filename": task.filename,
-                "status": task.status,
-                "error_message": getattr(task, "error_message", None),
-                "source": getattr(task, "source", "upload"),
-                "source_url": getattr(task, "source_url", None),
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-            }
-            for task in tasks
-        ]
+        result = [_task_summary(task) for task in tasks]
         return R.success(result)
     except Exception as e:
         logger.error(f"获取任务列表失败: {e}", exc_info=True)
         return R.error(f"获取任务列表失败: {str(e)}")
 
 
+@router.get("/tasks/page")
+def list_tasks_page(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """
+    游标分页获取任务列表
+    - status: 逗号分隔的状态，任一匹配
+    - created_from/created_to: ISO 时间，[from, to) 区间
+    - 返回 next_cursor，传回 cursor 获取下一页；为 null 表示没有更多
+    """
+    try:
+        statuses = [item.strip() for item in status.split(",") if item.strip()] if status else None
+        rows, next_cursor = list_task_summaries(
+            limit=max(1, min(limit, TASK_PAGE_MAX_LIMIT)),
+            cursor=cursor,
+            statuses=statuses,
+            source=source,
+            created_from=created_from,
+            created_to=created_to,
+        )
+        return R.success({"items": [_task_summary(row) for row in rows], "next_cursor": next_cursor})
+    except ValueError as e:
+        return R.error(str(e), code=400)
+    except Exception as e:
+        logger.error(f"获取任务列表失败: {e}", exc_info=True)
+        return R.error(f"获取任务列表失败: {str(e)}")
+
+
 class RegenerateRequest(BaseModel):
     modelConfig: Optional[dict] = None  # 使用驼峰命名，避免与 Pydantic 的 model_config 冲突
     noteStyle: Optional[str] = None
+    # 默认只重新请求最终笔记，分段摘要复用模型响应缓存；为 True 时全部重新请求
+    bypassCache: bool = Field(False, validation_alias=AliasChoices("bypassCache", "bypass_cache"))
 
 @router.post("/task/{task_id}/regenerate")
 def regenerate_note(
     task_id: str, 
     request: RegenerateRequest = Body(None),
-    background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """重新生成笔记"""
     try:
@@ -322,8 +589,7 @@ def regenerate_note(
             return R.error("任务不存在")
         
         # 检查转录是否完成
-        transcript_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-        if not transcript_file.exists():
+        if not transcript_exists(NOTE_OUTPUT_DIR, task_id):
             return R.error("请先完成音频转写")
         
         # 获取文件路径
@@ -382,16 +648,17 @@ def regenerate_note(
             logger.info(f"已删除旧笔记缓存: {cache_file}")
         
         # 更新状态为 summarizing
-        update_task_status(task_id, "summarizing")
+        queue_task_status(task_id, "summarizing")
         
-        # 在后台重新生成笔记（模型配置会在 run_note_task_step 中读取）
-        background_tasks.add_task(
-            run_note_task_step,
+        # 放入任务队列重新生成笔记（模型配置会在 run_note_task_step 中读取）
+        _submit_note_step(
             task_id=task_id,
             video_path=str(file_path),
             filename=task.filename,
             step="summarize",
-            screenshot=screenshot
+            screenshot=screenshot,
+            refresh=True,
+            bypass_cache=bool(request and request.bypassCache),
         )
         
         logger.info(f"开始重新生成笔记: {task_id}")
@@ -408,7 +675,7 @@ class ConfirmStepRequest(BaseModel):
     noteStyle: Optional[str] = None
 
 @router.post("/task/{task_id}/confirm_step")
-def confirm_step(task_id: str, request: ConfirmStepRequest, background_tasks: BackgroundTasks = BackgroundTasks()):
+def confirm_step(task_id: str, request: ConfirmStepRequest):
     """确认步骤并执行"""
     try:
         # 检查任务状态
@@ -437,37 +704,33 @@ def confirm_step(task_id: str, request: ConfirmStepRequest, background_tasks: Ba
         if step == "extract":
             if task.status != "pending":
                 return R.error("当前步骤不可执行")
-            background_tasks.add_task(
-                run_note_task_step,
+            _submit_note_step(
                 task_id=task_id,
                 video_path=str(file_path),
                 filename=task.filename,
                 step="extract",
-                screenshot=screenshot
+                screenshot=screenshot,
             )
         elif step == "transcribe":
             if task.status != "processing":
                 return R.error("当前步骤不可执行")
-            background_tasks.add_task(
-                run_note_task_step,
+            _submit_note_step(
                 task_id=task_id,
                 video_path=str(file_path),
                 filename=task.filename,
                 step="transcribe",
-                screenshot=screenshot
+                screenshot=screenshot,
             )
         elif step == "summarize":
-            # 检查转录是否完成（通过检查转录文件是否存在）
-            transcript_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-            if task.status not in {"transcribing", "transcribed"} and not transcript_file.exists():
+            # 检查转录是否完成（通过检查转写结果是否存在）
+            if task.status not in {"transcribing", "transcribed"} and not transcript_exists(NOTE_OUTPUT_DIR, task_id):
                 return R.error("请先完成音频转写")
-            background_tasks.add_task(
-                run_note_task_step,
+            _submit_note_step(
                 task_id=task_id,
                 video_path=str(file_path),
                 filename=task.filename,
                 step="summarize",
-                screenshot=screenshot
+                screenshot=screenshot,
             )
         else:
             return R.error("未知的步骤")
@@ -721,6 +984,7 @@ def delete_task(task_id: str):
         
         # 删除数据库记录
         cancel_jobs_for_task(task_id)
+        cancel_queued_jobs_for_task(task_id)
         delete_task_by_id(task_id)
         
         # 删除相关文件
@@ -739,9 +1003,11 @@ def delete_task(task_id: str):
             if markdown_file.exists():
                 markdown_file.unlink()
             
-            transcript_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-            if transcript_file.exists():
-                transcript_file.unlink()
+            delete_transcript(NOTE_OUTPUT_DIR, task_id)
+
+            checkpoint = checkpoint_file(NOTE_OUTPUT_DIR, task_id)
+            if checkpoint.exists():
+                checkpoint.unlink()
             
             # 删除截图目录
             screenshot_dir = NOTE_OUTPUT_DIR / "screenshots"
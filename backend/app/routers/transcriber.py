@@ -12,6 +12,7 @@ from app.services.transcriber_settings import (
     save_transcriber_config,
     validate_transcriber_config,
 )
+from app.transcriber.model_pool import whisper_model_pool
 from app.utils.response import ResponseWrapper as R
 
 router = APIRouter()
@@ -22,6 +23,8 @@ class TranscriberConfigRequest(BaseModel):
     model_size: Optional[str] = None
     device: Optional[str] = None
     compute_type: Optional[str] = None
+    parallel_workers: Optional[int] = None
+    chunk_seconds: Optional[int] = None
 
 
 @router.get("/transcriber/types")
@@ -47,3 +50,14 @@ def test_transcriber_config(config: TranscriberConfigRequest):
     if error:
         return R.error(error)
     return R.success(public_transcriber_config(payload), msg="本地语音识别配置可用")
+
+
+@router.get("/transcriber/models")
+def get_loaded_transcriber_models():
+    return R.success(whisper_model_pool.stats())
+
+
+@router.post("/transcriber/models/unload")
+def unload_idle_transcriber_models():
+    count = whisper_model_pool.unload_idle()
+    return R.success({"unloaded": count}, msg=f"已释放 {count} 个空闲模型")
@@ -21,7 +21,9 @@ class TaskStatus(Enum):
 
 # 定义回调类型
 LogCallback = Callable[[str, str], Awaitable[None]]
-ProgressCallback = Callable[[str, str, int, int, int], Awaitable[None]]
+# (状态, 当前视频, 总数, 已完成数, 当前视频进度)，
+# 另以关键字参数传入 downloaded_bytes / total_bytes / failed / overall_progress / videos
+ProgressCallback = Callable[..., Awaitable[None]]
 StatusCallback = Callable[[str, str], Awaitable[None]]
 
 
@@ -35,6 +37,11 @@ class BiliTaskManager:
         self.total_videos: int = 0
         self.completed_videos: int = 0
         self.download_progress: int = 0  # 当前视频下载进度 0-100
+        self.downloaded_bytes: int = 0  # 当前视频已下载字节数
+        self.total_bytes: Optional[int] = None  # 当前视频总字节数，未知时为 None
+        self.failed_videos: int = 0
+        # 并发下载时每个视频各自的状态与进度，按视频列表顺序
+        self.videos: Dict[str, Dict] = {}
         self.downloader = None
         self.download_task: Optional[asyncio.Task] = None
         
@@ -73,7 +80,12 @@ class BiliTaskManager:
                     self.current_video or "",
                     self.total_videos,
                     self.completed_videos,
-                    self.download_progress
+                    self.download_progress,
+                    downloaded_bytes=self.downloaded_bytes,
+                    total_bytes=self.total_bytes,
+                    failed=self.failed_videos,
+                    overall_progress=self.overall_progress(),
+                    videos=self.video_states(),
                 )
             except Exception as e:
                 logger.error(f"进度回调错误: {e}")
@@ -105,6 +117,10 @@ class BiliTaskManager:
         self.total_videos = len(video_list)
         self.completed_videos = 0
         self.download_progress = 0
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        self.failed_videos = 0
+        self.videos = {video: self._new_video_state(video) for video in video_list}
         
         await self.emit_status_change("下载任务启动")
         await self.emit_log("info", f"开始下载任务，共 {self.total_videos} 个视频")
@@ -173,15 +189,77 @@ class BiliTaskManager:
             "total": self.total_videos,
             "completed": self.completed_videos,
             "progress": self.download_progress,
+            "downloaded_bytes": self.downloaded_bytes,
+            "total_bytes": self.total_bytes,
+            "failed": self.failed_videos,
+            "overall_progress": self.overall_progress(),
+            "videos": self.video_states(),
         }
     
+    @staticmethod
+    def _new_video_state(video: str) -> Dict:
+        return {"video": video, "status": "pending", "progress": 0, "downloaded_bytes": 0, "total_bytes": None}
+    
+    def _video_state(self, video: str) -> Dict:
+        state = self.videos.get(video)
+        if state is None:
+            state = self._new_video_state(video)
+            self.videos[video] = state
+        return state
+    
+    def video_states(self) -> List[Dict]:
+        return [dict(state) for state in self.videos.values()]
+    
+    def overall_progress(self) -> int:
+        """整批下载进度 0-100：已结束的视频按 100 计，下载中的按各自进度计"""
+        if not self.total_videos:
+            return 0
+        finished = self.completed_videos + self.failed_videos
+        running = sum(state["progress"] for state in self.videos.values() if state["status"] == "running")
+        return min(100, (finished * 100 + running) // self.total_videos)
+    
+    async def start_video(self, video: str):
+        """开始下载某个视频"""
+        self._video_state(video).update(status="running", progress=0, downloaded_bytes=0, total_bytes=None)
+        self.current_video = video
+        self.download_progress = 0
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        await self.emit_progress()
+    
+    async def finish_video(self, video: str, success: bool):
+        """某个视频下载结束（成功或失败）"""
+        state = self._video_state(video)
+        state["status"] = "completed" if success else "failed"
+        if success:
+            state["progress"] = 100
+        self.completed_videos = sum(1 for item in self.videos.values() if item["status"] == "completed")
+        self.failed_videos = sum(1 for item in self.videos.values() if item["status"] == "failed")
+        await self.emit_progress()
+    
     async def update_progress(self, current_video: str, completed: int, progress: int = 0):
         """更新下载进度（异步版本）"""
+        if current_video != self.current_video or progress == 0:
+            self.downloaded_bytes = 0
+            self.total_bytes = None
         self.current_video = current_video
         self.completed_videos = completed
         self.download_progress = progress
         await self.emit_progress()
     
+    async def update_bytes(self, current_video: str, downloaded: int, total: Optional[int] = None):
+        """更新当前视频已下载的字节数，进度百分比按总字节数换算"""
+        state = self._video_state(current_video)
+        state["downloaded_bytes"] = downloaded
+        state["total_bytes"] = total
+        if total:
+            state["progress"] = min(100, downloaded * 100 // total)
+        self.current_video = current_video
+        self.downloaded_bytes = downloaded
+        self.total_bytes = total
+        self.download_progress = state["progress"]
+        await self.emit_progress()
+    
     def update_progress_sync(self, current_video: str, completed: int, progress: int = 0):
         """更新下载进度（同步版本，兼容旧代码）"""
         self.current_video = current_video
@@ -3,7 +3,7 @@ WebSocket 连接管理器
 用于实时日志推送和下载进度更新
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from fastapi import WebSocket
 
@@ -56,8 +56,11 @@ class ConnectionManager:
         })
     
     async def send_progress(self, status: str, current_video: str, 
-                           total: int, completed: int, progress: int = 0):
-        """发送下载进度"""
+                           total: int, completed: int, progress: int = 0,
+                           downloaded_bytes: int = 0, total_bytes: Optional[int] = None,
+                           failed: int = 0, overall_progress: int = 0,
+                           videos: Optional[List[Dict[str, Any]]] = None):
+        """发送下载进度，videos 为并发下载时每个视频的进度"""
         await self.broadcast({
             "type": "progress",
             "timestamp": datetime.now().isoformat(),
@@ -66,7 +69,12 @@ class ConnectionManager:
                 "current_video": current_video,
                 "total": total,
                 "completed": completed,
-                "progress": progress
+                "progress": progress,
+                "downloaded_bytes": downloaded_bytes,
+                "total_bytes": total_bytes,
+                "failed": failed,
+                "overall_progress": overall_progress,
+                "videos": videos or []
             }
         })
     
@@ -4,16 +4,20 @@ Bilibili API 客户端
 """
 
 import json
+from pathlib import Path
 from typing import Any, Dict, Optional, Tuple, Union
 from urllib.parse import urlencode
 
 import httpx
 from playwright.async_api import BrowserContext, Page
 
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from app.utils.bili_logger import logger
 from .help import BilibiliSign
 from app.utils.browser_util import convert_cookies
+from app.services.http_pool import web_async_http_client
+from app.services.media_download import ByteProgress, stream_to_file
+from app.utils.rate_limiter import AsyncTokenBucket
 
 
 class BilibiliClient:
@@ -26,6 +30,7 @@ class BilibiliClient:
         headers: Dict[str, str] = None,
         playwright_page: Page = None,
         cookie_dict: Dict[str, str] = None,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
     ):
         self.proxy = proxy
         self.timeout = timeout
@@ -33,20 +38,35 @@ class BilibiliClient:
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict or {}
+        # api.bilibili.com 的限速令牌桶，并发下载时所有视频共用
+        self.rate_limiter = rate_limiter
 
     async def request(self, method: str, url: str, **kwargs) -> Any:
         """发送HTTP请求"""
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        if self.proxy:
+            async with httpx.AsyncClient(proxy=self.proxy) as client:
+                response = await client.request(
+                    method, url, timeout=self.timeout, **kwargs
+                )
+        else:
+            # 复用进程共享的连接池，API 请求走已建立的 keep-alive 连接
+            response = await web_async_http_client().request(
                 method, url, timeout=self.timeout, **kwargs
             )
         
+        if response.status_code == 412:
+            raise IPBlockError("请求被B站风控拦截 (HTTP 412)")
+        
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
             logger.error(f"JSON解码失败. status_code: {response.status_code}, response: {response.text}")
             raise DataFetchError(f"JSON解码失败: {response.text}")
         
+        if data.get("code") == -412:
+            raise IPBlockError(data.get("message", "请求被拦截"))
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "未知错误"))
         
@@ -185,3 +205,25 @@ class BilibiliClient:
             except httpx.HTTPError as exc:
                 logger.error(f"下载视频出错: {exc}")
                 return None
+
+    async def download_media(
+        self,
+        url: str,
+        dest: Path,
+        on_progress: Optional[ByteProgress] = None,
+    ) -> int:
+        """
+        流式下载视频到文件，不在内存中缓存整个视频
+        
+        Args:
+            url: 视频URL
+            dest: 保存路径，下载中的数据写入 dest.part，完成后改名
+            on_progress: 进度回调 (已下载字节数, 总字节数)
+        
+        Returns:
+            文件大小（字节）；失败时抛出 httpx.HTTPError，已下载部分留待续传
+        """
+        if not self.proxy:
+            return await stream_to_file(web_async_http_client(), url, dest, headers=self.headers, on_progress=on_progress)
+        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True, timeout=self.timeout) as client:
+            return await stream_to_file(client, url, dest, headers=self.headers, on_progress=on_progress)
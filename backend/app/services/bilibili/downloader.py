@@ -6,17 +6,25 @@ Bilibili 视频下载器
 import asyncio
 import os
 import pathlib
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import aiofiles
+import httpx
 from playwright.async_api import async_playwright, BrowserContext, Page
 
 from .client import BilibiliClient
 from .login import BilibiliLogin
 from .help import parse_video_info_from_url
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from app.utils.bili_logger import logger
 from app.db import bili_dao
+from app.utils.rate_limiter import AsyncTokenBucket
+
+DEFAULT_MAX_CONCURRENT = 3
+# api.bilibili.com 默认每秒请求数；每个视频需要 2 次 API 调用（详情、播放地址）
+DEFAULT_API_RATE = 2.0
+BILI_API_BURST = int(os.getenv("BILI_API_BURST", "4"))
+BILI_BLOCK_COOLDOWN_SECONDS = float(os.getenv("BILI_BLOCK_COOLDOWN_SECONDS", "60"))
 
 
 class BilibiliDownloader:
@@ -72,6 +80,7 @@ class BilibiliDownloader:
         
         # 创建客户端
         timeout = self.api_config.get('request_timeout', 60) if self.api_config else 60
+        api_rate = self.api_config.get('api_rate_limit', DEFAULT_API_RATE) if self.api_config else DEFAULT_API_RATE
         self.bili_client = BilibiliClient(
             timeout=timeout,
             headers={
@@ -79,6 +88,7 @@ class BilibiliDownloader:
                 "Referer": "https://www.bilibili.com",
             },
             playwright_page=self.context_page,
+            rate_limiter=AsyncTokenBucket(float(api_rate), BILI_API_BURST),
         )
         
         # 登录
@@ -121,7 +131,7 @@ class BilibiliDownloader:
         await self.bili_client.update_cookies(self.browser_context)
 
     async def download_videos(self):
-        """下载视频列表"""
+        """下载视频列表，最多 max_concurrent_downloads 个视频同时下载"""
         # 使用API传入的视频列表
         video_list = self.video_list if self.video_list else []
         
@@ -129,60 +139,66 @@ class BilibiliDownloader:
             logger.warning("视频列表为空")
             return
         
-        # 获取下载间隔配置
-        download_interval = self.api_config.get('download_interval', 2) if self.api_config else 2
+        max_concurrent = self.api_config.get('max_concurrent_downloads', DEFAULT_MAX_CONCURRENT) if self.api_config else DEFAULT_MAX_CONCURRENT
+        max_concurrent = max(1, min(int(max_concurrent), len(video_list)))
+        semaphore = asyncio.Semaphore(max_concurrent)
         
-        logger.info(f"开始下载 {len(video_list)} 个视频...")
+        logger.info(f"开始下载 {len(video_list)} 个视频（同时下载 {max_concurrent} 个）...")
         
-        for idx, video_url in enumerate(video_list, 1):
-            logger.info(f"\n[{idx}/{len(video_list)}] 处理: {video_url}")
-            
-            # 更新任务进度
-            if self.task_manager:
-                await self.task_manager.update_progress(video_url, idx - 1, 0)
-            
-            try:
-                # 更新数据库状态为下载中
-                video_info = parse_video_info_from_url(video_url)
-                bili_dao.update_bili_video_status(video_info.video_id, "running")
+        async def run(idx: int, video_url: str):
+            async with semaphore:
+                logger.info(f"\n[{idx}/{len(video_list)}] 处理: {video_url}")
+                await self.download_one(video_url)
+        
+        await asyncio.gather(*(run(idx, video_url) for idx, video_url in enumerate(video_list, 1)))
 
-                result = await self.download_single_video(video_url)
-                
-                if result:
-                    # 更新数据库状态为已完成
-                    bili_dao.update_bili_video_status(
-                        result["bv_id"], 
-                        "downloaded",
-                        title=result["title"]
-                    )
-                    
-                    # 添加下载历史
-                    bili_dao.add_bili_download_history(
-                        bv_id=result["bv_id"],
-                        title=result["title"],
-                        file_path=result["file_path"],
-                        file_size=result["file_size"],
-                        quality=result["quality"]
-                    )
+    async def download_one(self, video_url: str):
+        """下载单个视频并更新数据库状态和任务进度"""
+        # 更新任务进度
+        if self.task_manager:
+            await self.task_manager.start_video(video_url)
+        
+        result = None
+        try:
+            # 更新数据库状态为下载中
+            video_info = parse_video_info_from_url(video_url)
+            bili_dao.update_bili_video_status(video_info.video_id, "running")
+
+            result = await self.download_single_video(video_url)
+            
+            if result:
+                # 更新数据库状态为已完成
+                bili_dao.update_bili_video_status(
+                    result["bv_id"], 
+                    "downloaded",
+                    title=result["title"]
+                )
                 
-                # 更新完成进度
-                if self.task_manager:
-                    await self.task_manager.update_progress(video_url, idx, 100)
+                # 添加下载历史
+                bili_dao.add_bili_download_history(
+                    bv_id=result["bv_id"],
+                    title=result["title"],
+                    file_path=result["file_path"],
+                    file_size=result["file_size"],
+                    quality=result["quality"]
+                )
                 
-                # 下载间隔
-                if idx < len(video_list):
-                    logger.info(f"等待 {download_interval} 秒后继续...")
-                    await asyncio.sleep(download_interval)
-                    
-            except Exception as e:
-                logger.error(f"下载视频失败 {video_url}: {e}")
-                # 更新数据库状态为失败
-                try:
-                    video_info = parse_video_info_from_url(video_url)
-                    bili_dao.update_bili_video_status(video_info.video_id, "failed")
-                except:
-                    pass
-                continue
+        except Exception as e:
+            if isinstance(e, IPBlockError) and self.bili_client.rate_limiter:
+                # 被风控时所有并发下载一起暂停调用 API
+                logger.warning(f"请求被B站拦截，暂停 API 请求 {BILI_BLOCK_COOLDOWN_SECONDS} 秒")
+                self.bili_client.rate_limiter.pause(BILI_BLOCK_COOLDOWN_SECONDS)
+            logger.error(f"下载视频失败 {video_url}: {e}")
+            # 更新数据库状态为失败
+            try:
+                video_info = parse_video_info_from_url(video_url)
+                bili_dao.update_bili_video_status(video_info.video_id, "failed")
+            except:
+                pass
+        
+        # 更新完成进度
+        if self.task_manager:
+            await self.task_manager.finish_video(video_url, bool(result))
 
     async def download_single_video(self, video_url: str):
         """下载单个视频"""
@@ -223,44 +239,45 @@ class BilibiliDownloader:
         
         # 选择最大尺寸的视频
         max_size = -1
-        video_url = ""
+        media_url = ""
         for durl in durl_list:
             size = durl.get("size", 0)
             if size > max_size:
                 max_size = size
-                video_url = durl.get("url")
+                media_url = durl.get("url")
         
-        if not video_url:
+        if not media_url:
             logger.error("未找到视频URL")
             return
         
         logger.info(f"视频大小: {max_size / 1024 / 1024:.2f} MB")
         
-        # 下载视频
+        # 流式下载到文件
         logger.info("开始下载视频...")
-        video_content = await self.bili_client.get_video_media(video_url)
-        
-        if not video_content:
-            logger.error("下载视频内容失败")
+        filepath = self._video_path(bvid, title)
+
+        async def report(downloaded: int, total: Optional[int]):
+            if self.task_manager:
+                await self.task_manager.update_bytes(video_url, downloaded, total or max_size or None)
+
+        try:
+            file_size = await self.bili_client.download_media(media_url, filepath, on_progress=report)
+        except httpx.HTTPError as exc:
+            logger.error(f"下载视频内容失败，已下载部分将在下次续传: {exc}")
             return
         
-        # 保存视频
-        file_path, filename = await self.save_video(
-            bvid=bvid,
-            title=title,
-            content=video_content
-        )
+        logger.info(f"✅ 视频已保存: {filepath}")
         
         return {
             "bv_id": bvid,
             "title": title,
-            "file_path": str(file_path),
-            "file_size": len(video_content),
+            "file_path": str(filepath),
+            "file_size": file_size,
             "quality": video_quality
         }
 
-    async def save_video(self, bvid: str, title: str, content: bytes):
-        """保存视频到本地"""
+    def _video_path(self, bvid: str, title: str) -> pathlib.Path:
+        """视频保存路径"""
         # 创建下载目录
         download_path = self.api_config.get('download_path', 'uploads') if self.api_config else 'uploads'
         download_dir = pathlib.Path(download_path)
@@ -271,12 +288,15 @@ class BilibiliDownloader:
         safe_title = safe_title[:50]  # 限制文件名长度
         
         # 生成文件名
-        filename = f"{safe_title}_{bvid}.mp4"
-        filepath = download_dir / filename
+        return download_dir / f"{safe_title}_{bvid}.mp4"
+
+    async def save_video(self, bvid: str, title: str, content: bytes):
+        """保存视频到本地"""
+        filepath = self._video_path(bvid, title)
         
         # 保存文件
         async with aiofiles.open(filepath, 'wb') as f:
             await f.write(content)
         
         logger.info(f"✅ 视频已保存: {filepath}")
-        return filepath, filename
+        return filepath, filepath.name
@@ -0,0 +1,413 @@
+"""
+网页视频解析、媒体下载和 B 站 API 共用的 HTTP 连接池
+进程内共享一个客户端，每个主机一个独立的连接池：一次页面解析（view、nav、playurl……）复用已建立的
+keep-alive 连接，多连接分段下载也不会占满发往其他主机的 API 请求；主机名解析结果按 TTL 缓存，
+新连接不必每次都走一遍 getaddrinfo
+"""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import os
+import socket
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+WEB_HTTP_MAX_PER_HOST = int(os.getenv("WEB_HTTP_MAX_PER_HOST", "10"))
+WEB_HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("WEB_HTTP_MAX_KEEPALIVE_PER_HOST", "4"))
+WEB_HTTP_KEEPALIVE_SECONDS = float(os.getenv("WEB_HTTP_KEEPALIVE_SECONDS", "60"))
+WEB_HTTP_TIMEOUT_SECONDS = float(os.getenv("WEB_HTTP_TIMEOUT_SECONDS", "30"))
+# 同时保留连接池的主机数，超出后按最久未使用淘汰
+WEB_HTTP_MAX_HOSTS = int(os.getenv("WEB_HTTP_MAX_HOSTS", "32"))
+WEB_DNS_CACHE_SECONDS = float(os.getenv("WEB_DNS_CACHE_SECONDS", "300"))
+
+HostKey = Tuple[str, str, int]
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DnsCache:
+    """getaddrinfo 前的 TTL 缓存：缓存主机的全部地址，已知主机的新连接不再重复解析"""
+
+    def __init__(self, ttl: float = WEB_DNS_CACHE_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[List[str], float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, host: str) -> bool:
+        return self.ttl > 0 and bool(host) and host != "localhost" and not _is_ip_address(host)
+
+    def lookup(self, host: str, port: int) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return list(entry[0])
+        return None
+
+    def resolve(self, host: str, port: int) -> Optional[List[str]]:
+        """
+        阻塞解析，按 getaddrinfo 的顺序返回去重后的地址列表
+        解析失败时返回 None，交给传输层自行解析并报告它原本的错误
+        """
+        try:
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError:
+            return None
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if not addresses:
+            return None
+        with self._lock:
+            self.misses += 1
+            self._entries[(host, port)] = (addresses, time.monotonic() + self.ttl)
+        return list(addresses)
+
+    def forget(self, host: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == host]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"hosts": len(self._entries), "hits": self.hits, "misses": self.misses, "ttl": self.ttl}
+
+
+def _host_key(url: httpx.URL) -> HostKey:
+    port = url.port or (443 if url.scheme == "https" else 80)
+    return (url.scheme, url.host, port)
+
+
+def _pin_request(request: httpx.Request, address: str) -> httpx.Request:
+    """把请求发往解析好的地址；Host 头和 TLS 的 SNI、证书校验仍使用原主机名"""
+    extensions = dict(request.extensions)
+    if request.url.scheme == "https":
+        extensions.setdefault("sni_hostname", request.url.host)
+    return httpx.Request(
+        request.method,
+        request.url.copy_with(host=address),
+        headers=request.headers,
+        stream=request.stream,
+        extensions=extensions,
+    )
+
+
+def _per_host_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=WEB_HTTP_MAX_PER_HOST,
+        max_keepalive_connections=WEB_HTTP_MAX_KEEPALIVE_PER_HOST,
+        keepalive_expiry=WEB_HTTP_KEEPALIVE_SECONDS,
+    )
+
+
+class _PoolEntry:
+    __slots__ = ("transport", "active", "evicted")
+
+    def __init__(self, transport):
+        self.transport = transport
+        # 尚未关闭的响应数（流式下载的响应体读完或关闭后才算结束）
+        self.active = 0
+        self.evicted = False
+
+
+class _HostTransports:
+    """
+    按主机划分的传输层 LRU
+    被淘汰的传输层可能还有下载在读响应体，等它上面的响应全部关闭后再关闭，释放其中的 keep-alive 连接
+    """
+
+    def __init__(self, factory: Callable[[], object], max_hosts: int = WEB_HTTP_MAX_HOSTS):
+        self.factory = factory
+        self.max_hosts = max(1, max_hosts)
+        self._transports: "OrderedDict[HostKey, _PoolEntry]" = OrderedDict()
+        # 已淘汰但仍有响应未关闭的传输层
+        self._evicted: List[_PoolEntry] = []
+        self._lock = threading.Lock()
+
+    def acquire(self, key: HostKey) -> Tuple[_PoolEntry, list]:
+        """
+        取出主机的传输层并记一次使用，用完必须调用 release
+
+        :return: (传输层记录, 因淘汰而可以立即关闭的传输层列表，由调用方关闭)
+        """
+        idle = []
+        with self._lock:
+            entry = self._transports.get(key)
+            if entry is None:
+                entry = _PoolEntry(self.factory())
+                self._transports[key] = entry
+                while len(self._transports) > self.max_hosts:
+                    _, old = self._transports.popitem(last=False)
+                    old.evicted = True
+                    if old.active:
+                        self._evicted.append(old)
+                    else:
+                        idle.append(old.transport)
+            else:
+                self._transports.move_to_end(key)
+            entry.active += 1
+        return entry, idle
+
+    def release(self, entry: _PoolEntry):
+        """结束一次使用；返回已淘汰且不再有响应的传输层，由调用方关闭"""
+        with self._lock:
+            entry.active -= 1
+            if entry.evicted and entry.active == 0 and entry in self._evicted:
+                self._evicted.remove(entry)
+                return entry.transport
+        return None
+
+    def drain(self) -> list:
+        with self._lock:
+            transports = [entry.transport for entry in self._transports.values()]
+            transports += [entry.transport for entry in self._evicted]
+            self._transports.clear()
+            self._evicted.clear()
+            return transports
+
+    def hosts(self) -> list:
+        with self._lock:
+            return [key[1] for key in self._transports]
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """响应体关闭时通知连接池这次使用已结束"""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close:
+                on_close()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close:
+                await on_close()
+
+
+class HostPoolTransport(httpx.BaseTransport):
+    def __init__(self, dns: Optional[DnsCache] = None, max_hosts: int = WEB_HTTP_MAX_HOSTS):
+        self.dns = dns or DnsCache()
+        self.pools = _HostTransports(lambda: httpx.HTTPTransport(limits=_per_host_limits()), max_hosts)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        entry, idle = self.pools.acquire(_host_key(request.url))
+        for transport in idle:
+            transport.close()
+        try:
+            response = self._send(entry.transport, request)
+        except BaseException:
+            self._release(entry)
+            raise
+        if response.is_closed:
+            # 响应体已完整读入内存（如 MockTransport 构造的响应），不会再有关闭通知
+            self._release(entry)
+        else:
+            response.stream = _ReleasingStream(response.stream, lambda: self._release(entry))
+        return response
+
+    def _send(self, transport, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if self.dns.cacheable(host):
+            port = _host_key(request.url)[2]
+            addresses = self.dns.lookup(host, port) or self.dns.resolve(host, port) or []
+            # 按解析顺序逐个尝试，连不上的地址（如没有 IPv6 路由）不影响后面的地址
+            for address in addresses:
+                try:
+                    return transport.handle_request(_pin_request(request, address))
+                except httpx.ConnectError:
+                    continue
+            if addresses:
+                # 缓存的地址可能都已失效，丢掉缓存并走一次正常解析
+                self.dns.forget(host)
+        return transport.handle_request(request)
+
+    def _release(self, entry: _PoolEntry) -> None:
+        transport = self.pools.release(entry)
+        if transport is not None:
+            transport.close()
+
+    def close(self) -> None:
+        for transport in self.pools.drain():
+            transport.close()
+
+
+class AsyncHostPoolTransport(httpx.AsyncBaseTransport):
+    def __init__(self, dns: Optional[DnsCache] = None, max_hosts: int = WEB_HTTP_MAX_HOSTS):
+        self.dns = dns or DnsCache()
+        self.pools = _HostTransports(lambda: httpx.AsyncHTTPTransport(limits=_per_host_limits()), max_hosts)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry, idle = self.pools.acquire(_host_key(request.url))
+        for transport in idle:
+            await transport.aclose()
+        try:
+            response = await self._send(entry.transport, request)
+        except BaseException:
+            await self._release(entry)
+            raise
+        if response.is_closed:
+            await self._release(entry)
+        else:
+            response.stream = _AsyncReleasingStream(response.stream, lambda: self._release(entry))
+        return response
+
+    async def _send(self, transport, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if self.dns.cacheable(host):
+            port = _host_key(request.url)[2]
+            addresses = self.dns.lookup(host, port)
+            if addresses is None:
+                # getaddrinfo 会阻塞，放到线程池里执行
+                addresses = await asyncio.get_running_loop().run_in_executor(None, self.dns.resolve, host, port)
+            for address in addresses or []:
+                try:
+                    return await transport.handle_async_request(_pin_request(request, address))
+                except httpx.ConnectError:
+                    continue
+            if addresses:
+                self.dns.forget(host)
+        return await transport.handle_async_request(request)
+
+    async def _release(self, entry: _PoolEntry) -> None:
+        transport = self.pools.release(entry)
+        if transport is not None:
+            await transport.aclose()
+
+    async def aclose(self) -> None:
+        for transport in self.pools.drain():
+            await transport.aclose()
+
+
+def _stateless_cookies() -> CookieJar:
+    # 调用方通过请求头传入各自用户的 Cookie；共享的 CookieJar 会让 Set-Cookie 串到别的解析请求里
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+def _timeout() -> httpx.Timeout:
+    # 不设连接池等待超时：分段下载会排队等待被长时间占用的连接
+    return httpx.Timeout(WEB_HTTP_TIMEOUT_SECONDS, connect=min(10.0, WEB_HTTP_TIMEOUT_SECONDS), pool=None)
+
+
+_dns_cache = DnsCache()
+_sync_client: Optional[httpx.Client] = None
+_sync_lock = threading.Lock()
+# httpx.AsyncClient 的连接属于创建它的事件循环，按事件循环各建一个
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+def create_web_http_client() -> httpx.Client:
+    return httpx.Client(
+        transport=HostPoolTransport(_dns_cache),
+        timeout=_timeout(),
+        follow_redirects=True,
+        cookies=_stateless_cookies(),
+    )
+
+
+def create_web_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=AsyncHostPoolTransport(_dns_cache),
+        timeout=_timeout(),
+        follow_redirects=True,
+        cookies=_stateless_cookies(),
+    )
+
+
+def web_http_client() -> httpx.Client:
+    """进程共享的同步客户端，可在多个线程间共用"""
+    global _sync_client
+    with _sync_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = create_web_http_client()
+        return _sync_client
+
+
+def web_async_http_client() -> httpx.AsyncClient:
+    """当前事件循环共享的异步客户端，需在使用它的事件循环内调用"""
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = create_web_async_http_client()
+            _async_clients[loop] = client
+        return client
+
+
+def _pooled_hosts(client: Optional[httpx.BaseClient]) -> list:
+    transport = getattr(client, "_transport", None)
+    pools = getattr(transport, "pools", None)
+    return pools.hosts() if pools is not None and not client.is_closed else []
+
+
+def web_http_stats() -> Dict[str, object]:
+    with _sync_lock:
+        sync_hosts = _pooled_hosts(_sync_client)
+    with _async_lock:
+        async_hosts = [_pooled_hosts(client) for client in _async_clients.values()]
+    return {
+        "max_connections_per_host": WEB_HTTP_MAX_PER_HOST,
+        "max_keepalive_per_host": WEB_HTTP_MAX_KEEPALIVE_PER_HOST,
+        "sync_hosts": sync_hosts,
+        "async_hosts": async_hosts,
+        "dns": _dns_cache.stats(),
+    }
+
+
+def close_web_http_clients() -> None:
+    """关闭共享的同步客户端；异步客户端需在各自的事件循环内关闭（见 aclose_web_async_http_client）"""
+    global _sync_client
+    with _sync_lock:
+        client, _sync_client = _sync_client, None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+async def aclose_web_async_http_client() -> None:
+    """关闭当前事件循环的共享异步客户端"""
+    with _async_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
@@ -0,0 +1,52 @@
+"""
+提示词级别的模型响应缓存
+键为 (模型, base_url, system 提示词, user 提示词, temperature) 的哈希；长视频重新生成时，
+分段摘要的提示词不变可直接复用，只有风格相关的最终合并步骤需要重新请求模型
+"""
+import hashlib
+import os
+from typing import Optional
+
+from app.services.media_cache import MEDIA_CACHE_DIR
+from app.utils.file_cache import FileCache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "128"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", str(24 * 30)))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in {"0", "false", "no"}
+
+llm_cache = FileCache(
+    MEDIA_CACHE_DIR / "llm",
+    LLM_CACHE_MAX_MB * 1024 * 1024,
+    ".md",
+    ttl_seconds=LLM_CACHE_TTL_HOURS * 3600 if LLM_CACHE_TTL_HOURS > 0 else None,
+)
+
+
+def llm_cache_key(model: str, base_url: str, system_content: str, prompt: str, temperature: float) -> str:
+    digest = hashlib.sha256()
+    for part in ("llm", model, (base_url or "").rstrip("/"), system_content, prompt, f"{temperature:.3f}"):
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def llm_cache_enabled() -> bool:
+    return LLM_CACHE_ENABLED
+
+
+def load_llm_response(key: str) -> Optional[str]:
+    if not LLM_CACHE_ENABLED:
+        return None
+    return llm_cache.get_text(key)
+
+
+def store_llm_response(key: str, markdown: str) -> None:
+    if not LLM_CACHE_ENABLED or not markdown:
+        return
+    try:
+        llm_cache.set_text(key, markdown)
+    except OSError as exc:
+        logger.warning(f"写入模型响应缓存失败: {exc}")
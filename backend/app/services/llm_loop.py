@@ -0,0 +1,62 @@
+"""
+笔记生成共用的后台事件循环
+所有任务的 LLM 请求都作为协程跑在这一个线程里，等待模型流式输出时不再各占一个线程
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Optional, TypeVar
+
+from app.services.openai_client import aclose_shared_async_http_clients
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def get_llm_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _lock:
+        if _loop is not None and _thread is not None and _thread.is_alive():
+            return _loop
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="llm-event-loop", daemon=True)
+        thread.start()
+        ready.wait()
+        _loop, _thread = loop, thread
+        logger.info("LLM 事件循环已启动")
+        return loop
+
+
+def run_on_llm_loop(coro: Awaitable[T]) -> "Future[T]":
+    """把协程提交到后台事件循环，返回可在任意线程等待的 Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_llm_loop())
+
+
+def stop_llm_loop(timeout: float = 5.0) -> None:
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(aclose_shared_async_http_clients(), loop).result(timeout=timeout)
+    except Exception as exc:
+        logger.warning(f"关闭异步 HTTP 连接池失败: {exc}")
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=timeout)
+    loop.close()
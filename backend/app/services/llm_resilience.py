@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Chat requests for one note chunk are retried here rather than by the SDK, so a
+# stream that breaks halfway is retried as a whole and every attempt is measured.
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "4"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1.0"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30.0"))
+# Consecutive retryable failures before a provider endpoint is skipped for a while.
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "60.0"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+RetryCallback = Callable[[int, float, BaseException], None]
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the provider while its circuit breaker is open."""
+
+    def __init__(self, key: str, retry_in: float):
+        super().__init__(f"AI provider {key} is failing repeatedly; skipped for {retry_in:.0f}s")
+        self.key = key
+        self.retry_in = retry_in
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient provider errors: timeouts, dropped connections and streams, overload and 5xx."""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    # httpx.TransportError covers streams cut off mid-response (RemoteProtocolError, ReadError)
+    return isinstance(exc, (APITimeoutError, APIConnectionError, httpx.TransportError))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = LLM_RETRY_ATTEMPTS
+    base_delay: float = LLM_RETRY_BASE_SECONDS
+    max_delay: float = LLM_RETRY_MAX_SECONDS
+
+    def delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """Exponential backoff with jitter after the given failed attempt; Retry-After wins when sent."""
+        retry_after = retry_after_seconds(exc) if exc is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(cap / 2, cap)
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures; one trial call is let through after `reset_after`."""
+
+    def __init__(self, threshold: int = LLM_BREAKER_FAILURES, reset_after: float = LLM_BREAKER_RESET_SECONDS):
+        self.threshold = max(1, threshold)
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if now - self._opened_at >= self.reset_after else "open"
+
+    def before_call(self, key: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+            retry_in = max(0.0, self.reset_after - (now - self._opened_at))
+        raise CircuitOpenError(key, retry_in)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class CallMetrics:
+    """Per-provider attempt and latency counters for /queue/stats."""
+
+    def __init__(self):
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> dict:
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = {
+                "calls": 0,
+                "failures": 0,
+                "attempts": 0,
+                "retries": 0,
+                "failovers": 0,
+                "rejected": 0,
+                "latency_total": 0.0,
+                "latency_max": 0.0,
+                "latency_last": 0.0,
+            }
+            self._stats[key] = entry
+        return entry
+
+    def record_call(self, key: str, attempts: int, latency: float, ok: bool) -> None:
+        with self._lock:
+            entry = self._entry(key)
+            entry["calls"] += 1
+            entry["attempts"] += attempts
+            entry["retries"] += max(0, attempts - 1)
+            if not ok:
+                entry["failures"] += 1
+            entry["latency_total"] += latency
+            entry["latency_max"] = max(entry["latency_max"], latency)
+            entry["latency_last"] = latency
+
+    def record_failover(self, key: str) -> None:
+        with self._lock:
+            self._entry(key)["failovers"] += 1
+
+    def record_rejected(self, key: str) -> None:
+        with self._lock:
+            self._entry(key)["rejected"] += 1
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            result = {}
+            for key, entry in self._stats.items():
+                item = {name: value for name, value in entry.items() if name != "latency_total"}
+                item["latency_avg"] = round(entry["latency_total"] / entry["calls"], 3) if entry["calls"] else 0.0
+                item["latency_max"] = round(entry["latency_max"], 3)
+                item["latency_last"] = round(entry["latency_last"], 3)
+                item["breaker"] = _breakers[key].state if key in _breakers else "closed"
+                result[key] = item
+            return result
+
+
+llm_metrics = CallMetrics()
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(key: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[key] = breaker
+        return breaker
+
+
+def llm_call_stats() -> Dict[str, dict]:
+    return llm_metrics.stats()
+
+
+def record_failover(key: str) -> None:
+    llm_metrics.record_failover(key)
+
+
+def call_with_retries(
+    key: str,
+    call: Callable[[], T],
+    policy: Optional[RetryPolicy] = None,
+    on_retry: Optional[RetryCallback] = None,
+) -> T:
+    """Run call() behind the provider's circuit breaker, retrying transient errors with backoff."""
+    policy = policy or RetryPolicy()
+    breaker = circuit_breaker(key)
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            breaker.before_call(key)
+        except CircuitOpenError:
+            llm_metrics.record_rejected(key)
+            llm_metrics.record_call(key, attempt - 1, time.monotonic() - started, ok=False)
+            raise
+        try:
+            result = call()
+        except Exception as exc:
+            retryable = is_retryable(exc)
+            if retryable:
+                breaker.record_failure()
+            else:
+                # The provider answered (e.g. a 400 for a too-long prompt), so it is up
+                breaker.record_success()
+            if not retryable or attempt >= policy.attempts:
+                llm_metrics.record_call(key, attempt, time.monotonic() - started, ok=False)
+                raise
+            delay = policy.delay(attempt, exc)
+            logger.warning("LLM call to %s failed (attempt %s/%s): %s; retrying in %.1fs",
+                           key, attempt, policy.attempts, exc, delay)
+            if on_retry:
+                on_retry(attempt, delay, exc)
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        llm_metrics.record_call(key, attempt, time.monotonic() - started, ok=True)
+        return result
+
+
+async def call_with_retries_async(
+    key: str,
+    call: Callable[[], Awaitable[T]],
+    policy: Optional[RetryPolicy] = None,
+    on_retry: Optional[RetryCallback] = None,
+) -> T:
+    """call_with_retries for coroutines; backoff waits on the event loop instead of a thread."""
+    policy = policy or RetryPolicy()
+    breaker = circuit_breaker(key)
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            breaker.before_call(key)
+        except CircuitOpenError:
+            llm_metrics.record_rejected(key)
+            llm_metrics.record_call(key, attempt - 1, time.monotonic() - started, ok=False)
+            raise
+        try:
+            result = await call()
+        except Exception as exc:
+            retryable = is_retryable(exc)
+            if retryable:
+                breaker.record_failure()
+            else:
+                # The provider answered (e.g. a 400 for a too-long prompt), so it is up
+                breaker.record_success()
+            if not retryable or attempt >= policy.attempts:
+                llm_metrics.record_call(key, attempt, time.monotonic() - started, ok=False)
+                raise
+            delay = policy.delay(attempt, exc)
+            logger.warning("LLM call to %s failed (attempt %s/%s): %s; retrying in %.1fs",
+                           key, attempt, policy.attempts, exc, delay)
+            if on_retry:
+                on_retry(attempt, delay, exc)
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        llm_metrics.record_call(key, attempt, time.monotonic() - started, ok=True)
+        return result
+
+
+def should_fail_over(exc: BaseException) -> bool:
+    """Only provider-side outages move a request to a fallback model; prompt or auth errors would fail there too."""
+    return isinstance(exc, CircuitOpenError) or is_retryable(exc)
@@ -0,0 +1,175 @@
+"""
+按媒体内容寻址的转写/笔记缓存
+同一个视频通过 /upload（existing_file_path）或插件重复导入时，task_id 不同但内容相同，
+可以直接复用之前的转写结果和笔记
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.utils.file_cache import FileCache
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
+MEDIA_CACHE_DIR = Path(os.getenv("MEDIA_CACHE_DIR", str(NOTE_OUTPUT_DIR / "cache")))
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "256"))
+NOTE_CACHE_MAX_MB = int(os.getenv("NOTE_CACHE_MAX_MB", "128"))
+
+# 笔记提示词有实质修改时递增，让旧笔记缓存失效
+NOTE_PROMPT_VERSION = "1"
+
+# 指纹对整个文件分块计算 SHA-256；结果按路径 + 大小 + 修改时间记在内存里，同一文件只读一遍
+FINGERPRINT_CHUNK_BYTES = 1024 * 1024
+
+transcript_cache = FileCache(MEDIA_CACHE_DIR / "transcripts", TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024, ".json")
+note_cache = FileCache(MEDIA_CACHE_DIR / "notes", NOTE_CACHE_MAX_MB * 1024 * 1024, ".md")
+
+_fingerprint_lock = threading.Lock()
+_fingerprints: Dict[Tuple[str, int, int], str] = {}
+
+
+def media_fingerprint(path: str) -> str:
+    """整个文件内容的 SHA-256；同一路径未修改时复用上次的结果"""
+    file_path = Path(path)
+    stat = file_path.stat()
+    memo_key = (str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+
+    digest = hashlib.sha256()
+    with file_path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(FINGERPRINT_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprints[memo_key] = fingerprint
+    return fingerprint
+
+
+def _hash_parts(*parts: object) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part if part is not None else "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def transcript_cache_key(media_path: str, transcriber) -> Optional[str]:
+    """媒体指纹 + 影响识别结果的转写配置"""
+    try:
+        fingerprint = media_fingerprint(media_path)
+    except OSError as exc:
+        logger.warning(f"计算媒体指纹失败，跳过转写缓存: {exc}")
+        return None
+    return _hash_parts(
+        "transcript",
+        fingerprint,
+        getattr(transcriber, "model_size", ""),
+        getattr(transcriber, "compute_type", ""),
+    )
+
+
+def transcript_content_hash(transcript: TranscriptResult) -> str:
+    digest = hashlib.sha256()
+    digest.update(str(transcript.language or "").encode("utf-8"))
+    for segment in transcript.segments:
+        digest.update(f"{segment.start:.3f}|{segment.end:.3f}|{segment.text}\n".encode("utf-8"))
+    if not transcript.segments:
+        digest.update(transcript.full_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def note_cache_key(
+    transcript: TranscriptResult,
+    filename: str,
+    model_config: Optional[dict],
+    note_style: str,
+    screenshot: bool,
+) -> str:
+    """转写内容 + 模型 + 风格 + 提示词版本"""
+    config = model_config or {}
+    return _hash_parts(
+        "note",
+        NOTE_PROMPT_VERSION,
+        transcript_content_hash(transcript),
+        filename,
+        config.get("provider_type") or config.get("provider") or "",
+        config.get("base_url") or "",
+        config.get("model") or "",
+        note_style,
+        int(bool(screenshot)),
+    )
+
+
+def transcript_to_dict(transcript: TranscriptResult) -> dict:
+    return {
+        "language": transcript.language,
+        "full_text": transcript.full_text,
+        "segments": [
+            {"start": seg.start, "end": seg.end, "text": seg.text}
+            for seg in transcript.segments
+        ],
+    }
+
+
+def transcript_from_dict(data: dict) -> TranscriptResult:
+    return TranscriptResult(
+        language=data.get("language"),
+        full_text=data.get("full_text", ""),
+        segments=[TranscriptSegment(**seg) for seg in data.get("segments", [])],
+    )
+
+
+def load_cached_transcript(key: Optional[str]) -> Optional[TranscriptResult]:
+    if not key:
+        return None
+    data = transcript_cache.get_json(key)
+    if data is None:
+        return None
+    try:
+        return transcript_from_dict(data)
+    except (TypeError, KeyError) as exc:
+        logger.warning(f"转写缓存格式错误，已忽略: {exc}")
+        transcript_cache.delete(key)
+        return None
+
+
+def store_transcript(key: Optional[str], transcript: TranscriptResult) -> None:
+    if not key:
+        return
+    try:
+        transcript_cache.set_json(key, transcript_to_dict(transcript))
+    except OSError as exc:
+        logger.warning(f"写入转写缓存失败: {exc}")
+
+
+def load_cached_note(key: str) -> Optional[str]:
+    return note_cache.get_text(key)
+
+
+def store_note(key: str, markdown: str) -> None:
+    try:
+        note_cache.set_text(key, markdown)
+    except OSError as exc:
+        logger.warning(f"写入笔记缓存失败: {exc}")
+
+
+def cache_stats() -> dict:
+    return {
+        "transcripts": transcript_cache.stats(),
+        "notes": note_cache.stats(),
+    }
+
+
+def clear_caches() -> dict:
+    return {
+        "transcripts": transcript_cache.clear(),
+        "notes": note_cache.clear(),
+    }
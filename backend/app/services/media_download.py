@@ -0,0 +1,361 @@
+"""
+大文件下载
+stream_to_file：异步流式下载，边下载边按块写入 <目标文件>.part，完成后原子改名为目标文件，内存占用与视频大小无关；
+.part 已存在时用 HTTP Range 从已下载的字节处续传；.part 旁边记录首次响应的 ETag / Last-Modified，
+续传时通过 If-Range 校验服务端文件未变，校验不通过、没有记录或服务端不支持 Range 时从头下载
+download_segmented：把文件按字节范围分成几段，多个连接并行下载，各段用 pwrite 写入预先分配好大小的文件，
+绕开 CDN 对单个连接的限速；服务端不支持 Range 或文件较小时退回单连接流式下载
+"""
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiofiles
+import httpx
+
+from app.services.http_pool import web_http_client
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MEDIA_CHUNK_BYTES = int(os.getenv("MEDIA_CHUNK_BYTES", str(1024 * 1024)))
+# 进度回调的最小间隔，避免每个块都推送一次 WebSocket
+MEDIA_PROGRESS_INTERVAL = float(os.getenv("MEDIA_PROGRESS_INTERVAL", "0.5"))
+# 分段下载的最大并行连接数，以及每段的最小字节数（小文件不值得分段）
+MEDIA_SEGMENTS = int(os.getenv("MEDIA_SEGMENTS", "4"))
+MEDIA_MIN_SEGMENT_BYTES = int(os.getenv("MEDIA_MIN_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+# 单个分段出错后从已写入的位置重试的次数
+MEDIA_SEGMENT_RETRIES = int(os.getenv("MEDIA_SEGMENT_RETRIES", "3"))
+
+# (已下载字节数, 总字节数；未知时为 None)
+ByteProgress = Callable[[int, Optional[int]], Awaitable[None]]
+SyncByteProgress = Callable[[int, Optional[int]], None]
+
+_seek_lock = threading.Lock()
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+
+class DownloadCancelled(RuntimeError):
+    """共享的取消事件被置位（同一任务的另一路下载已失败），本次下载提前停止"""
+
+
+def part_file(dest: Path) -> Path:
+    return dest.with_name(dest.name + ".part")
+
+
+def validator_file(dest: Path) -> Path:
+    """记录 .part 对应服务端版本（ETag 或 Last-Modified）的文件"""
+    return dest.with_name(dest.name + ".part.validator")
+
+
+def response_validator(response: httpx.Response) -> Optional[str]:
+    """可用于 If-Range 的校验值：强 ETag 优先，其次 Last-Modified；弱 ETag 不能用于 Range 校验"""
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("last-modified")
+
+
+def _read_validator(dest: Path) -> Optional[str]:
+    try:
+        return validator_file(dest).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _discard_part(dest: Path) -> None:
+    part_file(dest).unlink(missing_ok=True)
+    validator_file(dest).unlink(missing_ok=True)
+
+
+def parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """解析 Content-Range，返回 (起始字节, 总字节数)"""
+    match = _CONTENT_RANGE.match(value or "")
+    if not match:
+        return None, None
+    start = int(match.group(1)) if match.group(1) is not None else None
+    total = int(match.group(3)) if match.group(3) != "*" else None
+    return start, total
+
+
+async def stream_to_file(
+    client: httpx.AsyncClient,
+    url: str,
+    dest: Path,
+    headers: Optional[Dict[str, str]] = None,
+    on_progress: Optional[ByteProgress] = None,
+    chunk_size: int = MEDIA_CHUNK_BYTES,
+) -> int:
+    """
+    下载 url 到 dest，返回文件大小
+    失败时抛出 httpx.HTTPError，已下载的部分和服务端版本保留在 .part 文件旁供下次续传
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = part_file(dest)
+    offset = part.stat().st_size if part.exists() else 0
+    validator = _read_validator(dest) if offset else None
+    if offset and validator is None:
+        # 不知道 .part 来自服务端的哪个版本，拼接后可能是两个版本的混合，只能从头下载
+        logger.info(f"未记录 .part 的服务端版本，从头下载: {dest.name}")
+        _discard_part(dest)
+        offset = 0
+
+    request_headers = dict(headers or {})
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+        # 服务端文件已变化时 If-Range 不成立，服务端返回完整的 200 响应
+        request_headers["If-Range"] = validator
+
+    async with client.stream("GET", url, headers=request_headers) as response:
+        if offset and response.status_code == 416:
+            # 请求的起点已超出文件末尾：.part 可能已经完整，否则丢弃重下
+            _, total = parse_content_range(response.headers.get("content-range"))
+            if total == offset:
+                os.replace(part, dest)
+                validator_file(dest).unlink(missing_ok=True)
+                logger.info(f"续传文件已完整: {dest.name}")
+                if on_progress:
+                    await on_progress(offset, total)
+                return offset
+            logger.warning(f"续传位置无效，重新下载: {dest.name}")
+            await response.aclose()
+            _discard_part(dest)
+            return await stream_to_file(client, url, dest, headers, on_progress, chunk_size)
+        response.raise_for_status()
+
+        current_validator = response_validator(response)
+        if offset and response.status_code == 206 and current_validator and current_validator != validator:
+            # 服务端忽略了 If-Range 却返回了另一个版本的片段
+            logger.warning(f"服务端文件已变化，重新下载: {dest.name}")
+            await response.aclose()
+            _discard_part(dest)
+            return await stream_to_file(client, url, dest, headers, on_progress, chunk_size)
+
+        total: Optional[int] = None
+        if offset and response.status_code == 206:
+            start, total = parse_content_range(response.headers.get("content-range"))
+            if start != offset:
+                raise httpx.HTTPStatusError(
+                    f"Content-Range 起点 {start} 与续传位置 {offset} 不一致", request=response.request, response=response
+                )
+            logger.info(f"从 {offset} 字节处续传: {dest.name}")
+            mode = "ab"
+        else:
+            if offset:
+                logger.info(f"服务端文件已变化或不支持 Range，从头下载: {dest.name}")
+            offset = 0
+            mode = "wb"
+            content_length = response.headers.get("content-length")
+            total = int(content_length) if content_length and content_length.isdigit() else None
+            if current_validator:
+                validator_file(dest).write_text(current_validator, encoding="utf-8")
+            else:
+                validator_file(dest).unlink(missing_ok=True)
+
+        downloaded = offset
+        last_report = 0.0
+        async with aiofiles.open(part, mode) as f:
+            # 按传输字节写入，Range 偏移和 Content-Length 都以此计算
+            async for chunk in response.aiter_raw(chunk_size):
+                await f.write(chunk)
+                downloaded += len(chunk)
+                now = time.monotonic()
+                if on_progress and now - last_report >= MEDIA_PROGRESS_INTERVAL:
+                    last_report = now
+                    await on_progress(downloaded, total)
+
+    if total is not None and downloaded != total:
+        raise httpx.ReadError(f"下载不完整: {downloaded}/{total} 字节")
+    os.replace(part, dest)
+    validator_file(dest).unlink(missing_ok=True)
+    if on_progress:
+        await on_progress(downloaded, total if total is not None else downloaded)
+    return downloaded
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    if hasattr(os, "pwrite"):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+    # Windows 没有 os.pwrite，定位和写入放在同一把锁里
+    with _seek_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+
+def split_ranges(size: int, segments: int) -> List[Tuple[int, int]]:
+    """把 [0, size) 分成 segments 段，返回闭区间 (start, end) 列表"""
+    segments = max(1, min(segments, size))
+    step = math.ceil(size / segments)
+    return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+
+class _SegmentProgress:
+    def __init__(
+        self,
+        total: Optional[int],
+        on_progress: Optional[SyncByteProgress],
+        failed: Optional[threading.Event] = None,
+    ):
+        self.total = total
+        self.downloaded = 0
+        # 任一分段（或共用该事件的其他下载）失败后通知其余分段尽快停止
+        self.failed = failed or threading.Event()
+        self._on_progress = on_progress
+        self._lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        # 回调也在锁内执行，否则并行分段的回调可能乱序，进度出现倒退
+        with self._lock:
+            self.downloaded += count
+            if self._on_progress:
+                self._on_progress(self.downloaded, self.total)
+
+
+def _probe_range(client: httpx.Client, url: str, headers: Dict[str, str]) -> Optional[int]:
+    """请求第一个字节，服务端支持 Range 时返回文件总大小"""
+    with client.stream("GET", url, headers={**headers, "Range": "bytes=0-0"}) as response:
+        if response.status_code == 416:
+            # 空文件
+            return None
+        response.raise_for_status()
+        if response.status_code != 206:
+            return None
+        start, total = parse_content_range(response.headers.get("content-range"))
+        return total if start == 0 else None
+
+
+def _stream_single(
+    client: httpx.Client,
+    url: str,
+    target_path: Path,
+    headers: Dict[str, str],
+    progress: _SegmentProgress,
+    chunk_size: int,
+) -> None:
+    with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        content_length = response.headers.get("content-length")
+        if progress.total is None and content_length and content_length.isdigit():
+            progress.total = int(content_length)
+        with open(target_path, "wb") as handle:
+            for chunk in response.iter_raw(chunk_size):
+                if progress.failed.is_set():
+                    raise DownloadCancelled(f"下载已取消: {target_path.name}")
+                handle.write(chunk)
+                progress.add(len(chunk))
+
+
+def _fetch_segment(
+    client: httpx.Client,
+    url: str,
+    fd: int,
+    segment: Tuple[int, int],
+    headers: Dict[str, str],
+    progress: _SegmentProgress,
+    chunk_size: int,
+) -> None:
+    start, end = segment
+    offset = start
+    attempt = 0
+    while offset <= end:
+        try:
+            with client.stream("GET", url, headers={**headers, "Range": f"bytes={offset}-{end}"}) as response:
+                response.raise_for_status()
+                range_start, _ = parse_content_range(response.headers.get("content-range"))
+                if response.status_code != 206 or range_start != offset:
+                    raise httpx.HTTPStatusError(
+                        f"分段 {offset}-{end} 未按 Range 返回", request=response.request, response=response
+                    )
+                for chunk in response.iter_raw(chunk_size):
+                    if progress.failed.is_set():
+                        return
+                    chunk = chunk[: end + 1 - offset]
+                    _pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                    progress.add(len(chunk))
+                    if offset > end:
+                        break
+            if offset <= end:
+                raise httpx.ReadError(f"分段 {start}-{end} 提前结束于 {offset}")
+        except httpx.TransportError as exc:
+            attempt += 1
+            if attempt > MEDIA_SEGMENT_RETRIES:
+                raise
+            logger.warning(f"分段 {start}-{end} 下载中断，从 {offset} 重试（{attempt}/{MEDIA_SEGMENT_RETRIES}）: {exc}")
+            time.sleep(min(attempt, 5))
+
+
+def download_segmented(
+    url: str,
+    target_path: Path,
+    headers: Optional[Dict[str, str]] = None,
+    on_progress: Optional[SyncByteProgress] = None,
+    segments: int = MEDIA_SEGMENTS,
+    min_segment_bytes: int = MEDIA_MIN_SEGMENT_BYTES,
+    chunk_size: int = MEDIA_CHUNK_BYTES,
+    client: Optional[httpx.Client] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Path:
+    """
+    多连接分段下载 url 到 target_path（同步，在工作线程中调用），默认使用进程共享的连接池
+    失败时删除不完整的文件并抛出 httpx.HTTPError
+
+    :param cancel: 几路下载共用的取消事件：本次下载失败时置位；被其他下载置位后本次尽快停止并抛出 DownloadCancelled
+    """
+    headers = dict(headers or {})
+    target_path = Path(target_path)
+    client = client or web_http_client()
+    failed = cancel or threading.Event()
+    try:
+        size = _probe_range(client, url, headers) if segments > 1 else None
+        count = min(segments, size // min_segment_bytes) if size else 0
+        progress = _SegmentProgress(size, on_progress, failed)
+        if count < 2:
+            if size is None and segments > 1:
+                logger.info(f"服务端不支持 Range，单连接下载: {target_path.name}")
+            _stream_single(client, url, target_path, headers, progress, chunk_size)
+            return target_path
+
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(target_path, flags, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            ranges = split_ranges(size, count)
+            logger.info(f"分 {len(ranges)} 段并行下载 {size / 1024 / 1024:.1f} MB: {target_path.name}")
+            with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="media-segment") as executor:
+                futures = [
+                    executor.submit(_fetch_segment, client, url, fd, segment, headers, progress, chunk_size)
+                    for segment in ranges
+                ]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    failed.set()
+                    raise
+            if failed.is_set():
+                raise DownloadCancelled(f"下载已取消: {target_path.name}")
+        finally:
+            os.close(fd)
+        return target_path
+    except DownloadCancelled:
+        target_path.unlink(missing_ok=True)
+        raise
+    except BaseException:
+        failed.set()
+        target_path.unlink(missing_ok=True)
+        raise
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import json
+import os
 from typing import Dict, List, Optional
 from urllib.parse import urlsplit, urlunsplit
 
@@ -21,6 +23,19 @@ OPENAI_COMPATIBLE_PROVIDER_TYPES = {
 }
 
 
+# Concurrent chat requests allowed per provider while generating chunked notes.
+# Local runtimes serialize on one GPU; hosted APIs with strict rate limits get less.
+DEFAULT_PROVIDER_CONCURRENCY = 3
+PROVIDER_CONCURRENCY: Dict[str, int] = {
+    "openai": 4,
+    "deepseek": 4,
+    "openrouter": 4,
+    "groq": 2,
+    "gemini": 2,
+    "ollama": 1,
+}
+
+
 BUILTIN_PROVIDER_TYPES: List[Dict[str, str]] = [
     {
         "id": "openai",
@@ -128,6 +143,18 @@ def normalize_provider_type(provider: str = "", provider_type: str = "openai") -
     return provider_type or "openai"
 
 
+def provider_concurrency(provider_type: str) -> int:
+    """NOTE_LLM_CONCURRENCY_<TYPE> overrides one provider, NOTE_LLM_CONCURRENCY overrides all."""
+    for env_name in (f"NOTE_LLM_CONCURRENCY_{(provider_type or '').upper()}", "NOTE_LLM_CONCURRENCY"):
+        value = os.getenv(env_name, "").strip()
+        if value:
+            try:
+                return max(1, int(value))
+            except ValueError:
+                pass
+    return PROVIDER_CONCURRENCY.get(provider_type, DEFAULT_PROVIDER_CONCURRENCY)
+
+
 def default_base_url(provider_type: str) -> str:
     provider_config = next((item for item in BUILTIN_PROVIDER_TYPES if item["id"] == provider_type), None)
     if provider_config:
@@ -170,3 +197,48 @@ def model_item(
         "provider": provider_instance_id or provider_type,
         "provider_type": provider_type,
     }
+
+
+def fallback_model_configs(model_config: Optional[dict] = None) -> List[Dict[str, str]]:
+    """
+    Secondary models tried, in order, when the primary provider keeps failing.
+
+    Entries come from model_config["fallback_models"] (or "fallbackModels"), then from the
+    NOTE_LLM_FALLBACKS environment variable (a JSON list); each has provider/provider_type,
+    base_url, api_key and model. Entries without a model or equal to the primary are dropped.
+    """
+    entries = list((model_config or {}).get("fallback_models") or (model_config or {}).get("fallbackModels") or [])
+    env_value = os.getenv("NOTE_LLM_FALLBACKS", "").strip()
+    if env_value:
+        try:
+            parsed = json.loads(env_value)
+            if isinstance(parsed, list):
+                entries.extend(parsed)
+        except ValueError:
+            pass
+
+    primary = None
+    if model_config:
+        primary_type = normalize_provider_type(model_config.get("provider", ""), model_config.get("provider_type", "openai"))
+        primary = (normalize_base_url(primary_type, model_config.get("base_url")), model_config.get("model", ""))
+
+    configs: List[Dict[str, str]] = []
+    seen = {primary} if primary else set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("model"):
+            continue
+        provider_type = normalize_provider_type(
+            entry.get("provider", ""), entry.get("provider_type", entry.get("providerType", "openai"))
+        )
+        base_url = normalize_base_url(provider_type, entry.get("base_url", entry.get("baseUrl")))
+        identity = (base_url, entry["model"])
+        if identity in seen:
+            continue
+        seen.add(identity)
+        configs.append({
+            "provider_type": provider_type,
+            "base_url": base_url,
+            "api_key": normalize_api_key(provider_type, entry.get("api_key", entry.get("apiKey"))),
+            "model": entry["model"],
+        })
+    return configs
@@ -22,6 +22,7 @@ def save_active_model_config(config: dict) -> dict:
         "base_url": config.get("base_url", config.get("baseUrl", "")),
         "model": config.get("model", ""),
         "note_style": config.get("note_style", config.get("noteStyle", "simple")),
+        "fallback_models": config.get("fallback_models", config.get("fallbackModels", [])),
     }
     _settings_path().write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
     logger.info("Saved active model config for local app bridge")
@@ -1,18 +1,39 @@
-import json
+import asyncio
 import os
 import re
 import subprocess
 from pathlib import Path
 from typing import Optional, List, Tuple
 
-from app.db.video_task_dao import update_task_status
 from app.gpt.openai_gpt import OpenAIGPT
 from app.models.notes_model import NoteResult
-from app.services.model_provider import normalize_api_key, normalize_base_url, normalize_provider_type
+from app.services.media_cache import (
+    load_cached_note,
+    load_cached_transcript,
+    note_cache_key,
+    store_note,
+    store_transcript,
+    transcript_cache,
+    transcript_cache_key,
+    transcript_to_dict,
+)
+from app.services.model_provider import (
+    fallback_model_configs,
+    normalize_api_key,
+    normalize_base_url,
+    normalize_provider_type,
+)
+from app.services.note_job_queue import stage_slot
+from app.services.note_pipeline import note_pipeline
 from app.services.note_progress import clear_note_progress, write_note_progress
+from app.services.summary_checkpoint import SummaryCheckpoint
+from app.services.task_artifacts import load_transcript, save_transcript, transcript_exists
 from app.transcriber.transcriber_provider import get_transcriber
 from app.utils.logger import get_logger
-from app.utils.video_helper import generate_screenshot
+from app.utils.audio_stream import decode_audio_to_array
+from app.utils.frame_select import SCREENSHOT_SMART_SELECT, select_screenshot_frames
+from app.utils.screenshot_markdown import find_screenshot_markers, rewrite_screenshot_markdown
+from app.utils.video_helper import generate_screenshots
 from app.utils.ffmpeg_helper import get_ffmpeg_path, hidden_subprocess_kwargs
 
 logger = get_logger(__name__)
@@ -26,6 +47,9 @@ IMAGE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # 使用相对路径，因为截图和笔记在同一目录下
 IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "/api/note_results/screenshots")
 
+# 音频处理方式：stream 在提取阶段把 ffmpeg 输出的 PCM 解码到内存交给转写阶段，wav 先落地中间文件
+AUDIO_PIPELINE_MODE = os.getenv("AUDIO_PIPELINE_MODE", "stream").strip().lower()
+
 
 class NoteGenerator:
     """笔记生成器"""
@@ -34,6 +58,7 @@ class NoteGenerator:
         self.transcriber = get_transcriber()
         self.gpt = None  # 延迟初始化，避免启动时就需要 API key
         self.model_config = model_config  # 保存模型配置
+        self._media_paths = {}  # task_id -> 原始媒体路径，用于计算内容缓存的指纹
         logger.info("NoteGenerator 初始化完成")
     
     def _get_gpt(self):
@@ -56,7 +81,9 @@ class NoteGenerator:
                     self.gpt = OpenAIGPT(
                         api_key=api_key,
                         base_url=base_url,
-                        model=model
+                        model=model,
+                        provider_type=provider_type,
+                        fallbacks=fallback_model_configs(self.model_config),
                     )
                 else:
                     # 其他提供商使用 OpenAI 兼容接口
@@ -64,12 +91,14 @@ class NoteGenerator:
                     self.gpt = OpenAIGPT(
                         api_key=api_key,
                         base_url=base_url,
-                        model=model
+                        model=model,
+                        provider_type=provider_type,
+                        fallbacks=fallback_model_configs(self.model_config),
                     )
             else:
                 # 使用默认配置
                 logger.warning("未提供模型配置，使用默认配置")
-                self.gpt = OpenAIGPT()
+                self.gpt = OpenAIGPT(fallbacks=fallback_model_configs())
         return self.gpt
     
     def generate(
@@ -89,49 +118,47 @@ class NoteGenerator:
         :param note_style: 笔记风格 (simple, detailed, academic, creative)
         :return: NoteResult 对象
         """
+        # 交给分阶段流水线执行，多个任务的提取、转写、总结可以相互重叠
+        future = note_pipeline.submit(
+            self,
+            video_path=video_path,
+            filename=filename,
+            task_id=task_id,
+            screenshot=screenshot,
+            note_style=note_style,
+        )
         try:
-            logger.info(f"开始生成笔记 (task_id={task_id}, style={note_style})")
-            update_task_status(task_id, "processing")
-            
-            # 1. 提取音频
-            audio_path = self._extract_audio(video_path, task_id)
-            
-            # 2. 转写音频
-            update_task_status(task_id, "transcribing")
-            transcript = self._transcribe_audio(audio_path, task_id)
-            
-            # 3. GPT 生成笔记
-            update_task_status(task_id, "summarizing")
-            markdown = self._summarize_text(transcript, filename, task_id, screenshot, note_style=note_style)
-            
-            # 清理 AI 输出中的思考过程标签（redacted_reasoning）
-            import re
-            markdown = re.sub(r'<think>.*?</think>', '', markdown, flags=re.DOTALL | re.IGNORECASE)
-            markdown = re.sub(r'<think>[\s\S]*?</think>', '', markdown, flags=re.IGNORECASE)
-            # 清理多余的空白行
-            markdown = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown)
-            
-            # 4. 后处理：插入截图
-            if screenshot:
-                markdown = self._insert_screenshots(markdown, video_path)
-            
-            # 5. 保存结果
-            update_task_status(task_id, "completed", markdown)
-            
-            logger.info(f"笔记生成成功 (task_id={task_id})")
-            return NoteResult(
-                markdown=markdown,
-                transcript=transcript,
-                filename=filename
-            )
-            
+            return future.result()
         except Exception as exc:
-            logger.error(f"生成笔记失败 (task_id={task_id}): {exc}", exc_info=True)
-            update_task_status(task_id, "failed", error_message=str(exc))
+            logger.error(f"生成笔记失败 (task_id={task_id}): {exc}")
             raise
     
+    def _finalize_markdown(self, markdown: str, video_path: str, screenshot: bool = False, task_id: str = None) -> str:
+        """清理 AI 输出中的思考过程标签，并按需插入截图"""
+        markdown = re.sub(r'<think>.*?</think>', '', markdown, flags=re.DOTALL | re.IGNORECASE)
+        markdown = re.sub(r'<think>[\s\S]*?</think>', '', markdown, flags=re.IGNORECASE)
+        # 清理多余的空白行
+        markdown = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown)
+        
+        if screenshot:
+            markdown = self._insert_screenshots(markdown, video_path, task_id)
+        return markdown
+    
     def _extract_audio(self, video_path: str, task_id: str) -> str:
         """从视频中提取音频"""
+        self._media_paths[task_id] = str(video_path)
+        if self._has_cached_transcript(video_path, task_id):
+            # 已有转写结果（本任务或相同内容的其他任务），不需要再提取音频
+            logger.info(f"转写缓存命中，跳过音频提取: {video_path}")
+            return str(video_path)
+        if AUDIO_PIPELINE_MODE == "stream":
+            # 流式模式不生成 WAV，转写阶段拿到转写槽位后再解码：
+            # 长视频的 PCM 有数百 MB，提前解码会在等待转写的队列里堆积
+            return str(video_path)
+        return self._extract_audio_wav(video_path, task_id)
+
+    def _extract_audio_wav(self, video_path: str, task_id: str) -> str:
+        """使用 ffmpeg 提取 16kHz 单声道 WAV"""
         logger.info(f"提取音频: {video_path}")
         
         audio_path = NOTE_OUTPUT_DIR / f"{task_id}_audio.wav"
@@ -149,13 +176,14 @@ class NoteGenerator:
                 str(audio_path)
             ]
             
-            result = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True,
-                **hidden_subprocess_kwargs(),
-            )
+            with stage_slot("extract"):
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    **hidden_subprocess_kwargs(),
+                )
             
             logger.info(f"音频提取完成: {audio_path}")
             return str(audio_path)
@@ -167,27 +195,45 @@ class NoteGenerator:
             logger.error(f"音频提取失败: {e}")
             raise
     
+    def _has_cached_transcript(self, media_path: str, task_id: str) -> bool:
+        if transcript_exists(NOTE_OUTPUT_DIR, task_id):
+            return True
+        key = transcript_cache_key(media_path, self.transcriber)
+        return bool(key) and transcript_cache.path_for(key).exists()
+
+    def _write_transcript_file(self, task_id: str, transcript) -> None:
+        save_transcript(NOTE_OUTPUT_DIR, task_id, transcript_to_dict(transcript))
+
     def _transcribe_audio(self, audio_path: str, task_id: str):
         """转录音频"""
         logger.info(f"开始转录: {audio_path}")
         
         # 检查缓存
-        cache_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
-        if cache_file.exists():
-            logger.info(f"使用缓存: {cache_file}")
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                from app.models.transcriber_model import TranscriptResult, TranscriptSegment
-                segments = [TranscriptSegment(**seg) for seg in data['segments']]
-                return TranscriptResult(
-                    language=data['language'],
-                    full_text=data['full_text'],
-                    segments=segments
-                )
+        data = load_transcript(NOTE_OUTPUT_DIR, task_id)
+        if data is not None:
+            logger.info(f"使用转写缓存: {task_id}")
+            from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+            segments = [TranscriptSegment(**seg) for seg in data['segments']]
+            return TranscriptResult(
+                language=data['language'],
+                full_text=data['full_text'],
+                segments=segments
+            )
+        
+        # 按媒体内容查找其他任务留下的转写结果
+        shared_key = transcript_cache_key(self._media_paths.get(task_id, audio_path), self.transcriber)
+        cached = load_cached_transcript(shared_key)
+        if cached is not None:
+            logger.info(f"转写内容缓存命中: task_id={task_id}, key={shared_key[:12]}")
+            self._write_transcript_file(task_id, cached)
+            return cached
         
         # 执行转录
         try:
-            transcript = self.transcriber.transcript(audio_path)
+            with stage_slot("transcribe"):
+                # 在转写槽位内解码，同一时间驻留内存的 PCM 不超过转写并发数
+                audio = self._load_audio_for_transcribe(audio_path, task_id)
+                transcript = self.transcriber.transcript(audio)
         except Exception as exc:
             logger.error(f"转录失败: audio_path={audio_path}, task_id={task_id}, error={exc}", exc_info=True)
             raise
@@ -197,63 +243,123 @@ class NoteGenerator:
             raise RuntimeError("本地语音识别没有识别到有效语音。请确认视频有清晰人声，或在设置里调小模型后重试。")
         
         # 保存缓存
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'language': transcript.language,
-                'full_text': transcript.full_text,
-                'segments': [
-                    {
-                        'start': seg.start,
-                        'end': seg.end,
-                        'text': seg.text
-                    }
-                    for seg in transcript.segments
-                ]
-            }, f, ensure_ascii=False, indent=2)
+        self._write_transcript_file(task_id, transcript)
+        store_transcript(shared_key, transcript)
         
         logger.info("转录完成")
         return transcript
     
-    def _summarize_text(self, transcript, filename: str, task_id: str, screenshot: bool = False, use_cache: bool = True, note_style: str = "simple") -> str:
-        """使用 GPT 生成笔记"""
+    def _load_audio_for_transcribe(self, audio_path: str, task_id: str):
+        """
+        流式模式下把媒体解码为 PCM 数组，调用方需持有转写槽位；
+        WAV 模式直接返回文件路径，解码失败时回退到提取 WAV
+        """
+        if AUDIO_PIPELINE_MODE != "stream" or str(audio_path).lower().endswith(".wav"):
+            return audio_path
+        try:
+            audio = decode_audio_to_array(audio_path)
+            logger.info(f"音频已解码到内存: {audio_path}")
+            return audio
+        except Exception as exc:
+            logger.warning(f"流式解码失败，回退到 WAV 提取: {exc}")
+            return self._extract_audio_wav(audio_path, task_id)
+
+    def _summarize_text(self, transcript, filename: str, task_id: str, screenshot: bool = False, use_cache: bool = True, note_style: str = "simple", refresh: bool = False, bypass_cache: bool = False) -> str:
+        """
+        使用 GPT 生成笔记
+        refresh=True 时忽略笔记内容缓存并重新请求最终笔记，分段摘要仍复用模型响应缓存；
+        bypass_cache=True 时所有提示词都重新请求模型
+        """
         logger.info(f"开始生成笔记... (screenshot={screenshot}, use_cache={use_cache}, style={note_style})")
+        cached, note_key = self._load_summary_cache(
+            transcript, filename, task_id, screenshot, use_cache, note_style, refresh or bypass_cache
+        )
+        if cached is not None:
+            return cached
+        
+        # 调用 GPT（延迟初始化）
+        gpt = self._get_gpt()
+        on_note_progress = self._note_progress_writer(task_id)
+
+        with stage_slot("summarize"):
+            markdown = gpt.summarize(
+                transcript,
+                filename,
+                screenshot,
+                note_style,
+                progress_callback=on_note_progress,
+                refresh=refresh,
+                bypass_cache=bypass_cache,
+                checkpoint=SummaryCheckpoint.for_task(NOTE_OUTPUT_DIR, task_id),
+            )
+        
+        return self._store_summary(markdown, task_id, note_key)
+    
+    async def _summarize_text_async(self, transcript, filename: str, task_id: str, screenshot: bool = False, use_cache: bool = True, note_style: str = "simple", refresh: bool = False, bypass_cache: bool = False) -> str:
+        """
+        _summarize_text 的协程版本，在共享事件循环上等待模型输出，不占用线程
+        并发数由流水线的总结阶段限额控制，这里不再占用 stage_slot
+        """
+        logger.info(f"开始异步生成笔记... (screenshot={screenshot}, use_cache={use_cache}, style={note_style})")
+        cached, note_key = await asyncio.to_thread(
+            self._load_summary_cache, transcript, filename, task_id, screenshot, use_cache, note_style, refresh or bypass_cache
+        )
+        if cached is not None:
+            return cached
         
+        gpt = self._get_gpt()
+        markdown = await gpt.summarize_async(
+            transcript,
+            filename,
+            screenshot,
+            note_style,
+            progress_callback=self._note_progress_writer(task_id),
+            refresh=refresh,
+            bypass_cache=bypass_cache,
+            checkpoint=SummaryCheckpoint.for_task(NOTE_OUTPUT_DIR, task_id),
+        )
+        return await asyncio.to_thread(self._store_summary, markdown, task_id, note_key)
+    
+    def _load_summary_cache(self, transcript, filename: str, task_id: str, screenshot: bool, use_cache: bool, note_style: str, refresh: bool):
+        """返回 (命中的笔记或 None, 笔记内容缓存键)"""
         # 检查缓存（如果允许使用缓存）
         cache_file = NOTE_OUTPUT_DIR / f"{task_id}_markdown.md"
         if use_cache and cache_file.exists():
             # 如果启用了截图但缓存中没有截图标记，强制重新生成
             if screenshot:
                 cached_content = cache_file.read_text(encoding='utf-8')
-                import re
                 pattern = r"\*Screenshot-\[(\d{2}):(\d{2})\]|\*Screenshot-(\d{2}):(\d{2})"
                 if not re.search(pattern, cached_content):
                     logger.info(f"缓存中没有截图标记，强制重新生成 (screenshot={screenshot})")
                     cache_file.unlink()
                 else:
                     logger.info(f"使用缓存: {cache_file}")
-                    return cached_content
+                    return cached_content, None
             else:
                 logger.info(f"使用缓存: {cache_file}")
-                return cache_file.read_text(encoding='utf-8')
+                return cache_file.read_text(encoding='utf-8'), None
+        
+        # 相同转写内容、模型、风格生成过的笔记直接复用
+        note_key = note_cache_key(transcript, filename, self._note_model_identity(), note_style, screenshot)
+        if not refresh:
+            cached_note = load_cached_note(note_key)
+            if cached_note is not None:
+                logger.info(f"笔记内容缓存命中: task_id={task_id}, key={note_key[:12]}")
+                cache_file.write_text(cached_note, encoding='utf-8')
+                return cached_note, note_key
         
-        # 调用 GPT（延迟初始化）
-        gpt = self._get_gpt()
         write_note_progress(NOTE_OUTPUT_DIR, task_id, "正在请求 AI 生成笔记", "")
-
+        return None, note_key
+    
+    def _note_progress_writer(self, task_id: str):
         def on_note_progress(message: str, partial_markdown: str) -> None:
             write_note_progress(NOTE_OUTPUT_DIR, task_id, message, partial_markdown)
 
-        markdown = gpt.summarize(
-            transcript,
-            filename,
-            screenshot,
-            note_style,
-            progress_callback=on_note_progress,
-        )
-        
+        return on_note_progress
+    
+    def _store_summary(self, markdown: str, task_id: str, note_key: str) -> str:
         # 清理 AI 输出中的思考过程标签（redacted_reasoning）
         # 删除所有 <think>...</think> 标签及其内容
-        import re
         markdown = re.sub(r'<think>.*?</think>', '', markdown, flags=re.DOTALL | re.IGNORECASE)
         # 也处理可能的多行格式
         markdown = re.sub(r'<think>[\s\S]*?</think>', '', markdown, flags=re.IGNORECASE)
@@ -261,12 +367,25 @@ class NoteGenerator:
         markdown = re.sub(r'\n\s*\n\s*\n', '\n\n', markdown)
         
         # 保存缓存
+        cache_file = NOTE_OUTPUT_DIR / f"{task_id}_markdown.md"
         cache_file.write_text(markdown, encoding='utf-8')
+        store_note(note_key, markdown)
         clear_note_progress(NOTE_OUTPUT_DIR, task_id)
+        # 笔记已完整生成，分段断点不再需要
+        SummaryCheckpoint.for_task(NOTE_OUTPUT_DIR, task_id).clear()
         
         logger.info("笔记生成完成")
         return markdown
     
+    def _note_model_identity(self) -> dict:
+        """笔记缓存键使用的模型信息；未提供配置时与 OpenAIGPT 的默认值一致"""
+        if self.model_config:
+            return self.model_config
+        return {
+            "base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+            "model": os.getenv("GPT_MODEL", "gpt-4o-mini"),
+        }
+    
     def _insert_screenshots(self, markdown: str, video_path: str, task_id: str = None) -> str:
         """
         扫描 Markdown 文本中所有 Screenshot 标记，并替换为实际生成的截图链接
@@ -276,131 +395,43 @@ class NoteGenerator:
         :param task_id: 任务 ID，用于更新缓存文件
         :return: 替换后的 Markdown 字符串
         """
-        # 先修复旧的图片路径（如果存在），并清理格式问题
-        # 修复所有旧的图片路径
-        markdown = re.sub(
-            r'!\[\]\(/static/screenshots/([^)]+)\)',
-            lambda m: f"![]({IMAGE_BASE_URL.rstrip('/')}/{m.group(1)})",
-            markdown
-        )
-        
+        base_url = IMAGE_BASE_URL.rstrip('/')
         matches = self._extract_screenshot_timestamps(markdown)
-        if not matches:
-            logger.info("未找到截图标记")
-            # 清理可能存在的格式问题（图片后的 * 符号）
-            markdown = re.sub(r'!\[\]\([^)]+\)\*', lambda m: m.group(0).rstrip('*'), markdown)
-            return markdown
-        
-        logger.info(f"找到 {len(matches)} 个截图标记，开始生成截图...")
-        
-        for idx, (marker, timestamp) in enumerate(matches):
-            try:
-                img_path = generate_screenshot(str(video_path), str(IMAGE_OUTPUT_DIR), timestamp, idx)
-                filename = Path(img_path).name
-                # 直接生成正确的 URL（截图在 note_results/screenshots 目录下）
-                img_url = f"{IMAGE_BASE_URL.rstrip('/')}/{filename}"
-                
-                # 智能替换：在标记所在位置插入图片，保持原有结构
-                # 处理带 * 的标记
-                marker_with_star = f"{marker}*"
-                if marker_with_star in markdown:
-                    # 替换带 * 的标记，在标记位置插入图片
-                    markdown = markdown.replace(marker_with_star, f"\n\n![]({img_url})\n\n", 1)
-                else:
-                    # 替换标记：找到标记所在位置，在该位置插入图片
-                    # 如果标记在单独一行，直接替换该行
-                    # 如果标记在行尾，在该行后插入图片
-                    lines = markdown.split('\n')
-                    new_lines = []
-                    replaced = False
-                    
-                    for i, line in enumerate(lines):
-                        if not replaced and marker in line:
-                            # 找到包含标记的行
-                            cleaned_line = line.replace(marker, '').strip()
-                            
-                            if cleaned_line:
-                                # 行中还有其他内容：保留内容，在下一行插入图片
-                                new_lines.append(cleaned_line)
-                                new_lines.append('')  # 空行
-                                new_lines.append(f"![]({img_url})")
-                            else:
-                                # 这行只有标记：直接替换为图片
-                                new_lines.append(f"![]({img_url})")
-                            
-                            # 检查下一行是否是空行或新章节，如果不是则添加空行
-                            if i + 1 < len(lines):
-                                next_line = lines[i + 1].strip()
-                                if next_line and not next_line.startswith('#'):
-                                    new_lines.append('')  # 添加空行分隔
-                            else:
-                                new_lines.append('')  # 文件末尾也添加空行
-                            
-                            replaced = True
-                        else:
-                            new_lines.append(line)
-                    
-                    if not replaced:
-                        # 如果没找到，使用简单替换
-                        markdown = markdown.replace(marker, f"\n\n![]({img_url})\n\n", 1)
-                    else:
-                        markdown = '\n'.join(new_lines)
-                
-                logger.info(f"截图已插入: {img_url} (时间戳: {timestamp}秒)")
-            except Exception as exc:
-                logger.error(f"生成截图失败 (timestamp={timestamp}): {exc}")
-                # 失败时保留原标记
-                continue
-        
-        # 清理多余的换行和格式问题
-        markdown = re.sub(r'\n{4,}', '\n\n\n', markdown)  # 将4个以上连续换行替换为3个（保留章节间的分隔）
-        markdown = re.sub(r'!\[\]\([^)]+\)\*', lambda m: m.group(0).rstrip('*'), markdown)  # 清理图片后的 * 符号
-        
-        # 最后修复所有图片路径（确保都是新路径，包括刚生成的）
-        # 这是关键步骤：修复所有可能的旧路径格式
-        def fix_all_image_paths(text):
-            """修复所有图片路径，确保都使用新路径"""
-            # 1. 修复 /static/screenshots/ 路径
-            text = re.sub(
-                r'!\[\]\(/static/screenshots/([^)]+)\)',
-                lambda m: f"![]({IMAGE_BASE_URL.rstrip('/')}/{m.group(1)})",
-                text
-            )
-            # 2. 修复任何包含 screenshots 但路径不对的图片
-            def fix_path(match):
-                full_path = match.group(1)
-                filename = Path(full_path).name
-                # 如果路径不是新路径，统一修复
-                if '/static/screenshots/' in full_path or not full_path.startswith('/api/note_results/screenshots/'):
-                    return f"![]({IMAGE_BASE_URL.rstrip('/')}/{filename})"
-                return match.group(0)  # 已经是正确路径，不修改
-            
-            text = re.sub(
-                r'!\[\]\((.*?screenshots.*?/([^/)]+))\)',
-                fix_path,
-                text
+        image_urls = {}
+        duplicates = 0
+        if matches:
+            logger.info(f"找到 {len(matches)} 个截图标记，开始生成截图...")
+            timestamps = list(dict.fromkeys(timestamp for _, timestamp in matches))
+            # 在标记附近挑选清晰、稳定的帧，画面与上一张截图重复的标记不再单独截图，直接复用那张图片
+            choices = select_screenshot_frames(str(video_path), timestamps) if SCREENSHOT_SMART_SELECT else {}
+            capture_times = {}
+            for timestamp in timestamps:
+                choice = choices.get(timestamp)
+                if choice is None:
+                    capture_times[timestamp] = timestamp
+                elif choice.duplicate_of is None:
+                    capture_times[timestamp] = choice.time
+            # 所有时间点一次性批量截取，避免每个标记各启动一次 ffmpeg
+            screenshots = generate_screenshots(
+                str(video_path), str(IMAGE_OUTPUT_DIR), list(capture_times.values())
             )
-            return text
-        
-        markdown = fix_all_image_paths(markdown)
+            for timestamp, capture_time in capture_times.items():
+                if capture_time in screenshots:
+                    image_urls[timestamp] = f"{base_url}/{Path(screenshots[capture_time]).name}"
+            for timestamp, choice in choices.items():
+                if choice.duplicate_of in image_urls:
+                    image_urls[timestamp] = image_urls[choice.duplicate_of]
+                    duplicates += 1
+            for marker, timestamp in matches:
+                if timestamp not in image_urls:
+                    # 失败时保留原标记
+                    logger.error(f"生成截图失败，保留标记 {marker} (timestamp={timestamp})")
+        else:
+            logger.info("未找到截图标记")
         
-        # 最终检查：确保所有图片路径都是正确的
-        logger.info(f"最终图片路径检查: IMAGE_BASE_URL={IMAGE_BASE_URL}")
-        old_paths = re.findall(r'!\[\]\(/static/screenshots/[^)]+\)', markdown)
-        if old_paths:
-            logger.warning(f"发现 {len(old_paths)} 个旧路径，正在强制修复...")
-            # 强制修复所有旧路径
-            markdown = re.sub(
-                r'!\[\]\(/static/screenshots/([^)]+)\)',
-                lambda m: f"![]({IMAGE_BASE_URL.rstrip('/')}/{m.group(1)})",
-                markdown
-            )
-            # 再次检查
-            remaining = len(re.findall(r'!\[\]\(/static/screenshots/[^)]+\)', markdown))
-            if remaining == 0:
-                logger.info("✓ 所有旧路径已修复")
-            else:
-                logger.error(f"⚠ 仍有 {remaining} 个旧路径未修复！")
+        # 标记替换、旧图片路径修复和格式清理在一次扫描中完成
+        markdown = rewrite_screenshot_markdown(markdown, image_urls, base_url)
+        logger.info(f"截图已插入: {len(image_urls) - duplicates} 张，复用重复画面 {duplicates} 个")
         
         # 如果提供了 task_id，更新缓存文件
         if task_id:
@@ -418,15 +449,5 @@ class NoteGenerator:
         :param markdown: 原始 Markdown 文本
         :return: 标记与对应时间戳秒数的列表 [(标记文本, 时间戳秒数), ...]
         """
-        # 匹配 *Screenshot-[mm:ss] 或 *Screenshot-mm:ss 格式
-        pattern = r"\*Screenshot-\[(\d{2}):(\d{2})\]|\*Screenshot-(\d{2}):(\d{2})"
-        results: List[Tuple[str, int]] = []
-        for match in re.finditer(pattern, markdown):
-            # group(1) 和 group(2) 是 [mm:ss] 格式，group(3) 和 group(4) 是 mm:ss 格式
-            mm = match.group(1) or match.group(3)
-            ss = match.group(2) or match.group(4)
-            if mm and ss:
-                total_seconds = int(mm) * 60 + int(ss)
-                results.append((match.group(0), total_seconds))
-        return results
+        return find_screenshot_markers(markdown)
 
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from app.db import note_job_dao
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 同时运行的队列任务数量（每个任务一个 worker 线程）
+# 自动生成笔记的任务会交给分阶段流水线，至少 3 个任务同时在途才能让三个阶段重叠
+QUEUE_WORKERS = max(1, int(os.getenv("NOTE_QUEUE_WORKERS", "4")))
+QUEUE_POLL_SECONDS = float(os.getenv("NOTE_QUEUE_POLL_SECONDS", "2"))
+
+# 各阶段的并发上限：ffmpeg 受 I/O 限制，Whisper 受 CPU 限制，LLM 受网络和配额限制
+# 每个阶段同时最多只有 QUEUE_WORKERS 个任务在途，上限超过 worker 数没有意义
+STAGES = ("extract", "transcribe", "summarize")
+
+
+def _stage_limit(name: str, default: str) -> int:
+    return min(QUEUE_WORKERS, max(1, int(os.getenv(name, default))))
+
+
+STAGE_LIMITS = {
+    "extract": _stage_limit("NOTE_STAGE_LIMIT_EXTRACT", "2"),
+    "transcribe": _stage_limit("NOTE_STAGE_LIMIT_TRANSCRIBE", "1"),
+    "summarize": _stage_limit("NOTE_STAGE_LIMIT_SUMMARIZE", "4"),
+}
+
+# 用户在界面上手动确认的步骤优先于插件的批量导入
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BACKGROUND = 0
+
+JobHandler = Callable[[str, dict], None]
+
+
+class _StageLimiter:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+
+    @contextmanager
+    def slot(self):
+        with self._lock:
+            self.waiting += 1
+        self._semaphore.acquire()
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"limit": self.limit, "active": self.active, "waiting": self.waiting}
+
+
+_stage_limiters = {stage: _StageLimiter(limit) for stage, limit in STAGE_LIMITS.items()}
+
+
+@contextmanager
+def stage_slot(stage: str):
+    """占用某个处理阶段的并发名额，超过上限时阻塞等待"""
+    limiter = _stage_limiters.get(stage)
+    if limiter is None:
+        yield
+        return
+    with limiter.slot():
+        yield
+
+
+class NoteJobQueue:
+    """基于 SQLite 的持久化任务队列，使用固定数量的 worker 线程执行"""
+
+    def __init__(self, workers: int = QUEUE_WORKERS, poll_seconds: float = QUEUE_POLL_SECONDS):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._handlers: Dict[str, JobHandler] = {}
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stopping = False
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """注册任务类型的处理函数：handler(job_id, payload)，抛出异常表示任务失败"""
+        self._handlers[kind] = handler
+
+    def start(self, resume: bool = True) -> None:
+        """启动 worker；resume=True 时把上次中断的任务重新放回队列"""
+        with self._lock:
+            if self._started:
+                return
+            note_job_dao.ensure_note_job_table()
+            if resume:
+                resumed = note_job_dao.requeue_interrupted_jobs()
+                if resumed:
+                    logger.info(f"已恢复 {resumed} 个中断的队列任务")
+            self._stopping = False
+            self._threads = [
+                threading.Thread(target=self._worker_loop, name=f"note-job-worker-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._started = True
+            logger.info(f"任务队列已启动: workers={self.workers}, 阶段并发上限={STAGE_LIMITS}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """通知 worker 退出；正在执行的任务会在下次启动时恢复"""
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping = True
+            self._started = False
+            threads = list(self._threads)
+            self._threads = []
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def submit(
+        self,
+        kind: str,
+        payload: dict,
+        task_id: Optional[str] = None,
+        priority: int = PRIORITY_BACKGROUND,
+        job_id: Optional[str] = None,
+    ) -> str:
+        """持久化任务并唤醒 worker，返回队列任务 ID"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown note job kind: {kind}")
+        self.start()
+        job = note_job_dao.create_job(kind, payload, task_id=task_id, priority=priority, job_id=job_id)
+        with self._wakeup:
+            self._wakeup.notify()
+        logger.info(f"任务已入队: {job.job_id} (kind={kind}, task_id={task_id}, priority={priority})")
+        return job.job_id
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self._started,
+            "jobs": note_job_dao.count_jobs_by_status(),
+            "stages": {stage: limiter.snapshot() for stage, limiter in _stage_limiters.items()},
+        }
+
+    def _worker_loop(self) -> None:
+        while not self._stopping:
+            try:
+                job = note_job_dao.claim_next_job(self._handlers.keys())
+            except Exception as exc:
+                logger.error(f"领取队列任务失败: {exc}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=self.poll_seconds)
+                continue
+
+            self._run_job(job)
+
+    def _run_job(self, job) -> None:
+        handler = self._handlers.get(job.kind)
+        try:
+            payload = json.loads(job.payload or "{}")
+            handler(job.job_id, payload)
+        except Exception as exc:
+            logger.error(f"队列任务执行失败: {job.job_id}, 错误: {exc}", exc_info=True)
+            note_job_dao.finish_job(job.job_id, "failed", error_message=str(exc))
+            return
+        note_job_dao.finish_job(job.job_id, "completed")
+
+
+note_job_queue = NoteJobQueue()
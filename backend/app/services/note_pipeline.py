@@ -0,0 +1,308 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.db.video_task_dao import queue_task_status, update_task_status
+from app.models.notes_model import NoteResult
+from app.services.llm_loop import run_on_llm_loop
+from app.services.note_job_queue import STAGE_LIMITS, STAGES
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 总结阶段以协程跑在共享事件循环上：等待模型输出时不占线程，并发仍受 summarize 限额约束
+ASYNC_SUMMARIZE = os.getenv("NOTE_ASYNC_SUMMARIZE", "1").lower() not in {"0", "false", "no"}
+
+
+@dataclass
+class PipelineItem:
+    generator: Any
+    video_path: str
+    filename: str
+    task_id: str
+    screenshot: bool = False
+    note_style: str = "simple"
+    future: Future = field(default_factory=Future)
+    audio_path: Optional[str] = None
+    transcript: Any = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _StageCounters:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def begin(self, waited: float) -> None:
+        with self._lock:
+            self.busy += 1
+            self.wait_seconds += waited
+
+    def end(self, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self.busy -= 1
+            self.busy_seconds += elapsed
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self, queued: int, uptime: float) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "queued": queued,
+                "busy": self.busy,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_seconds": round(self.busy_seconds / finished, 3) if finished else 0.0,
+                "avg_wait_seconds": round(self.wait_seconds / finished, 3) if finished else 0.0,
+                "utilization": round(self.busy_seconds / (uptime * self.workers), 3) if uptime > 0 else 0.0,
+                "per_minute": round(self.completed * 60 / uptime, 3) if uptime > 0 else 0.0,
+            }
+
+
+class NotePipeline:
+    """
+    分阶段流水线：提取音频、转写、生成笔记各有独立的 worker 池和交接队列。
+    第 N 个任务在生成笔记时，第 N+1 个任务可以同时转写，第 N+2 个任务同时提取音频。
+    """
+
+    def __init__(self, stage_workers: Optional[Dict[str, int]] = None, async_summarize: Optional[bool] = None):
+        stage_workers = stage_workers or STAGE_LIMITS
+        self.async_summarize = ASYNC_SUMMARIZE if async_summarize is None else async_summarize
+        self._queues: Dict[str, queue.Queue] = {stage: queue.Queue() for stage in STAGES}
+        self._counters = {stage: _StageCounters(max(1, int(stage_workers.get(stage, 1)))) for stage in STAGES}
+        self._handlers: Dict[str, Callable[[PipelineItem], Any]] = {
+            "extract": self._extract,
+            "transcribe": self._transcribe,
+            "summarize": self._summarize,
+        }
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._summarize_slots: Optional[asyncio.Semaphore] = None
+        self._summarize_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def submit(
+        self,
+        generator,
+        video_path: str,
+        filename: str,
+        task_id: str,
+        screenshot: bool = False,
+        note_style: str = "simple",
+    ) -> Future:
+        """提交一个完整的笔记任务，返回在笔记完成（或失败）时结束的 Future"""
+        self._ensure_started()
+        item = PipelineItem(
+            generator=generator,
+            video_path=video_path,
+            filename=filename,
+            task_id=task_id,
+            screenshot=screenshot,
+            note_style=note_style,
+        )
+        self._queues[STAGES[0]].put(item)
+        return item.future
+
+    def stats(self) -> dict:
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            stage: self._counters[stage].snapshot(self._queues[stage].qsize(), uptime)
+            for stage in STAGES
+        }
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """停止所有 worker；尚未开始的任务会以异常结束"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._started_at = None
+        for stage in STAGES:
+            for _ in range(self._counters[stage].workers):
+                self._queues[stage].put(None)
+        for thread in threads:
+            thread.join(timeout=timeout)
+        for stage in STAGES:
+            while True:
+                try:
+                    item = self._queues[stage].get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and not item.future.done():
+                    item.future.set_exception(RuntimeError("Note pipeline stopped"))
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._started_at = time.monotonic()
+            for stage in STAGES:
+                if stage == "summarize" and self.async_summarize:
+                    # 单个分发线程把任务交给事件循环，worker 数只作为协程并发上限
+                    thread = threading.Thread(
+                        target=self._async_dispatch_loop,
+                        args=(stage,),
+                        name=f"note-pipeline-{stage}-dispatch",
+                        daemon=True,
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+                    continue
+                for index in range(self._counters[stage].workers):
+                    thread = threading.Thread(
+                        target=self._stage_loop,
+                        args=(stage,),
+                        name=f"note-pipeline-{stage}-{index}",
+                        daemon=True,
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+            logger.info(
+                "Note pipeline started: "
+                + ", ".join(f"{stage}={self._counters[stage].workers}" for stage in STAGES)
+            )
+
+    def _stage_loop(self, stage: str) -> None:
+        stage_queue = self._queues[stage]
+        counters = self._counters[stage]
+        handler = self._handlers[stage]
+        next_stage = STAGES[STAGES.index(stage) + 1] if stage != STAGES[-1] else None
+
+        while True:
+            item = stage_queue.get()
+            if item is None:
+                return
+
+            started = time.monotonic()
+            counters.begin(started - item.enqueued_at)
+            result, error = None, None
+            try:
+                result = handler(item)
+            except Exception as exc:
+                error = exc
+                logger.error(f"笔记流水线阶段失败 (stage={stage}, task_id={item.task_id}): {exc}", exc_info=True)
+                try:
+                    update_task_status(item.task_id, "failed", error_message=str(exc))
+                except Exception:
+                    pass
+            self._finish(stage, item, started, result, error, next_stage)
+
+    def _finish(
+        self,
+        stage: str,
+        item: PipelineItem,
+        started: float,
+        result: Any,
+        error: Optional[Exception],
+        next_stage: Optional[str],
+    ) -> None:
+        self._counters[stage].end(time.monotonic() - started, error is None)
+
+        # 先更新计数再结束 Future，调用方拿到结果时统计已是最新
+        if error is not None:
+            item.future.set_exception(error)
+        elif next_stage:
+            item.enqueued_at = time.monotonic()
+            self._queues[next_stage].put(item)
+        else:
+            item.future.set_result(result)
+
+    def _async_dispatch_loop(self, stage: str) -> None:
+        stage_queue = self._queues[stage]
+        while True:
+            item = stage_queue.get()
+            if item is None:
+                return
+            run_on_llm_loop(self._run_async_stage(stage, item))
+
+    async def _run_async_stage(self, stage: str, item: PipelineItem) -> None:
+        loop = asyncio.get_running_loop()
+        if self._summarize_slots is None or self._summarize_slots_loop is not loop:
+            self._summarize_slots = asyncio.Semaphore(self._counters[stage].workers)
+            self._summarize_slots_loop = loop
+
+        async with self._summarize_slots:
+            started = time.monotonic()
+            self._counters[stage].begin(started - item.enqueued_at)
+            result, error = None, None
+            try:
+                result = await self._summarize_async(item)
+            except Exception as exc:
+                error = exc
+                logger.error(f"笔记流水线阶段失败 (stage={stage}, task_id={item.task_id}): {exc}", exc_info=True)
+                try:
+                    await asyncio.to_thread(update_task_status, item.task_id, "failed", error_message=str(exc))
+                except Exception:
+                    pass
+            self._finish(stage, item, started, result, error, None)
+
+    @staticmethod
+    def _extract(item: PipelineItem) -> None:
+        logger.info(f"开始生成笔记 (task_id={item.task_id}, style={item.note_style})")
+        queue_task_status(item.task_id, "processing")
+        item.audio_path = item.generator._extract_audio(item.video_path, item.task_id)
+
+    @staticmethod
+    def _transcribe(item: PipelineItem) -> None:
+        queue_task_status(item.task_id, "transcribing")
+        item.transcript = item.generator._transcribe_audio(item.audio_path, item.task_id)
+
+    @staticmethod
+    def _summarize(item: PipelineItem) -> NoteResult:
+        queue_task_status(item.task_id, "summarizing")
+        generator = item.generator
+        markdown = generator._summarize_text(
+            item.transcript,
+            item.filename,
+            item.task_id,
+            item.screenshot,
+            note_style=item.note_style,
+        )
+        markdown = generator._finalize_markdown(markdown, item.video_path, item.screenshot)
+        update_task_status(item.task_id, "completed", markdown)
+        logger.info(f"笔记生成成功 (task_id={item.task_id})")
+        return NoteResult(markdown=markdown, transcript=item.transcript, filename=item.filename)
+
+    @staticmethod
+    async def _summarize_async(item: PipelineItem) -> NoteResult:
+        # 状态监听器会写文件、抢 StatusWriter 锁，不能在共享的 LLM 事件循环上执行
+        await asyncio.to_thread(queue_task_status, item.task_id, "summarizing")
+        generator = item.generator
+        summarize_async = getattr(generator, "_summarize_text_async", None)
+        if summarize_async is not None:
+            markdown = await summarize_async(
+                item.transcript,
+                item.filename,
+                item.task_id,
+                item.screenshot,
+                note_style=item.note_style,
+            )
+        else:
+            markdown = await asyncio.to_thread(
+                generator._summarize_text,
+                item.transcript,
+                item.filename,
+                item.task_id,
+                item.screenshot,
+                note_style=item.note_style,
+            )
+        # 截图需要调用 ffmpeg，放回线程池执行
+        markdown = await asyncio.to_thread(generator._finalize_markdown, markdown, item.video_path, item.screenshot)
+        await asyncio.to_thread(update_task_status, item.task_id, "completed", markdown)
+        logger.info(f"笔记生成成功 (task_id={item.task_id})")
+        return NoteResult(markdown=markdown, transcript=item.transcript, filename=item.filename)
+
+
+note_pipeline = NotePipeline()
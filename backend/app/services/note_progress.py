@@ -1,32 +1,120 @@
 import json
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+from app.db.video_task_dao import add_status_listener
+from app.services.progress_bus import progress_bus
+from app.utils.blob_store import compress_bytes, decompress_bytes
+
+# 进度文件只作为持久化快照（重启后或其他进程读取）；实时进度走 progress_bus。
+# 快照频繁覆盖写，不适合内容寻址，只用 gzip 压缩后原地替换
+NOTE_PROGRESS_SNAPSHOT = os.getenv("NOTE_PROGRESS_SNAPSHOT", "1").lower() not in {"0", "false", "no"}
+# 同一任务的快照最多每隔这么多秒写一次；并发分段时进度文字几乎每条都在变，只按时间节流
+NOTE_PROGRESS_SNAPSHOT_SECONDS = float(os.getenv("NOTE_PROGRESS_SNAPSHOT_SECONDS", "2.0"))
+# 任务进入这些状态后不再有新进度，清理内存中的进度状态
+TERMINAL_TASK_STATUSES = {"completed", "failed", "transcribed"}
+
+_snapshot_lock = threading.Lock()
+# task_id -> 上次写快照的时间
+_last_snapshots: Dict[str, float] = {}
+# task_id -> 输出目录：节流跳过了最新进度、快照文件落后于内存的任务
+_stale_snapshots: Dict[str, Path] = {}
 
 
 def progress_file(output_dir: Path, task_id: str) -> Path:
+    return output_dir / f"{task_id}_progress.json.gz"
+
+
+def _legacy_progress_file(output_dir: Path, task_id: str) -> Path:
     return output_dir / f"{task_id}_progress.json"
 
 
+def _snapshot_due(output_dir: Path, task_id: str) -> bool:
+    now = time.monotonic()
+    with _snapshot_lock:
+        last = _last_snapshots.get(task_id)
+        if last is not None and now - last < NOTE_PROGRESS_SNAPSHOT_SECONDS:
+            _stale_snapshots[task_id] = output_dir
+            return False
+        _last_snapshots[task_id] = now
+        _stale_snapshots.pop(task_id, None)
+        return True
+
+
 def write_note_progress(output_dir: Path, task_id: str, message: str, partial_markdown: str = "") -> None:
+    progress_bus.publish_progress(task_id, message, partial_markdown)
+    if not NOTE_PROGRESS_SNAPSHOT or not _snapshot_due(output_dir, task_id):
+        return
+    _write_snapshot(output_dir, task_id, message, partial_markdown)
+
+
+def _write_snapshot(output_dir: Path, task_id: str, message: str, partial_markdown: str) -> None:
     path = progress_file(output_dir, task_id)
     payload = {
         "message": message,
         "partial_markdown": partial_markdown or "",
     }
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    temp_path.write_bytes(compress_bytes(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "gzip"))
+    os.replace(temp_path, path)
 
 
 def read_note_progress(output_dir: Path, task_id: str) -> Optional[dict]:
+    snapshot = progress_bus.snapshot(task_id)
+    if snapshot is not None:
+        return {"message": snapshot["message"], "partial_markdown": snapshot["partial_markdown"]}
+
     path = progress_file(output_dir, task_id)
-    if not path.exists():
-        return None
+    legacy = _legacy_progress_file(output_dir, task_id)
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        if path.exists():
+            return json.loads(decompress_bytes(path.read_bytes(), "gzip").decode("utf-8"))
+        if legacy.exists():
+            return json.loads(legacy.read_text(encoding="utf-8"))
     except Exception:
         return None
+    return None
+
+
+def note_progress_version(output_dir: Path, task_id: str) -> str:
+    """进度版本号，用于 ETag：内存中有进度时为发布序号，否则为快照文件的修改时间"""
+    snapshot = progress_bus.snapshot(task_id)
+    if snapshot is not None:
+        return f"s{snapshot['seq']}"
+    try:
+        return f"f{progress_file(output_dir, task_id).stat().st_mtime_ns}"
+    except FileNotFoundError:
+        return "0"
+
+
+def publish_task_status(task_id: str, status: str, error_message: Optional[str] = None) -> None:
+    """
+    任务状态变化时推送给订阅方；进入终态后补写节流时落下的最后一次进度，再释放内存中的进度状态
+    （失败的任务不会走 clear_note_progress，不在这里释放会一直留在内存里）
+    """
+    progress_bus.publish_status(task_id, status, error_message)
+    if status not in TERMINAL_TASK_STATUSES:
+        return
+    with _snapshot_lock:
+        _last_snapshots.pop(task_id, None)
+        stale_dir = _stale_snapshots.pop(task_id, None)
+    snapshot = progress_bus.snapshot(task_id)
+    if stale_dir is not None and snapshot is not None:
+        _write_snapshot(stale_dir, task_id, snapshot["message"], snapshot["partial_markdown"])
+    progress_bus.clear(task_id)
+
+
+add_status_listener(publish_task_status)
 
 
 def clear_note_progress(output_dir: Path, task_id: str) -> None:
-    path = progress_file(output_dir, task_id)
-    if path.exists():
-        path.unlink()
+    progress_bus.clear(task_id)
+    with _snapshot_lock:
+        _last_snapshots.pop(task_id, None)
+        _stale_snapshots.pop(task_id, None)
+    for path in (progress_file(output_dir, task_id), _legacy_progress_file(output_dir, task_id)):
+        if path.exists():
+            path.unlink()
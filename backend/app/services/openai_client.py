@@ -1,25 +1,146 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
 
 import httpx
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+# Connection pools are shared by every client talking to the same provider endpoint
+# with the same key, so a new note task reuses warm keep-alive connections instead
+# of paying DNS + TLS again.
+HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_CLIENT_POOL_SIZE = int(os.getenv("LLM_HTTP_CLIENT_POOL_SIZE", "16"))
+
+PoolKey = Tuple[str, str, float]
+
+
+def http2_available() -> bool:
+    """httpx only speaks HTTP/2 when the optional h2 package is installed."""
+    return os.getenv("LLM_HTTP2", "1").lower() not in {"0", "false", "no"} and (
+        importlib.util.find_spec("h2") is not None
+    )
+
+
+def _http_timeout(timeout: float) -> httpx.Timeout:
+    return httpx.Timeout(
+        timeout,
+        connect=min(30.0, timeout),
+        read=timeout,
+        write=min(60.0, timeout),
+        pool=min(30.0, timeout),
+    )
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
 
 
 def create_openai_http_client(timeout: float = 60.0) -> httpx.Client:
     """Create a version-stable httpx client for OpenAI-compatible providers."""
     return httpx.Client(
-        timeout=httpx.Timeout(
-            timeout,
-            connect=min(30.0, timeout),
-            read=timeout,
-            write=min(60.0, timeout),
-            pool=min(30.0, timeout),
-        ),
+        timeout=_http_timeout(timeout),
+        limits=_http_limits(),
+        http2=http2_available(),
+        trust_env=False,
+    )
+
+
+def create_async_openai_http_client(timeout: float = 60.0) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=_http_timeout(timeout),
+        limits=_http_limits(),
+        http2=http2_available(),
         trust_env=False,
     )
 
 
+class _ClientPool:
+    """LRU of shared http clients keyed by (base_url, api_key, timeout).
+
+    Evicted clients are only dropped from the pool, not closed: OpenAI instances
+    created earlier may still be streaming through them.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._clients: "OrderedDict[PoolKey, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def get(self, key: PoolKey, factory: Callable[[], object]):
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None and not getattr(client, "is_closed", False):
+                self._clients.move_to_end(key)
+                self.reused += 1
+                return client
+            client = factory()
+            self._clients[key] = client
+            self.created += 1
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+            return client
+
+    def drain(self) -> list:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            return clients
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "created": self.created,
+                "reused": self.reused,
+                "endpoints": sorted({key[0] for key in self._clients}),
+            }
+
+
+_sync_pool = _ClientPool(HTTP_CLIENT_POOL_SIZE)
+# httpx.AsyncClient connections belong to the event loop that opened them
+_async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ClientPool]" = weakref.WeakKeyDictionary()
+_async_pools_lock = threading.Lock()
+
+
+def _pool_key(api_key: str, base_url: Optional[str], timeout: float) -> PoolKey:
+    return ((base_url or "").strip(), api_key or "", float(timeout))
+
+
+def shared_http_client(api_key: str, base_url: Optional[str] = None, timeout: float = 60.0) -> httpx.Client:
+    return _sync_pool.get(
+        _pool_key(api_key, base_url, timeout),
+        lambda: create_openai_http_client(timeout=timeout),
+    )
+
+
+def shared_async_http_client(api_key: str, base_url: Optional[str] = None, timeout: float = 60.0) -> httpx.AsyncClient:
+    """Must be called from inside the event loop that will use the client."""
+    loop = asyncio.get_running_loop()
+    with _async_pools_lock:
+        pool = _async_pools.get(loop)
+        if pool is None:
+            pool = _ClientPool(HTTP_CLIENT_POOL_SIZE)
+            _async_pools[loop] = pool
+    return pool.get(
+        _pool_key(api_key, base_url, timeout),
+        lambda: create_async_openai_http_client(timeout=timeout),
+    )
+
+
 def create_openai_client(
     api_key: str,
     base_url: Optional[str] = None,
@@ -28,9 +149,58 @@ def create_openai_client(
 ) -> OpenAI:
     kwargs = {
         "api_key": api_key,
-        "http_client": create_openai_http_client(timeout=timeout),
+        "http_client": shared_http_client(api_key, base_url, timeout=timeout),
         "max_retries": max_retries,
     }
     if base_url:
         kwargs["base_url"] = base_url.strip()
     return OpenAI(**kwargs)
+
+
+def create_async_openai_client(
+    api_key: str,
+    base_url: Optional[str] = None,
+    timeout: float = 60.0,
+    max_retries: int = 2,
+) -> AsyncOpenAI:
+    kwargs = {
+        "api_key": api_key,
+        "http_client": shared_async_http_client(api_key, base_url, timeout=timeout),
+        "max_retries": max_retries,
+    }
+    if base_url:
+        kwargs["base_url"] = base_url.strip()
+    return AsyncOpenAI(**kwargs)
+
+
+def http_pool_stats() -> Dict[str, object]:
+    with _async_pools_lock:
+        async_pools = list(_async_pools.values())
+    return {
+        "http2": http2_available(),
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "sync": _sync_pool.stats(),
+        "async": [pool.stats() for pool in async_pools],
+    }
+
+
+def close_shared_http_clients() -> None:
+    """Close pooled sync clients; async pools are closed by their event loop (see aclose_shared_async_http_clients)."""
+    for client in _sync_pool.drain():
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+async def aclose_shared_async_http_clients() -> None:
+    with _async_pools_lock:
+        pool = _async_pools.pop(asyncio.get_running_loop(), None)
+    if pool is None:
+        return
+    for client in pool.drain():
+        try:
+            await client.aclose()
+        except Exception:
+            pass
@@ -0,0 +1,149 @@
+"""
+进程内的任务进度发布/订阅
+笔记生成线程发布进度，SSE 连接订阅；进度事件只携带与上一次相比变化的部分
+（前缀长度 offset + 新的尾部 text），客户端截断到 offset 后拼接即可，不再每次传整篇笔记
+"""
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def common_prefix_length(old: str, new: str) -> int:
+    """两段文本的公共前缀长度；流式输出大多只在末尾追加，先走快速路径"""
+    if new.startswith(old):
+        return len(old)
+    low, high = 0, min(len(old), len(new))
+    # 二分 + 切片比较，逐字符比较在长笔记上太慢
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+@dataclass
+class _TaskProgress:
+    message: str = ""
+    partial_markdown: str = ""
+    seq: int = 0
+
+
+@dataclass(eq=False)
+class Subscription:
+    task_id: str
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+
+    def _offer(self, event: dict) -> None:
+        if self.queue.full():
+            # 客户端太慢：丢弃积压的增量，让它重新拉一次完整快照
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"type": "resync"}
+        self.queue.put_nowait(event)
+
+    def push(self, event: dict) -> bool:
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+            return True
+        except RuntimeError:
+            # 订阅方的事件循环已关闭
+            return False
+
+
+class ProgressBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, _TaskProgress] = {}
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._published = 0
+
+    def publish_progress(self, task_id: str, message: str, partial_markdown: str = "") -> None:
+        partial_markdown = partial_markdown or ""
+        with self._lock:
+            state = self._states.setdefault(task_id, _TaskProgress())
+            offset = common_prefix_length(state.partial_markdown, partial_markdown)
+            state.message = message
+            state.partial_markdown = partial_markdown
+            state.seq += 1
+            event = {
+                "type": "progress",
+                "seq": state.seq,
+                "message": message,
+                "offset": offset,
+                "text": partial_markdown[offset:],
+            }
+            subscribers = list(self._subscribers.get(task_id, ()))
+        self._dispatch(task_id, subscribers, event)
+
+    def publish_status(self, task_id: str, status: str, error_message: Optional[str] = None) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(task_id, ()))
+        self._dispatch(task_id, subscribers, {"type": "status", "status": status, "error_message": error_message})
+
+    def snapshot(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            state = self._states.get(task_id)
+            if state is None:
+                return None
+            return {"message": state.message, "partial_markdown": state.partial_markdown, "seq": state.seq}
+
+    def snapshot_event(self, task_id: str) -> dict:
+        """订阅开始或需要重新同步时发送的完整快照，offset 为 0"""
+        snapshot = self.snapshot(task_id) or {"message": "", "partial_markdown": "", "seq": 0}
+        return {
+            "type": "progress",
+            "seq": snapshot["seq"],
+            "message": snapshot["message"],
+            "offset": 0,
+            "text": snapshot["partial_markdown"],
+        }
+
+    def clear(self, task_id: str) -> None:
+        with self._lock:
+            self._states.pop(task_id, None)
+
+    def subscribe(self, task_id: str) -> Subscription:
+        """在当前事件循环中订阅任务进度，需在协程内调用"""
+        subscription = Subscription(task_id=task_id, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(task_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.task_id)
+            if not subscribers:
+                return
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.task_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tasks": len(self._states),
+                "subscribers": sum(len(items) for items in self._subscribers.values()),
+                "published": self._published,
+            }
+
+    def _dispatch(self, task_id: str, subscribers: List[Subscription], event: dict) -> None:
+        dead = [subscription for subscription in subscribers if not subscription.push(event)]
+        with self._lock:
+            self._published += 1
+        for subscription in dead:
+            logger.debug(f"移除已关闭的进度订阅: task_id={task_id}")
+            self.unsubscribe(subscription)
+
+
+progress_bus = ProgressBus()
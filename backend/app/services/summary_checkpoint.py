@@ -0,0 +1,82 @@
+"""
+长视频分段摘要的断点
+每段摘要（以及中间摘要的压缩结果）一完成就追加到 <task_id>_chunks.jsonl，键为模型响应缓存同样使用的
+(模型, base_url, 提示词, temperature) 哈希，提示词里包含分段内容。生成中途失败后重试或重新生成时，
+已完成的分段直接取用，从第一个缺失的分段继续；笔记生成成功后删除断点。
+与模型响应缓存不同，断点不会被容量淘汰，也不受 LLM_CACHE_ENABLED 和 bypass_cache 影响
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def checkpoint_file(output_dir: Path, task_id: str) -> Path:
+    return output_dir / f"{task_id}_chunks.jsonl"
+
+
+class SummaryCheckpoint:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def for_task(cls, output_dir: Path, task_id: str) -> "SummaryCheckpoint":
+        return cls(checkpoint_file(output_dir, task_id))
+
+    def _load(self) -> Dict[str, str]:
+        if self._entries is not None:
+            return self._entries
+        entries: Dict[str, str] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        entries[record["key"]] = record["summary"]
+                    except (ValueError, KeyError, TypeError):
+                        # 进程在写入中途退出时最后一行可能不完整，跳过即可
+                        continue
+            if entries:
+                logger.info(f"读取摘要断点: {self.path.name}, 已完成 {len(entries)} 段")
+        self._entries = entries
+        return entries
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._load().get(key)
+
+    def count(self, keys: Iterable[str]) -> int:
+        with self._lock:
+            entries = self._load()
+            return sum(1 for key in keys if key in entries)
+
+    def put(self, key: str, summary: str) -> None:
+        if not summary:
+            return
+        with self._lock:
+            entries = self._load()
+            if entries.get(key) == summary:
+                return
+            entries[key] = summary
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "summary": summary}, ensure_ascii=False) + "\n")
+            except OSError as exc:
+                logger.warning(f"写入摘要断点失败: {exc}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            if self.path.exists():
+                self.path.unlink()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
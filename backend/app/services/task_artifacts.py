@@ -0,0 +1,88 @@
+"""
+任务转写结果的存取
+转写结果压缩存到 blob_store，由任务行的 transcript_blob 引用；没有任务行时（例如单独调用生成器）
+以及升级前生成的任务，仍使用 NOTE_OUTPUT_DIR/<task_id>_transcript.json 文件
+"""
+import json
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db.video_task_dao import get_task_blob_refs, set_task_transcript_blob
+from app.utils.blob_store import blob_store
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def transcript_file(output_dir: Path, task_id: str) -> Path:
+    return output_dir / f"{task_id}_transcript.json"
+
+
+def _transcript_blob(task_id: str) -> Optional[str]:
+    try:
+        refs = get_task_blob_refs(task_id)
+    except SQLAlchemyError as exc:
+        logger.debug(f"读取转写引用失败，使用转写文件: {exc}")
+        return None
+    return refs.get("transcript_blob") if refs else None
+
+
+def save_transcript(output_dir: Path, task_id: str, data: dict) -> None:
+    legacy = transcript_file(output_dir, task_id)
+    try:
+        has_task = get_task_blob_refs(task_id) is not None
+        if has_task:
+            set_task_transcript_blob(task_id, blob_store.put_json(data))
+    except SQLAlchemyError as exc:
+        logger.debug(f"保存转写引用失败，写入转写文件: {exc}")
+        has_task = False
+    if has_task:
+        if legacy.exists():
+            legacy.unlink()
+        return
+    legacy.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def load_transcript(output_dir: Path, task_id: str) -> Optional[dict]:
+    blob_id = _transcript_blob(task_id)
+    if blob_id:
+        data = blob_store.get_json(blob_id)
+        if data is not None:
+            return data
+    legacy = transcript_file(output_dir, task_id)
+    if not legacy.exists():
+        return None
+    with open(legacy, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def transcript_exists(output_dir: Path, task_id: str) -> bool:
+    blob_id = _transcript_blob(task_id)
+    if blob_id and blob_store.exists(blob_id):
+        return True
+    return transcript_file(output_dir, task_id).exists()
+
+
+def transcript_version(output_dir: Path, task_id: str) -> str:
+    """转写内容的版本标识：blob id，或转写文件的修改时间；没有转写结果时为空串"""
+    blob_id = _transcript_blob(task_id)
+    if blob_id:
+        return blob_id
+    legacy = transcript_file(output_dir, task_id)
+    try:
+        return f"f{legacy.stat().st_mtime_ns}"
+    except FileNotFoundError:
+        return ""
+
+
+def delete_transcript(output_dir: Path, task_id: str) -> None:
+    """解除任务对转写 blob 的引用并删除转写文件；blob 本身由启动时的清理回收"""
+    try:
+        set_task_transcript_blob(task_id, None)
+    except SQLAlchemyError:
+        pass
+    legacy = transcript_file(output_dir, task_id)
+    if legacy.exists():
+        legacy.unlink()
@@ -22,13 +22,34 @@ TRANSCRIBER_TYPES = {
 }
 
 
+# 长音频并行转写：按静音切分成若干窗口，由多个进程各自加载模型同时转写
+PARALLEL_WORKERS_RANGE = (1, 64)
+CHUNK_SECONDS_RANGE = (60, 3600)
+
+
+def _bounded_int(value, default: int, bounds: tuple) -> int:
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+    return min(max(number, bounds[0]), bounds[1])
+
+
+def _int_in_range(value, bounds: tuple) -> bool:
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        return False
+    return bounds[0] <= number <= bounds[1]
+
+
 def _settings_path() -> Path:
     path = get_app_data_dir() / "transcriber_config.json"
     path.parent.mkdir(parents=True, exist_ok=True)
     return path
 
 
-def default_transcriber_config() -> Dict[str, str]:
+def default_transcriber_config() -> Dict[str, object]:
     device = os.getenv("WHISPER_DEVICE", "cpu").strip() or "cpu"
     return {
         "type": LOCAL_TRANSCRIBER_ID,
@@ -38,10 +59,12 @@ def default_transcriber_config() -> Dict[str, str]:
             "WHISPER_COMPUTE_TYPE",
             "int8" if device == "cpu" else "float16",
         ).strip(),
+        "parallel_workers": _bounded_int(os.getenv("WHISPER_PARALLEL_WORKERS", "1"), 1, PARALLEL_WORKERS_RANGE),
+        "chunk_seconds": _bounded_int(os.getenv("WHISPER_CHUNK_SECONDS", "600"), 600, CHUNK_SECONDS_RANGE),
     }
 
 
-def normalize_transcriber_config(config: Optional[dict]) -> Dict[str, str]:
+def normalize_transcriber_config(config: Optional[dict]) -> Dict[str, object]:
     """Normalize config to the local faster-whisper path.
 
     Older builds briefly allowed OpenAI-compatible speech APIs. The product
@@ -66,10 +89,20 @@ def normalize_transcriber_config(config: Optional[dict]) -> Dict[str, str]:
     if not normalized["compute_type"]:
         normalized["compute_type"] = defaults["compute_type"]
 
+    normalized["parallel_workers"] = _bounded_int(
+        config.get("parallel_workers", config.get("parallelWorkers")),
+        defaults["parallel_workers"],
+        PARALLEL_WORKERS_RANGE,
+    )
+    normalized["chunk_seconds"] = _bounded_int(
+        config.get("chunk_seconds", config.get("chunkSeconds")),
+        defaults["chunk_seconds"],
+        CHUNK_SECONDS_RANGE,
+    )
     return normalized
 
 
-def load_transcriber_config() -> Dict[str, str]:
+def load_transcriber_config() -> Dict[str, object]:
     path = _settings_path()
     if not path.exists():
         return default_transcriber_config()
@@ -82,7 +115,7 @@ def load_transcriber_config() -> Dict[str, str]:
         return default_transcriber_config()
 
 
-def save_transcriber_config(config: dict) -> Dict[str, str]:
+def save_transcriber_config(config: dict) -> Dict[str, object]:
     current = load_transcriber_config()
     payload = normalize_transcriber_config({**current, **(config or {})})
     _settings_path().write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -102,6 +135,12 @@ def validate_transcriber_config(config: Optional[dict] = None) -> Optional[str]:
         return "设备只能选择 cpu、cuda 或 auto"
     if not raw_compute_type:
         return "请选择计算精度"
+    raw_workers = raw.get("parallel_workers", raw.get("parallelWorkers"))
+    if raw_workers is not None and not _int_in_range(raw_workers, PARALLEL_WORKERS_RANGE):
+        return f"并行转写进程数需在 {PARALLEL_WORKERS_RANGE[0]}-{PARALLEL_WORKERS_RANGE[1]} 之间"
+    raw_chunk = raw.get("chunk_seconds", raw.get("chunkSeconds"))
+    if raw_chunk is not None and not _int_in_range(raw_chunk, CHUNK_SECONDS_RANGE):
+        return f"切分时长需在 {CHUNK_SECONDS_RANGE[0]}-{CHUNK_SECONDS_RANGE[1]} 秒之间"
 
     payload = normalize_transcriber_config(config)
     if not payload.get("model_size"):
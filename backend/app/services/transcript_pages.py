@@ -0,0 +1,127 @@
+"""
+转写结果分页读取
+长视频的转写 JSON 可达数 MB；解析结果按 (路径, 修改时间, 大小) 或 (任务, 转写版本) 缓存，
+分页请求只做二分查找和切片
+"""
+import bisect
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from app.services.task_artifacts import load_transcript, transcript_version
+
+TRANSCRIPT_CACHE_ENTRIES = 8
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 2000
+
+
+class _ParsedTranscript:
+    __slots__ = ("language", "segments", "starts")
+
+    def __init__(self, data: dict):
+        self.language = data.get("language")
+        self.segments: List[dict] = sorted(data.get("segments") or [], key=lambda seg: seg.get("start", 0))
+        self.starts: List[float] = [float(seg.get("start", 0)) for seg in self.segments]
+
+
+_cache: "OrderedDict[Tuple, _ParsedTranscript]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cached(key: Tuple, load: Callable[[], Optional[dict]]) -> Optional[_ParsedTranscript]:
+    with _cache_lock:
+        parsed = _cache.get(key)
+        if parsed is not None:
+            _cache.move_to_end(key)
+            return parsed
+
+    data = load()
+    if data is None:
+        return None
+    parsed = _ParsedTranscript(data)
+    with _cache_lock:
+        _cache[key] = parsed
+        _cache.move_to_end(key)
+        while len(_cache) > TRANSCRIPT_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return parsed
+
+
+def _load(path: Path) -> Optional[_ParsedTranscript]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    return _cached(key, lambda: json.loads(path.read_text(encoding="utf-8")))
+
+
+def _load_task(output_dir: Path, task_id: str) -> Optional[_ParsedTranscript]:
+    version = transcript_version(output_dir, task_id)
+    if not version:
+        return None
+    return _cached(("task", str(output_dir), task_id, version), lambda: load_transcript(output_dir, task_id))
+
+
+def read_transcript_page(
+    path: Path,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Optional[dict]:
+    """
+    读取 [start, end) 时间范围内的一页转写片段
+
+    :param path: 转写 JSON 文件
+    :param start: 起始秒数，片段结束时间晚于它才返回；None 表示从头开始
+    :param end: 结束秒数，片段开始时间早于它才返回；None 表示到结尾
+    :param offset: 在时间范围内跳过的片段数
+    :param limit: 本页最多返回的片段数
+    :return: 分页结果；文件不存在时返回 None
+    """
+    parsed = _load(path)
+    if parsed is None:
+        return None
+    return _page(parsed, start, end, offset, limit)
+
+
+def read_task_transcript_page(
+    output_dir: Path,
+    task_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    offset: int = 0,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Optional[dict]:
+    """同 read_transcript_page，转写结果由 task_artifacts 按任务读取（blob 或转写文件）"""
+    parsed = _load_task(output_dir, task_id)
+    if parsed is None:
+        return None
+    return _page(parsed, start, end, offset, limit)
+
+
+def _page(parsed: _ParsedTranscript, start: Optional[float], end: Optional[float], offset: int, limit: int) -> dict:
+    # 片段按开始时间排序；与 start 重叠的前一个片段也算在范围内
+    first = 0
+    if start is not None:
+        first = max(0, bisect.bisect_right(parsed.starts, start) - 1)
+        if first < len(parsed.segments) and float(parsed.segments[first].get("end", 0)) <= start:
+            first += 1
+    last = len(parsed.segments) if end is None else bisect.bisect_left(parsed.starts, end)
+    last = max(first, last)
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    page_start = min(first + offset, last)
+    page_end = min(page_start + limit, last)
+    return {
+        "language": parsed.language,
+        "total": last - first,
+        "offset": offset,
+        "limit": limit,
+        "segments": parsed.segments[page_start:page_end],
+        "next_offset": offset + (page_end - page_start) if page_end < last else None,
+    }
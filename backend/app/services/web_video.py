@@ -7,15 +7,19 @@ import threading
 import uuid
 import hashlib
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from app.db.video_task_dao import create_task, get_task_by_id, update_task_status
+from app.services.http_pool import web_http_client
+from app.services.media_download import DownloadCancelled, download_segmented
 from app.services.model_settings import load_active_model_config
 from app.services.note import NoteGenerator
+from app.services.note_job_queue import PRIORITY_BACKGROUND, note_job_queue
 from app.services.note_progress import read_note_progress
 from app.utils.ffmpeg_helper import get_ffmpeg_path
 from app.utils.logger import get_logger
@@ -24,6 +28,8 @@ logger = get_logger(__name__)
 
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
 NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
+# 解析 B 站清晰度时并行请求 playurl 的最大数量
+BILIBILI_PLAYURL_CONCURRENCY = int(os.getenv("BILIBILI_PLAYURL_CONCURRENCY", "4"))
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 NOTE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -90,8 +96,8 @@ class WebVideoJobManager:
     jobs: Dict[str, WebVideoJob] = field(default_factory=dict)
     lock: threading.Lock = field(default_factory=threading.Lock)
 
-    def create(self, page_url: str) -> WebVideoJob:
-        job = WebVideoJob(job_id=str(uuid.uuid4()), page_url=page_url)
+    def create(self, page_url: str, job_id: Optional[str] = None) -> WebVideoJob:
+        job = WebVideoJob(job_id=job_id or str(uuid.uuid4()), page_url=page_url)
         with self.lock:
             self.jobs[job.job_id] = job
         return job
@@ -745,13 +751,11 @@ def _douyin_web_api_candidates(page_url: str, page_title: str = "", headers: Opt
     if not aweme_id:
         return []
 
-    import requests
-
     request_headers = _douyin_headers(headers, referer=page_url)
     cookie_header = _cookie_header_from_details(cookie, cookie_details)
     if cookie_header:
         request_headers["Cookie"] = cookie_header
-    response = requests.get(
+    response = web_http_client().get(
         "https://www.douyin.com/aweme/v1/web/aweme/detail/",
         params={"aweme_id": aweme_id},
         headers=request_headers,
@@ -969,9 +973,7 @@ def _bilibili_api_candidates(page_url: str, page_title: str = "", headers: Optio
     if not bvid or "SESSDATA" not in _cookie_names(cookie, cookie_details):
         return []
 
-    import requests
-
-    session = requests.Session()
+    session = web_http_client()
     request_headers = _bilibili_headers(headers, referer=page_url)
     cookie_header = _cookie_header_from_details(cookie, cookie_details)
     if cookie_header:
@@ -1025,20 +1027,31 @@ def _bilibili_api_candidates(page_url: str, page_title: str = "", headers: Optio
             raise RuntimeError(f"Bilibili playurl API failed: {play_data.get('code')} {play_data.get('message')}")
         return play_data.get("data") or {}
 
-    play_infos = [request_playinfo()]
-    existing_qualities = {video.get("id") for video in (play_infos[0].get("dash", {}).get("video") or [])}
-    for quality in play_infos[0].get("accept_quality") or []:
-        if quality in existing_qualities:
-            continue
-        try:
-            quality_play_info = request_playinfo({"qn": quality})
-        except Exception as exc:
-            logger.warning("Bilibili playurl qn=%s failed: %s", quality, exc)
-            continue
-        play_infos.append(quality_play_info)
-        existing_qualities.update(video.get("id") for video in (quality_play_info.get("dash", {}).get("video") or []))
+    # 第一次响应作为合并基准，其余清晰度并行请求，先返回的先合并
+    play_info = request_playinfo()
+    existing_qualities = {video.get("id") for video in (play_info.get("dash", {}).get("video") or [])}
+    missing_qualities = [quality for quality in play_info.get("accept_quality") or [] if quality not in existing_qualities]
+    if missing_qualities:
+        workers = max(1, min(BILIBILI_PLAYURL_CONCURRENCY, len(missing_qualities)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bili-playurl") as executor:
+            futures = {executor.submit(request_playinfo, {"qn": quality}): quality for quality in missing_qualities}
+            for future in as_completed(futures):
+                quality = futures[future]
+                if future.cancelled():
+                    # 该清晰度已由其他响应带回，请求被取消，不算失败
+                    continue
+                try:
+                    quality_play_info = future.result()
+                except Exception as exc:
+                    logger.warning("Bilibili playurl qn=%s failed: %s", quality, exc)
+                    continue
+                play_info = _merge_bilibili_playinfos([play_info, quality_play_info])
+                existing_qualities.update(video.get("id") for video in (quality_play_info.get("dash", {}).get("video") or []))
+                # 已由其他响应带回的清晰度不必再请求
+                for pending, pending_quality in futures.items():
+                    if pending_quality in existing_qualities:
+                        pending.cancel()
 
-    play_info = _merge_bilibili_playinfos(play_infos)
     formats = _bilibili_playinfo_formats(play_info)
     if diagnostics is not None:
         diagnostics["bilibiliApiAcceptQuality"] = play_info.get("accept_quality") or []
@@ -1324,11 +1337,25 @@ def resolve_web_video(page_url: str, page_title: str = "", detected_streams: Opt
 def start_import_job(payload: Dict[str, Any]) -> WebVideoJob:
     page_url = payload.get("pageUrl") or payload.get("page_url") or ""
     job = job_manager.create(page_url=page_url)
-    thread = threading.Thread(target=_run_import_job, args=(job.job_id, payload), daemon=True)
-    thread.start()
+    job_manager.update(job.job_id, message="Waiting in AInote queue")
+    note_job_queue.submit("web_import", payload, priority=PRIORITY_BACKGROUND, job_id=job.job_id)
     return job
 
 
+def _run_queued_import_job(job_id: str, payload: Dict[str, Any]) -> None:
+    # 进程重启后内存中的插件任务已丢失，按队列任务 ID 重新登记以便插件继续轮询
+    if not job_manager.get(job_id):
+        job_manager.create(page_url=payload.get("pageUrl") or payload.get("page_url") or "", job_id=job_id)
+    _run_import_job(job_id, payload)
+    # _run_import_job 自己处理异常，失败时抛出让队列任务也记录为失败
+    job = job_manager.get(job_id)
+    if job and job.status == "failed":
+        raise RuntimeError(job.error or "Import failed")
+
+
+note_job_queue.register("web_import", _run_queued_import_job)
+
+
 def _choose_download_url(payload: Dict[str, Any]) -> str:
     candidate_url = payload.get("candidateUrl") or payload.get("candidate_url")
     if candidate_url and not str(candidate_url).startswith("blob:"):
@@ -1404,29 +1431,22 @@ def _download_with_ytdlp(job_id: str, payload: Dict[str, Any]) -> Path:
 
 
 def _download_direct_url(url: str, target_path: Path, headers: Dict[str, str], job_id: str,
-                         label: str = "Downloading media track") -> Path:
-    import requests
-
+                         label: str = "Downloading media track",
+                         on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                         cancel: Optional[threading.Event] = None) -> Path:
     job_manager.update(job_id, status="downloading", progress=8, message=label)
-    with requests.get(url, headers=headers, stream=True, timeout=30) as response:
-        response.raise_for_status()
-        total = int(response.headers.get("content-length") or 0)
-        downloaded = 0
-        with target_path.open("wb") as handle:
-            for chunk in response.iter_content(chunk_size=1024 * 512):
-                if not chunk:
-                    continue
-                handle.write(chunk)
-                downloaded += len(chunk)
-                if total:
-                    progress = 8 + int(downloaded * 35 / total)
-                    job_manager.update(
-                        job_id,
-                        status="downloading",
-                        progress=max(8, min(progress, 45)),
-                        message=label,
-                    )
-    return target_path
+
+    def report(downloaded: int, total: Optional[int]) -> None:
+        if total:
+            progress = 8 + int(downloaded * 35 / total)
+            job_manager.update(
+                job_id,
+                status="downloading",
+                progress=max(8, min(progress, 45)),
+                message=label,
+            )
+
+    return download_segmented(url, target_path, headers, on_progress=on_progress or report, cancel=cancel)
 
 
 def _download_selected_direct_media(job_id: str, payload: Dict[str, Any], suffix: str = ".mp4") -> Path:
@@ -1507,10 +1527,48 @@ def _download_bilibili_playinfo(job_id: str, payload: Dict[str, Any]) -> Path:
     video_path = UPLOAD_DIR / f"{job_prefix}.video.m4s"
     audio_path = UPLOAD_DIR / f"{job_prefix}.audio.m4s"
     output_path = UPLOAD_DIR / f"{job_prefix}.mp4"
+    # 视频和音频轨道同时下载，进度按两条轨道的字节数合计
+    track_bytes: Dict[str, tuple] = {}
+    progress_lock = threading.Lock()
+    # 一条轨道失败后另一条立即停止，不再白白下载完
+    cancel = threading.Event()
+
+    def track_progress(track: str):
+        def report(downloaded: int, total: Optional[int]) -> None:
+            # 两条轨道并发回调，更新任务进度也放在锁内，避免进度倒退
+            with progress_lock:
+                track_bytes[track] = (downloaded, total or 0)
+                done = sum(item[0] for item in track_bytes.values())
+                size = sum(item[1] for item in track_bytes.values())
+                if size and len(track_bytes) == 2:
+                    job_manager.update(
+                        job_id,
+                        status="downloading",
+                        progress=max(8, min(8 + int(done * 72 / size), 80)),
+                        message="Downloading Bilibili video and audio tracks",
+                    )
+        return report
+
     try:
-        _download_direct_url(video_url, video_path, headers, job_id, "Downloading selected Bilibili video track")
-        job_manager.update(job_id, status="downloading", progress=50, message="Downloading Bilibili audio track")
-        _download_direct_url(audio_url, audio_path, headers, job_id, "Downloading Bilibili audio track")
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="bili-track") as executor:
+            tracks = [
+                executor.submit(_download_direct_url, video_url, video_path, headers, job_id,
+                                "Downloading selected Bilibili video track", on_progress=track_progress("video"),
+                                cancel=cancel),
+                executor.submit(_download_direct_url, audio_url, audio_path, headers, job_id,
+                                "Downloading Bilibili audio track", on_progress=track_progress("audio"),
+                                cancel=cancel),
+            ]
+            errors = []
+            for track in as_completed(tracks):
+                try:
+                    track.result()
+                except Exception as exc:
+                    cancel.set()
+                    errors.append(exc)
+            if errors:
+                # 抛出真正的失败原因，而不是另一条轨道被连带取消的 DownloadCancelled
+                raise next((exc for exc in errors if not isinstance(exc, DownloadCancelled)), errors[0])
         return _merge_video_audio(video_path, audio_path, output_path, job_id)
     finally:
         for path in (video_path, audio_path):
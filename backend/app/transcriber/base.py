@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import Union
+
+import numpy as np
+
 from app.models.transcriber_model import TranscriptResult
 
 
@@ -6,11 +10,11 @@ class Transcriber(ABC):
     """转录器基类"""
     
     @abstractmethod
-    def transcript(self, file_path: str) -> TranscriptResult:
+    def transcript(self, file_path: Union[str, np.ndarray]) -> TranscriptResult:
         """
         转录音频文件
         
-        :param file_path: 音频文件路径
+        :param file_path: 音频文件路径，或 16kHz 单声道 float32 PCM 数组
         :return: TranscriptResult 对象
         """
         pass
@@ -1,7 +1,13 @@
 import os
-from faster_whisper import WhisperModel
+from typing import Optional, Union
+
+import numpy as np
+
 from app.transcriber.base import Transcriber
+from app.transcriber.model_pool import whisper_model_pool
+from app.transcriber.parallel import transcribe_parallel
 from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.utils.audio_stream import decode_audio_to_array
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -10,72 +16,75 @@ logger = get_logger(__name__)
 class FastWhisperTranscriber(Transcriber):
     """使用 faster-whisper 进行音频转录"""
     
-    def __init__(self, model_size: str = "base", device: str = "cpu", compute_type: str = None):
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: str = "cpu",
+        compute_type: str = None,
+        parallel_workers: int = 1,
+        chunk_seconds: int = 600,
+    ):
         """
         初始化转录器
         
         :param model_size: 模型大小 (tiny, base, small, medium, large)
         :param device: 设备 (cpu, cuda)
+        :param parallel_workers: 长音频并行转写的进程数，1 表示不并行
+        :param chunk_seconds: 并行转写时每个窗口的目标时长（秒）
         """
         self.model_size = model_size
         self.device = device
+        self.parallel_workers = max(1, int(parallel_workers or 1))
+        self.chunk_seconds = chunk_seconds
         self.compute_type = compute_type or os.getenv(
             "WHISPER_COMPUTE_TYPE",
             "int8" if device == "cpu" else "float16",
         )
-        self._model = None
         logger.info(
             f"配置 FastWhisper 转录器: model_size={model_size}, device={device}, compute_type={self.compute_type}"
         )
     
-    @property
-    def model(self):
-        if self._model is None:
-            logger.info(
-                f"正在加载 FastWhisper 模型: {self.model_size} (device={self.device}, compute_type={self.compute_type})..."
-            )
-            self._model = WhisperModel(
-                self.model_size,
-                device=self.device,
-                compute_type=self.compute_type,
-            )
-            logger.info("FastWhisper 模型加载完成")
-        return self._model
+    def transcript(self, file_path: Union[str, np.ndarray]) -> TranscriptResult:
+        """转录音频文件或内存中的 PCM 数组"""
+        source = self._describe_source(file_path)
+        logger.info(f"开始转录: {source}")
 
-    def transcript(self, file_path: str) -> TranscriptResult:
-        """转录音频文件"""
-        logger.info(f"开始转录: {file_path}")
+        parallel_result = self._transcribe_parallel(file_path)
+        if parallel_result is not None:
+            return parallel_result
 
         try:
-            segments, info = self.model.transcribe(
-                file_path,
-                beam_size=5,
-                language=None,  # 自动检测语言
-                vad_filter=True,  # 启用语音活动检测
-            )
+            # 转写期间持有模型引用，避免被模型池淘汰
+            with whisper_model_pool.lease(self.model_size, self.device, self.compute_type) as model:
+                segments, info = model.transcribe(
+                    file_path,
+                    beam_size=5,
+                    language=None,  # 自动检测语言
+                    vad_filter=True,  # 启用语音活动检测
+                )
 
-            # 提取语言
-            language = info.language
-            logger.info(
-                f"FastWhisper 已识别语言: {language}, 音频时长={getattr(info, 'duration', 0):.2f}s"
-            )
+                # 提取语言
+                language = info.language
+                logger.info(
+                    f"FastWhisper 已识别语言: {language}, 音频时长={getattr(info, 'duration', 0):.2f}s"
+                )
 
-            # 处理分段
-            transcript_segments = []
-            full_text_parts = []
-
-            for segment in segments:
-                text = segment.text.strip()
-                if not text:
-                    continue
-                transcript_segments.append(
-                    TranscriptSegment(
-                        start=segment.start,
-                        end=segment.end,
-                        text=text,
+                # 处理分段（segments 是惰性生成器，需要在持有模型时迭代完）
+                transcript_segments = []
+                full_text_parts = []
+
+                for segment in segments:
+                    text = segment.text.strip()
+                    if not text:
+                        continue
+                    transcript_segments.append(
+                        TranscriptSegment(
+                            start=segment.start,
+                            end=segment.end,
+                            text=text,
+                        )
                     )
-                )
-                full_text_parts.append(text)
+                    full_text_parts.append(text)
 
             full_text = " ".join(full_text_parts)
 
@@ -87,9 +96,41 @@ class FastWhisperTranscriber(Transcriber):
                 segments=transcript_segments,
             )
         except Exception as exc:
-            logger.error(f"FastWhisper 转录失败: {file_path}, 错误: {exc}", exc_info=True)
+            logger.error(f"FastWhisper 转录失败: {source}, 错误: {exc}", exc_info=True)
             raise RuntimeError(self._friendly_error(exc)) from exc
 
+    def _transcribe_parallel(self, audio: Union[str, np.ndarray]) -> Optional[TranscriptResult]:
+        """多进程转写长音频；未启用、音频太短或失败时返回 None，走单模型路径"""
+        # GPU 上多进程各自加载模型只会争抢显存，只在 CPU 上并行
+        if self.parallel_workers < 2 or self.device == "cuda":
+            return None
+        try:
+            if not isinstance(audio, np.ndarray):
+                audio = decode_audio_to_array(audio)
+            if len(audio) < self.chunk_seconds * 16000 * 1.5:
+                return None
+            result = transcribe_parallel(
+                audio,
+                model_size=self.model_size,
+                device="cpu",
+                compute_type=self.compute_type,
+                workers=self.parallel_workers,
+                chunk_seconds=self.chunk_seconds,
+            )
+        except Exception as exc:
+            # 进程池损坏时 transcribe_parallel 已将其丢弃，其他任务仍在用的进程池不受影响
+            logger.warning(f"并行转写失败，改用单模型转写: {exc}", exc_info=True)
+            return None
+        if result is not None:
+            logger.info(f"并行转写完成: 语言={result.language}, 分段数={len(result.segments)}")
+        return result
+
+    @staticmethod
+    def _describe_source(audio: Union[str, np.ndarray]) -> str:
+        if isinstance(audio, np.ndarray):
+            return f"<PCM {len(audio) / 16000:.2f}s>"
+        return str(audio)
+
     def _friendly_error(self, exc: Exception) -> str:
         message = str(exc)
         lower_message = message.lower()
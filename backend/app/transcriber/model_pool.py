@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 同时常驻内存的 Whisper 模型数量上限（不同 model_size/device/compute_type 各算一个）
+WHISPER_MAX_RESIDENT_MODELS = max(1, int(os.getenv("WHISPER_MAX_RESIDENT_MODELS", "1")))
+
+ModelKey = Tuple[str, str, str]
+
+
+def _process_rss_bytes() -> Optional[int]:
+    """读取当前进程常驻内存，用于估算模型占用；平台不支持时返回 None"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as handle:
+            resident_pages = int(handle.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def _load_whisper_model(model_size: str, device: str, compute_type: str):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+
+@dataclass
+class _PooledModel:
+    key: ModelKey
+    model: object = None
+    refs: int = 0
+    loaded_at: float = 0.0
+    last_used: float = 0.0
+    load_seconds: float = 0.0
+    memory_bytes: Optional[int] = None
+    uses: int = 0
+    load_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class WhisperModelPool:
+    """
+    进程内共享的 faster-whisper 模型池。
+    按 (model_size, device, compute_type) 缓存模型，使用引用计数防止正在转写的模型被释放，
+    超出常驻上限时按最近最少使用的顺序淘汰空闲模型。
+    """
+
+    def __init__(
+        self,
+        max_resident: int = WHISPER_MAX_RESIDENT_MODELS,
+        loader: Callable[[str, str, str], object] = _load_whisper_model,
+    ):
+        self.max_resident = max(1, max_resident)
+        self._loader = loader
+        self._entries: "OrderedDict[ModelKey, _PooledModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def acquire(self, model_size: str, device: str, compute_type: str):
+        """获取模型并增加引用计数，用完必须调用 release"""
+        key = (model_size, device, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _PooledModel(key=key)
+                self._entries[key] = entry
+            entry.refs += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(key)
+
+        try:
+            with entry.load_lock:
+                if entry.model is None:
+                    self._load(entry)
+                else:
+                    with self._lock:
+                        self.hits += 1
+        except Exception:
+            with self._lock:
+                entry.refs -= 1
+                if entry.model is None and entry.refs == 0 and self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+
+        with self._lock:
+            entry.uses += 1
+            self._evict_idle_locked()
+        return entry.model
+
+    def release(self, model_size: str, device: str, compute_type: str) -> None:
+        key = (model_size, device, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            entry.last_used = time.time()
+            self._evict_idle_locked()
+
+    @contextmanager
+    def lease(self, model_size: str, device: str, compute_type: str):
+        """with 语句形式的 acquire/release"""
+        model = self.acquire(model_size, device, compute_type)
+        try:
+            yield model
+        finally:
+            self.release(model_size, device, compute_type)
+
+    def warmup(self, model_size: str, device: str, compute_type: str) -> None:
+        """预先加载模型，首个转写任务不必等待加载"""
+        started = time.time()
+        with self.lease(model_size, device, compute_type):
+            pass
+        logger.info(
+            f"Whisper 模型预热完成: {model_size} (device={device}, compute_type={compute_type}), "
+            f"耗时 {time.time() - started:.2f}s"
+        )
+
+    def unload_idle(self) -> int:
+        """释放所有未被使用的模型，返回释放数量"""
+        with self._lock:
+            idle = [key for key, entry in self._entries.items() if entry.refs == 0 and entry.model is not None]
+            for key in idle:
+                self._drop_locked(key)
+            return len(idle)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            models: List[Dict[str, object]] = [
+                {
+                    "model_size": entry.key[0],
+                    "device": entry.key[1],
+                    "compute_type": entry.key[2],
+                    "loaded": entry.model is not None,
+                    "refs": entry.refs,
+                    "uses": entry.uses,
+                    "loaded_at": entry.loaded_at or None,
+                    "last_used": entry.last_used or None,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "memory_bytes": entry.memory_bytes,
+                }
+                for entry in reversed(self._entries.values())
+            ]
+            return {
+                "max_resident": self.max_resident,
+                "resident": sum(1 for entry in self._entries.values() if entry.model is not None),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "process_rss_bytes": _process_rss_bytes(),
+                "models": models,
+            }
+
+    def _load(self, entry: _PooledModel) -> None:
+        model_size, device, compute_type = entry.key
+        logger.info(f"正在加载 FastWhisper 模型: {model_size} (device={device}, compute_type={compute_type})...")
+        rss_before = _process_rss_bytes()
+        started = time.time()
+        model = self._loader(model_size, device, compute_type)
+        rss_after = _process_rss_bytes()
+
+        entry.model = model
+        entry.loaded_at = time.time()
+        entry.load_seconds = entry.loaded_at - started
+        if rss_before is not None and rss_after is not None:
+            entry.memory_bytes = max(0, rss_after - rss_before)
+        with self._lock:
+            self.loads += 1
+        logger.info(f"FastWhisper 模型加载完成，耗时 {entry.load_seconds:.2f}s")
+
+    def _evict_idle_locked(self) -> None:
+        resident = [key for key, entry in self._entries.items() if entry.model is not None]
+        overflow = len(resident) - self.max_resident
+        if overflow <= 0:
+            return
+        # OrderedDict 从旧到新排列，优先淘汰最久未用且没有引用的模型
+        for key in resident:
+            if overflow <= 0:
+                break
+            if self._entries[key].refs == 0:
+                self._drop_locked(key)
+                self.evictions += 1
+                overflow -= 1
+        if overflow > 0:
+            logger.warning(f"所有常驻 Whisper 模型都在使用中，暂时超出上限 {self.max_resident}")
+
+    def _drop_locked(self, key: ModelKey) -> None:
+        entry = self._entries.pop(key)
+        entry.model = None
+        logger.info(f"释放 FastWhisper 模型: {key[0]} (device={key[1]}, compute_type={key[2]})")
+
+
+whisper_model_pool = WhisperModelPool()
@@ -0,0 +1,218 @@
+"""
+长音频并行转写
+1. 用 Silero VAD 找到静音位置，把音频切成约 chunk_seconds 长的窗口
+2. 每个窗口交给进程池转写，每个进程加载自己的模型并限制 cpu_threads
+3. 把各窗口的分段换算回全局时间并去掉重叠部分的重复内容
+"""
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+# 找不到静音时只能硬切，前一个窗口多转写一小段，拼接时按时间去重
+HARD_CUT_OVERLAP_SECONDS = 2.0
+# 切点在目标位置前后这个比例的范围内寻找最长的静音
+SPLIT_SEARCH_RATIO = 0.25
+# 去重时允许的时间误差
+DEDUPE_TOLERANCE_SECONDS = 0.2
+
+WindowSegments = List[Tuple[float, float, str]]
+
+
+@dataclass
+class AudioWindow:
+    index: int
+    start: int
+    end: int
+    # 该窗口负责的范围终点；硬切时 end 会比 core_end 多出重叠部分
+    core_end: int
+
+
+def find_speech_spans(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """返回有人声的采样区间"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    spans = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=300, speech_pad_ms=0))
+    return [(span["start"], span["end"]) for span in spans]
+
+
+def plan_windows(
+    total_samples: int,
+    speech_spans: List[Tuple[int, int]],
+    chunk_seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[AudioWindow]:
+    """在静音处切分音频；目标位置附近没有静音时硬切并保留重叠"""
+    chunk = int(chunk_seconds * sample_rate)
+    overlap = int(HARD_CUT_OVERLAP_SECONDS * sample_rate)
+    search = int(chunk * SPLIT_SEARCH_RATIO)
+
+    # 静音区间：(中点, 长度)
+    gaps = []
+    for (_, prev_end), (next_start, _) in zip(speech_spans, speech_spans[1:]):
+        if next_start > prev_end:
+            gaps.append(((prev_end + next_start) // 2, next_start - prev_end))
+
+    windows: List[AudioWindow] = []
+    start = 0
+    # 剩余部分不足 1.25 个窗口时不再切分，避免最后一段过短
+    while total_samples - start > chunk + search:
+        target = start + chunk
+        candidates = [gap for gap in gaps if target - search <= gap[0] <= target + search]
+        if candidates:
+            cut = max(candidates, key=lambda gap: (gap[1], -abs(gap[0] - target)))[0]
+            windows.append(AudioWindow(len(windows), start, cut, cut))
+        else:
+            cut = target
+            windows.append(AudioWindow(len(windows), start, min(total_samples, cut + overlap), cut))
+        start = cut
+
+    windows.append(AudioWindow(len(windows), start, total_samples, total_samples))
+    return windows
+
+
+def stitch_segments(
+    windows: List[AudioWindow],
+    results: List[WindowSegments],
+    sample_rate: int = SAMPLE_RATE,
+) -> List[TranscriptSegment]:
+    """把窗口内的相对时间换算成全局时间，并去掉重叠区域的重复分段"""
+    stitched: List[TranscriptSegment] = []
+    for window, segments in zip(windows, results):
+        offset = window.start / sample_rate
+        core_end = window.core_end / sample_rate
+        for start, end, text in segments:
+            text = text.strip()
+            if not text:
+                continue
+            global_start = start + offset
+            global_end = end + offset
+            # 重叠区里开始的分段属于下一个窗口
+            if window.end > window.core_end and global_start >= core_end:
+                continue
+            if stitched:
+                previous = stitched[-1]
+                if global_start < previous.end - DEDUPE_TOLERANCE_SECONDS:
+                    continue
+                if text == previous.text and global_start - previous.end <= HARD_CUT_OVERLAP_SECONDS:
+                    continue
+            stitched.append(TranscriptSegment(start=global_start, end=global_end, text=text))
+    return stitched
+
+
+# ---- 子进程 ----
+
+_worker_model = None
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, cpu_threads: int) -> None:
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_window(audio: np.ndarray) -> Tuple[str, float, WindowSegments]:
+    segments, info = _worker_model.transcribe(audio, beam_size=5, language=None, vad_filter=True)
+    collected = [(segment.start, segment.end, segment.text) for segment in segments]
+    return info.language, len(audio) / SAMPLE_RATE, collected
+
+
+# ---- 主进程 ----
+
+_executor_lock = threading.Lock()
+_executor: Optional[Executor] = None
+_executor_key: Optional[tuple] = None
+
+
+def _get_executor(model_size: str, device: str, compute_type: str, workers: int) -> Executor:
+    """
+    复用进程池，避免每次转写都重新启动进程并加载模型；
+    配置变化时换用新进程池，旧进程池跑完其他任务已提交的窗口后自行退出
+    """
+    global _executor, _executor_key
+    key = (model_size, device, compute_type, workers)
+    with _executor_lock:
+        if _executor is not None and _executor_key == key:
+            return _executor
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        logger.info(f"启动并行转写进程池: workers={workers}, cpu_threads={cpu_threads}, model={model_size}")
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # spawn 避免 fork 带有线程的服务进程
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, device, compute_type, cpu_threads),
+        )
+        _executor_key = key
+        return _executor
+
+
+def _discard_broken_executor(executor: Executor) -> None:
+    """子进程异常退出后进程池不可再用，丢弃后由下一次转写重建"""
+    global _executor, _executor_key
+    with _executor_lock:
+        if _executor is executor:
+            _executor, _executor_key = None, None
+    executor.shutdown(wait=False)
+
+
+def shutdown_parallel_executor() -> None:
+    """服务退出时调用，取消所有未开始的窗口"""
+    global _executor, _executor_key
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor, _executor_key = None, None
+
+
+def transcribe_parallel(
+    audio: np.ndarray,
+    model_size: str,
+    device: str,
+    compute_type: str,
+    workers: int,
+    chunk_seconds: float,
+) -> Optional[TranscriptResult]:
+    """
+    并行转写长音频；音频太短只切出一个窗口时返回 None，由调用方走单模型路径
+    """
+    windows = plan_windows(len(audio), find_speech_spans(audio), chunk_seconds)
+    if len(windows) < 2:
+        return None
+
+    logger.info(f"并行转写: 时长={len(audio) / SAMPLE_RATE:.1f}s, 窗口数={len(windows)}, workers={workers}")
+    executor = _get_executor(model_size, device, compute_type, workers)
+    results: List[WindowSegments] = []
+    language_seconds: Dict[str, float] = Counter()
+    try:
+        futures = [executor.submit(_transcribe_window, audio[window.start:window.end]) for window in windows]
+        for future in futures:
+            language, seconds, segments = future.result()
+            language_seconds[language] += seconds
+            results.append(segments)
+    except BrokenProcessPool:
+        _discard_broken_executor(executor)
+        raise
+
+    segments = stitch_segments(windows, results)
+    language = max(language_seconds, key=language_seconds.get) if language_seconds else ""
+    return TranscriptResult(
+        language=language,
+        full_text=" ".join(segment.text for segment in segments),
+        segments=segments,
+    )
@@ -3,6 +3,7 @@ import os
 from app.services.transcriber_settings import load_transcriber_config, normalize_transcriber_config
 from app.transcriber.base import Transcriber
 from app.transcriber.fast_whisper import FastWhisperTranscriber
+from app.transcriber.model_pool import whisper_model_pool
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -24,4 +25,15 @@ def get_transcriber(transcriber_type: str = None, config: dict = None) -> Transc
         model_size=loaded_config.get("model_size") or os.getenv("WHISPER_MODEL_SIZE", "base"),
         device=loaded_config.get("device") or os.getenv("WHISPER_DEVICE", "cpu"),
         compute_type=loaded_config.get("compute_type") or None,
+        parallel_workers=int(loaded_config.get("parallel_workers") or 1),
+        chunk_seconds=int(loaded_config.get("chunk_seconds") or 600),
     )
+
+
+def warmup_transcriber() -> None:
+    """按当前配置预加载共享的 Whisper 模型（WHISPER_WARMUP=1 时在启动阶段调用）"""
+    transcriber = get_transcriber()
+    try:
+        whisper_model_pool.warmup(transcriber.model_size, transcriber.device, transcriber.compute_type)
+    except Exception as exc:
+        logger.warning(f"Whisper 模型预热失败，将在首次转写时加载: {exc}")
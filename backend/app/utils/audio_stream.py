@@ -0,0 +1,79 @@
+"""
+音频流式解码
+ffmpeg 把 16kHz 单声道 PCM 直接写到 stdout，读入 NumPy 数组后交给 faster-whisper，
+不在磁盘上生成中间 WAV 文件
+"""
+import subprocess
+import threading
+from typing import List
+
+import numpy as np
+
+from app.utils.ffmpeg_helper import get_ffmpeg_path, hidden_subprocess_kwargs
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class AudioDecodeError(RuntimeError):
+    pass
+
+
+def decode_audio_to_array(media_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    解码音频为 float32 单声道数组（取值范围 [-1, 1]）
+
+    :param media_path: 视频或音频文件路径
+    :param sample_rate: 采样率，faster-whisper 要求 16000
+    :return: np.ndarray(float32)
+    """
+    command = [
+        get_ffmpeg_path(),
+        "-nostdin",
+        "-i", str(media_path),
+        "-vn",
+        "-f", "s16le",
+        "-acodec", "pcm_s16le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-loglevel", "error",
+        "pipe:1",
+    ]
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **hidden_subprocess_kwargs(),
+    )
+
+    # stderr 单独读取，避免 ffmpeg 输出大量警告时填满管道导致死锁
+    stderr_parts: List[bytes] = []
+    stderr_thread = threading.Thread(target=lambda: stderr_parts.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    pcm = bytearray()
+    try:
+        while True:
+            chunk = process.stdout.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            pcm.extend(chunk)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        stderr_thread.join(timeout=5)
+
+    if returncode != 0:
+        message = b"".join(stderr_parts).decode("utf-8", errors="replace").strip()
+        raise AudioDecodeError(f"音频解码失败: {message[-1000:] or f'ffmpeg exit code {returncode}'}")
+
+    # 奇数字节说明最后一个采样不完整，直接丢弃
+    usable = len(pcm) - (len(pcm) % 2)
+    audio = np.frombuffer(memoryview(pcm)[:usable], dtype=np.int16).astype(np.float32)
+    del pcm
+    audio /= 32768.0
+    logger.info(f"音频流式解码完成: {media_path}, 时长={len(audio) / sample_rate:.2f}s")
+    return audio
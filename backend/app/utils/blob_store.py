@@ -0,0 +1,163 @@
+"""
+压缩的内容寻址大对象存储
+笔记正文、转写结果等大文本不再直接放进任务行或缩进 JSON 文件：内容按 SHA-256 寻址，
+压缩后写到 root/<前两位>/<id>.<codec>，任务行只保存 id。相同内容只存一份，写入后不再修改
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from app.utils.logger import get_logger
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖：没有安装时使用 gzip
+    zstandard = None
+
+logger = get_logger(__name__)
+
+NOTE_OUTPUT_DIR = Path(os.getenv("NOTE_OUTPUT_DIR", "note_results"))
+BLOB_STORE_DIR = Path(os.getenv("BLOB_STORE_DIR", str(NOTE_OUTPUT_DIR / "blobs")))
+BLOB_TEXT_CACHE_ENTRIES = 32
+
+CODEC_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def compress_bytes(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def decompress_bytes(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("读取 zstd 压缩的数据需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class BlobStore:
+    def __init__(self, root: Path, codec: Optional[str] = None):
+        self.root = Path(root)
+        self.codec = codec or default_codec()
+        self._lock = threading.Lock()
+        # blob 不可变，解码后的文本可以放心缓存
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+
+    @staticmethod
+    def blob_id(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, blob_id: str, codec: str) -> Path:
+        return self.root / blob_id[:2] / f"{blob_id}{CODEC_SUFFIXES[codec]}"
+
+    def _existing(self, blob_id: str) -> Optional[tuple]:
+        # 优先当前编码，兼容切换编码前写入的 blob
+        for codec in (self.codec, *[name for name in CODEC_SUFFIXES if name != self.codec]):
+            path = self._path(blob_id, codec)
+            if path.exists():
+                return path, codec
+        return None
+
+    def exists(self, blob_id: str) -> bool:
+        return bool(blob_id) and self._existing(blob_id) is not None
+
+    def put_bytes(self, data: bytes) -> str:
+        blob_id = self.blob_id(data)
+        if self._existing(blob_id) is not None:
+            return blob_id
+        path = self._path(blob_id, self.codec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(compress_bytes(data, self.codec))
+        os.replace(tmp_path, path)
+        return blob_id
+
+    def get_bytes(self, blob_id: str) -> Optional[bytes]:
+        if not blob_id:
+            return None
+        found = self._existing(blob_id)
+        if found is None:
+            logger.warning(f"blob 不存在: {blob_id}")
+            return None
+        path, codec = found
+        return decompress_bytes(path.read_bytes(), codec)
+
+    def put_text(self, text: str) -> str:
+        blob_id = self.put_bytes(text.encode("utf-8"))
+        self._remember(blob_id, text)
+        return blob_id
+
+    def get_text(self, blob_id: str) -> Optional[str]:
+        with self._lock:
+            text = self._texts.get(blob_id)
+            if text is not None:
+                self._texts.move_to_end(blob_id)
+                return text
+        data = self.get_bytes(blob_id)
+        if data is None:
+            return None
+        text = data.decode("utf-8")
+        self._remember(blob_id, text)
+        return text
+
+    def put_json(self, value: Any) -> str:
+        return self.put_text(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+    def get_json(self, blob_id: str) -> Any:
+        text = self.get_text(blob_id)
+        return json.loads(text) if text is not None else None
+
+    def _remember(self, blob_id: str, text: str) -> None:
+        with self._lock:
+            self._texts[blob_id] = text
+            self._texts.move_to_end(blob_id)
+            while len(self._texts) > BLOB_TEXT_CACHE_ENTRIES:
+                self._texts.popitem(last=False)
+
+    def sweep(self, keep: Iterable[str], min_age_seconds: float = 3600) -> int:
+        """删除不在 keep 中的 blob；刚写入、可能还没登记到任务行的 blob 不删"""
+        keep = set(keep)
+        if not self.root.exists():
+            return 0
+        removed = 0
+        cutoff = time.time() - min_age_seconds
+        for path in self.root.glob("*/*"):
+            blob_id = path.name.split(".", 1)[0]
+            try:
+                if blob_id in keep or path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            for blob_id in [key for key in self._texts if key not in keep]:
+                self._texts.pop(blob_id, None)
+        return removed
+
+    def stats(self) -> dict:
+        count = 0
+        total = 0
+        if self.root.exists():
+            for path in self.root.glob("*/*"):
+                try:
+                    total += path.stat().st_size
+                    count += 1
+                except OSError:
+                    continue
+        return {"codec": self.codec, "blobs": count, "bytes": total}
+
+
+blob_store = BlobStore(BLOB_STORE_DIR)
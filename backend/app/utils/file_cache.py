@@ -0,0 +1,191 @@
+"""
+基于文件的内容寻址缓存
+每个 key 对应 root/<前两位>/<key><suffix> 一个文件；文件 mtime 作为最近使用时间，
+总大小超过上限时按 LRU 删除最旧的文件
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 淘汰时一次性降到上限的这个比例以下，避免每次写入都触发扫描
+EVICT_TARGET_RATIO = 0.9
+
+
+class FileCache:
+    def __init__(self, root: Path, max_bytes: int, suffix: str = "", ttl_seconds: Optional[float] = None):
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self.suffix = suffix
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        try:
+            stat = path.stat()
+            if self.ttl_seconds is not None and time.time() - stat.st_mtime > self.ttl_seconds:
+                self._remove(path, stat.st_size)
+                raise FileNotFoundError(path)
+            data = path.read_bytes()
+            # 更新 mtime 作为最近使用时间
+            os.utime(path, None)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def set_bytes(self, key: str, data: bytes) -> None:
+        if self.max_bytes and len(data) > self.max_bytes:
+            return
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.writes += 1
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - old_size
+        self._evict_if_needed()
+
+    def get_text(self, key: str) -> Optional[str]:
+        data = self.get_bytes(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def set_text(self, key: str, text: str) -> None:
+        self.set_bytes(key, text.encode("utf-8"))
+
+    def get_json(self, key: str) -> Optional[Any]:
+        text = self.get_text(key)
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            logger.warning(f"缓存文件损坏，已忽略: {self.path_for(key)}")
+            self.delete(key)
+            return None
+
+    def set_json(self, key: str, value: Any) -> None:
+        self.set_text(key, json.dumps(value, ensure_ascii=False))
+
+    def delete(self, key: str) -> None:
+        path = self.path_for(key)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return
+        self._remove(path, size)
+
+    def clear(self) -> int:
+        removed = 0
+        for path in self._iter_files():
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._total_bytes = 0
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        total = self._ensure_total()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "root": str(self.root),
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "entries": sum(1 for _ in self._iter_files()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+    def _iter_files(self):
+        if not self.root.exists():
+            return
+        for path in self.root.glob(f"*/*{self.suffix}"):
+            if path.is_file() and not path.name.endswith(".tmp"):
+                yield path
+
+    def _ensure_total(self) -> int:
+        with self._lock:
+            if self._total_bytes is not None:
+                return self._total_bytes
+        total = 0
+        for path in self._iter_files():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        with self._lock:
+            self._total_bytes = total
+            return total
+
+    def _remove(self, path: Path, size: int) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes = max(0, self._total_bytes - size)
+
+    def _evict_if_needed(self) -> None:
+        if not self.max_bytes or self._ensure_total() <= self.max_bytes:
+            return
+
+        entries = []
+        for path in self._iter_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._total_bytes = total
+            self.evictions += evicted
+        if evicted:
+            logger.info(f"缓存超出上限，已淘汰 {evicted} 个文件: {self.root}")
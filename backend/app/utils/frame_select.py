@@ -0,0 +1,169 @@
+"""
+截图选帧与去重
+每个截图标记在时间点附近取几帧低分辨率灰度候选，用 NumPy 按清晰度（拉普拉斯方差）和画面稳定度打分，
+避开转场和模糊帧；再用选中帧的差值哈希（dHash）与上一张保留的截图比较，
+连续停留在同一画面上的标记共用一张截图，隔了别的画面再回来的标记仍单独截图
+"""
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.ffmpeg_helper import get_ffmpeg_path, hidden_subprocess_kwargs
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCREENSHOT_SMART_SELECT = os.getenv("SCREENSHOT_SMART_SELECT", "1").lower() not in {"0", "false", "no"}
+# 候选窗口为标记时间点前后各多少秒
+SCREENSHOT_WINDOW_SECONDS = float(os.getenv("SCREENSHOT_WINDOW_SECONDS", "1.5"))
+SCREENSHOT_CANDIDATES = int(os.getenv("SCREENSHOT_CANDIDATES", "5"))
+# dHash 汉明距离不超过该值视为同一画面（64 位）
+SCREENSHOT_DEDUP_DISTANCE = int(os.getenv("SCREENSHOT_DEDUP_DISTANCE", "6"))
+SELECT_BATCH_SIZE = 8
+
+SAMPLE_WIDTH = 160
+SAMPLE_HEIGHT = 90
+# 画面变化（转场、镜头移动）的扣分权重，以及偏离标记时间点的扣分权重
+MOTION_WEIGHT = 0.6
+DISTANCE_WEIGHT = 0.15
+
+
+@dataclass(frozen=True)
+class FrameChoice:
+    timestamp: int
+    time: float
+    dhash: int
+    duplicate_of: Optional[int] = None
+
+
+def sharpness_scores(frames: np.ndarray) -> np.ndarray:
+    """每帧拉普拉斯响应的方差，越大越清晰；frames 形状为 (n, h, w)"""
+    f = frames.astype(np.float32)
+    laplacian = (
+        f[:, :-2, 1:-1] + f[:, 2:, 1:-1] + f[:, 1:-1, :-2] + f[:, 1:-1, 2:] - 4.0 * f[:, 1:-1, 1:-1]
+    )
+    return laplacian.reshape(len(f), -1).var(axis=1)
+
+
+def motion_scores(frames: np.ndarray) -> np.ndarray:
+    """每帧与相邻候选帧的平均像素差，转场中的帧两侧差值都大"""
+    n = len(frames)
+    if n < 2:
+        return np.zeros(n, dtype=np.float32)
+    diffs = np.abs(np.diff(frames.astype(np.float32), axis=0)).mean(axis=(1, 2))
+    total = np.zeros(n, dtype=np.float32)
+    counts = np.zeros(n, dtype=np.float32)
+    total[:-1] += diffs
+    total[1:] += diffs
+    counts[:-1] += 1
+    counts[1:] += 1
+    return total / counts
+
+
+def best_frame_index(frames: np.ndarray, offsets: np.ndarray, window: float) -> int:
+    """综合清晰度、稳定度和离标记时间点的距离选出最佳候选帧"""
+    sharp = sharpness_scores(frames)
+    motion = motion_scores(frames)
+    score = sharp / (sharp.max() + 1e-6) - MOTION_WEIGHT * motion / (motion.max() + 1e-6)
+    score -= DISTANCE_WEIGHT * np.abs(offsets) / max(window, 1e-6)
+    return int(np.argmax(score))
+
+
+def dhash(frame: np.ndarray, size: int = 8) -> int:
+    """差值哈希：缩成 size x (size+1) 的块均值，比较横向相邻块的明暗"""
+    f = frame.astype(np.float32)
+    row_edges = np.linspace(0, f.shape[0], size + 1).astype(int)[:-1]
+    col_edges = np.linspace(0, f.shape[1], size + 2).astype(int)[:-1]
+    pooled = np.add.reduceat(np.add.reduceat(f, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, f.shape[0])), np.diff(np.append(col_edges, f.shape[1])))
+    pooled /= counts
+    bits = (pooled[:, 1:] > pooled[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _window(timestamp: int) -> Tuple[float, float]:
+    start = max(0.0, timestamp - SCREENSHOT_WINDOW_SECONDS)
+    return start, timestamp + SCREENSHOT_WINDOW_SECONDS - start
+
+
+def _sample_batch(video_path: str, timestamps: Sequence[int], workdir: Path) -> Dict[int, np.ndarray]:
+    """一次 ffmpeg 调用解码一批标记的候选帧（低分辨率灰度 raw），返回时间点 -> (n, h, w)"""
+    command = [get_ffmpeg_path(), "-hide_banner", "-loglevel", "error", "-y"]
+    outputs: List[Path] = []
+    for timestamp in timestamps:
+        start, duration = _window(timestamp)
+        command += ["-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", str(video_path)]
+    for input_index, timestamp in enumerate(timestamps):
+        _, duration = _window(timestamp)
+        fps = max(SCREENSHOT_CANDIDATES, 1) / duration
+        output = workdir / f"candidates_{input_index}.gray"
+        outputs.append(output)
+        command += [
+            "-map", f"{input_index}:v:0",
+            "-vf", f"fps={fps:.4f},scale={SAMPLE_WIDTH}:{SAMPLE_HEIGHT},format=gray",
+            "-frames:v", str(max(SCREENSHOT_CANDIDATES, 1)),
+            "-f", "rawvideo", str(output),
+        ]
+    subprocess.run(command, capture_output=True, text=True, check=True, **hidden_subprocess_kwargs())
+
+    frame_bytes = SAMPLE_WIDTH * SAMPLE_HEIGHT
+    samples: Dict[int, np.ndarray] = {}
+    for timestamp, output in zip(timestamps, outputs):
+        data = np.fromfile(output, dtype=np.uint8) if output.exists() else np.empty(0, dtype=np.uint8)
+        count = len(data) // frame_bytes
+        if count:
+            samples[timestamp] = data[:count * frame_bytes].reshape(count, SAMPLE_HEIGHT, SAMPLE_WIDTH)
+    return samples
+
+
+def select_screenshot_frames(video_path: str, timestamps: Sequence[int]) -> Dict[int, FrameChoice]:
+    """
+    为每个截图时间点选出最佳帧，并标记与上一张保留截图画面重复的结果
+
+    :param video_path: 视频文件路径
+    :param timestamps: 截图时间点（秒），按标记出现顺序
+    :return: 时间点 -> FrameChoice；候选帧解码失败的时间点不在结果中，调用方按原时间点截图
+    """
+    unique = list(dict.fromkeys(int(timestamp) for timestamp in timestamps))
+    samples: Dict[int, np.ndarray] = {}
+    with tempfile.TemporaryDirectory(prefix="frame_select_") as tmp:
+        for start in range(0, len(unique), SELECT_BATCH_SIZE):
+            batch = unique[start:start + SELECT_BATCH_SIZE]
+            try:
+                samples.update(_sample_batch(str(video_path), batch, Path(tmp)))
+            except subprocess.CalledProcessError as exc:
+                logger.warning(f"截图候选帧解码失败，使用原时间点: {exc.stderr}")
+
+    choices: Dict[int, FrameChoice] = {}
+    last_kept: Optional[FrameChoice] = None
+    for timestamp in unique:
+        frames = samples.get(timestamp)
+        if frames is None:
+            continue
+        window_start, duration = _window(timestamp)
+        step = duration / max(SCREENSHOT_CANDIDATES, 1)
+        times = window_start + step * np.arange(len(frames))
+        index = best_frame_index(frames, times - timestamp, SCREENSHOT_WINDOW_SECONDS)
+        frame_hash = dhash(frames[index])
+
+        # 只和上一张保留的截图比较：画面切走后再切回同一页，说明讲解回到了这里，应重新配图
+        duplicate_of = None
+        if last_kept is not None and hamming_distance(last_kept.dhash, frame_hash) <= SCREENSHOT_DEDUP_DISTANCE:
+            duplicate_of = last_kept.timestamp
+        choice = FrameChoice(timestamp, round(float(times[index]), 3), frame_hash, duplicate_of)
+        choices[timestamp] = choice
+        if duplicate_of is None:
+            last_kept = choice
+
+    duplicates = sum(1 for choice in choices.values() if choice.duplicate_of is not None)
+    logger.info(f"截图选帧完成: {len(choices)}/{len(unique)} 个时间点，合并重复画面 {duplicates} 个")
+    return choices
@@ -0,0 +1,45 @@
+"""
+异步令牌桶限速
+令牌按 rate（个/秒）匀速补充，最多攒 burst 个；每次请求取一个令牌，没有令牌时在事件循环上等待。
+并发下载时所有协程共用同一个桶，对同一主机的请求总速率不超过 rate；被对方限流时可以 pause 一段时间
+"""
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        # rate <= 0 表示不限速
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # 持锁等待，等待中的请求按先来后到取得令牌
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """暂停发放令牌，恢复后从空桶开始补充"""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = self._paused_until
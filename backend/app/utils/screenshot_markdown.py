@@ -0,0 +1,113 @@
+"""
+笔记 Markdown 中截图标记的单遍改写
+一个编译好的正则同时识别截图标记、图片链接和多余空行，按顺序扫描一次即输出最终文本，
+替代逐个标记重新拆分全文再做多轮全文正则修复的做法
+"""
+import re
+from typing import List, Mapping, Tuple
+
+LEGACY_IMAGE_PREFIX = "/static/screenshots/"
+
+# *Screenshot-[mm:ss] 或 *Screenshot-mm:ss，紧跟的 * 属于标记本身
+_MARKER_PATTERN = r"\*Screenshot-(?:\[(?P<mm1>\d{2}):(?P<ss1>\d{2})\]|(?P<mm2>\d{2}):(?P<ss2>\d{2}))"
+SCREENSHOT_MARKER_RE = re.compile(_MARKER_PATTERN)
+_TOKEN_RE = re.compile(
+    rf"(?P<marker>{_MARKER_PATTERN})(?P<marker_star>\*)?"
+    r"|!\[\]\((?P<image>[^)\n]+)\)(?P<image_star>\*)?"
+    r"|(?P<blank>\n{4,})"
+)
+_LEADING_SPACE_RE = re.compile(r"(?:[ \t]*\n)+|[ \t]*")
+
+
+def _marker_seconds(match: re.Match) -> int:
+    mm = match.group("mm1") or match.group("mm2")
+    ss = match.group("ss1") or match.group("ss2")
+    return int(mm) * 60 + int(ss)
+
+
+def find_screenshot_markers(markdown: str) -> List[Tuple[str, int]]:
+    """
+    提取所有截图标记
+
+    :return: [(标记文本, 时间戳秒数), ...]，按出现顺序
+    """
+    return [(match.group(0), _marker_seconds(match)) for match in SCREENSHOT_MARKER_RE.finditer(markdown)]
+
+
+def normalize_image_path(path: str, base_url: str) -> str:
+    """旧版 /static/screenshots/ 路径和其他位置的截图路径统一改到 base_url 下"""
+    base = base_url.rstrip("/")
+    if path.startswith(LEGACY_IMAGE_PREFIX):
+        return f"{base}/{path[len(LEGACY_IMAGE_PREFIX):]}"
+    position = path.find("screenshots")
+    if position < 0 or "/" not in path[position:] or path.startswith(f"{base}/"):
+        return path
+    return f"{base}/{path.rsplit('/', 1)[-1]}"
+
+
+class _Emitter:
+    """按顺序拼接输出；图片块前后各保留一个空行"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.pending_break = False
+
+    def text(self, chunk: str) -> None:
+        if not chunk:
+            return
+        if self.pending_break:
+            # 图片块之后的文本：去掉原来的行首空白，换成一个空行分隔
+            chunk = chunk[_LEADING_SPACE_RE.match(chunk).end():]
+            if not chunk:
+                return
+            self.parts.append("\n\n")
+            self.pending_break = False
+        self.parts.append(chunk)
+
+    def block(self, image_markdown: str) -> None:
+        # 去掉标记前的行尾空白和空行，保证图片独占一段
+        while self.parts and not self.parts[-1].strip():
+            self.parts.pop()
+        if self.parts:
+            self.parts[-1] = self.parts[-1].rstrip()
+            self.parts.append("\n\n")
+        self.parts.append(image_markdown)
+        self.pending_break = True
+
+    def result(self) -> str:
+        if self.pending_break:
+            self.parts.append("\n")
+        return "".join(self.parts)
+
+
+def rewrite_screenshot_markdown(markdown: str, screenshots: Mapping[int, str], base_url: str) -> str:
+    """
+    单遍改写截图 Markdown
+
+    - 截图标记替换为独立成段的图片；时间戳不在 screenshots 中的标记原样保留
+    - 图片链接路径规范到 base_url 下，并去掉图片后多余的 *
+    - 4 个以上连续换行压缩为 3 个
+
+    :param markdown: 原始 Markdown
+    :param screenshots: 时间戳（秒） -> 图片 URL
+    :param base_url: 截图访问前缀
+    :return: 改写后的 Markdown
+    """
+    emitter = _Emitter()
+    position = 0
+    for match in _TOKEN_RE.finditer(markdown):
+        emitter.text(markdown[position:match.start()])
+        position = match.end()
+
+        if match.group("marker") is not None:
+            url = screenshots.get(_marker_seconds(match))
+            if url:
+                emitter.block(f"![]({url})")
+            else:
+                emitter.text(match.group(0))
+        elif match.group("image") is not None:
+            emitter.text(f"![]({normalize_image_path(match.group('image'), base_url)})")
+        else:
+            emitter.text("\n\n\n")
+    emitter.text(markdown[position:])
+    return emitter.result()
@@ -1,13 +1,19 @@
 import subprocess
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from app.utils.logger import get_logger
 from app.utils.ffmpeg_helper import get_ffmpeg_path, hidden_subprocess_kwargs
 
 logger = get_logger(__name__)
 
+# 一次 ffmpeg 调用处理的截图数：每个时间点是一路独立 seek 的输入，太多会同时占用过多解码器内存
+SCREENSHOT_BATCH_SIZE = int(os.getenv("SCREENSHOT_BATCH_SIZE", "8"))
+# 同时运行的批次数
+SCREENSHOT_WORKERS = int(os.getenv("SCREENSHOT_WORKERS", "2"))
+
 
 def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index: int) -> str:
     """
@@ -51,4 +57,76 @@ def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index:
         raise Exception(f"生成截图失败: {e.stderr}")
 
 
+def _screenshot_output_path(output_dir: Path, index: int) -> Path:
+    return output_dir / f"screenshot_{index:03d}_{uuid.uuid4().hex[:8]}.jpg"
+
+
+def _build_batch_command(ffmpeg_path: str, video_path: str, jobs: Sequence[Tuple[float, Path]]) -> List[str]:
+    """
+    每个时间点作为一路 `-ss t -i video` 输入：输入前 seek 先跳到关键帧再解码到精确时间，
+    不需要像 select 滤镜那样从头解码整段视频；每路输入映射到自己的单帧输出
+    """
+    command = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y"]
+    for timestamp, _ in jobs:
+        command += ["-ss", str(timestamp), "-i", str(video_path)]
+    for input_index, (_, output_path) in enumerate(jobs):
+        command += ["-map", f"{input_index}:v:0", "-frames:v", "1", "-q:v", "2", str(output_path)]
+    return command
+
+
+def _run_screenshot_batch(video_path: str, jobs: Sequence[Tuple[float, Path]]) -> Dict[float, str]:
+    results: Dict[float, str] = {}
+    try:
+        subprocess.run(
+            _build_batch_command(get_ffmpeg_path(), video_path, jobs),
+            capture_output=True,
+            text=True,
+            check=True,
+            **hidden_subprocess_kwargs(),
+        )
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"批量截图失败，改为逐张截图: {e.stderr}")
+
+    for index, (timestamp, output_path) in enumerate(jobs):
+        if output_path.exists() and output_path.stat().st_size > 0:
+            results[timestamp] = str(output_path)
+            continue
+        # 批量命令失败或该时间点没有产出（例如超出视频时长），单独重试一次
+        try:
+            results[timestamp] = generate_screenshot(video_path, str(output_path.parent), timestamp, index)
+        except Exception as exc:
+            logger.error(f"生成截图失败 (timestamp={timestamp}): {exc}")
+    return results
+
+
+def generate_screenshots(video_path: str, output_dir: str, timestamps: Sequence[float]) -> Dict[float, str]:
+    """
+    批量生成截图，相同时间点只截一次
+
+    :param video_path: 视频文件路径
+    :param output_dir: 输出目录
+    :param timestamps: 时间戳列表（秒，可带小数）
+    :return: 时间戳 -> 截图文件路径；生成失败的时间戳不在结果中
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    unique = list(dict.fromkeys(timestamps))
+    if not unique:
+        return {}
+    jobs = [(timestamp, _screenshot_output_path(output_dir, index)) for index, timestamp in enumerate(unique)]
+    batch_size = max(1, SCREENSHOT_BATCH_SIZE)
+    batches = [jobs[start:start + batch_size] for start in range(0, len(jobs), batch_size)]
+
+    results: Dict[float, str] = {}
+    workers = min(max(1, SCREENSHOT_WORKERS), len(batches))
+    if workers == 1:
+        for batch in batches:
+            results.update(_run_screenshot_batch(str(video_path), batch))
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screenshot") as executor:
+            for batch_results in executor.map(lambda batch: _run_screenshot_batch(str(video_path), batch), batches):
+                results.update(batch_results)
 
+    logger.info(f"批量截图完成: {len(results)}/{len(unique)} 张，{len(batches)} 次 ffmpeg 调用")
+    return results
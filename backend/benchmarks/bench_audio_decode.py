@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+对比两种音频准备方式的耗时和峰值内存：
+  wav    : ffmpeg 写出 16kHz WAV，再由 faster-whisper 读回（原有流程）
+  stream : ffmpeg 通过 stdout 输出 PCM，直接解码到 NumPy 数组
+
+用法（在 backend 目录下）:
+  python benchmarks/bench_audio_decode.py --input lecture.mp4
+  python benchmarks/bench_audio_decode.py --duration 1800          # 生成 30 分钟测试音频
+  python benchmarks/bench_audio_decode.py --input a.mp4 --transcribe --model tiny
+
+每种方式都在独立子进程中运行，峰值 RSS 互不影响。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB，macOS 是字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_mode(mode: str, media_path: str, transcribe: bool, model_size: str) -> dict:
+    from app.utils.audio_stream import decode_audio_to_array
+    from app.utils.ffmpeg_helper import get_ffmpeg_path
+
+    started = time.perf_counter()
+    wav_bytes = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        if mode == "wav":
+            wav_path = Path(tmp) / "audio.wav"
+            subprocess.run(
+                [get_ffmpeg_path(), "-i", media_path, "-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000",
+                 "-y", "-loglevel", "error", str(wav_path)],
+                check=True,
+            )
+            wav_bytes = wav_path.stat().st_size
+            if transcribe:
+                audio = str(wav_path)
+            else:
+                from faster_whisper.audio import decode_audio
+
+                audio = decode_audio(str(wav_path), sampling_rate=16000)
+        else:
+            audio = decode_audio_to_array(media_path)
+        decoded = time.perf_counter()
+
+        segments = None
+        if transcribe:
+            from faster_whisper import WhisperModel
+
+            model = WhisperModel(model_size, device="cpu", compute_type="int8")
+            segments = len(list(model.transcribe(audio, beam_size=5, vad_filter=True)[0]))
+
+    finished = time.perf_counter()
+    return {
+        "mode": mode,
+        "decode_seconds": round(decoded - started, 3),
+        "total_seconds": round(finished - started, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "wav_bytes_written": wav_bytes,
+        "segments": segments,
+    }
+
+
+def _make_test_media(duration: int, target: Path) -> None:
+    from app.utils.ffmpeg_helper import get_ffmpeg_path
+
+    subprocess.run(
+        [get_ffmpeg_path(), "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+         "-ac", "2", "-ar", "44100", "-c:a", "aac", "-y", "-loglevel", "error", str(target)],
+        check=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare WAV and streaming audio decode")
+    parser.add_argument("--input", help="媒体文件路径；不传则按 --duration 生成测试音频")
+    parser.add_argument("--duration", type=int, default=600, help="生成测试音频的时长（秒）")
+    parser.add_argument("--transcribe", action="store_true", help="同时跑一次 faster-whisper 转写")
+    parser.add_argument("--model", default="tiny", help="--transcribe 时使用的模型大小")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--child", choices=["wav", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_run_mode(args.child, args.input, args.transcribe, args.model)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        media_path = args.input
+        if not media_path:
+            media_path = str(Path(tmp) / "bench.m4a")
+            print(f"生成 {args.duration}s 测试音频: {media_path}")
+            _make_test_media(args.duration, Path(media_path))
+
+        print(f"输入: {media_path} ({os.path.getsize(media_path) / 1024 / 1024:.1f} MB)")
+        for _ in range(args.repeat):
+            for mode in ("wav", "stream"):
+                command = [sys.executable, __file__, "--child", mode, "--input", media_path, "--model", args.model]
+                if args.transcribe:
+                    command.append("--transcribe")
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(
+                    f"{result['mode']:>6}: decode={result['decode_seconds']:.2f}s "
+                    f"total={result['total_seconds']:.2f}s peak_rss={result['peak_rss_mb']:.0f}MB "
+                    f"wav_written={result['wav_bytes_written'] / 1024 / 1024:.1f}MB"
+                    + (f" segments={result['segments']}" if result["segments"] is not None else "")
+                )
+
+
+if __name__ == "__main__":
+    main()
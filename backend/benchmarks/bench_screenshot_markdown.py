@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+对比截图标记替换的两种实现：
+  legacy : 每个标记重新拆分/拼接全文，最后再做多轮全文正则修复（原有 _insert_screenshots 逻辑）
+  single : app.utils.screenshot_markdown 的单遍改写
+
+用法（在 backend 目录下）:
+  python benchmarks/bench_screenshot_markdown.py
+  python benchmarks/bench_screenshot_markdown.py --sections 400 --repeat 5
+
+不调用 ffmpeg，截图路径直接由时间戳生成，只测文本处理耗时。
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.screenshot_markdown import find_screenshot_markers, rewrite_screenshot_markdown
+
+BASE_URL = "/api/note_results/screenshots"
+
+
+def _make_note(sections: int) -> str:
+    paragraph = "这一段讲解了本节的核心概念，并结合示例代码说明了实现细节和常见误区。" * 4
+    parts = []
+    for index in range(sections):
+        minutes, seconds = divmod(index * 7, 60)
+        marker = f"*Screenshot-[{minutes % 100:02d}:{seconds:02d}]"
+        parts.append(f"## 第 {index + 1} 节\n\n{paragraph}\n\n- 要点一 {marker}\n- 要点二\n")
+        if index % 10 == 0:
+            parts.append(f"![](/static/screenshots/legacy_{index}.jpg)*\n")
+    return "\n".join(parts)
+
+
+def _legacy(markdown: str, urls: dict) -> str:
+    markdown = re.sub(r'!\[\]\(/static/screenshots/([^)]+)\)', lambda m: f"![]({BASE_URL}/{m.group(1)})", markdown)
+    for marker, timestamp in find_screenshot_markers(markdown):
+        img_url = urls[timestamp]
+        if f"{marker}*" in markdown:
+            markdown = markdown.replace(f"{marker}*", f"\n\n![]({img_url})\n\n", 1)
+            continue
+        lines = markdown.split('\n')
+        new_lines = []
+        replaced = False
+        for i, line in enumerate(lines):
+            if not replaced and marker in line:
+                cleaned_line = line.replace(marker, '').strip()
+                if cleaned_line:
+                    new_lines += [cleaned_line, '', f"![]({img_url})"]
+                else:
+                    new_lines.append(f"![]({img_url})")
+                if i + 1 < len(lines):
+                    next_line = lines[i + 1].strip()
+                    if next_line and not next_line.startswith('#'):
+                        new_lines.append('')
+                else:
+                    new_lines.append('')
+                replaced = True
+            else:
+                new_lines.append(line)
+        markdown = '\n'.join(new_lines)
+    markdown = re.sub(r'\n{4,}', '\n\n\n', markdown)
+    markdown = re.sub(r'!\[\]\([^)]+\)\*', lambda m: m.group(0).rstrip('*'), markdown)
+    markdown = re.sub(r'!\[\]\(/static/screenshots/([^)]+)\)', lambda m: f"![]({BASE_URL}/{m.group(1)})", markdown)
+
+    def fix_path(match):
+        full_path = match.group(1)
+        if '/static/screenshots/' in full_path or not full_path.startswith(BASE_URL + '/'):
+            return f"![]({BASE_URL}/{Path(full_path).name})"
+        return match.group(0)
+
+    markdown = re.sub(r'!\[\]\((.*?screenshots.*?/([^/)]+))\)', fix_path, markdown)
+    re.findall(r'!\[\]\(/static/screenshots/[^)]+\)', markdown)
+    return markdown
+
+
+def _single(markdown: str, urls: dict) -> str:
+    return rewrite_screenshot_markdown(markdown, urls, BASE_URL)
+
+
+def _best_of(func, markdown: str, urls: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(markdown, urls)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare screenshot marker rewriting")
+    parser.add_argument("--sections", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for sections in args.sections:
+        markdown = _make_note(sections)
+        urls = {timestamp: f"{BASE_URL}/shot_{timestamp}.jpg" for _, timestamp in find_screenshot_markers(markdown)}
+        legacy = _best_of(_legacy, markdown, urls, args.repeat)
+        single = _best_of(_single, markdown, urls, args.repeat)
+        print(
+            f"sections={sections:>5} size={len(markdown) / 1024:>7.1f}KB markers={len(urls):>5} "
+            f"legacy={legacy * 1000:>9.2f}ms single={single * 1000:>7.2f}ms speedup={legacy / single:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
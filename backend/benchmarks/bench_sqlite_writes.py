@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+模拟多个后台任务同时更新任务状态，对比三种写库方式的吞吐和锁冲突：
+  default : 与改动前相同的引擎（回滚日志、synchronous=FULL；锁等待缩短到 50ms），每次更新一个事务
+  tuned   : create_database_engine（WAL、synchronous=NORMAL、mmap、busy_timeout、连接池）
+  batched : tuned 引擎 + StatusWriter，处理中的状态合并后定期批量写入
+
+用法（在 backend 目录下）:
+  python benchmarks/bench_sqlite_writes.py
+  python benchmarks/bench_sqlite_writes.py --workers 16 --updates 500 --readers 4
+
+每种方式使用独立的临时数据库；读线程模拟前端轮询 get_task_by_id。
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import video_task_dao  # noqa: E402
+from app.db.engine import create_database_engine  # noqa: E402
+from app.db.models.video_task import VideoTask  # noqa: E402
+from app.db.status_writer import StatusWriter  # noqa: E402
+
+STATUSES = ("processing", "transcribing", "summarizing")
+
+
+def _make_engine(mode: str, db_path: Path):
+    url = f"sqlite:///{db_path}"
+    if mode == "default":
+        # 与改动前的 engine.py 相同，只缩短锁等待，让冲突显现为错误
+        return create_engine(url, connect_args={"check_same_thread": False, "timeout": 0.05})
+    return create_database_engine(url)
+
+
+def _run_mode(mode: str, workers: int, updates: int, readers: int, interval: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _make_engine(mode, Path(tmp) / "bench.db")
+        VideoTask.__table__.create(bind=engine)
+        video_task_dao.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        writer = StatusWriter(video_task_dao._write_status_batch, interval=interval)
+        video_task_dao.task_status_writer = writer
+
+        task_ids = [f"bench-{index}" for index in range(workers)]
+        for task_id in task_ids:
+            video_task_dao.create_task(task_id, f"{task_id}.mp4")
+
+        errors = {"write": 0, "read": 0}
+        reads = [0]
+        lock = threading.Lock()
+        stop_reading = threading.Event()
+
+        def write(task_id: str) -> None:
+            for index in range(updates):
+                status = STATUSES[index % len(STATUSES)]
+                try:
+                    if mode == "batched":
+                        writer.submit(task_id, status)
+                    else:
+                        video_task_dao.update_task_status(task_id, status)
+                except OperationalError:
+                    with lock:
+                        errors["write"] += 1
+            video_task_dao.update_task_status(task_id, "completed")
+
+        def read() -> None:
+            index = 0
+            while not stop_reading.is_set():
+                try:
+                    video_task_dao.get_task_by_id(task_ids[index % len(task_ids)])
+                    with lock:
+                        reads[0] += 1
+                except OperationalError:
+                    with lock:
+                        errors["read"] += 1
+                index += 1
+
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        for thread in reader_threads:
+            thread.start()
+        started = time.perf_counter()
+        writer_threads = [threading.Thread(target=write, args=(task_id,)) for task_id in task_ids]
+        for thread in writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        writer.close()
+        elapsed = time.perf_counter() - started
+        stop_reading.set()
+        for thread in reader_threads:
+            thread.join()
+
+        completed = sum(1 for task_id in task_ids if video_task_dao.get_task_by_id(task_id).status == "completed")
+        stats = writer.stats()
+        engine.dispose()
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "updates_per_second": workers * updates / elapsed,
+        "write_errors": errors["write"],
+        "read_errors": errors["read"],
+        "reads": reads[0],
+        # 每个任务最后一次直接写入 completed
+        "transactions": (stats["batches"] if mode == "batched" else workers * updates) + workers,
+        "completed": completed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare SQLite task status write strategies")
+    parser.add_argument("--workers", type=int, default=8, help="并发写状态的任务数")
+    parser.add_argument("--updates", type=int, default=200, help="每个任务的状态更新次数")
+    parser.add_argument("--readers", type=int, default=2, help="并发轮询任务的读线程数")
+    parser.add_argument("--interval", type=float, default=0.2, help="batched 模式的批量写入间隔（秒）")
+    args = parser.parse_args()
+    # 锁冲突已计入结果，不逐条打印 DAO 的错误日志
+    logging.disable(logging.ERROR)
+
+    print(f"{args.workers} 个任务 x {args.updates} 次更新，{args.readers} 个读线程")
+    for mode in ("default", "tuned", "batched"):
+        result = _run_mode(mode, args.workers, args.updates, args.readers, args.interval)
+        print(
+            f"{result['mode']:>8}: {result['seconds']:.2f}s {result['updates_per_second']:.0f} 次更新/s "
+            f"事务={result['transactions']} 写冲突={result['write_errors']} 读冲突={result['read_errors']} "
+            f"读={result['reads']} 完成={result['completed']}/{args.workers}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -16,6 +17,13 @@ if os.getenv("VIDEO_NOTE_USE_PROJECT_DIR", "").lower() not in {"1", "true", "yes
     configure_app_environment()
 
 from app.db.init_db import init_db
+from app.services.llm_loop import stop_llm_loop
+from app.services.note_job_queue import note_job_queue
+from app.services.http_pool import aclose_web_async_http_client, close_web_http_clients
+from app.services.note_pipeline import note_pipeline
+from app.services.openai_client import close_shared_http_clients
+from app.transcriber.parallel import shutdown_parallel_executor
+from app.transcriber.transcriber_provider import warmup_transcriber
 from app.exceptions.exception_handlers import register_exception_handlers
 from app.utils.logger import get_logger
 from app import create_app
@@ -42,9 +50,22 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 初始化数据库
     init_db()
+    # 启动任务队列，并恢复上次退出时未完成的任务
+    note_job_queue.start(resume=True)
+    # 可选：后台预加载 Whisper 模型，缩短第一个转写任务的等待
+    if os.getenv("WHISPER_WARMUP", "").lower() in {"1", "true", "yes"}:
+        threading.Thread(target=warmup_transcriber, name="whisper-warmup", daemon=True).start()
 
     logger.info("应用启动完成")
     yield
+    note_job_queue.stop()
+    note_pipeline.shutdown()
+    stop_llm_loop()
+    close_shared_http_clients()
+    close_web_http_clients()
+    # 服务所在事件循环上的共享异步客户端（B 站 API 等）
+    await aclose_web_async_http_client()
+    shutdown_parallel_executor()
     logger.info("应用关闭")
 
 
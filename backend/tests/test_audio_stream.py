@@ -0,0 +1,101 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import note
+from app.utils import audio_stream
+from app.utils.ffmpeg_helper import get_ffmpeg_path
+
+
+class AudioStreamTests(unittest.TestCase):
+    def test_decode_audio_to_array_returns_16k_float_pcm(self):
+        with TemporaryDirectory() as tmp:
+            media = Path(tmp) / "tone.m4a"
+            subprocess.run(
+                [get_ffmpeg_path(), "-f", "lavfi", "-i", "sine=frequency=440:duration=2",
+                 "-ac", "2", "-ar", "44100", "-c:a", "aac", "-y", "-loglevel", "error", str(media)],
+                check=True,
+            )
+
+            audio = audio_stream.decode_audio_to_array(str(media))
+
+        self.assertEqual(audio.dtype, np.float32)
+        self.assertAlmostEqual(len(audio) / audio_stream.SAMPLE_RATE, 2.0, delta=0.1)
+        self.assertLessEqual(float(np.abs(audio).max()), 1.0)
+        self.assertGreater(float(np.abs(audio).max()), 0.05)
+
+    def test_decode_failure_raises_audio_decode_error(self):
+        with TemporaryDirectory() as tmp:
+            with self.assertRaises(audio_stream.AudioDecodeError):
+                audio_stream.decode_audio_to_array(str(Path(tmp) / "missing.mp4"))
+
+
+class NoteAudioModeTests(unittest.TestCase):
+    def make_generator(self, transcriber):
+        with mock.patch.object(note, "get_transcriber", return_value=transcriber):
+            return note.NoteGenerator()
+
+    def test_stream_mode_transcribes_pcm_without_writing_wav(self):
+        transcriber = mock.Mock()
+        transcriber.transcript.return_value = mock.Mock(full_text="hello", segments=[], language="en")
+        pcm = np.zeros(16000, dtype=np.float32)
+
+        with TemporaryDirectory() as tmp, \
+                mock.patch.object(note, "NOTE_OUTPUT_DIR", Path(tmp)), \
+                mock.patch.object(note, "AUDIO_PIPELINE_MODE", "stream"), \
+                mock.patch.object(note, "decode_audio_to_array", return_value=pcm) as decode, \
+                mock.patch.object(note.subprocess, "run") as run_ffmpeg:
+            generator = self.make_generator(transcriber)
+            audio_path = generator._extract_audio("video.mp4", "task-stream")
+            # 提取阶段（含分步执行的 extract 步骤）不解码，PCM 不会在转写队列里堆积
+            decode.assert_not_called()
+            held_slots = []
+            decode.side_effect = lambda path: held_slots.append(slot.call_args.args[0]) or pcm
+            with mock.patch.object(note, "stage_slot", wraps=note.stage_slot) as slot:
+                generator._transcribe_audio(audio_path, "task-stream")
+            wav_files = list(Path(tmp).glob("*.wav"))
+
+        self.assertEqual(audio_path, "video.mp4")
+        decode.assert_called_once_with("video.mp4")
+        run_ffmpeg.assert_not_called()
+        self.assertIs(transcriber.transcript.call_args.args[0], pcm)
+        self.assertEqual(wav_files, [])
+        # 解码发生在转写槽位内
+        self.assertEqual(held_slots, ["transcribe"])
+
+    def test_stream_decode_failure_falls_back_to_wav(self):
+        transcriber = mock.Mock()
+        transcriber.transcript.return_value = mock.Mock(full_text="hello", segments=[], language="en")
+
+        with TemporaryDirectory() as tmp, \
+                mock.patch.object(note, "NOTE_OUTPUT_DIR", Path(tmp)), \
+                mock.patch.object(note, "AUDIO_PIPELINE_MODE", "stream"), \
+                mock.patch.object(note, "decode_audio_to_array", side_effect=audio_stream.AudioDecodeError("pipe broken")), \
+                mock.patch.object(note.subprocess, "run") as run_ffmpeg:
+            generator = self.make_generator(transcriber)
+            generator._transcribe_audio("video.mp4", "task-fallback")
+
+        run_ffmpeg.assert_called_once()
+        self.assertEqual(transcriber.transcript.call_args.args[0], str(Path(tmp) / "task-fallback_audio.wav"))
+
+    def test_wav_mode_keeps_intermediate_file(self):
+        with TemporaryDirectory() as tmp, \
+                mock.patch.object(note, "NOTE_OUTPUT_DIR", Path(tmp)), \
+                mock.patch.object(note, "AUDIO_PIPELINE_MODE", "wav"), \
+                mock.patch.object(note.subprocess, "run") as run_ffmpeg:
+            generator = self.make_generator(mock.Mock())
+            audio_path = generator._extract_audio("video.mp4", "task-wav")
+
+        run_ffmpeg.assert_called_once()
+        self.assertTrue(audio_path.endswith("task-wav_audio.wav"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.bili_task_manager import BiliTaskManager
+from app.utils import rate_limiter
+from app.utils.rate_limiter import AsyncTokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for patcher in (
+            mock.patch.object(rate_limiter.time, "monotonic", self.clock.monotonic),
+            mock.patch.object(rate_limiter.asyncio, "sleep", self.clock.sleep),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_burst_then_steady_rate_across_concurrent_callers(self):
+        bucket = AsyncTokenBucket(rate=2.0, burst=3)
+        acquired = []
+
+        async def call(index):
+            await bucket.acquire()
+            acquired.append((index, self.clock.now))
+
+        async def run():
+            await asyncio.gather(*(call(index) for index in range(7)))
+
+        asyncio.run(run())
+
+        times = [at for _, at in acquired]
+        self.assertEqual(times[:3], [0.0, 0.0, 0.0])
+        self.assertEqual(times[3:], [0.5, 1.0, 1.5, 2.0])
+
+    def test_pause_blocks_until_cooldown_ends(self):
+        bucket = AsyncTokenBucket(rate=1.0, burst=5)
+        bucket.pause(30)
+
+        asyncio.run(bucket.acquire())
+
+        self.assertEqual(self.clock.now, 31.0)
+
+    def test_non_positive_rate_is_unlimited(self):
+        bucket = AsyncTokenBucket(rate=0)
+
+        async def run():
+            await asyncio.gather(*(bucket.acquire() for _ in range(50)))
+
+        asyncio.run(run())
+
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class TaskManagerAggregationTests(unittest.TestCase):
+    def test_per_video_progress_is_aggregated_and_broadcast(self):
+        manager = BiliTaskManager()
+        manager.total_videos = 4
+        manager.videos = {video: manager._new_video_state(video) for video in ("BV1", "BV2", "BV3", "BV4")}
+        broadcasts = []
+
+        async def callback(status, video, total, completed, progress, **kwargs):
+            broadcasts.append(kwargs)
+
+        manager.set_progress_callback(callback)
+
+        async def run():
+            await manager.start_video("BV1")
+            await manager.start_video("BV2")
+            await manager.update_bytes("BV1", 50, 100)
+            await manager.update_bytes("BV2", 25, 100)
+            await manager.finish_video("BV3", False)
+            await manager.start_video("BV4")
+            await manager.finish_video("BV4", True)
+
+        asyncio.run(run())
+
+        status = manager.get_status()
+        self.assertEqual((status["completed"], status["failed"]), (1, 1))
+        # (2 个已结束 * 100 + 50 + 25) / 4
+        self.assertEqual(status["overall_progress"], 68)
+        self.assertEqual([item["status"] for item in status["videos"]], ["running", "running", "failed", "completed"])
+        self.assertEqual(broadcasts[-1]["videos"][0]["downloaded_bytes"], 50)
+        self.assertEqual(broadcasts[-1]["overall_progress"], 68)
+
+
+if __name__ == "__main__":
+    unittest.main()
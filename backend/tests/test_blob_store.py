@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import video_task_dao
+from app.db.models import video_task as video_task_model
+from app.db.models.video_task import VideoTask
+from app.services import task_artifacts
+from app.services.transcript_pages import read_task_transcript_page
+from app.utils import blob_store as blob_store_module
+from app.utils.blob_store import BlobStore
+
+
+class BlobStoreTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.store = BlobStore(self.root, codec="gzip")
+
+    def test_identical_content_is_stored_once_and_compressed(self):
+        text = "## 第一节\n" + "重复的笔记内容。" * 500
+        first = self.store.put_text(text)
+        second = self.store.put_text(text)
+
+        files = list(self.root.glob("*/*"))
+        self.assertEqual(first, second)
+        self.assertEqual(len(files), 1)
+        self.assertLess(files[0].stat().st_size, len(text.encode("utf-8")) // 10)
+        self.assertEqual(BlobStore(self.root, codec="gzip").get_text(first), text)
+
+    def test_json_round_trip_and_missing_blob(self):
+        blob_id = self.store.put_json({"segments": [{"start": 0.0, "text": "你好"}]})
+
+        self.assertEqual(self.store.get_json(blob_id)["segments"][0]["text"], "你好")
+        self.assertIsNone(self.store.get_json("0" * 64))
+        self.assertFalse(self.store.exists(""))
+
+    def test_sweep_keeps_referenced_and_recent_blobs(self):
+        kept = self.store.put_text("kept")
+        stale = self.store.put_text("stale")
+        fresh = self.store.put_text("fresh")
+        old = time.time() - 7200
+        for blob_id in (kept, stale):
+            path = next(self.root.glob(f"*/{blob_id}.*"))
+            os.utime(path, (old, old))
+
+        removed = self.store.sweep({kept})
+
+        self.assertEqual(removed, 1)
+        self.assertTrue(self.store.exists(kept))
+        self.assertFalse(self.store.exists(stale))
+        self.assertTrue(self.store.exists(fresh))
+
+
+class TaskBlobTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.output_dir = self.tmp / "out"
+        self.output_dir.mkdir()
+        self.store = BlobStore(self.tmp / "blobs", codec="gzip")
+        for module in (video_task_model, video_task_dao, task_artifacts, blob_store_module):
+            patcher = mock.patch.object(module, "blob_store", self.store)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        engine = create_engine(f"sqlite:///{self.tmp / 'tasks.db'}", connect_args={"check_same_thread": False})
+        VideoTask.__table__.create(bind=engine)
+        self.addCleanup(engine.dispose)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        patcher = mock.patch.object(video_task_dao, "SessionLocal", self.session_factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        video_task_dao.create_task("task-a", "a.mp4")
+
+    def test_status_update_stores_markdown_as_blob_reference(self):
+        video_task_dao.update_task_status("task-a", "completed", "# 笔记\n正文")
+
+        db = self.session_factory()
+        row = db.query(VideoTask.markdown_inline, VideoTask.markdown_blob).filter(VideoTask.task_id == "task-a").one()
+        db.close()
+        self.assertIsNone(row.markdown_inline)
+        self.assertEqual(len(row.markdown_blob), 64)
+        self.assertEqual(video_task_dao.get_task_by_id("task-a").markdown, "# 笔记\n正文")
+
+    def test_inline_markdown_is_moved_to_blobs(self):
+        db = self.session_factory()
+        db.add(VideoTask(task_id="task-old", filename="old.mp4", markdown_inline="# 旧笔记"))
+        db.commit()
+        db.close()
+
+        self.assertEqual(video_task_dao.move_inline_markdown_to_blobs(batch_size=1), 1)
+        task = video_task_dao.get_task_by_id("task-old")
+        self.assertIsNone(task.markdown_inline)
+        self.assertEqual(task.markdown, "# 旧笔记")
+        self.assertEqual(video_task_dao.referenced_blob_ids(), {task.markdown_blob})
+
+    def test_rolled_back_status_update_leaves_row_untouched(self):
+        with mock.patch.object(video_task_dao, "_notify_status"), \
+                mock.patch.object(Session, "commit", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                video_task_dao.update_task_status("task-a", "completed", "# 未提交")
+
+        task = video_task_dao.get_task_by_id("task-a")
+        self.assertIsNone(task.markdown_blob)
+        # 已写出的 blob 没有任务引用，交给 sweep 清理
+        self.assertEqual(video_task_dao.referenced_blob_ids(), set())
+        self.assertEqual(self.store.sweep(video_task_dao.referenced_blob_ids(), min_age_seconds=0), 1)
+
+    def test_transcript_is_saved_as_blob_for_known_tasks(self):
+        data = {"language": "zh", "full_text": "", "segments": [{"start": 0.0, "end": 1.0, "text": "一"}]}
+        task_artifacts.save_transcript(self.output_dir, "task-a", data)
+        task_artifacts.save_transcript(self.output_dir, "task-unknown", data)
+
+        self.assertFalse(task_artifacts.transcript_file(self.output_dir, "task-a").exists())
+        self.assertTrue(task_artifacts.transcript_file(self.output_dir, "task-unknown").exists())
+        self.assertEqual(task_artifacts.load_transcript(self.output_dir, "task-a"), data)
+        self.assertEqual(read_task_transcript_page(self.output_dir, "task-a")["segments"][0]["text"], "一")
+
+        task_artifacts.delete_transcript(self.output_dir, "task-a")
+        self.assertFalse(task_artifacts.transcript_exists(self.output_dir, "task-a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.file_cache import FileCache
+
+
+class FileCacheTests(unittest.TestCase):
+    def test_hit_miss_and_json_round_trip(self):
+        with TemporaryDirectory() as tmp:
+            cache = FileCache(Path(tmp), max_bytes=1024 * 1024, suffix=".json")
+
+            self.assertIsNone(cache.get_json("abc123"))
+            cache.set_json("abc123", {"text": "你好"})
+
+            self.assertEqual(cache.get_json("abc123"), {"text": "你好"})
+            self.assertTrue(cache.path_for("abc123").parent.name == "ab")
+            stats = cache.stats()
+
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_evicts_least_recently_used_entries_over_limit(self):
+        with TemporaryDirectory() as tmp:
+            cache = FileCache(Path(tmp), max_bytes=1024)
+            now = time.time()
+            for index, key in enumerate(["aa01", "bb02", "cc03"]):
+                cache.set_bytes(key, b"x" * 100)
+                os.utime(cache.path_for(key), (now - 100 + index, now - 100 + index))
+            cache.max_bytes = 250
+
+            # 读取 aa01 后它成为最近使用，写入新条目时淘汰最久未用的 bb02 和 cc03
+            self.assertIsNotNone(cache.get_bytes("aa01"))
+            cache.set_bytes("dd04", b"y" * 100)
+
+            remaining = {key for key in ["aa01", "bb02", "cc03", "dd04"] if cache.path_for(key).exists()}
+            stats = cache.stats()
+
+        self.assertEqual(remaining, {"aa01", "dd04"})
+        self.assertLessEqual(stats["bytes"], 250)
+        self.assertEqual(stats["evictions"], 2)
+
+    def test_expired_entries_are_misses(self):
+        with TemporaryDirectory() as tmp:
+            cache = FileCache(Path(tmp), max_bytes=0, ttl_seconds=60)
+            cache.set_text("ee05", "old")
+            old = time.time() - 120
+            os.utime(cache.path_for("ee05"), (old, old))
+
+            self.assertIsNone(cache.get_text("ee05"))
+            self.assertFalse(cache.path_for("ee05").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
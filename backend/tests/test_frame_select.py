@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils import frame_select
+from app.utils.ffmpeg_helper import get_ffmpeg_path
+
+
+def _make_slides(path: Path) -> None:
+    """两段静止画面：0-6 秒为 testsrc 首帧，6-12 秒为彩条"""
+    subprocess.run(
+        [get_ffmpeg_path(),
+         "-f", "lavfi", "-i", "testsrc=duration=1:size=320x180:rate=10",
+         "-f", "lavfi", "-i", "smptebars=duration=6:size=320x180:rate=10",
+         "-filter_complex", "[0:v]trim=end_frame=1,loop=loop=59:size=1:start=0,setpts=N/10/TB[a];[a][1:v]concat=n=2:v=1:a=0",
+         "-g", "10", "-y", "-loglevel", "error", str(path)],
+        check=True,
+    )
+
+
+class FrameScoringTests(unittest.TestCase):
+    def test_prefers_sharp_stable_frame_over_blur_and_transition(self):
+        rng = np.random.default_rng(0)
+        sharp = rng.integers(0, 255, size=(90, 160)).astype(np.uint8)
+        blurred = np.full((90, 160), 128, dtype=np.uint8)
+        transition = (sharp // 2 + 128).astype(np.uint8)
+        frames = np.stack([blurred, transition, sharp, sharp, sharp])
+        offsets = np.array([-1.2, -0.6, 0.0, 0.6, 1.2])
+
+        self.assertGreater(frame_select.sharpness_scores(frames)[2], frame_select.sharpness_scores(frames)[0])
+        # 紧邻转场的帧也被扣分，选中其后清晰且稳定、离标记最近的一帧
+        self.assertEqual(frame_select.best_frame_index(frames, offsets, 1.5), 3)
+
+    def test_dhash_is_stable_under_small_noise(self):
+        rng = np.random.default_rng(1)
+        gradient = np.tile(np.linspace(0, 255, 160), (90, 1))
+        noisy = np.clip(gradient + rng.normal(0, 3, gradient.shape), 0, 255)
+        flipped = gradient[:, ::-1]
+
+        base = frame_select.dhash(gradient)
+        self.assertLessEqual(frame_select.hamming_distance(base, frame_select.dhash(noisy)), 2)
+        self.assertGreater(frame_select.hamming_distance(base, frame_select.dhash(flipped)), 32)
+
+
+class SelectScreenshotFramesTests(unittest.TestCase):
+    def test_same_slide_markers_collapse_and_new_slide_is_kept(self):
+        with TemporaryDirectory() as tmp:
+            video = Path(tmp) / "slides.mp4"
+            _make_slides(video)
+
+            choices = frame_select.select_screenshot_frames(str(video), [2, 4, 9, 4])
+
+        self.assertEqual(sorted(choices), [2, 4, 9])
+        self.assertIsNone(choices[2].duplicate_of)
+        self.assertEqual(choices[4].duplicate_of, 2)
+        self.assertIsNone(choices[9].duplicate_of)
+        for timestamp, choice in choices.items():
+            self.assertLessEqual(abs(choice.time - timestamp), frame_select.SCREENSHOT_WINDOW_SECONDS)
+
+    def test_returning_to_an_earlier_slide_gets_its_own_screenshot(self):
+        with TemporaryDirectory() as tmp:
+            video = Path(tmp) / "slides.mp4"
+            _make_slides(video)
+
+            # 标记顺序为 2 -> 9 -> 3：第三个标记只和上一张保留的彩条比较
+            choices = frame_select.select_screenshot_frames(str(video), [2, 9, 3])
+
+        self.assertIsNone(choices[9].duplicate_of)
+        self.assertIsNone(choices[3].duplicate_of)
+
+    def test_decode_failure_returns_no_choices(self):
+        failure = subprocess.CalledProcessError(1, "ffmpeg", stderr="boom")
+        with mock.patch.object(frame_select.subprocess, "run", side_effect=failure):
+            self.assertEqual(frame_select.select_screenshot_frames("missing.mp4", [1, 2]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
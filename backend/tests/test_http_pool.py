@@ -0,0 +1,180 @@
+import asyncio
+import socket
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import http_pool
+from app.services.http_pool import AsyncHostPoolTransport, DnsCache, HostPoolTransport
+
+
+def _addrinfo(address):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 443))]
+
+
+class HttpPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(http_pool.socket, "getaddrinfo", return_value=_addrinfo("203.0.113.7"))
+        self.getaddrinfo = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.seen = []
+
+    def _handler(self, request):
+        self.seen.append(request)
+        return httpx.Response(200, headers={"set-cookie": "buvid3=abc; Domain=.bilibili.com; Path=/"}, json={"code": 0})
+
+    def _client(self, dns=None):
+        transport = HostPoolTransport(dns or DnsCache(ttl=300))
+        transport.pools.factory = lambda: httpx.MockTransport(self._handler)
+        return httpx.Client(transport=transport, cookies=http_pool._stateless_cookies()), transport
+
+
+class HostPoolTransportTests(HttpPoolTestCase):
+    def test_requests_are_pinned_to_cached_address_and_keep_hostname(self):
+        client, transport = self._client()
+        with client:
+            client.get("https://api.bilibili.com/x/web-interface/view", params={"bvid": "BV1"})
+            client.get("https://api.bilibili.com/x/web-interface/nav")
+            client.get("https://upos.example.test/video.m4s")
+            self.assertEqual(transport.pools.hosts(), ["api.bilibili.com", "upos.example.test"])
+
+        self.assertEqual(self.seen[0].url.host, "203.0.113.7")
+        self.assertEqual(self.seen[0].headers["host"], "api.bilibili.com")
+        self.assertEqual(self.seen[0].extensions["sni_hostname"], "api.bilibili.com")
+        self.assertEqual(self.seen[0].url.params["bvid"], "BV1")
+        # one lookup per host, the second API call is served from the cache
+        self.assertEqual(self.getaddrinfo.call_count, 2)
+        self.assertEqual(transport.dns.stats()["hits"], 1)
+
+    def test_stale_address_falls_back_to_normal_resolution(self):
+        client, transport = self._client()
+
+        def handler(request):
+            if request.url.host == "203.0.113.7":
+                raise httpx.ConnectError("unreachable", request=request)
+            self.seen.append(request)
+            return httpx.Response(200)
+
+        transport.pools.factory = lambda: httpx.MockTransport(handler)
+        with client:
+            response = client.get("https://api.bilibili.com/x/web-interface/nav")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.seen[0].url.host, "api.bilibili.com")
+        self.assertIsNone(transport.dns.lookup("api.bilibili.com", 443))
+
+    def test_every_resolved_address_is_tried_in_order(self):
+        self.getaddrinfo.return_value = [
+            (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("2001:db8::7", 443, 0, 0)),
+            *_addrinfo("203.0.113.7"),
+            *_addrinfo("203.0.113.7"),
+        ]
+        client, transport = self._client()
+        tried = []
+
+        def handler(request):
+            tried.append(request.url.host)
+            if request.url.host == "2001:db8::7":
+                raise httpx.ConnectError("no IPv6 route", request=request)
+            return httpx.Response(200)
+
+        transport.pools.factory = lambda: httpx.MockTransport(handler)
+        with client:
+            client.get("https://api.bilibili.com/x/web-interface/nav")
+            client.get("https://api.bilibili.com/x/web-interface/view")
+
+        self.assertEqual(tried, ["2001:db8::7", "203.0.113.7", "2001:db8::7", "203.0.113.7"])
+        self.assertEqual(transport.dns.lookup("api.bilibili.com", 443), ["2001:db8::7", "203.0.113.7"])
+        self.assertEqual(self.getaddrinfo.call_count, 1)
+
+    def test_evicted_host_pool_is_closed_once_its_responses_are(self):
+        transport = HostPoolTransport(DnsCache(ttl=0), max_hosts=1)
+        created = []
+
+        def handler(request):
+            return httpx.Response(200, stream=httpx.ByteStream(b"media bytes"))
+
+        def factory():
+            created.append(mock.Mock(wraps=httpx.MockTransport(handler)))
+            return created[-1]
+
+        transport.pools.factory = factory
+        with httpx.Client(transport=transport) as client:
+            with client.stream("GET", "https://upos.example.test/video.m4s") as download:
+                client.get("https://api.bilibili.com/x/web-interface/nav")
+                self.assertEqual(transport.pools.hosts(), ["api.bilibili.com"])
+                # 淘汰时下载仍在读响应体，不能关闭
+                created[0].close.assert_not_called()
+                download.read()
+            created[0].close.assert_called_once()
+
+            client.get("https://upos.example.test/video.m4s")
+            # api 主机的池淘汰时没有进行中的响应，立即关闭
+            created[1].close.assert_called_once()
+
+    def test_ip_literals_and_disabled_cache_are_not_resolved(self):
+        client, _ = self._client(DnsCache(ttl=0))
+        with client:
+            client.get("https://api.bilibili.com/x/web-interface/nav")
+            client.get("http://127.0.0.1:8483/health")
+
+        self.getaddrinfo.assert_not_called()
+        self.assertEqual([request.url.host for request in self.seen], ["api.bilibili.com", "127.0.0.1"])
+
+    def test_shared_client_does_not_keep_cookies_between_callers(self):
+        client, _ = self._client()
+        with client:
+            client.get("https://api.bilibili.com/x/web-interface/nav", headers={"Cookie": "SESSDATA=user-a"})
+            client.get("https://api.bilibili.com/x/web-interface/nav")
+
+        self.assertEqual(len(client.cookies), 0)
+        self.assertNotIn("cookie", self.seen[1].headers)
+
+    def test_async_transport_resolves_off_the_event_loop(self):
+        transport = AsyncHostPoolTransport(DnsCache(ttl=300))
+        transport.pools.factory = lambda: httpx.MockTransport(self._handler)
+
+        async def run():
+            async with httpx.AsyncClient(transport=transport) as client:
+                await client.get("https://api.bilibili.com/x/web-interface/nav")
+                await client.get("https://api.bilibili.com/x/web-interface/view")
+
+        asyncio.run(run())
+
+        self.assertEqual([request.url.host for request in self.seen], ["203.0.113.7", "203.0.113.7"])
+        self.assertEqual(self.getaddrinfo.call_count, 1)
+
+
+class SharedClientTests(unittest.TestCase):
+    def test_sync_client_is_shared_and_recreated_after_close(self):
+        with mock.patch.object(http_pool, "_sync_client", None):
+            first = http_pool.web_http_client()
+            self.assertIs(http_pool.web_http_client(), first)
+            http_pool.close_web_http_clients()
+            self.assertTrue(first.is_closed)
+            second = http_pool.web_http_client()
+            self.assertIsNot(second, first)
+            http_pool.close_web_http_clients()
+
+    def test_async_client_is_shared_per_event_loop(self):
+        async def run():
+            client = http_pool.web_async_http_client()
+            same = http_pool.web_async_http_client()
+            await http_pool.aclose_web_async_http_client()
+            return client, same
+
+        first, same = asyncio.run(run())
+        second, _ = asyncio.run(run())
+
+        self.assertIs(first, same)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
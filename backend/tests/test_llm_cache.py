@@ -0,0 +1,109 @@
+import re
+import sys
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.gpt.openai_gpt import OpenAIGPT
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.routers.note import RegenerateRequest
+from app.services import llm_cache
+from app.utils.file_cache import FileCache
+
+
+class LLMResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.cache = FileCache(Path(self.tmp.name) / "llm", 1024 * 1024, ".md", ttl_seconds=3600)
+        self.patches = [
+            mock.patch.object(llm_cache, "llm_cache", self.cache),
+            mock.patch.object(llm_cache, "LLM_CACHE_ENABLED", True),
+            mock.patch("app.gpt.token_budget.tiktoken", None),
+            mock.patch("app.gpt.openai_gpt.NOTE_GENERATION_MODE", "chunk"),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+        self.prompts = []
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.side_effect = self._create
+        self.patches.append(mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=_async_client(fake_client)))
+        self.patches[-1].start()
+        self.gpt = OpenAIGPT(api_key="sk-test", base_url="https://cache.test/v1", model="demo", max_concurrency=1)
+        self.gpt.budget = replace(self.gpt.budget, chunk_target_tokens=3000)
+
+        segments = [
+            TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500)
+            for i in range(60)
+        ]
+        self.transcript = TranscriptResult(language="zh", full_text="", segments=segments)
+
+    def tearDown(self):
+        for patcher in reversed(self.patches):
+            patcher.stop()
+        self.tmp.cleanup()
+
+    def _create(self, **kwargs):
+        prompt = kwargs["messages"][1]["content"]
+        self.prompts.append(prompt)
+        part = re.search(r"part (\d+)/3", prompt)
+        content = f"summary {part.group(1)}" if part else f"# final {len(self.prompts)}"
+        return [mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=content))])]
+
+    def _chunk_calls(self):
+        return sum(1 for prompt in self.prompts if re.search(r"part \d+/3", prompt))
+
+    def test_style_change_only_reruns_final_merge(self):
+        self.gpt.summarize(self.transcript, filename="long.mp4", note_style="simple")
+        self.assertEqual((len(self.prompts), self._chunk_calls()), (4, 3))
+
+        self.gpt.summarize(self.transcript, filename="long.mp4", note_style="detailed")
+
+        self.assertEqual((len(self.prompts), self._chunk_calls()), (5, 3))
+        self.assertEqual(self.cache.stats()["hits"], 3)
+
+    def test_refresh_reruns_final_and_bypass_reruns_everything(self):
+        first = self.gpt.summarize(self.transcript, filename="long.mp4")
+        cached = self.gpt.summarize(self.transcript, filename="long.mp4")
+        self.assertEqual(cached, first)
+        self.assertEqual(len(self.prompts), 4)
+
+        refreshed = self.gpt.summarize(self.transcript, filename="long.mp4", refresh=True)
+        self.assertNotEqual(refreshed, first)
+        self.assertEqual((len(self.prompts), self._chunk_calls()), (5, 3))
+
+        self.gpt.summarize(self.transcript, filename="long.mp4", bypass_cache=True)
+        self.assertEqual((len(self.prompts), self._chunk_calls()), (9, 6))
+
+    def test_cache_key_covers_model_and_temperature(self):
+        base = llm_cache.llm_cache_key("demo", "https://a/v1", "sys", "prompt", 0.35)
+
+        self.assertEqual(base, llm_cache.llm_cache_key("demo", "https://a/v1/", "sys", "prompt", 0.35))
+        self.assertNotEqual(base, llm_cache.llm_cache_key("other", "https://a/v1", "sys", "prompt", 0.35))
+        self.assertNotEqual(base, llm_cache.llm_cache_key("demo", "https://a/v1", "sys", "prompt", 0.7))
+
+    def test_regenerate_request_accepts_bypass_cache_option(self):
+        self.assertTrue(RegenerateRequest(bypass_cache=True).bypassCache)
+        self.assertTrue(RegenerateRequest(bypassCache=True).bypassCache)
+        self.assertFalse(RegenerateRequest().bypassCache)
+
+
+def _async_client(fake_client):
+    """AsyncOpenAI stand-in answering from a sync chat.completions fake."""
+    async def create(**kwargs):
+        return _async_events(fake_client.chat.completions.create(**kwargs))
+
+    return mock.Mock(chat=mock.Mock(completions=mock.Mock(create=create)))
+
+
+async def _async_events(events):
+    for event in events:
+        yield event
+
+
+if __name__ == "__main__":
+    unittest.main()
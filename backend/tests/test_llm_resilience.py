@@ -0,0 +1,214 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+from openai import InternalServerError, RateLimitError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.gpt.openai_gpt import OpenAIGPT
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.services import llm_resilience
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    call_with_retries,
+    call_with_retries_async,
+)
+from app.services.model_provider import fallback_model_configs
+
+
+def _chunk(content):
+    return mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=content))])
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://provider.test/v1/chat/completions")
+    return cls("provider error", response=httpx.Response(status, request=request, headers=headers), body=None)
+
+
+def _broken_stream(*contents):
+    yield from (_chunk(content) for content in contents)
+    raise httpx.RemoteProtocolError("peer closed connection without sending complete message body")
+
+
+def _async_client(fake_client):
+    """AsyncOpenAI stand-in answering from a sync chat.completions fake."""
+    async def create(**kwargs):
+        return _async_events(fake_client.chat.completions.create(**kwargs))
+
+    return mock.Mock(chat=mock.Mock(completions=mock.Mock(create=create)))
+
+
+async def _async_events(events):
+    for event in events:
+        yield event
+
+
+def _transcript():
+    return TranscriptResult(language="zh", full_text="hello", segments=[TranscriptSegment(start=0, end=1, text="hello")])
+
+
+class ResilienceTestCase(unittest.TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.dict(llm_resilience._breakers, clear=True),
+            mock.patch.object(llm_resilience, "llm_metrics", llm_resilience.CallMetrics()),
+            mock.patch.object(llm_resilience.time, "sleep"),
+            mock.patch.object(llm_resilience.asyncio, "sleep", mock.AsyncMock()),
+            mock.patch("app.gpt.token_budget.tiktoken", None),
+            mock.patch("app.services.llm_cache.LLM_CACHE_ENABLED", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class RetryTests(ResilienceTestCase):
+    def test_transient_errors_are_retried_until_success(self):
+        call = mock.Mock(side_effect=[_status_error(InternalServerError, 503), httpx.ReadTimeout("slow"), "ok"])
+        retries = []
+
+        result = call_with_retries("p", call, RetryPolicy(attempts=3), on_retry=lambda *args: retries.append(args[0]))
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(retries, [1, 2])
+        stats = llm_resilience.llm_metrics.stats()["p"]
+        self.assertEqual((stats["calls"], stats["attempts"], stats["retries"], stats["failures"]), (1, 3, 2, 0))
+
+    def test_non_retryable_errors_fail_immediately(self):
+        call = mock.Mock(side_effect=ValueError("context_length_exceeded"))
+
+        with self.assertRaises(ValueError):
+            call_with_retries("p", call, RetryPolicy(attempts=4))
+        self.assertEqual(call.call_count, 1)
+
+    def test_backoff_grows_and_honours_retry_after(self):
+        policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=8.0)
+
+        self.assertTrue(0.5 <= policy.delay(1) <= 1.0)
+        self.assertTrue(4.0 <= policy.delay(4) <= 8.0)
+        self.assertTrue(4.0 <= policy.delay(9) <= 8.0)
+        self.assertEqual(policy.delay(1, _status_error(RateLimitError, 429, {"retry-after": "3"})), 3.0)
+
+    def test_async_retry_waits_on_event_loop(self):
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise httpx.ConnectError("refused")
+            return "ok"
+
+        with mock.patch.object(llm_resilience.asyncio, "sleep", mock.AsyncMock()) as sleep:
+            result = asyncio.run(call_with_retries_async("p", call, RetryPolicy(attempts=3)))
+
+        self.assertEqual(result, "ok")
+        sleep.assert_awaited_once()
+
+
+class CircuitBreakerTests(ResilienceTestCase):
+    def test_breaker_opens_after_consecutive_failures_and_allows_one_trial(self):
+        breaker = CircuitBreaker(threshold=2, reset_after=30)
+        with mock.patch.object(llm_resilience.time, "monotonic", return_value=100.0):
+            breaker.record_failure()
+            breaker.before_call("p")
+            breaker.record_failure()
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_call("p")
+        with mock.patch.object(llm_resilience.time, "monotonic", return_value=131.0):
+            breaker.before_call("p")
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_call("p")
+            breaker.record_success()
+            self.assertEqual(breaker.state, "closed")
+
+    def test_open_breaker_rejects_without_calling_provider(self):
+        llm_resilience._breakers["p"] = CircuitBreaker(threshold=1, reset_after=60)
+        call = mock.Mock(side_effect=_status_error(InternalServerError, 502))
+        with self.assertRaises(InternalServerError):
+            call_with_retries("p", call, RetryPolicy(attempts=1))
+
+        with self.assertRaises(CircuitOpenError):
+            call_with_retries("p", call, RetryPolicy(attempts=3))
+        self.assertEqual(call.call_count, 1)
+        self.assertEqual(llm_resilience.llm_metrics.stats()["p"]["rejected"], 1)
+
+
+class OpenAIGPTResilienceTests(ResilienceTestCase):
+    def _gpt(self, client, secondary=None, **kwargs):
+        clients = {"https://flaky.test/v1": client, "https://backup.test/v1": secondary}
+        patcher = mock.patch(
+            "app.gpt.openai_gpt.create_async_openai_client",
+            side_effect=lambda **options: _async_client(clients[options["base_url"]]),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return OpenAIGPT(api_key="sk-test", base_url="https://flaky.test/v1", model="demo", **kwargs)
+
+    def test_stream_broken_mid_response_is_retried_from_the_start(self):
+        client = mock.Mock()
+        client.chat.completions.create.side_effect = [_broken_stream("## Half"), [_chunk("## Whole note")]]
+        events = []
+
+        markdown = self._gpt(client).summarize(
+            _transcript(), filename="demo.mp4", progress_callback=lambda message, partial: events.append(message)
+        )
+
+        self.assertEqual(markdown, "## Whole note")
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        self.assertTrue(any("第 2 次尝试" in message for message in events))
+
+    def test_fails_over_to_secondary_model_when_provider_is_down(self):
+        primary = mock.Mock()
+        primary.chat.completions.create.side_effect = _status_error(InternalServerError, 503)
+        secondary = mock.Mock()
+        secondary.chat.completions.create.return_value = [_chunk("# From backup")]
+        fallback = {"provider_type": "openai", "base_url": "https://backup.test/v1", "api_key": "sk-b", "model": "backup"}
+        gpt = self._gpt(primary, secondary=secondary, fallbacks=[fallback])
+
+        markdown = gpt.summarize(_transcript(), filename="demo.mp4")
+
+        self.assertEqual(markdown, "# From backup")
+        self.assertEqual(primary.chat.completions.create.call_count, llm_resilience.LLM_RETRY_ATTEMPTS)
+        self.assertEqual(secondary.chat.completions.create.call_args.kwargs["model"], "backup")
+        stats = llm_resilience.llm_metrics.stats()
+        self.assertEqual(stats["openai|https://flaky.test/v1"]["failovers"], 1)
+        self.assertEqual(stats["openai|https://backup.test/v1"]["calls"], 1)
+
+    def test_prompt_errors_do_not_fail_over(self):
+        primary = mock.Mock()
+        primary.chat.completions.create.side_effect = _status_error(InternalServerError, 400)
+        fallback = {"provider_type": "openai", "base_url": "https://backup.test/v1", "api_key": "sk-b", "model": "backup"}
+
+        with self.assertRaises(RuntimeError):
+            self._gpt(primary, fallbacks=[fallback]).summarize(_transcript(), filename="demo.mp4")
+        self.assertEqual(primary.chat.completions.create.call_count, 1)
+
+
+class FallbackConfigTests(unittest.TestCase):
+    def test_fallbacks_are_normalized_and_exclude_the_primary(self):
+        config = {
+            "provider": "deepseek",
+            "base_url": "https://api.deepseek.com",
+            "model": "deepseek-chat",
+            "fallback_models": [
+                {"provider": "deepseek", "base_url": "https://api.deepseek.com/v1", "model": "deepseek-chat"},
+                {"providerType": "ollama", "model": "qwen2.5"},
+                {"provider": "openai"},
+            ],
+        }
+
+        with mock.patch.dict("os.environ", {"NOTE_LLM_FALLBACKS": '[{"provider": "openai", "api_key": "sk", "model": "gpt-4o-mini"}]'}):
+            fallbacks = fallback_model_configs(config)
+
+        self.assertEqual([item["model"] for item in fallbacks], ["qwen2.5", "gpt-4o-mini"])
+        self.assertEqual(fallbacks[0]["base_url"], "http://127.0.0.1:11434/v1")
+        self.assertEqual(fallbacks[0]["api_key"], "ollama")
+
+
+if __name__ == "__main__":
+    unittest.main()
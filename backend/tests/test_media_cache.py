@@ -0,0 +1,119 @@
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.services import media_cache, note
+from app.utils.file_cache import FileCache
+
+
+class MediaCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.tmp_path = Path(self.tmp.name)
+        self.output_dir = self.tmp_path / "notes"
+        self.output_dir.mkdir()
+        self.transcripts = FileCache(self.tmp_path / "cache" / "transcripts", 1024 * 1024, ".json")
+        self.notes = FileCache(self.tmp_path / "cache" / "notes", 1024 * 1024, ".md")
+        self.patches = [
+            mock.patch.object(note, "NOTE_OUTPUT_DIR", self.output_dir),
+            mock.patch.object(note, "transcript_cache", self.transcripts),
+            mock.patch.object(media_cache, "transcript_cache", self.transcripts),
+            mock.patch.object(media_cache, "note_cache", self.notes),
+            mock.patch.object(note, "write_note_progress"),
+            mock.patch.object(note, "clear_note_progress"),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+        self.transcriber = mock.Mock(model_size="base", compute_type="int8")
+        self.transcriber.transcript.return_value = TranscriptResult(
+            language="zh",
+            full_text="大家好",
+            segments=[TranscriptSegment(start=0.0, end=1.0, text="大家好")],
+        )
+
+    def tearDown(self):
+        for patcher in reversed(self.patches):
+            patcher.stop()
+        self.tmp.cleanup()
+
+    def make_video(self, name, content=b"same video bytes" * 1000):
+        path = self.tmp_path / name
+        path.write_bytes(content)
+        return str(path)
+
+    def make_generator(self, model_config=None):
+        with mock.patch.object(note, "get_transcriber", return_value=self.transcriber):
+            return note.NoteGenerator(model_config=model_config)
+
+    def test_fingerprint_matches_copies_and_differs_for_other_content(self):
+        first = self.make_video("a.mp4")
+        copy = self.make_video("b.mp4")
+        other = self.make_video("c.mp4", b"other video bytes" * 1000)
+
+        self.assertEqual(media_cache.media_fingerprint(first), media_cache.media_fingerprint(copy))
+        self.assertNotEqual(media_cache.media_fingerprint(first), media_cache.media_fingerprint(other))
+
+    def test_fingerprint_covers_the_whole_file(self):
+        content = bytearray(4 * 1024 * 1024)
+        first = self.make_video("edit-a.mp4", bytes(content))
+        # 同样大小，只在头/中/尾之外的位置不同
+        content[1024 * 1024 + 100] = 1
+        second = self.make_video("edit-b.mp4", bytes(content))
+
+        self.assertNotEqual(media_cache.media_fingerprint(first), media_cache.media_fingerprint(second))
+
+    def test_transcript_is_reused_across_tasks_with_same_media(self):
+        first_video = self.make_video("first.mp4")
+        second_video = self.make_video("second.mp4")
+
+        with mock.patch.object(note, "AUDIO_PIPELINE_MODE", "stream"), \
+                mock.patch.object(note, "decode_audio_to_array", return_value="pcm"):
+            generator = self.make_generator()
+            generator._transcribe_audio(generator._extract_audio(first_video, "task-a"), "task-a")
+
+            with mock.patch.object(note.subprocess, "run") as run_ffmpeg, \
+                    mock.patch.object(note, "AUDIO_PIPELINE_MODE", "wav"):
+                second = self.make_generator()
+                audio_path = second._extract_audio(second_video, "task-b")
+                transcript = second._transcribe_audio(audio_path, "task-b")
+
+        run_ffmpeg.assert_not_called()
+        self.assertEqual(self.transcriber.transcript.call_count, 1)
+        self.assertEqual(transcript.full_text, "大家好")
+        self.assertTrue((self.output_dir / "task-b_transcript.json").exists())
+        self.assertEqual(self.transcripts.stats()["hits"], 1)
+
+    def test_note_cache_is_keyed_by_model_and_style_and_refresh_bypasses_it(self):
+        transcript = self.transcriber.transcript.return_value
+        gpt = mock.Mock()
+        gpt.summarize.side_effect = ["# first", "# second", "# third"]
+        config = {"provider": "openai", "model": "gpt-a", "base_url": "https://api.example/v1"}
+
+        generator = self.make_generator(config)
+        generator.gpt = gpt
+        self.assertEqual(generator._summarize_text(transcript, "v.mp4", "task-1", note_style="simple"), "# first")
+        self.assertEqual(generator._summarize_text(transcript, "v.mp4", "task-2", note_style="simple"), "# first")
+        self.assertEqual(generator._summarize_text(transcript, "v.mp4", "task-3", note_style="detailed"), "# second")
+
+        other_model = self.make_generator({**config, "model": "gpt-b"})
+        other_model.gpt = gpt
+        self.assertEqual(other_model._summarize_text(transcript, "v.mp4", "task-4", note_style="simple"), "# third")
+
+        gpt.summarize.side_effect = ["# refreshed"]
+        (self.output_dir / "task-2_markdown.md").unlink()
+        self.assertEqual(
+            generator._summarize_text(transcript, "v.mp4", "task-2", note_style="simple", refresh=True),
+            "# refreshed",
+        )
+        self.assertEqual(gpt.summarize.call_count, 4)
+        self.assertEqual(self.notes.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,284 @@
+import asyncio
+import sys
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import media_download
+from app.services.bili_task_manager import BiliTaskManager
+from app.services.media_download import (
+    DownloadCancelled,
+    download_segmented,
+    parse_content_range,
+    part_file,
+    split_ranges,
+    stream_to_file,
+    validator_file,
+)
+
+PAYLOAD = bytes(range(256)) * 40
+
+
+def _body(content, status=200, headers=None):
+    headers = {"content-length": str(len(content)), **(headers or {})}
+    return httpx.Response(status, headers=headers, stream=httpx.ByteStream(content))
+
+
+def _ranged_server(payload, requests, support_range=True, truncate_once=(), etag=None, honour_if_range=True):
+    truncated = set()
+    version = {"etag": etag} if etag else {}
+
+    def handler(request):
+        requests.append(request.headers.get("range"))
+        header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if honour_if_range and if_range is not None and if_range != etag:
+            header = None
+        if header and support_range:
+            start, _, end = header.split("=")[1].partition("-")
+            start, end = int(start), int(end) if end else len(payload) - 1
+            if start >= len(payload):
+                return httpx.Response(416, headers={"content-range": f"bytes */{len(payload)}"})
+            body = payload[start:end + 1]
+            if start in truncate_once and start not in truncated:
+                truncated.add(start)
+                body = body[:len(body) // 2]
+            return _body(body, 206, {"content-range": f"bytes {start}-{end}/{len(payload)}", **version})
+        return _body(payload, headers=version)
+
+    return handler
+
+
+class StreamToFileTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dest = Path(tmp.name) / "video.mp4"
+        patcher = mock.patch.object(media_download, "MEDIA_PROGRESS_INTERVAL", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _download(self, handler, **kwargs):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await stream_to_file(client, "https://cdn.test/video.mp4", self.dest, **kwargs)
+
+        return asyncio.run(run())
+
+    def test_streams_in_chunks_to_final_file_and_reports_bytes(self):
+        requests, progress = [], []
+
+        async def on_progress(downloaded, total):
+            progress.append((downloaded, total))
+
+        size = self._download(_ranged_server(PAYLOAD, requests), on_progress=on_progress, chunk_size=4096)
+
+        self.assertEqual(size, len(PAYLOAD))
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+        self.assertFalse(part_file(self.dest).exists())
+        self.assertEqual(requests, [None])
+        self.assertEqual(progress[-1], (len(PAYLOAD), len(PAYLOAD)))
+        self.assertGreater(len(progress), 2)
+
+    def _partial(self, content, validator='"v1"'):
+        part_file(self.dest).write_bytes(content)
+        if validator:
+            validator_file(self.dest).write_text(validator, encoding="utf-8")
+
+    def test_first_download_records_validator_until_complete(self):
+        def handler(request):
+            return httpx.Response(
+                200, headers={"content-length": str(len(PAYLOAD)), "etag": '"v1"'}, stream=httpx.ByteStream(PAYLOAD[:1000])
+            )
+
+        with self.assertRaises(httpx.HTTPError):
+            self._download(handler)
+        self.assertEqual(validator_file(self.dest).read_text(encoding="utf-8"), '"v1"')
+
+        self._download(_ranged_server(PAYLOAD, [], etag='"v1"'))
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+        self.assertFalse(validator_file(self.dest).exists())
+
+    def test_resumes_partial_file_with_range(self):
+        self._partial(PAYLOAD[:3000])
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, etag='"v1"'))
+
+        self.assertEqual(requests, ["bytes=3000-"])
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+
+    def test_changed_file_restarts_from_zero(self):
+        self._partial(b"x" * 3000)
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, etag='"v2"'))
+
+        self.assertEqual(requests, ["bytes=3000-"])
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+
+    def test_changed_file_restarts_when_server_ignores_if_range(self):
+        self._partial(b"x" * 3000)
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, etag='"v2"', honour_if_range=False))
+
+        self.assertEqual(requests, ["bytes=3000-", None])
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+
+    def test_partial_file_without_validator_is_not_resumed(self):
+        self._partial(b"x" * 3000, validator=None)
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, etag='"v1"'))
+
+        self.assertEqual(requests, [None])
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+
+    def test_restarts_when_range_is_ignored(self):
+        self._partial(b"stale")
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, support_range=False))
+
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+
+    def test_complete_partial_file_is_renamed_on_416(self):
+        self._partial(PAYLOAD)
+
+        self.assertEqual(self._download(_ranged_server(PAYLOAD, [], etag='"v1"')), len(PAYLOAD))
+        self.assertEqual(self.dest.read_bytes(), PAYLOAD)
+        self.assertFalse(validator_file(self.dest).exists())
+
+    def test_truncated_body_keeps_part_file_for_resume(self):
+        def handler(request):
+            return httpx.Response(200, headers={"content-length": str(len(PAYLOAD))}, stream=httpx.ByteStream(PAYLOAD[:1000]))
+
+        with self.assertRaises(httpx.HTTPError):
+            self._download(handler)
+
+        self.assertFalse(self.dest.exists())
+        self.assertEqual(part_file(self.dest).read_bytes(), PAYLOAD[:1000])
+
+    def test_parse_content_range(self):
+        self.assertEqual(parse_content_range("bytes 100-199/1000"), (100, 1000))
+        self.assertEqual(parse_content_range("bytes */1000"), (None, 1000))
+        self.assertEqual(parse_content_range(None), (None, None))
+
+
+class SegmentedDownloadTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.target = Path(tmp.name) / "track.m4s"
+        patcher = mock.patch.object(media_download.time, "sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _download(self, handler, **kwargs):
+        with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+            return download_segmented(
+                "https://upos.test/track.m4s", self.target, client=client, min_segment_bytes=1024, chunk_size=512, **kwargs
+            )
+
+    def test_ranges_are_fetched_in_parallel_into_one_file(self):
+        requests, progress = [], []
+
+        self._download(_ranged_server(PAYLOAD, requests), on_progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual(self.target.read_bytes(), PAYLOAD)
+        self.assertEqual(requests[0], "bytes=0-0")
+        self.assertCountEqual(requests[1:], ["bytes=0-2559", "bytes=2560-5119", "bytes=5120-7679", "bytes=7680-10239"])
+        self.assertEqual(max(progress), (len(PAYLOAD), len(PAYLOAD)))
+
+    def test_interrupted_segment_resumes_from_its_offset(self):
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, truncate_once={2560}))
+
+        self.assertEqual(self.target.read_bytes(), PAYLOAD)
+        self.assertIn("bytes=3840-5119", requests)
+
+    def test_falls_back_to_single_stream_without_range_support(self):
+        requests = []
+
+        self._download(_ranged_server(PAYLOAD, requests, support_range=False))
+
+        self.assertEqual(self.target.read_bytes(), PAYLOAD)
+        self.assertEqual(requests, ["bytes=0-0", None])
+
+    def test_failed_segment_removes_incomplete_file(self):
+        def handler(request):
+            if request.headers["range"] == "bytes=0-0":
+                return _body(PAYLOAD[:1], 206, {"content-range": f"bytes 0-0/{len(PAYLOAD)}"})
+            return httpx.Response(403)
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            self._download(handler)
+        self.assertFalse(self.target.exists())
+
+    def test_failure_sets_the_shared_cancel_event(self):
+        cancel = threading.Event()
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            self._download(lambda request: httpx.Response(403), cancel=cancel)
+        self.assertTrue(cancel.is_set())
+
+    def test_cancelled_download_stops_and_removes_the_file(self):
+        cancel = threading.Event()
+        requests = []
+        handler = _ranged_server(PAYLOAD, requests)
+
+        def cancel_after_probe(request):
+            if request.headers.get("range") != "bytes=0-0":
+                cancel.set()
+            return handler(request)
+
+        with self.assertRaises(DownloadCancelled):
+            self._download(cancel_after_probe, cancel=cancel)
+        self.assertFalse(self.target.exists())
+
+    def test_parallel_segment_progress_never_goes_backwards(self):
+        progress = []
+
+        self._download(_ranged_server(PAYLOAD, []), on_progress=lambda done, total: progress.append(done))
+
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], len(PAYLOAD))
+
+    def test_split_ranges_cover_the_file(self):
+        self.assertEqual(split_ranges(10, 3), [(0, 3), (4, 7), (8, 9)])
+        self.assertEqual(split_ranges(2, 4), [(0, 0), (1, 1)])
+
+
+class TaskManagerByteProgressTests(unittest.TestCase):
+    def test_byte_progress_is_broadcast_and_reset_per_video(self):
+        manager = BiliTaskManager()
+        events = []
+
+        async def callback(status, video, total, completed, progress, **kwargs):
+            events.append((video, progress, kwargs))
+
+        manager.set_progress_callback(callback)
+
+        async def run():
+            await manager.update_progress("BV1", 0, 0)
+            await manager.update_bytes("BV1", 512, 2048)
+            await manager.update_progress("BV2", 1, 0)
+
+        asyncio.run(run())
+
+        self.assertEqual(events[1][:2], ("BV1", 25))
+        self.assertEqual((events[1][2]["downloaded_bytes"], events[1][2]["total_bytes"]), (512, 2048))
+        self.assertEqual((events[2][2]["downloaded_bytes"], events[2][2]["total_bytes"]), (0, None))
+        self.assertEqual(manager.get_status()["downloaded_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
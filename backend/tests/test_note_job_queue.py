@@ -0,0 +1,136 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import note_job_dao
+from app.services import note_job_queue as queue_module
+
+
+class NoteJobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.engine = create_engine(
+            f"sqlite:///{Path(self.tmp.name) / 'queue.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.patches = [
+            mock.patch.object(note_job_dao, "engine", self.engine),
+            mock.patch.object(note_job_dao, "SessionLocal", session_factory),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+        note_job_dao.ensure_note_job_table()
+
+    def tearDown(self):
+        for patcher in reversed(self.patches):
+            patcher.stop()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def wait_for_status(self, job_id, status, timeout=3.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = note_job_dao.get_job(job_id)
+            if job and job.status == status:
+                return job
+            time.sleep(0.02)
+        self.fail(f"job {job_id} did not reach {status}")
+
+    def test_claim_next_job_prefers_priority_then_fifo(self):
+        note_job_dao.create_job("note_step", {"n": 1}, job_id="low", priority=0)
+        note_job_dao.create_job("note_step", {"n": 2}, job_id="high-1", priority=10)
+        note_job_dao.create_job("note_step", {"n": 3}, job_id="high-2", priority=10)
+        note_job_dao.create_job("other", {}, job_id="other", priority=99)
+
+        claimed = [note_job_dao.claim_next_job(["note_step"]).job_id for _ in range(3)]
+
+        self.assertEqual(claimed, ["high-1", "high-2", "low"])
+        self.assertIsNone(note_job_dao.claim_next_job(["note_step"]))
+        self.assertEqual(note_job_dao.get_job("high-1").attempts, 1)
+        self.assertEqual(note_job_dao.get_job("other").status, "queued")
+
+    def test_interrupted_jobs_are_resumed_on_start(self):
+        note_job_dao.create_job("note_step", {"value": "resume-me"}, job_id="interrupted")
+        note_job_dao.claim_next_job(["note_step"])
+        self.assertEqual(note_job_dao.get_job("interrupted").status, "running")
+
+        seen = []
+        queue = queue_module.NoteJobQueue(workers=1, poll_seconds=0.05)
+        queue.register("note_step", lambda job_id, payload: seen.append((job_id, payload)))
+        queue.start(resume=True)
+        try:
+            job = self.wait_for_status("interrupted", "completed")
+        finally:
+            queue.stop()
+
+        self.assertEqual(seen, [("interrupted", {"value": "resume-me"})])
+        self.assertEqual(job.attempts, 2)
+
+    def test_failed_handler_records_error_and_canceled_job_is_kept(self):
+        release = threading.Event()
+
+        def handler(job_id, payload):
+            if payload.get("fail"):
+                raise RuntimeError("boom")
+            release.wait(timeout=2)
+
+        queue = queue_module.NoteJobQueue(workers=1, poll_seconds=0.05)
+        queue.register("note_step", handler)
+        failed_id = queue.submit("note_step", {"fail": True}, task_id="task-a")
+        failed = self.wait_for_status(failed_id, "failed")
+        self.assertEqual(failed.error_message, "boom")
+
+        blocked_id = queue.submit("note_step", {}, task_id="task-b")
+        self.wait_for_status(blocked_id, "running")
+        self.assertEqual(note_job_dao.cancel_jobs_for_task("task-b"), 1)
+        release.set()
+        time.sleep(0.1)
+        queue.stop()
+
+        self.assertEqual(note_job_dao.get_job(blocked_id).status, "canceled")
+
+    def test_submit_rejects_unknown_kind(self):
+        queue = queue_module.NoteJobQueue(workers=1)
+        with self.assertRaises(ValueError):
+            queue.submit("missing", {})
+
+    def test_stage_slot_limits_concurrency(self):
+        limiter = queue_module._StageLimiter(1)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with limiter.slot():
+                entered.set()
+                release.wait(timeout=2)
+
+        def wait_for_slot():
+            with limiter.slot():
+                pass
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        entered.wait(timeout=2)
+        waiter = threading.Thread(target=wait_for_slot)
+        waiter.start()
+        time.sleep(0.05)
+
+        self.assertEqual(limiter.snapshot(), {"limit": 1, "active": 1, "waiting": 1})
+        release.set()
+        holder.join(timeout=2)
+        waiter.join(timeout=2)
+        self.assertEqual(limiter.snapshot(), {"limit": 1, "active": 0, "waiting": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
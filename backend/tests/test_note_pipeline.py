@@ -0,0 +1,141 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import note_pipeline
+
+
+class FakeGenerator:
+    """记录各阶段的开始/结束，用事件控制第一个任务在总结阶段停住"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+        self.summarize_started = threading.Event()
+        self.release_summarize = threading.Event()
+        self.second_extracted = threading.Event()
+
+    def record(self, event):
+        with self.lock:
+            self.events.append(event)
+
+    def _extract_audio(self, video_path, task_id):
+        self.record(("extract", task_id))
+        if task_id == "task-2":
+            self.second_extracted.set()
+        return f"{task_id}.wav"
+
+    def _transcribe_audio(self, audio_path, task_id):
+        self.record(("transcribe", task_id))
+        return f"transcript:{audio_path}"
+
+    def _summarize_text(self, transcript, filename, task_id, screenshot=False, note_style="simple"):
+        self.record(("summarize", task_id))
+        if task_id == "task-1":
+            self.summarize_started.set()
+            self.release_summarize.wait(timeout=2)
+        if task_id == "boom":
+            raise RuntimeError("llm down")
+        return f"# {filename}\n\n{transcript}"
+
+    def _finalize_markdown(self, markdown, video_path, screenshot=False, task_id=None):
+        return markdown
+
+
+class NotePipelineTests(unittest.TestCase):
+    async_summarize = True
+
+    def setUp(self):
+        self.status_updates = []
+        self.patcher = mock.patch.object(
+            note_pipeline,
+            "update_task_status",
+            side_effect=lambda task_id, status, *args, **kwargs: self.status_updates.append((task_id, status)),
+        )
+        self.patcher.start()
+        self.status_threads = []
+        self.queue_patcher = mock.patch.object(
+            note_pipeline,
+            "queue_task_status",
+            side_effect=self.record_queued_status,
+        )
+        self.queue_patcher.start()
+        self.pipeline = note_pipeline.NotePipeline(
+            {"extract": 1, "transcribe": 1, "summarize": 1},
+            async_summarize=self.async_summarize,
+        )
+
+    def record_queued_status(self, task_id, status):
+        self.status_updates.append((task_id, status))
+        self.status_threads.append(threading.current_thread().name)
+
+    def tearDown(self):
+        self.pipeline.shutdown()
+        self.patcher.stop()
+        self.queue_patcher.stop()
+
+    def test_later_task_progresses_while_earlier_task_summarizes(self):
+        generator = FakeGenerator()
+        first = self.pipeline.submit(generator, "a.mp4", "a.mp4", "task-1")
+        self.assertTrue(generator.summarize_started.wait(timeout=2))
+
+        second = self.pipeline.submit(generator, "b.mp4", "b.mp4", "task-2")
+        self.assertTrue(generator.second_extracted.wait(timeout=2))
+        self.assertFalse(first.done())
+
+        generator.release_summarize.set()
+        self.assertEqual(first.result(timeout=2).markdown, "# a.mp4\n\ntranscript:task-1.wav")
+        self.assertEqual(second.result(timeout=2).filename, "b.mp4")
+        self.assertLess(generator.events.index(("extract", "task-2")), generator.events.index(("summarize", "task-2")))
+        self.assertIn(("task-1", "completed"), self.status_updates)
+
+        stats = self.pipeline.stats()
+        for stage in ("extract", "transcribe", "summarize"):
+            self.assertEqual(stats[stage]["completed"], 2)
+            self.assertEqual(stats[stage]["busy"], 0)
+            self.assertEqual(stats[stage]["workers"], 1)
+
+    def test_stage_failure_marks_task_failed_and_counts_it(self):
+        generator = FakeGenerator()
+        future = self.pipeline.submit(generator, "c.mp4", "c.mp4", "boom")
+
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=2)
+
+        self.assertIn(("boom", "failed"), self.status_updates)
+        stats = self.pipeline.stats()
+        self.assertEqual(stats["summarize"]["failed"], 1)
+        self.assertEqual(stats["transcribe"]["completed"], 1)
+
+    def test_async_summarize_uses_coroutine_generator_path(self):
+        generator = FakeGenerator()
+        threads = []
+
+        async def summarize_async(transcript, filename, task_id, screenshot=False, note_style="simple"):
+            threads.append(threading.current_thread().name)
+            return f"# async {filename}"
+
+        generator._summarize_text_async = summarize_async
+        result = self.pipeline.submit(generator, "d.mp4", "d.mp4", "task-async").result(timeout=2)
+
+        if self.async_summarize:
+            self.assertEqual(result.markdown, "# async d.mp4")
+            self.assertEqual(threads, ["llm-event-loop"])
+            # 状态发布不占用 LLM 事件循环
+            self.assertIn(("task-async", "summarizing"), self.status_updates)
+            self.assertNotIn("llm-event-loop", self.status_threads)
+        else:
+            self.assertEqual(result.markdown, "# d.mp4\n\ntranscript:task-async.wav")
+            self.assertEqual(threads, [])
+
+
+class ThreadedSummarizeNotePipelineTests(NotePipelineTests):
+    async_summarize = False
+
+
+if __name__ == "__main__":
+    unittest.main()
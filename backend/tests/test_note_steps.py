@@ -7,7 +7,7 @@ from unittest import mock
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app.routers import note
-from app.services.note_progress import write_note_progress
+from app.services.note_progress import clear_note_progress, write_note_progress
 
 
 class NoteStepTests(unittest.TestCase):
@@ -27,7 +27,8 @@ class NoteStepTests(unittest.TestCase):
         with TemporaryDirectory() as tmp:
             with mock.patch.object(note, "NOTE_OUTPUT_DIR", Path(tmp)), \
                     mock.patch.object(note, "NoteGenerator", FakeNoteGenerator), \
-                    mock.patch.object(note, "update_task_status", side_effect=lambda task_id, status, markdown=None: status_updates.append(status)):
+                    mock.patch.object(note, "update_task_status", side_effect=lambda task_id, status, markdown=None: status_updates.append(status)), \
+                    mock.patch.object(note, "queue_task_status", side_effect=lambda task_id, status: status_updates.append(status)):
                 note.run_note_task_step(
                     task_id="task-1",
                     video_path="video.mp4",
@@ -50,13 +51,15 @@ class NoteStepTests(unittest.TestCase):
         with TemporaryDirectory() as tmp:
             with mock.patch.object(note, "NOTE_OUTPUT_DIR", Path(tmp)), \
                     mock.patch.object(note, "NoteGenerator", FailingNoteGenerator), \
-                    mock.patch.object(note, "update_task_status", side_effect=lambda *args, **kwargs: updates.append((args, kwargs))):
-                note.run_note_task_step(
-                    task_id="task-2",
-                    video_path="video.mp4",
-                    filename="video.mp4",
-                    step="extract",
-                )
+                    mock.patch.object(note, "update_task_status", side_effect=lambda *args, **kwargs: updates.append((args, kwargs))), \
+                    mock.patch.object(note, "queue_task_status"):
+                with self.assertRaisesRegex(RuntimeError, "ffmpeg failed"):
+                    note.run_note_task_step(
+                        task_id="task-2",
+                        video_path="video.mp4",
+                        filename="video.mp4",
+                        step="extract",
+                    )
 
         self.assertEqual(updates[-1][0][:2], ("task-2", "failed"))
         self.assertEqual(updates[-1][1]["error_message"], "ffmpeg failed")
@@ -68,6 +71,7 @@ class NoteStepTests(unittest.TestCase):
         task.status = "summarizing"
         task.error_message = None
         task.markdown = None
+        task.markdown_blob = None
         task.source = "upload"
         task.source_url = None
         task.created_at = None
@@ -76,6 +80,7 @@ class NoteStepTests(unittest.TestCase):
         with TemporaryDirectory() as tmp:
             output_dir = Path(tmp)
             write_note_progress(output_dir, "task-progress", "正在生成第 1/3 段摘要", "## partial")
+            self.addCleanup(clear_note_progress, output_dir, "task-progress")
 
             with mock.patch.object(note, "NOTE_OUTPUT_DIR", output_dir), \
                     mock.patch.object(note, "get_task_by_id", return_value=task):
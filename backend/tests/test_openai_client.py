@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import unittest
 from pathlib import Path
@@ -32,6 +33,32 @@ class OpenAIClientTests(unittest.TestCase):
         self.assertEqual(fake_openai.call_args.kwargs["base_url"], "https://api.example.test/v1")
         self.assertIs(fake_openai.call_args.kwargs["http_client"], fake_http_client)
 
+    def test_http_clients_are_pooled_per_endpoint_and_key(self):
+        with mock.patch.object(openai_client, "_sync_pool", openai_client._ClientPool(4)), \
+                mock.patch.object(openai_client, "create_openai_http_client", side_effect=lambda timeout: object()):
+            first = openai_client.shared_http_client("sk-a", "https://pool.example.test/v1", timeout=30)
+            again = openai_client.shared_http_client("sk-a", "https://pool.example.test/v1", timeout=30)
+            other_key = openai_client.shared_http_client("sk-b", "https://pool.example.test/v1", timeout=30)
+            stats = openai_client._sync_pool.stats()
+
+        self.assertIs(first, again)
+        self.assertIsNot(first, other_key)
+        self.assertEqual((stats["created"], stats["reused"]), (2, 1))
+
+    def test_async_http_clients_are_pooled_per_event_loop(self):
+        async def lookup():
+            client = openai_client.shared_async_http_client("sk-a", "https://pool.example.test/v1", timeout=30)
+            again = openai_client.shared_async_http_client("sk-a", "https://pool.example.test/v1", timeout=30)
+            await openai_client.aclose_shared_async_http_clients()
+            return client, again, client.is_closed
+
+        first, again, closed = asyncio.run(lookup())
+        second, _, _ = asyncio.run(lookup())
+
+        self.assertIs(first, again)
+        self.assertIsNot(first, second)
+        self.assertTrue(closed)
+
 
 if __name__ == "__main__":
     unittest.main()
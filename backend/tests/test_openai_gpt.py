@@ -1,5 +1,9 @@
+import asyncio
+import re
 import sys
+import threading
 import unittest
+from dataclasses import replace
 from pathlib import Path
 from unittest import mock
 
@@ -7,13 +11,35 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app.gpt.openai_gpt import OpenAIGPT
 from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.services import model_provider
 
 
 class OpenAIGPTTests(unittest.TestCase):
+    def setUp(self):
+        # Deterministic token estimate even where tiktoken is installed; no response cache between tests
+        for patcher in (
+            mock.patch("app.gpt.token_budget.tiktoken", None),
+            mock.patch("app.services.llm_cache.LLM_CACHE_ENABLED", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _gpt(self, fake_client, **kwargs):
+        patcher = mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=_async_client(fake_client))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return OpenAIGPT(api_key="sk-test", **kwargs)
+
     def test_client_disables_retries_for_note_generation(self):
-        with mock.patch("app.gpt.openai_gpt.create_openai_client", return_value=mock.Mock()) as create_client:
-            OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+        gpt = OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+
+        async def get_client():
+            return gpt._get_async_client(), gpt._get_async_client()
 
+        with mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=mock.Mock()) as create_client:
+            first, same = asyncio.run(get_client())
+
+        self.assertIs(first, same)
         create_client.assert_called_once_with(
             api_key="sk-test",
             base_url="https://example.test/v1",
@@ -28,8 +54,7 @@ class OpenAIGPTTests(unittest.TestCase):
             _chunk("- item"),
         ]
 
-        with mock.patch("app.gpt.openai_gpt.create_openai_client", return_value=fake_client):
-            gpt = OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+        gpt = self._gpt(fake_client, base_url="https://example.test/v1", model="demo")
 
         transcript = TranscriptResult(
             language="zh",
@@ -49,8 +74,7 @@ class OpenAIGPTTests(unittest.TestCase):
             _chunk("b" * 250),
         ]
 
-        with mock.patch("app.gpt.openai_gpt.create_openai_client", return_value=fake_client):
-            gpt = OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+        gpt = self._gpt(fake_client, base_url="https://example.test/v1", model="demo")
 
         events = []
         transcript = TranscriptResult(
@@ -62,20 +86,21 @@ class OpenAIGPTTests(unittest.TestCase):
         markdown = gpt.summarize(
             transcript,
             filename="demo.mp4",
-            progress_callback=lambda message, partial: events.append((message, partial)),
+            progress_callback=lambda message, partial: events.append((message, partial, threading.current_thread().name)),
         )
 
         self.assertEqual(markdown, "a" * 250 + "b" * 250)
         self.assertTrue(events)
         self.assertEqual(events[-1][0], "正在生成笔记")
         self.assertEqual(events[-1][1], markdown)
+        # Progress writes do file I/O, so they must not run on the shared LLM event loop
+        self.assertNotIn("llm-event-loop", {thread for _, _, thread in events})
 
     def test_long_transcript_uses_direct_generation_by_default(self):
         fake_client = mock.Mock()
         fake_client.chat.completions.create.return_value = [_chunk("# Direct note")]
 
-        with mock.patch("app.gpt.openai_gpt.create_openai_client", return_value=fake_client):
-            gpt = OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+        gpt = self._gpt(fake_client, base_url="https://example.test/v1", model="demo")
 
         segments = [
             TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500)
@@ -97,8 +122,9 @@ class OpenAIGPTTests(unittest.TestCase):
             [_chunk("# Final note")],
         ]
 
-        with mock.patch("app.gpt.openai_gpt.create_openai_client", return_value=fake_client):
-            gpt = OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+        gpt = self._gpt(fake_client, base_url="https://example.test/v1", model="demo")
+        # Each formatted segment is ~128 tokens, so 60 segments pack into 3 chunks
+        gpt.budget = replace(gpt.budget, chunk_target_tokens=3000)
 
         segments = [
             TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500)
@@ -129,8 +155,8 @@ class OpenAIGPTTests(unittest.TestCase):
             [_chunk("# Final note")],
         ]
 
-        with mock.patch("app.gpt.openai_gpt.create_openai_client", return_value=fake_client):
-            gpt = OpenAIGPT(api_key="sk-test", base_url="https://example.test/v1", model="demo")
+        gpt = self._gpt(fake_client, base_url="https://example.test/v1", model="demo")
+        gpt.budget = replace(gpt.budget, chunk_target_tokens=3000)
 
         segments = [
             TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500)
@@ -143,6 +169,137 @@ class OpenAIGPTTests(unittest.TestCase):
         self.assertEqual(markdown, "# Final note")
         self.assertEqual(fake_client.chat.completions.create.call_count, 5)
 
+    def test_chunk_summaries_run_concurrently_and_keep_order(self):
+        active = []
+        peak = []
+
+        async def create(**kwargs):
+            prompt = kwargs["messages"][1]["content"]
+            part = re.search(r"part (\d+)/3", prompt)
+            if not part:
+                return _async_stream(["# Final note\n" + prompt])
+            active.append(part.group(1))
+            peak.append(len(active))
+            # Later chunks finish first so completion order differs from input order
+            await asyncio.sleep(0.05 * (4 - int(part.group(1))))
+            active.remove(part.group(1))
+            return _async_stream([f"summary {part.group(1)}"])
+
+        fake_async_client = mock.Mock()
+        fake_async_client.chat.completions.create.side_effect = create
+
+        with mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=fake_async_client):
+            gpt = OpenAIGPT(api_key="sk-test", base_url="https://concurrent.test/v1", model="demo", max_concurrency=3)
+        gpt.budget = replace(gpt.budget, chunk_target_tokens=3000)
+
+        segments = [
+            TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500)
+            for i in range(60)
+        ]
+        transcript = TranscriptResult(language="zh", full_text=" ".join(seg.text for seg in segments), segments=segments)
+        events = []
+
+        with mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=fake_async_client), \
+                mock.patch("app.gpt.openai_gpt.NOTE_GENERATION_MODE", "chunk"):
+            markdown = gpt.summarize(
+                transcript,
+                filename="long.mp4",
+                progress_callback=lambda message, partial: events.append((message, partial)),
+            )
+
+        self.assertEqual(max(peak), 3)
+        self.assertLess(markdown.index("summary 1"), markdown.index("summary 2"))
+        self.assertLess(markdown.index("summary 2"), markdown.index("summary 3"))
+        self.assertTrue(any(
+            "正在生成第 1/3 段摘要" in partial and "正在生成第 3/3 段摘要" in partial
+            for _, partial in events
+        ))
+
+    def test_compression_groups_run_concurrently_in_order(self):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.side_effect = lambda **kwargs: [
+            _chunk("compressed " + re.search(r"Group (\d+)/", kwargs["messages"][1]["content"]).group(1))
+        ]
+
+        gpt = self._gpt(fake_client, base_url="https://compress.test/v1", model="demo", max_concurrency=4)
+
+        # Four ~2500-token summaries exceed a 7500-token prompt budget and compress one group each
+        summaries = [f"summary {i} " + "y" * 10000 for i in range(4)]
+        gpt.budget = replace(gpt.budget, prompt_tokens=7500, merge_target_tokens=2500)
+        merged = asyncio.run(gpt._compress_summaries_if_needed(summaries, "system"))
+
+        self.assertEqual(merged, ["compressed 1", "compressed 2", "compressed 3", "compressed 4"])
+
+    def test_provider_concurrency_defaults_and_env_override(self):
+        self.assertEqual(model_provider.provider_concurrency("ollama"), 1)
+        self.assertEqual(
+            model_provider.provider_concurrency("custom"),
+            model_provider.DEFAULT_PROVIDER_CONCURRENCY,
+        )
+        with mock.patch.dict("os.environ", {"NOTE_LLM_CONCURRENCY_OLLAMA": "2"}):
+            self.assertEqual(model_provider.provider_concurrency("ollama"), 2)
+
+    def test_summarize_async_streams_chunks_through_async_client(self):
+        calls = []
+
+        async def create(**kwargs):
+            prompt = kwargs["messages"][1]["content"]
+            part = re.search(r"part (\d+)/3", prompt)
+            calls.append(part.group(1) if part else "final")
+            if part:
+                # Reverse completion order to check that results keep chunk order
+                await asyncio.sleep(0.01 * (4 - int(part.group(1))))
+                return _async_stream([f"summary {part.group(1)}"])
+            return _async_stream(["# Final ", "note"])
+
+        fake_async_client = mock.Mock()
+        fake_async_client.chat.completions.create.side_effect = create
+
+        gpt = OpenAIGPT(api_key="sk-test", base_url="https://async.test/v1", model="demo", max_concurrency=3)
+        gpt.budget = replace(gpt.budget, chunk_target_tokens=3000)
+
+        segments = [
+            TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500)
+            for i in range(60)
+        ]
+        transcript = TranscriptResult(language="zh", full_text=" ".join(seg.text for seg in segments), segments=segments)
+        events = []
+
+        with mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=fake_async_client), \
+                mock.patch("app.gpt.openai_gpt.NOTE_GENERATION_MODE", "chunk"):
+            markdown = asyncio.run(gpt.summarize_async(
+                transcript,
+                filename="long.mp4",
+                progress_callback=lambda message, partial: events.append((message, partial)),
+            ))
+
+        self.assertEqual(markdown, "# Final note")
+        self.assertEqual(calls[-1], "final")
+        final_prompt = fake_async_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        self.assertLess(final_prompt.index("summary 1"), final_prompt.index("summary 3"))
+        self.assertTrue(any(message == "正在合并全片笔记" for message, _ in events))
+
+
+def _async_client(fake_client):
+    """AsyncOpenAI stand-in answering from a sync chat.completions fake."""
+    async def create(**kwargs):
+        return _async_events(fake_client.chat.completions.create(**kwargs))
+
+    return mock.Mock(chat=mock.Mock(completions=mock.Mock(create=create)))
+
+
+async def _async_events(events):
+    for event in events:
+        yield event
+
+
+def _async_stream(contents):
+    async def stream():
+        for content in contents:
+            yield _chunk(content)
+
+    return stream()
+
 
 def _chunk(content):
     return mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=content))])
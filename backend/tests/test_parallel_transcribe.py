@@ -0,0 +1,152 @@
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import transcriber_settings
+from app.transcriber import fast_whisper, parallel
+
+SR = parallel.SAMPLE_RATE
+
+
+class PlanWindowsTests(unittest.TestCase):
+    def test_splits_at_longest_silence_near_target(self):
+        # 语音 0-95s，静音 95-97s，语音 97-190s，静音 190-190.5s，语音 190.5-300s
+        spans = [(0, 95 * SR), (97 * SR, 190 * SR), (int(190.5 * SR), 300 * SR)]
+
+        windows = parallel.plan_windows(300 * SR, spans, chunk_seconds=100)
+
+        self.assertEqual([w.start for w in windows], [0, 96 * SR, int(190.25 * SR)])
+        self.assertEqual(windows[-1].end, 300 * SR)
+        for window in windows:
+            self.assertEqual(window.end, window.core_end)
+
+    def test_hard_cut_adds_overlap_when_no_silence(self):
+        windows = parallel.plan_windows(200 * SR, [(0, 200 * SR)], chunk_seconds=100)
+
+        self.assertEqual(len(windows), 2)
+        self.assertEqual(windows[0].core_end, 100 * SR)
+        self.assertEqual(windows[0].end, int((100 + parallel.HARD_CUT_OVERLAP_SECONDS) * SR))
+        self.assertEqual(windows[1].start, 100 * SR)
+
+    def test_short_audio_is_single_window(self):
+        windows = parallel.plan_windows(110 * SR, [(0, 110 * SR)], chunk_seconds=100)
+
+        self.assertEqual(len(windows), 1)
+
+
+class StitchSegmentsTests(unittest.TestCase):
+    def test_offsets_and_dedupes_overlap(self):
+        windows = [
+            parallel.AudioWindow(0, 0, 102 * SR, 100 * SR),
+            parallel.AudioWindow(1, 100 * SR, 200 * SR, 200 * SR),
+        ]
+        results = [
+            [(0.0, 50.0, "first"), (98.0, 101.5, "across the cut"), (100.5, 102.0, "overlap tail")],
+            [(0.0, 1.5, "cut"), (1.5, 10.0, "second window"), (10.0, 12.0, "second window")],
+        ]
+
+        segments = parallel.stitch_segments(windows, results)
+
+        self.assertEqual(
+            [(s.start, s.end, s.text) for s in segments],
+            [(0.0, 50.0, "first"), (98.0, 101.5, "across the cut"), (101.5, 110.0, "second window")],
+        )
+
+
+class FakeWorkerModel:
+    def transcribe(self, audio, **_kwargs):
+        seconds = len(audio) / SR
+        segment = SimpleNamespace(start=0.0, end=seconds, text=f" {seconds:.0f}s ")
+        return iter([segment]), SimpleNamespace(language="zh")
+
+
+class ParallelTranscribeTests(unittest.TestCase):
+    def test_transcribe_parallel_stitches_windows_in_order(self):
+        audio = np.zeros(300 * SR, dtype=np.float32)
+        spans = [(0, 95 * SR), (97 * SR, 190 * SR), (int(190.5 * SR), 300 * SR)]
+
+        with ThreadPoolExecutor(max_workers=3) as executor, \
+                mock.patch.object(parallel, "find_speech_spans", return_value=spans), \
+                mock.patch.object(parallel, "_get_executor", return_value=executor), \
+                mock.patch.object(parallel, "_worker_model", FakeWorkerModel()):
+            result = parallel.transcribe_parallel(audio, "base", "cpu", "int8", workers=3, chunk_seconds=100)
+
+        self.assertEqual(result.language, "zh")
+        self.assertEqual([s.text for s in result.segments], ["96s", "94s", "110s"])
+        self.assertEqual([s.start for s in result.segments], [0.0, 96.0, 190.25])
+
+    def test_transcriber_falls_back_to_single_model_when_parallel_fails(self):
+        transcriber = fast_whisper.FastWhisperTranscriber(
+            model_size="base", device="cpu", compute_type="int8", parallel_workers=4, chunk_seconds=60,
+        )
+        audio = np.zeros(200 * SR, dtype=np.float32)
+        pooled = mock.MagicMock()
+        pooled.lease.return_value.__enter__.return_value = FakeWorkerModel()
+
+        with mock.patch.object(fast_whisper, "transcribe_parallel", side_effect=RuntimeError("pool broke")), \
+                mock.patch.object(fast_whisper, "whisper_model_pool", pooled):
+            result = transcriber.transcript(audio)
+
+        self.assertEqual(result.full_text, "200s")
+
+    def test_broken_pool_is_discarded_and_config_change_lets_old_pool_finish(self):
+        pools = [mock.Mock(name="pool-a"), mock.Mock(name="pool-b"), mock.Mock(name="pool-c")]
+        audio = np.zeros(300 * SR, dtype=np.float32)
+        spans = [(0, 95 * SR), (97 * SR, 190 * SR), (int(190.5 * SR), 300 * SR)]
+
+        with mock.patch.object(parallel, "_executor", None), \
+                mock.patch.object(parallel, "_executor_key", None), \
+                mock.patch.object(parallel, "ProcessPoolExecutor", side_effect=pools), \
+                mock.patch.object(parallel, "find_speech_spans", return_value=spans):
+            first = parallel._get_executor("base", "cpu", "int8", 2)
+            self.assertIs(parallel._get_executor("base", "cpu", "int8", 2), first)
+            second = parallel._get_executor("small", "cpu", "int8", 2)
+            # 其他任务已提交的窗口继续在旧进程池里完成
+            first.shutdown.assert_called_once_with(wait=False)
+
+            second.submit.return_value.result.side_effect = BrokenProcessPool("worker died")
+            with self.assertRaises(BrokenProcessPool):
+                parallel.transcribe_parallel(audio, "small", "cpu", "int8", workers=2, chunk_seconds=100)
+            second.shutdown.assert_called_once_with(wait=False)
+            self.assertIs(parallel._get_executor("small", "cpu", "int8", 2), pools[2])
+
+    def test_parallel_is_skipped_for_single_worker_and_cuda(self):
+        with mock.patch.object(fast_whisper, "transcribe_parallel") as run_parallel:
+            single = fast_whisper.FastWhisperTranscriber(parallel_workers=1)
+            gpu = fast_whisper.FastWhisperTranscriber(device="cuda", parallel_workers=4)
+            audio = np.zeros(10, dtype=np.float32)
+            self.assertIsNone(single._transcribe_parallel(audio))
+            self.assertIsNone(gpu._transcribe_parallel(audio))
+
+        run_parallel.assert_not_called()
+
+
+class ParallelSettingsTests(unittest.TestCase):
+    def test_parallel_settings_are_normalized_and_validated(self):
+        normalized = transcriber_settings.normalize_transcriber_config({
+            "model_size": "base",
+            "device": "cpu",
+            "compute_type": "int8",
+            "parallelWorkers": "8",
+            "chunk_seconds": 5,
+        })
+
+        self.assertEqual(normalized["parallel_workers"], 8)
+        self.assertEqual(normalized["chunk_seconds"], transcriber_settings.CHUNK_SECONDS_RANGE[0])
+        self.assertIsNotNone(transcriber_settings.validate_transcriber_config({
+            "model_size": "base",
+            "compute_type": "int8",
+            "parallel_workers": 0,
+        }))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import asyncio
+import gzip
+import json
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import video_task_dao
+from app.routers import note
+from app.services import note_progress
+from app.services.progress_bus import ProgressBus, common_prefix_length, progress_bus
+
+
+def _apply(markdown: str, event: dict) -> str:
+    return markdown[:event["offset"]] + event["text"]
+
+
+class ProgressBusTests(unittest.TestCase):
+    def test_common_prefix_length(self):
+        self.assertEqual(common_prefix_length("abc", "abcdef"), 3)
+        self.assertEqual(common_prefix_length("## 1\n…", "## 1\n正文"), 5)
+        self.assertEqual(common_prefix_length("xyz", "abc"), 0)
+
+    def test_subscribers_receive_deltas_that_rebuild_the_document(self):
+        bus = ProgressBus()
+
+        async def scenario():
+            subscription = bus.subscribe("task")
+            bus.publish_progress("task", "生成中", "## 第一段\n")
+            bus.publish_progress("task", "生成中", "## 第一段\n内容")
+            # 并发摘要时中间的占位段会被替换，不是单纯追加
+            bus.publish_progress("task", "合并中", "## 第一段\n内容改写")
+            bus.publish_status("task", "completed")
+            events = [await asyncio.wait_for(subscription.queue.get(), 1) for _ in range(4)]
+            bus.unsubscribe(subscription)
+            return events
+
+        events = asyncio.run(scenario())
+
+        markdown = ""
+        for event in events[:3]:
+            markdown = _apply(markdown, event)
+        self.assertEqual(markdown, "## 第一段\n内容改写")
+        self.assertEqual(events[1]["text"], "内容")
+        self.assertEqual([event["seq"] for event in events[:3]], [1, 2, 3])
+        self.assertEqual(events[3], {"type": "status", "status": "completed", "error_message": None})
+        self.assertEqual(bus.stats()["subscribers"], 0)
+
+    def test_slow_subscriber_is_asked_to_resync(self):
+        bus = ProgressBus()
+
+        async def scenario():
+            subscription = bus.subscribe("task")
+            subscription.queue = asyncio.Queue(2)
+            for index in range(3):
+                bus.publish_progress("task", "生成中", "x" * index)
+            await asyncio.sleep(0)
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+        events = asyncio.run(scenario())
+
+        self.assertEqual(events, [{"type": "resync"}])
+        self.assertEqual(bus.snapshot_event("task")["text"], "xx")
+
+
+class NoteProgressSnapshotTests(unittest.TestCase):
+    def tearDown(self):
+        progress_bus.clear("task-snapshot")
+
+    def _snapshot(self, path):
+        return json.loads(gzip.decompress(path.read_bytes()))
+
+    def test_snapshots_are_throttled_by_time_even_when_the_message_changes(self):
+        with TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            path = note_progress.progress_file(output_dir, "task-snapshot")
+            with mock.patch.object(note_progress, "NOTE_PROGRESS_SNAPSHOT_SECONDS", 60):
+                note_progress.write_note_progress(output_dir, "task-snapshot", "第 1 段", "a")
+                note_progress.write_note_progress(output_dir, "task-snapshot", "第 1 段", "ab")
+                note_progress.write_note_progress(output_dir, "task-snapshot", "第 2 段", "abc")
+                self.assertEqual(self._snapshot(path), {"message": "第 1 段", "partial_markdown": "a"})
+                # 内存中的进度始终是最新的
+                self.assertEqual(
+                    note_progress.read_note_progress(output_dir, "task-snapshot")["partial_markdown"], "abc"
+                )
+
+            note_progress.clear_note_progress(output_dir, "task-snapshot")
+            self.assertFalse(path.exists())
+            self.assertIsNone(note_progress.read_note_progress(output_dir, "task-snapshot"))
+            self.assertNotIn("task-snapshot", note_progress._last_snapshots)
+
+    def test_terminal_status_flushes_the_last_progress_and_releases_memory(self):
+        with TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            path = note_progress.progress_file(output_dir, "task-snapshot")
+            with mock.patch.object(note_progress, "NOTE_PROGRESS_SNAPSHOT_SECONDS", 60):
+                note_progress.write_note_progress(output_dir, "task-snapshot", "第 1 段", "a")
+                note_progress.write_note_progress(output_dir, "task-snapshot", "第 2 段", "ab")
+                note_progress.publish_task_status("task-snapshot", "summarizing")
+                self.assertIsNotNone(progress_bus.snapshot("task-snapshot"))
+
+                note_progress.publish_task_status("task-snapshot", "failed", "boom")
+
+            self.assertIsNone(progress_bus.snapshot("task-snapshot"))
+            self.assertNotIn("task-snapshot", note_progress._last_snapshots)
+            self.assertNotIn("task-snapshot", note_progress._stale_snapshots)
+            # 失败后仍能从快照文件读到最后的进度
+            self.assertEqual(
+                note_progress.read_note_progress(output_dir, "task-snapshot"),
+                {"message": "第 2 段", "partial_markdown": "ab"},
+            )
+
+    def test_task_status_updates_reach_the_progress_bus_through_the_listener(self):
+        self.assertIn(note_progress.publish_task_status, video_task_dao._status_listeners)
+        with mock.patch.object(note_progress, "publish_task_status") as publish, \
+                mock.patch.object(video_task_dao, "_status_listeners", [publish]), \
+                mock.patch.object(video_task_dao, "task_status_writer"):
+            video_task_dao.queue_task_status("task-snapshot", "transcribing")
+
+        publish.assert_called_once_with("task-snapshot", "transcribing", None)
+
+
+class TaskEventStreamTests(unittest.TestCase):
+    def test_stream_sends_snapshot_then_deltas_until_terminal_status(self):
+        task = mock.Mock(status="summarizing", error_message=None)
+        progress_bus.publish_progress("task-sse", "生成中", "## 已有")
+        self.addCleanup(progress_bus.clear, "task-sse")
+
+        async def scenario():
+            with mock.patch.object(note, "get_task_by_id", return_value=task):
+                response = await note.stream_task_events("task-sse", mock.Mock())
+            chunks = []
+            iterator = response.body_iterator
+            chunks.append(await iterator.__anext__())
+            chunks.append(await iterator.__anext__())
+            progress_bus.publish_progress("task-sse", "生成中", "## 已有内容")
+            progress_bus.publish_status("task-sse", "completed")
+            async for chunk in iterator:
+                chunks.append(chunk)
+            return chunks
+
+        chunks = asyncio.run(scenario())
+
+        events = [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks]
+        self.assertEqual([event["type"] for event in events], ["status", "progress", "progress", "status"])
+        self.assertEqual(events[1]["text"], "## 已有")
+        self.assertEqual((events[2]["offset"], events[2]["text"]), (len("## 已有"), "内容"))
+        self.assertEqual(events[3]["status"], "completed")
+        self.assertEqual(progress_bus.stats()["subscribers"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import note
+from app.utils.frame_select import FrameChoice
+from app.utils.screenshot_markdown import find_screenshot_markers, rewrite_screenshot_markdown
+
+BASE = "/api/note_results/screenshots"
+
+
+class RewriteScreenshotMarkdownTests(unittest.TestCase):
+    def test_find_markers_supports_both_formats(self):
+        markers = find_screenshot_markers("a *Screenshot-[01:05]\nb *Screenshot-02:10*")
+
+        self.assertEqual(markers, [("*Screenshot-[01:05]", 65), ("*Screenshot-02:10", 130)])
+
+    def test_marker_becomes_its_own_paragraph(self):
+        markdown = "## 第一节\n讲解内容 *Screenshot-[00:05]\n下一行\n*Screenshot-[00:09]*\n## 第二节\n"
+
+        result = rewrite_screenshot_markdown(markdown, {5: f"{BASE}/a.jpg", 9: f"{BASE}/b.jpg"}, BASE)
+
+        self.assertEqual(
+            result,
+            f"## 第一节\n讲解内容\n\n![]({BASE}/a.jpg)\n\n下一行\n\n![]({BASE}/b.jpg)\n\n## 第二节\n",
+        )
+
+    def test_missing_screenshot_keeps_marker(self):
+        markdown = "内容 *Screenshot-[00:05]\n"
+
+        self.assertEqual(rewrite_screenshot_markdown(markdown, {}, BASE), markdown)
+
+    def test_image_paths_are_normalized_in_the_same_pass(self):
+        markdown = (
+            "![](/static/screenshots/old.jpg)*\n"
+            "![](http://localhost:8000/note_results/screenshots/moved.jpg)\n"
+            f"![]({BASE}/ok.jpg)\n"
+            "![](https://example.com/cover.png)\n\n\n\n\n尾部"
+        )
+
+        result = rewrite_screenshot_markdown(markdown, {}, BASE)
+
+        self.assertEqual(
+            result,
+            f"![]({BASE}/old.jpg)\n![]({BASE}/moved.jpg)\n![]({BASE}/ok.jpg)\n"
+            "![](https://example.com/cover.png)\n\n\n尾部",
+        )
+
+    def test_indentation_after_marker_line_is_kept(self):
+        markdown = "- 要点 *Screenshot-[00:01]\n  - 子要点\n"
+
+        result = rewrite_screenshot_markdown(markdown, {1: f"{BASE}/a.jpg"}, BASE)
+
+        self.assertEqual(result, f"- 要点\n\n![]({BASE}/a.jpg)\n\n  - 子要点\n")
+
+
+class InsertScreenshotsTests(unittest.TestCase):
+    def test_insert_screenshots_uses_batch_results(self):
+        generator = note.NoteGenerator.__new__(note.NoteGenerator)
+        markdown = "一 *Screenshot-[00:01]\n二 *Screenshot-[00:02]\n三 *Screenshot-[00:01]\n"
+
+        with mock.patch.object(note, "generate_screenshots", return_value={1: "/tmp/x/shot_1.jpg"}) as batch, \
+                mock.patch.object(note, "SCREENSHOT_SMART_SELECT", False), \
+                mock.patch.object(note, "IMAGE_BASE_URL", BASE):
+            result = generator._insert_screenshots(markdown, "video.mp4")
+
+        batch.assert_called_once_with("video.mp4", str(note.IMAGE_OUTPUT_DIR), [1, 2])
+        self.assertEqual(result.count(f"![]({BASE}/shot_1.jpg)"), 2)
+        self.assertIn("二 *Screenshot-[00:02]", result)
+
+    def test_duplicate_frames_share_one_screenshot(self):
+        generator = note.NoteGenerator.__new__(note.NoteGenerator)
+        markdown = "一 *Screenshot-[00:01]\n二 *Screenshot-[00:05]\n三 *Screenshot-[00:09]\n"
+        choices = {
+            1: FrameChoice(1, 1.6, 0b1010),
+            5: FrameChoice(5, 4.4, 0b1011, duplicate_of=1),
+        }
+
+        with mock.patch.object(note, "select_screenshot_frames", return_value=choices), \
+                mock.patch.object(note, "SCREENSHOT_SMART_SELECT", True), \
+                mock.patch.object(note, "generate_screenshots", return_value={
+                    1.6: "/tmp/x/a.jpg", 9: "/tmp/x/c.jpg",
+                }) as batch, \
+                mock.patch.object(note, "IMAGE_BASE_URL", BASE):
+            result = generator._insert_screenshots(markdown, "video.mp4")
+
+        batch.assert_called_once_with("video.mp4", str(note.IMAGE_OUTPUT_DIR), [1.6, 9])
+        self.assertEqual(
+            result,
+            f"一\n\n![]({BASE}/a.jpg)\n\n二\n\n![]({BASE}/a.jpg)\n\n三\n\n![]({BASE}/c.jpg)\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import video_task_dao
+from app.db.engine import SQLITE_BUSY_TIMEOUT_MS, create_database_engine
+from app.db.models.video_task import VideoTask
+from app.db.status_writer import StatusWriter
+from app.services.progress_bus import progress_bus
+
+
+class SqliteEngineTests(unittest.TestCase):
+    def test_file_database_connections_use_wal_and_busy_timeout(self):
+        with TemporaryDirectory() as tmp:
+            engine = create_database_engine(f"sqlite:///{Path(tmp) / 'tuned.db'}")
+            try:
+                with engine.connect() as conn:
+                    journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+                    synchronous = conn.execute(text("PRAGMA synchronous")).scalar()
+                    busy_timeout = conn.execute(text("PRAGMA busy_timeout")).scalar()
+            finally:
+                engine.dispose()
+
+        self.assertEqual(journal_mode, "wal")
+        self.assertEqual(synchronous, 1)  # NORMAL
+        self.assertEqual(busy_timeout, SQLITE_BUSY_TIMEOUT_MS)
+
+    def test_memory_database_shares_one_connection(self):
+        engine = create_database_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM t")).scalar(), 0)
+        engine.dispose()
+
+
+class StatusWriterTests(unittest.TestCase):
+    def test_updates_are_coalesced_per_task(self):
+        batches = []
+        writer = StatusWriter(lambda batch: batches.append(dict(batch)), interval=60)
+        for status in ("processing", "transcribing", "summarizing"):
+            writer.submit("task-a", status)
+        writer.submit("task-b", "processing")
+        writer.discard("task-b")
+
+        self.assertEqual(writer.pending_status("task-a"), "summarizing")
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(batches, [{"task-a": "summarizing"}])
+        self.assertEqual(writer.flush(), 0)
+        writer.close()
+        self.assertEqual(writer.stats()["submitted"], 4)
+
+    def test_failed_batch_is_dropped(self):
+        writer = StatusWriter(mock.Mock(side_effect=RuntimeError("locked")), interval=60)
+        writer.submit("task-a", "processing")
+
+        self.assertEqual(writer.flush(), 0)
+        self.assertIsNone(writer.pending_status("task-a"))
+        self.assertEqual(writer.stats()["failures"], 1)
+        writer.close()
+
+
+class QueuedTaskStatusTests(unittest.TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        engine = create_database_engine(f"sqlite:///{Path(tmp.name) / 'tasks.db'}")
+        self.addCleanup(engine.dispose)
+        VideoTask.__table__.create(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        patcher = mock.patch.object(video_task_dao, "SessionLocal", session_factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        writer = StatusWriter(video_task_dao._write_status_batch, interval=60)
+        self.addCleanup(writer.close)
+        patcher = mock.patch.object(video_task_dao, "task_status_writer", writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer = writer
+        self.addCleanup(progress_bus.clear, "task-q")
+        video_task_dao.create_task("task-q", "q.mp4")
+        video_task_dao.update_task_status("task-q", "failed", error_message="boom")
+
+    def test_queued_status_is_visible_before_and_after_flush(self):
+        video_task_dao.queue_task_status("task-q", "transcribing")
+        self.assertEqual(video_task_dao.get_task_by_id("task-q").status, "transcribing")
+
+        self.writer.flush()
+        task = video_task_dao.get_task_by_id("task-q")
+        self.assertEqual(task.status, "transcribing")
+        self.assertIsNone(task.error_message)
+
+    def test_direct_update_supersedes_queued_status(self):
+        video_task_dao.queue_task_status("task-q", "summarizing")
+        video_task_dao.update_task_status("task-q", "completed")
+        self.writer.flush()
+
+        self.assertEqual(video_task_dao.get_task_by_id("task-q").status, "completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import re
+import sys
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.gpt.openai_gpt import OpenAIGPT
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.services.summary_checkpoint import SummaryCheckpoint
+
+
+def _chunk(content):
+    return mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=content))])
+
+
+def _reply_by_part(responses):
+    """Answer chunk prompts by part number (None is the final merge); chunks may reach the provider in any order."""
+    def create(messages, **kwargs):
+        match = re.search(r"This is part (\d+)/", messages[1]["content"])
+        reply = responses[int(match.group(1)) if match else None]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    return create
+
+
+def _async_client(fake_client):
+    """AsyncOpenAI stand-in answering from a sync chat.completions fake."""
+    async def create(**kwargs):
+        return _async_events(fake_client.chat.completions.create(**kwargs))
+
+    return mock.Mock(chat=mock.Mock(completions=mock.Mock(create=create)))
+
+
+async def _async_events(events):
+    for event in events:
+        yield event
+
+
+def _transcript():
+    segments = [TranscriptSegment(start=i * 2, end=i * 2 + 1, text="x" * 500) for i in range(60)]
+    return TranscriptResult(language="zh", full_text=" ".join(seg.text for seg in segments), segments=segments)
+
+
+class SummaryCheckpointTests(unittest.TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch("app.gpt.token_budget.tiktoken", None),
+            mock.patch("app.services.llm_cache.LLM_CACHE_ENABLED", False),
+            mock.patch("app.gpt.openai_gpt.NOTE_GENERATION_MODE", "chunk"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output_dir = Path(tmp.name)
+
+    def _gpt(self, responses):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.side_effect = _reply_by_part(responses)
+        patcher = mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=_async_client(fake_client))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        gpt = OpenAIGPT(api_key="sk-test", base_url="https://checkpoint.test/v1", model="demo")
+        # 60 segments of ~128 tokens pack into 3 chunks
+        gpt.budget = replace(gpt.budget, chunk_target_tokens=3000)
+        gpt.max_concurrency = 1
+        return gpt, fake_client
+
+    def test_failed_run_resumes_at_first_missing_chunk(self):
+        checkpoint = SummaryCheckpoint.for_task(self.output_dir, "task-long")
+        gpt, _ = self._gpt({1: [_chunk("chunk one")], 2: [_chunk("chunk two")], 3: RuntimeError("502 Bad Gateway")})
+        with self.assertRaises(RuntimeError):
+            gpt.summarize(_transcript(), filename="long.mp4", checkpoint=checkpoint)
+        self.assertEqual(len(SummaryCheckpoint.for_task(self.output_dir, "task-long")), 2)
+
+        events = []
+        gpt, client = self._gpt({3: [_chunk("chunk three")], None: [_chunk("# Final note")]})
+        markdown = gpt.summarize(
+            _transcript(),
+            filename="long.mp4",
+            progress_callback=lambda message, partial: events.append((message, partial)),
+            bypass_cache=True,
+            checkpoint=SummaryCheckpoint.for_task(self.output_dir, "task-long"),
+        )
+
+        self.assertEqual(markdown, "# Final note")
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        self.assertIn("已完成 2 段", events[0][0])
+        self.assertTrue(any(message.endswith("（已完成 3/3，剩余 0）") for message, _ in events))
+        final_prompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        self.assertIn("chunk one", final_prompt)
+        self.assertIn("chunk three", final_prompt)
+
+    def test_async_path_records_chunks_and_changed_model_does_not_reuse_them(self):
+        checkpoint = SummaryCheckpoint.for_task(self.output_dir, "task-async")
+        gpt, _ = self._gpt({})
+        replies = iter(["a", "b", "c", "# Final"])
+
+        async def complete(system_content, prompt, temperature=0.7, progress_callback=None,
+                           progress_message="", use_cache=True):
+            return next(replies)
+
+        gpt._complete_markdown = complete
+        markdown = asyncio.run(gpt.summarize_async(_transcript(), filename="long.mp4", checkpoint=checkpoint))
+
+        self.assertEqual(markdown, "# Final")
+        self.assertEqual(len(SummaryCheckpoint.for_task(self.output_dir, "task-async")), 3)
+        chunks = gpt._chunk_segments(_transcript().segments, gpt.budget.chunk_target_tokens)
+        prompts = [gpt._build_chunk_prompt(chunk, "long.mp4", i, 3, False) for i, chunk in enumerate(chunks, start=1)]
+        system_content = gpt._system_content(False)
+        self.assertEqual(gpt._resumed_count(checkpoint, system_content, prompts), 3)
+        gpt.model = "other-model"
+        self.assertEqual(gpt._resumed_count(checkpoint, system_content, prompts), 0)
+
+    def test_truncated_last_line_is_ignored(self):
+        checkpoint = SummaryCheckpoint.for_task(self.output_dir, "task-crash")
+        checkpoint.put("k1", "summary one")
+        with open(checkpoint.path, "a", encoding="utf-8") as f:
+            f.write('{"key": "k2", "summ')
+
+        reloaded = SummaryCheckpoint.for_task(self.output_dir, "task-crash")
+        self.assertEqual(reloaded.get("k1"), "summary one")
+        self.assertIsNone(reloaded.get("k2"))
+        reloaded.clear()
+        self.assertFalse(checkpoint.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.routers import note
+from app.services.note_progress import clear_note_progress, write_note_progress
+from app.services.transcript_pages import read_transcript_page
+
+
+def _task(**overrides):
+    task = mock.Mock()
+    task.task_id = "task-fields"
+    task.filename = "video.mp4"
+    task.status = "summarizing"
+    task.error_message = None
+    task.markdown = "# note"
+    task.markdown_blob = None
+    task.source = "upload"
+    task.source_url = None
+    task.created_at = datetime(2025, 1, 1)
+    task.updated_at = datetime(2025, 1, 1, 0, 5)
+    for key, value in overrides.items():
+        setattr(task, key, value)
+    return task
+
+
+def _write_transcript(output_dir: Path, count: int) -> Path:
+    path = output_dir / "task-fields_transcript.json"
+    segments = [{"start": i * 2.0, "end": i * 2.0 + 2.0, "text": f"第{i}句"} for i in range(count)]
+    path.write_text(json.dumps({"language": "zh", "full_text": "", "segments": segments}), encoding="utf-8")
+    return path
+
+
+class TaskFieldsTests(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(note.router)
+        self.client = TestClient(app)
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output_dir = Path(tmp.name)
+        _write_transcript(self.output_dir, 10)
+        patcher = mock.patch.object(note, "NOTE_OUTPUT_DIR", self.output_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(clear_note_progress, self.output_dir, "task-fields")
+
+    def test_fields_limit_payload_to_requested_groups(self):
+        write_note_progress(self.output_dir, "task-fields", "正在生成", "## partial")
+        with mock.patch.object(note, "get_task_by_id", return_value=_task()):
+            light = self.client.get("/task/task-fields", params={"fields": "status,progress"}).json()["data"]
+            full = self.client.get("/task/task-fields").json()["data"]
+
+        self.assertEqual(light["status"], "summarizing")
+        self.assertEqual(light["partial_markdown"], "## partial")
+        self.assertNotIn("transcript", light)
+        self.assertNotIn("markdown", light)
+        self.assertEqual(len(full["transcript"]["segments"]), 10)
+        self.assertEqual(full["markdown"], "# note")
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/task/task-fields", params={"fields": "status,secrets"}).json()
+
+        self.assertEqual(response["code"], 400)
+
+    def test_if_none_match_returns_304_until_progress_changes(self):
+        with mock.patch.object(note, "get_task_by_id", return_value=_task()):
+            first = self.client.get("/task/task-fields", params={"fields": "status,progress"})
+            etag = first.headers["etag"]
+            unchanged = self.client.get(
+                "/task/task-fields", params={"fields": "status,progress"}, headers={"If-None-Match": etag}
+            )
+            write_note_progress(self.output_dir, "task-fields", "正在生成", "## more")
+            changed = self.client.get(
+                "/task/task-fields", params={"fields": "status,progress"}, headers={"If-None-Match": etag}
+            )
+
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.content, b"")
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], etag)
+
+    def test_transcript_endpoint_pages_through_time_range(self):
+        first = self.client.get(
+            "/task/task-fields/transcript", params={"start": 3, "end": 15, "limit": 4}
+        ).json()["data"]
+        second = self.client.get(
+            "/task/task-fields/transcript", params={"start": 3, "end": 15, "limit": 4, "offset": first["next_offset"]}
+        ).json()["data"]
+
+        # 2-4 秒的片段与 start=3 重叠，14-16 秒的片段开始于 end 之前
+        self.assertEqual(first["total"], 7)
+        self.assertEqual([seg["text"] for seg in first["segments"]], ["第1句", "第2句", "第3句", "第4句"])
+        self.assertEqual([seg["text"] for seg in second["segments"]], ["第5句", "第6句", "第7句"])
+        self.assertIsNone(second["next_offset"])
+
+    def test_missing_transcript_reports_error(self):
+        self.assertIsNone(read_transcript_page(self.output_dir / "missing.json"))
+        response = self.client.get("/task/other/transcript").json()
+
+        self.assertEqual(response["code"], 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import sqlite3
+import sys
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db import migrate, video_task_dao
+from app.db.models.video_task import VideoTask
+from app.routers import note
+
+
+class TaskListingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "tasks.db"
+        self.engine = create_engine(f"sqlite:///{self.db_path}", connect_args={"check_same_thread": False})
+        VideoTask.__table__.create(bind=self.engine)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        patcher = mock.patch.object(video_task_dao, "SessionLocal", self.session_factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.engine.dispose)
+
+        base = datetime(2025, 1, 1)
+        db = self.session_factory()
+        # 两两共用同一创建时间，检验游标在时间相同的行之间不丢不重
+        for index in range(9):
+            db.add(VideoTask(
+                task_id=f"task-{index}",
+                filename=f"video-{index}.mp4",
+                status="completed" if index % 3 else "failed",
+                source="bilibili" if index % 2 else "upload",
+                markdown_inline="x" * 1000,
+                created_at=base + timedelta(minutes=index // 2),
+            ))
+        db.commit()
+        db.close()
+
+    def test_cursor_pages_cover_every_task_once_in_order(self):
+        seen = []
+        cursor = None
+        while True:
+            response = note.list_tasks_page(limit=4, cursor=cursor)
+            self.assertEqual(response["code"], 200)
+            seen.extend(item["task_id"] for item in response["data"]["items"])
+            cursor = response["data"]["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [f"task-{index}" for index in range(8, -1, -1)])
+
+    def test_filters_by_status_source_and_date_range(self):
+        response = note.list_tasks_page(
+            status="completed",
+            source="bilibili",
+            created_from=datetime(2025, 1, 1, 0, 1),
+            created_to=datetime(2025, 1, 1, 0, 4),
+        )
+
+        self.assertEqual([item["task_id"] for item in response["data"]["items"]], ["task-7", "task-5"])
+        self.assertNotIn("markdown", response["data"]["items"][0])
+
+    def test_summary_query_does_not_select_markdown(self):
+        rows = video_task_dao.get_all_tasks(limit=2)
+
+        self.assertEqual([row.task_id for row in rows], ["task-8", "task-7"])
+        self.assertNotIn("markdown", rows[0]._fields)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(note.list_tasks_page(cursor="not-a-cursor")["code"], 400)
+
+    def test_migration_adds_listing_indexes_to_existing_database(self):
+        legacy = Path(self.tmp.name) / "legacy.db"
+        conn = sqlite3.connect(legacy)
+        conn.execute(
+            "CREATE TABLE video_tasks (id INTEGER PRIMARY KEY, task_id TEXT, filename TEXT, status TEXT, "
+            "markdown TEXT, created_at DATETIME, updated_at DATETIME)"
+        )
+        conn.close()
+
+        with mock.patch.object(migrate, "DB_PATH", str(legacy)):
+            migrate.migrate_add_screenshot_column()
+            migrate.migrate_add_task_indexes()
+            migrate.migrate_add_task_indexes()
+
+        conn = sqlite3.connect(legacy)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT task_id FROM video_tasks WHERE status = 'failed' "
+            "ORDER BY created_at DESC, id DESC LIMIT 50"
+        ))
+        conn.close()
+
+        self.assertTrue({name for name, _ in migrate.TASK_INDEXES} <= indexes)
+        self.assertIn("ix_video_tasks_status_created_id", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
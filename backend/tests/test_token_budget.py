@@ -0,0 +1,115 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.gpt import token_budget
+from app.gpt.openai_gpt import OpenAIGPT
+from app.gpt.token_budget import TokenBudget
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+
+
+class TokenBudgetTests(unittest.TestCase):
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(token_budget, "tiktoken", None),
+            mock.patch("app.services.llm_cache.LLM_CACHE_ENABLED", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_estimate_counts_cjk_per_character(self):
+        self.assertEqual(token_budget.estimate_tokens("大家好"), 3)
+        self.assertEqual(token_budget.estimate_tokens("a" * 40), 10)
+        self.assertEqual(token_budget.estimate_tokens("讲解 asyncio"), 2 + 2)
+
+    def test_context_window_lookup_handles_relay_names_and_override(self):
+        self.assertEqual(token_budget.context_window("gpt-4o-mini"), 128_000)
+        self.assertEqual(token_budget.context_window("openai/gpt-4o"), 128_000)
+        self.assertEqual(token_budget.context_window("moonshot-v1-8k"), 8_192)
+        self.assertEqual(token_budget.context_window("unknown-model"), token_budget.DEFAULT_CONTEXT_TOKENS)
+        with mock.patch.dict("os.environ", {"NOTE_MODEL_CONTEXT_TOKENS": "32000"}):
+            self.assertEqual(token_budget.context_window("gpt-4o"), 32000)
+
+    def test_budget_reserves_output_and_bounds_chunk_targets(self):
+        budget = TokenBudget.for_model("moonshot-v1-8k")
+
+        self.assertEqual(budget.output_reserve, 2048)
+        self.assertLess(budget.prompt_tokens, budget.context_tokens - budget.output_reserve)
+        self.assertLessEqual(budget.chunk_target_tokens, budget.prompt_tokens // 2)
+
+    def test_chinese_segments_pack_into_more_chunks_than_english(self):
+        gpt = OpenAIGPT(api_key="sk-test", base_url="https://budget.test/v1", model="demo")
+
+        chinese = [TranscriptSegment(start=i, end=i + 1, text="中" * 400) for i in range(30)]
+        english = [TranscriptSegment(start=i, end=i + 1, text="e" * 400) for i in range(30)]
+
+        chinese_chunks = gpt._chunk_segments(chinese, 2000)
+        english_chunks = gpt._chunk_segments(english, 2000)
+
+        self.assertEqual(len(english_chunks), 2)
+        self.assertEqual(len(chinese_chunks), 8)
+        for chunk in chinese_chunks:
+            self.assertLessEqual(sum(gpt.budget.count(gpt._format_segment(seg)) for seg in chunk), 2000)
+
+    def test_auto_mode_chunks_up_front_when_prompt_exceeds_model_window(self):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.side_effect = lambda **kwargs: [_chunk("# note")]
+        gpt = OpenAIGPT(api_key="sk-test", base_url="https://budget.test/v1", model="moonshot-v1-8k")
+
+        segments = [TranscriptSegment(start=i, end=i + 1, text="中" * 300) for i in range(40)]
+        transcript = TranscriptResult(language="zh", full_text="", segments=segments)
+
+        with mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=_async_client(fake_client)), \
+                mock.patch("app.gpt.openai_gpt.NOTE_GENERATION_MODE", "auto"):
+            gpt.summarize(transcript, filename="long.mp4")
+
+        prompts = [call.kwargs["messages"][1]["content"] for call in fake_client.chat.completions.create.call_args_list]
+        # No direct attempt that would fail on the context limit; every request fits the budget
+        self.assertGreater(len(prompts), 2)
+        self.assertTrue(all(gpt.budget.count(prompt) <= gpt.budget.prompt_tokens for prompt in prompts))
+
+    def test_token_counting_stays_off_the_llm_loop(self):
+        fake_client = mock.Mock()
+        fake_client.chat.completions.create.side_effect = lambda **kwargs: [_chunk("# note")]
+        gpt = OpenAIGPT(api_key="sk-test", base_url="https://budget.test/v1", model="moonshot-v1-8k")
+        segments = [TranscriptSegment(start=i, end=i + 1, text="中" * 300) for i in range(40)]
+        transcript = TranscriptResult(language="zh", full_text="", segments=segments)
+        count = TokenBudget.count
+        threads = set()
+
+        def record_thread(budget, text):
+            threads.add(threading.current_thread().name)
+            return count(budget, text)
+
+        with mock.patch("app.gpt.openai_gpt.create_async_openai_client", return_value=_async_client(fake_client)), \
+                mock.patch("app.gpt.openai_gpt.NOTE_GENERATION_MODE", "auto"), \
+                mock.patch.object(TokenBudget, "count", autospec=True, side_effect=record_thread):
+            gpt.summarize(transcript, filename="long.mp4")
+
+        self.assertTrue(threads)
+        self.assertNotIn("llm-event-loop", threads)
+
+
+def _chunk(content):
+    return mock.Mock(choices=[mock.Mock(delta=mock.Mock(content=content))])
+
+
+def _async_client(fake_client):
+    """AsyncOpenAI stand-in answering from a sync chat.completions fake."""
+    async def create(**kwargs):
+        return _async_events(fake_client.chat.completions.create(**kwargs))
+
+    return mock.Mock(chat=mock.Mock(completions=mock.Mock(create=create)))
+
+
+async def _async_events(events):
+    for event in events:
+        yield event
+
+
+if __name__ == "__main__":
+    unittest.main()
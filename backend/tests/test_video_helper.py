@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils import video_helper
+from app.utils.ffmpeg_helper import get_ffmpeg_path
+
+
+def _make_video(path: Path, duration: int = 12) -> None:
+    subprocess.run(
+        [get_ffmpeg_path(), "-f", "lavfi", "-i", f"testsrc=duration={duration}:size=160x120:rate=10",
+         "-g", "20", "-y", "-loglevel", "error", str(path)],
+        check=True,
+    )
+
+
+class GenerateScreenshotsTests(unittest.TestCase):
+    def test_batches_share_ffmpeg_runs_and_dedupe_timestamps(self):
+        with TemporaryDirectory() as tmp:
+            video = Path(tmp) / "clip.mp4"
+            _make_video(video)
+            real_run = subprocess.run
+
+            with mock.patch.object(video_helper, "SCREENSHOT_BATCH_SIZE", 3), \
+                    mock.patch.object(video_helper.subprocess, "run", side_effect=real_run) as run:
+                shots = video_helper.generate_screenshots(str(video), tmp, [1, 3, 3, 5, 7, 9])
+
+            self.assertEqual(sorted(shots), [1, 3, 5, 7, 9])
+            self.assertEqual(run.call_count, 2)
+            self.assertEqual(len(set(shots.values())), 5)
+            for path in shots.values():
+                self.assertGreater(Path(path).stat().st_size, 0)
+
+    def test_failed_batch_falls_back_to_single_screenshots(self):
+        with TemporaryDirectory() as tmp:
+            video = Path(tmp) / "clip.mp4"
+            failure = subprocess.CalledProcessError(1, "ffmpeg", stderr="boom")
+
+            with mock.patch.object(video_helper.subprocess, "run", side_effect=failure) as run, \
+                    mock.patch.object(video_helper, "generate_screenshot", side_effect=[
+                        str(Path(tmp) / "a.jpg"), Exception("seek failed"),
+                    ]) as single:
+                shots = video_helper.generate_screenshots(str(video), tmp, [2, 4])
+
+            run.assert_called_once()
+            self.assertEqual(single.call_count, 2)
+            self.assertEqual(shots, {2: str(Path(tmp) / "a.jpg")})
+
+    def test_empty_timestamps_skip_ffmpeg(self):
+        with TemporaryDirectory() as tmp, mock.patch.object(video_helper.subprocess, "run") as run:
+            self.assertEqual(video_helper.generate_screenshots("missing.mp4", tmp, []), {})
+        run.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,17 @@
 import sys
+import threading
 import types
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import mock
 
+import httpx
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app.services import web_video
+from app.services.media_download import DownloadCancelled
 from app.routers.extension import ImportRequest
 
 
@@ -305,7 +309,7 @@ class WebVideoServiceTests(unittest.TestCase):
             return FakeResponse()
 
         with mock.patch.dict(sys.modules, {"yt_dlp": types.SimpleNamespace(YoutubeDL=FakeYoutubeDL)}), \
-                mock.patch("requests.get", side_effect=fake_get):
+                mock.patch.object(web_video, "web_http_client", return_value=types.SimpleNamespace(get=fake_get)):
             result = web_video.resolve_web_video(
                 page_url="https://www.douyin.com/video/123456",
                 page_title="Douyin",
@@ -480,7 +484,7 @@ class WebVideoServiceTests(unittest.TestCase):
 
         fake_session = FakeSession()
         with mock.patch.dict(sys.modules, {"yt_dlp": types.SimpleNamespace(YoutubeDL=FakeYoutubeDL)}), \
-                mock.patch("requests.Session", return_value=fake_session):
+                mock.patch.object(web_video, "web_http_client", return_value=fake_session):
             result = web_video.resolve_web_video(
                 page_url="https://www.bilibili.com/video/BV1demo/",
                 cookie="SESSDATA=demo; bili_jct=csrf",
@@ -569,7 +573,7 @@ class WebVideoServiceTests(unittest.TestCase):
                 raise AssertionError(f"unexpected URL {url}")
 
         fake_session = FakeSession()
-        with mock.patch("requests.Session", return_value=fake_session):
+        with mock.patch.object(web_video, "web_http_client", return_value=fake_session):
             result = web_video._bilibili_api_candidates(
                 "https://www.bilibili.com/video/BV1demo/?p=2",
                 cookie="SESSDATA=demo",
@@ -579,6 +583,141 @@ class WebVideoServiceTests(unittest.TestCase):
         self.assertTrue(result)
         self.assertTrue(any(params.get("cid") == "222" for params in fake_session.play_params))
 
+    def test_bilibili_api_requests_missing_qualities_concurrently(self):
+        class FakeResponse:
+            def __init__(self, payload):
+                self.payload = payload
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return self.payload
+
+        def play_data(qualities):
+            return {
+                "code": 0,
+                "data": {
+                    "accept_quality": [120, 116, 80, 64],
+                    "dash": {
+                        "video": [
+                            {"id": quality, "baseUrl": f"https://upos.example.test/video-{quality}.m4s", "height": quality * 9}
+                            for quality in qualities
+                        ],
+                        "audio": [{"baseUrl": "https://upos.example.test/audio.m4s"}],
+                    },
+                },
+            }
+
+        class FakeSession:
+            def __init__(self):
+                self.qualities = []
+                # every missing quality must be in flight at once to get past the barrier
+                self.barrier = threading.Barrier(3, timeout=5)
+
+            def get(self, url, **kwargs):
+                if url.endswith("/x/web-interface/view"):
+                    return FakeResponse({"code": 0, "data": {"cid": 111, "title": "Qualities"}})
+                if url.endswith("/x/web-interface/nav"):
+                    key = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789ab"
+                    return FakeResponse({
+                        "code": 0,
+                        "data": {
+                            "isLogin": True,
+                            "wbi_img": {
+                                "img_url": f"https://i0.hdslb.com/bfs/wbi/{key[:32]}.png",
+                                "sub_url": f"https://i0.hdslb.com/bfs/wbi/{key[32:]}.png",
+                            },
+                        },
+                    })
+                if url.endswith("/x/player/wbi/playurl"):
+                    quality = kwargs.get("params", {}).get("qn")
+                    if quality is None:
+                        return FakeResponse(play_data([64]))
+                    self.qualities.append(quality)
+                    self.barrier.wait()
+                    if quality == "116":
+                        raise RuntimeError("qn=116 rejected")
+                    return FakeResponse(play_data([int(quality)]))
+                raise AssertionError(f"unexpected URL {url}")
+
+        fake_session = FakeSession()
+        diagnostics = {}
+        with mock.patch.object(web_video, "web_http_client", return_value=fake_session):
+            result = web_video._bilibili_api_candidates(
+                "https://www.bilibili.com/video/BV1demo/",
+                cookie="SESSDATA=demo",
+                diagnostics=diagnostics,
+            )
+
+        self.assertCountEqual(fake_session.qualities, ["120", "116", "80"])
+        self.assertEqual([fmt["formatId"] for fmt in result[0]["formats"]], ["bilibili-api-120", "bilibili-api-80", "bilibili-api-64"])
+        self.assertEqual(diagnostics["bilibiliApiAcceptQuality"], [120, 116, 80, 64])
+
+    def test_bilibili_api_cancelled_quality_requests_are_not_reported_as_failures(self):
+        class FakeResponse:
+            def __init__(self, payload):
+                self.payload = payload
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return self.payload
+
+        def play_data(qualities):
+            return {
+                "code": 0,
+                "data": {
+                    "accept_quality": [120, 116, 80, 64],
+                    "dash": {
+                        "video": [
+                            {"id": quality, "baseUrl": f"https://upos.example.test/video-{quality}.m4s", "height": quality * 9}
+                            for quality in qualities
+                        ],
+                        "audio": [{"baseUrl": "https://upos.example.test/audio.m4s"}],
+                    },
+                },
+            }
+
+        class FakeSession:
+            def __init__(self):
+                self.qualities = []
+
+            def get(self, url, **kwargs):
+                if url.endswith("/x/web-interface/view"):
+                    return FakeResponse({"code": 0, "data": {"cid": 111, "title": "Qualities"}})
+                if url.endswith("/x/web-interface/nav"):
+                    key = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789ab"
+                    return FakeResponse({
+                        "code": 0,
+                        "data": {
+                            "isLogin": True,
+                            "wbi_img": {
+                                "img_url": f"https://i0.hdslb.com/bfs/wbi/{key[:32]}.png",
+                                "sub_url": f"https://i0.hdslb.com/bfs/wbi/{key[32:]}.png",
+                            },
+                        },
+                    })
+                if url.endswith("/x/player/wbi/playurl"):
+                    quality = kwargs.get("params", {}).get("qn")
+                    if quality is None:
+                        return FakeResponse(play_data([64]))
+                    self.qualities.append(quality)
+                    # 一次响应就带回全部缺失清晰度，排队中的其余请求被取消
+                    return FakeResponse(play_data([120, 116, 80]))
+                raise AssertionError(f"unexpected URL {url}")
+
+        fake_session = FakeSession()
+        with mock.patch.object(web_video, "web_http_client", return_value=fake_session), \
+                mock.patch.object(web_video, "BILIBILI_PLAYURL_CONCURRENCY", 1), \
+                mock.patch.object(web_video.logger, "warning") as warning:
+            result = web_video._bilibili_api_candidates("https://www.bilibili.com/video/BV1demo/", cookie="SESSDATA=demo")
+
+        self.assertEqual(fake_session.qualities, ["120"])
+        self.assertEqual(len(result[0]["formats"]), 4)
+        warning.assert_not_called()
+
     def test_ytdlp_options_set_network_timeouts(self):
         options = web_video._yt_dlp_options()
 
@@ -961,7 +1100,7 @@ class WebVideoServiceTests(unittest.TestCase):
             downloaded.write_bytes(b"video")
             seen = {}
 
-            def fake_download_direct(url, target_path, headers, job_id, label):
+            def fake_download_direct(url, target_path, headers, job_id, label, on_progress=None, cancel=None):
                 seen.setdefault("urls", []).append(url)
                 target_path.write_bytes(b"track")
                 return target_path
@@ -1003,13 +1142,44 @@ class WebVideoServiceTests(unittest.TestCase):
 
             updated = web_video.job_manager.get(job.job_id)
             self.assertEqual(updated.status, "completed")
-            self.assertEqual(seen["urls"], [
+            # video and audio tracks download concurrently, so completion order varies
+            self.assertCountEqual(seen["urls"], [
                 "https://upos.example.test/video-1080.m4s",
                 "https://upos.example.test/audio.m4s",
             ])
             self.assertEqual(seen["merge"], ("web_" + job.job_id + ".video.m4s", "web_" + job.job_id + ".audio.m4s"))
             self.assertTrue(list(upload_dir.glob(f"{updated.task_id}.mp4")))
 
+    def test_failed_bilibili_track_cancels_the_other_track(self):
+        seen = {}
+
+        def fake_download_direct(url, target_path, headers, job_id, label, on_progress=None, cancel=None):
+            if url.endswith("audio.m4s"):
+                raise httpx.ReadError("audio CDN reset")
+            seen["cancelled"] = cancel.wait(5)
+            raise DownloadCancelled("video track cancelled")
+
+        with TemporaryDirectory() as tmp, \
+                mock.patch.object(web_video, "UPLOAD_DIR", Path(tmp)), \
+                mock.patch.object(web_video, "_download_direct_url", side_effect=fake_download_direct), \
+                mock.patch.object(web_video, "_merge_video_audio", side_effect=AssertionError("merge should not run")):
+            job = web_video.job_manager.create("https://www.bilibili.com/video/BV1demo/")
+            with self.assertRaisesRegex(httpx.ReadError, "audio CDN reset"):
+                web_video._download_bilibili_playinfo(job.job_id, {
+                    "formatId": "bilibili-api-80",
+                    "candidateId": "bilibili-api-BV1demo",
+                    "resolvedCandidates": [{
+                        "id": "bilibili-api-BV1demo",
+                        "formats": [{
+                            "formatId": "bilibili-api-80",
+                            "sourceUrl": "https://upos.example.test/video-1080.m4s",
+                            "companionAudioUrl": "https://upos.example.test/audio.m4s",
+                        }],
+                    }],
+                })
+
+        self.assertTrue(seen["cancelled"])
+
     def test_normalize_douyin_share_url(self):
         self.assertEqual(
             web_video._normalize_page_url("https://www.douyin.com/share/video/123456/?foo=bar"),
@@ -1066,6 +1236,14 @@ class WebVideoServiceTests(unittest.TestCase):
             self.assertTrue((output_dir / f"{updated.task_id}_model_config.json").exists())
             self.assertTrue(list(upload_dir.glob(f"{updated.task_id}.mp4")))
 
+    def test_queued_import_job_failure_is_raised_to_the_queue(self):
+        with mock.patch.object(web_video, "_download_with_ytdlp", side_effect=RuntimeError("download blocked")):
+            job = web_video.job_manager.create("https://example.test/watch")
+            with self.assertRaisesRegex(RuntimeError, "download blocked"):
+                web_video._run_queued_import_job(job.job_id, {"pageUrl": "https://example.test/watch"})
+
+        self.assertEqual(web_video.job_manager.get(job.job_id).status, "failed")
+
     def test_run_import_job_uses_plugin_note_style(self):
         with TemporaryDirectory() as tmp:
             tmp_path = Path(tmp)
@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.transcriber import fast_whisper, model_pool
+
+
+class FakeLoader:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, model_size, device, compute_type):
+        with self.lock:
+            self.calls.append((model_size, device, compute_type))
+        time.sleep(self.delay)
+        return object()
+
+
+class WhisperModelPoolTests(unittest.TestCase):
+    def test_same_key_is_loaded_once_across_threads(self):
+        loader = FakeLoader(delay=0.05)
+        pool = model_pool.WhisperModelPool(max_resident=2, loader=loader)
+        models = []
+
+        def use():
+            with pool.lease("base", "cpu", "int8") as model:
+                models.append(model)
+
+        threads = [threading.Thread(target=use) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=2)
+
+        self.assertEqual(loader.calls, [("base", "cpu", "int8")])
+        self.assertEqual(len({id(model) for model in models}), 1)
+        stats = pool.stats()
+        self.assertEqual(stats["loads"], 1)
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["models"][0]["refs"], 0)
+        self.assertEqual(stats["models"][0]["uses"], 4)
+
+    def test_least_recently_used_idle_model_is_evicted(self):
+        loader = FakeLoader()
+        pool = model_pool.WhisperModelPool(max_resident=2, loader=loader)
+
+        with pool.lease("tiny", "cpu", "int8"):
+            pass
+        with pool.lease("base", "cpu", "int8"):
+            pass
+        with pool.lease("tiny", "cpu", "int8"):
+            pass
+        with pool.lease("small", "cpu", "int8"):
+            pass
+
+        resident = {model["model_size"] for model in pool.stats()["models"]}
+        self.assertEqual(resident, {"tiny", "small"})
+        self.assertEqual(pool.stats()["evictions"], 1)
+
+    def test_model_in_use_is_not_evicted(self):
+        loader = FakeLoader()
+        pool = model_pool.WhisperModelPool(max_resident=1, loader=loader)
+
+        held = pool.acquire("base", "cpu", "int8")
+        with pool.lease("small", "cpu", "int8"):
+            sizes = {model["model_size"] for model in pool.stats()["models"]}
+            self.assertEqual(sizes, {"base", "small"})
+
+        # small 已空闲，base 仍被持有，超出上限时淘汰 small
+        self.assertEqual([model["model_size"] for model in pool.stats()["models"]], ["base"])
+        pool.release("base", "cpu", "int8")
+        self.assertIs(pool.acquire("base", "cpu", "int8"), held)
+
+    def test_failed_load_does_not_leave_entry(self):
+        pool = model_pool.WhisperModelPool(loader=mock.Mock(side_effect=RuntimeError("download failed")))
+
+        with self.assertRaises(RuntimeError):
+            pool.acquire("large", "cpu", "int8")
+
+        self.assertEqual(pool.stats()["models"], [])
+
+    def test_transcribers_share_pooled_model(self):
+        used = []
+
+        class FakeModel:
+            def transcribe(self, audio, **_kwargs):
+                # 转写期间模型被租用，不会被淘汰
+                used.append((self, pool.stats()["models"][0]["refs"]))
+                return iter([]), mock.Mock(language="en", duration=0.0)
+
+        loader = mock.Mock(return_value=FakeModel())
+        pool = model_pool.WhisperModelPool(loader=loader)
+
+        with mock.patch.object(fast_whisper, "whisper_model_pool", pool):
+            first = fast_whisper.FastWhisperTranscriber(model_size="base", device="cpu", compute_type="int8")
+            second = fast_whisper.FastWhisperTranscriber(model_size="base", device="cpu", compute_type="int8")
+            first.transcript("first.wav")
+            second.transcript("second.wav")
+
+        self.assertIs(used[0][0], used[1][0])
+        self.assertEqual([refs for _, refs in used], [1, 1])
+        self.assertEqual(loader.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,14 +29,41 @@ hiddenimports = [
     'app.services.note',
     'app.services.web_video',
     'app.services.extension_bridge',
+    'app.services.note_job_queue',
+    'app.services.note_pipeline',
+    'app.services.llm_loop',
+    'app.services.llm_cache',
+    'app.services.llm_resilience',
+    'app.services.media_download',
+    'app.services.http_pool',
+    'app.services.progress_bus',
+    'app.services.task_artifacts',
     'app.services.model_provider',
     'app.services.model_settings',
     'app.services.openai_client',
+    'app.services.media_cache',
+    'app.services.summary_checkpoint',
+    'app.services.transcript_pages',
+    'app.db.status_writer',
+    'app.db.note_job_dao',
+    'app.db.models.note_job',
+    'app.gpt.token_budget',
+    'app.utils.audio_stream',
+    'app.utils.blob_store',
+    'app.utils.file_cache',
+    'app.utils.frame_select',
+    'app.utils.rate_limiter',
+    'app.utils.screenshot_markdown',
     'app.transcriber.transcriber_provider',
     'app.transcriber.fast_whisper',
+    'app.transcriber.model_pool',
+    'app.transcriber.parallel',
     'faster_whisper',
     'yt_dlp',
     'python_multipart',
+    'tiktoken',
+    'tiktoken_ext',
+    'tiktoken_ext.openai_public',
 ]
 
 def safe_collect_data(package_name):
@@ -79,6 +106,24 @@ datas += safe_copy_metadata('google-generativeai')
 datas += safe_copy_metadata('openai')
 datas += safe_copy_metadata('yt-dlp')
 datas += safe_copy_metadata('playwright')
+datas += safe_copy_metadata('tiktoken')
+
+
+# 构建时预取 tiktoken 编码表并打包，运行时 app.gpt.token_budget 从包内目录读取，不再联网下载
+def safe_cache_tiktoken(encodings):
+    cache_dir = os.path.abspath(os.path.join('build', 'tiktoken_cache'))
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ['TIKTOKEN_CACHE_DIR'] = cache_dir
+    try:
+        import tiktoken
+        for name in encodings:
+            tiktoken.get_encoding(name)
+    except Exception as e:
+        print(f"Warning: Could not cache tiktoken encodings: {e}")
+        return []
+    return [(cache_dir, 'tiktoken_cache')]
+
+datas += safe_cache_tiktoken(['o200k_base', 'cl100k_base'])
 
 a = Analysis(
     ['app_entry.py'],
@@ -11,7 +11,8 @@ const BiliConfigPanel: React.FC<BiliConfigPanelProps> = ({ compact = false }) =>
     const [config, setConfig] = useState<BiliConfig>({
         video_quality: 80,
         download_path: 'uploads',
-        download_interval: 2,
+        max_concurrent_downloads: 3,
+        api_rate_limit: 2,
         headless: false,
     })
     const [loading, setLoading] = useState(false)
@@ -25,7 +26,7 @@ const BiliConfigPanel: React.FC<BiliConfigPanelProps> = ({ compact = false }) =>
         try {
             const response = await getBiliConfig()
             if (response.success) {
-                setConfig(response.data)
+                setConfig((prev) => ({ ...prev, ...response.data }))
             }
         } catch (error) {
             console.error('加载配置失败:', error)
@@ -78,20 +79,36 @@ const BiliConfigPanel: React.FC<BiliConfigPanelProps> = ({ compact = false }) =>
 
                 <div>
                     <label className="block text-xs font-medium text-gray-500 dark:text-gray-400 mb-1">
-                        下载间隔 (秒)
+                        同时下载数
                     </label>
                     <input
                         type="number"
                         min="1"
-                        max="60"
-                        value={config.download_interval}
-                        onChange={(e) => setConfig({ ...config, download_interval: Number(e.target.value) })}
+                        max="8"
+                        value={config.max_concurrent_downloads}
+                        onChange={(e) => setConfig({ ...config, max_concurrent_downloads: Number(e.target.value) })}
                         className="w-full px-3 py-2 text-sm border border-gray-200 dark:border-gray-600 rounded-lg 
                          bg-white dark:bg-gray-700 text-gray-900 dark:text-white"
                     />
                 </div>
 
-                <div className="md:col-span-2">
+                <div>
+                    <label className="block text-xs font-medium text-gray-500 dark:text-gray-400 mb-1">
+                        API 请求频率 (次/秒)
+                    </label>
+                    <input
+                        type="number"
+                        min="0.5"
+                        max="20"
+                        step="0.5"
+                        value={config.api_rate_limit}
+                        onChange={(e) => setConfig({ ...config, api_rate_limit: Number(e.target.value) })}
+                        className="w-full px-3 py-2 text-sm border border-gray-200 dark:border-gray-600 rounded-lg 
+                         bg-white dark:bg-gray-700 text-gray-900 dark:text-white"
+                    />
+                </div>
+
+                <div>
                     <label className="block text-xs font-medium text-gray-500 dark:text-gray-400 mb-1">
                         保存路径
                     </label>
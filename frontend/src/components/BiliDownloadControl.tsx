@@ -4,6 +4,8 @@ import { startDownload, stopDownload } from '../services/biliApi'
 import { DownloadProgress } from '../hooks/useBiliWebSocket'
 import toast from 'react-hot-toast'
 
+const formatMB = (bytes: number) => `${(bytes / 1024 / 1024).toFixed(1)} MB`
+
 interface BiliDownloadControlProps {
     progress: DownloadProgress
 }
@@ -36,20 +38,41 @@ const BiliDownloadControl: React.FC<BiliDownloadControlProps> = ({ progress }) =
     }
 
     const isRunning = progress.status === 'running'
-    const progressPercent = progress.total > 0 ? (progress.completed / progress.total) * 100 : 0
+    const finished = progress.completed + (progress.failed ?? 0)
+    const progressPercent = progress.overall_progress
+        ?? (progress.total > 0 ? (finished / progress.total) * 100 : 0)
+    const runningVideos = (progress.videos ?? []).filter((video) => video.status === 'running')
 
     return (
         <div className="space-y-4">
             {/* 进度区域 */}
             {isRunning && (
                 <div className="space-y-3">
-                    {/* 当前视频 */}
-                    {progress.current_video && (
+                    {/* 当前视频：并发下载时逐个列出 */}
+                    {runningVideos.length > 1 ? (
+                        <div className="space-y-1">
+                            {runningVideos.map((video) => (
+                                <div key={video.video} className="flex items-center gap-2 text-sm">
+                                    <span className="font-mono text-gray-900 dark:text-white">{video.video}</span>
+                                    <span className="text-gray-500 dark:text-gray-400">
+                                        {video.progress}%
+                                        {video.total_bytes ? ` · ${formatMB(video.downloaded_bytes)} / ${formatMB(video.total_bytes)}` : ''}
+                                    </span>
+                                </div>
+                            ))}
+                        </div>
+                    ) : progress.current_video && (
                         <div className="flex items-center gap-2 text-sm">
                             <span className="text-gray-500 dark:text-gray-400">当前:</span>
                             <span className="font-mono text-gray-900 dark:text-white">
                                 {progress.current_video}
                             </span>
+                            {!!progress.downloaded_bytes && (
+                                <span className="text-gray-500 dark:text-gray-400">
+                                    {formatMB(progress.downloaded_bytes)}
+                                    {progress.total_bytes ? ` / ${formatMB(progress.total_bytes)}` : ''}
+                                </span>
+                            )}
                         </div>
                     )}
 
@@ -60,7 +83,10 @@ const BiliDownloadControl: React.FC<BiliDownloadControlProps> = ({ progress }) =
                                 下载进度
                             </span>
                             <span className="font-medium text-gray-900 dark:text-white">
-                                {progress.completed} / {progress.total}
+                                {finished} / {progress.total}
+                                {!!progress.failed && (
+                                    <span className="text-red-500 ml-1">（失败 {progress.failed}）</span>
+                                )}
                             </span>
                         </div>
                         <div className="w-full bg-gray-200 dark:bg-gray-700 rounded-full h-2.5 overflow-hidden">
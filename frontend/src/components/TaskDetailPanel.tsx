@@ -19,6 +19,7 @@ export default function TaskDetailPanel({ taskId, onClose }: TaskDetailPanelProp
   const [autoProcess, setAutoProcess] = useState(false)
   const [transcript, setTranscript] = useState<any>(null)
   const [regenerateStyle, setRegenerateStyle] = useState<string>('')
+  const [bypassCache, setBypassCache] = useState(false)
 
   // 初始化步骤
   useEffect(() => {
@@ -360,10 +361,19 @@ export default function TaskDetailPanel({ taskId, onClose }: TaskDetailPanelProp
                     <option value="academic">学术模式</option>
                     <option value="creative">创意模式</option>
                   </select>
+                  <label className="flex items-center gap-1 text-sm text-gray-600" title="不复用已缓存的分段摘要，全部重新请求模型">
+                    <input
+                      type="checkbox"
+                      checked={bypassCache}
+                      onChange={(e) => setBypassCache(e.target.checked)}
+                      className="rounded border-gray-300"
+                    />
+                    忽略缓存
+                  </label>
                   <button
                     onClick={async () => {
                       try {
-                        await regenerateNote(taskId, regenerateStyle || undefined)
+                        await regenerateNote(taskId, regenerateStyle || undefined, bypassCache)
                         toast.success('正在重新生成笔记...')
                         setAutoProcess(true)
                       } catch (error: any) {
@@ -1,9 +1,21 @@
 import { useEffect, useState, useRef } from 'react'
 import { FileVideo, Calendar, Trash2, Loader2, CheckCircle2, AlertCircle, Clock } from 'lucide-react'
 import { useTaskStore } from '../store/taskStore'
-import { getTasks, deleteTask } from '../services/api'
+import { getTaskPage, deleteTask } from '../services/api'
 import toast from 'react-hot-toast'
 
+const PAGE_SIZE = 50
+
+const toTask = (task: any) => ({
+  id: task.task_id,
+  filename: task.filename,
+  status: task.status,
+  errorMessage: task.error_message,
+  source: task.source,
+  sourceUrl: task.source_url,
+  createdAt: task.created_at,
+})
+
 const statusIcons = {
   completed: <CheckCircle2 className="w-4 h-4 text-green-500" />,
   failed: <AlertCircle className="w-4 h-4 text-red-500" />,
@@ -20,6 +32,8 @@ export default function TaskList() {
   const { tasks, currentTaskId, setCurrentTask, loadTasks, removeTask } = useTaskStore()
   const [deletingIds, setDeletingIds] = useState<Set<string>>(new Set())
   const tasksLoadedRef = useRef(false)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   // 加载任务列表
   useEffect(() => {
@@ -31,18 +45,10 @@ export default function TaskList() {
     const loadTaskList = async () => {
       tasksLoadedRef.current = true
       try {
-        const response = await getTasks()
+        const response = await getTaskPage({ limit: PAGE_SIZE })
         if (response.data.code === 200) {
-          const taskList = response.data.data.map((task: any) => ({
-            id: task.task_id,
-            filename: task.filename,
-            status: task.status,
-            errorMessage: task.error_message,
-            source: task.source,
-            sourceUrl: task.source_url,
-            markdown: task.markdown,
-            createdAt: task.created_at,
-          }))
+          const taskList = response.data.data.items.map(toTask)
+          setNextCursor(response.data.data.next_cursor)
           loadTasks(taskList)
         }
       } catch (error: any) {
@@ -59,6 +65,26 @@ export default function TaskList() {
     loadTaskList()
   }, [loadTasks])
 
+  const handleLoadMore = async () => {
+    if (!nextCursor || loadingMore) return
+    setLoadingMore(true)
+    try {
+      const response = await getTaskPage({ limit: PAGE_SIZE, cursor: nextCursor })
+      if (response.data.code === 200) {
+        const currentTasks = useTaskStore.getState().tasks
+        const knownIds = new Set(currentTasks.map((task) => task.id))
+        const more = response.data.data.items.map(toTask).filter((task: any) => !knownIds.has(task.id))
+        loadTasks([...currentTasks, ...more])
+        setNextCursor(response.data.data.next_cursor)
+      }
+    } catch (error) {
+      console.error('加载更多任务失败:', error)
+      toast.error('加载更多任务失败')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleDelete = async (taskId: string, e: React.MouseEvent) => {
     e.stopPropagation() // 阻止触发任务选择
 
@@ -192,6 +218,16 @@ export default function TaskList() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <button
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="w-full flex items-center justify-center gap-2 py-2 text-sm text-gray-500 hover:text-blue-600 disabled:opacity-60"
+              >
+                {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                加载更多
+              </button>
+            )}
           </div>
         )}
       </div>
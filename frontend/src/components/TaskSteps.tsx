@@ -1,7 +1,7 @@
 import { useEffect, useState, useRef } from 'react'
 import { FileVideo, Music, FileText, BookOpen, RotateCcw, Eye, Play } from 'lucide-react'
 import { useTaskStore } from '../store/taskStore'
-import { getTaskStatus, confirmStep, regenerateNote } from '../services/api'
+import { getTaskStatus, confirmStep, regenerateNote, subscribeTaskEvents } from '../services/api'
 import StepProgress, { StepStatus } from './StepProgress'
 import ContentPreviewModal from './ContentPreviewModal'
 import MarkdownContent from './MarkdownContent'
@@ -351,9 +351,20 @@ export default function TaskSteps({ taskId }: TaskStepsProps) {
       return
     }
 
-    const interval = setInterval(async () => {
+    let interval: ReturnType<typeof setInterval> | null = null
+    let finished = false
+    let streamedMarkdown = task.partialMarkdown || ''
+
+    const refresh = async () => {
       try {
-        const response = await getTaskStatus(taskId)
+        // 进行中只取状态和进度，步骤结束时再取一次完整结果（笔记、转写）
+        let response = await getTaskStatus(taskId, 'status,progress')
+        if (
+          response.data.code === 200 &&
+          ['completed', 'failed', 'transcribed'].includes(response.data.data.status)
+        ) {
+          response = await getTaskStatus(taskId)
+        }
         if (response.data.code === 200) {
           const taskData = response.data.data
           const currentTask = tasksRef.current.find((t) => t.id === taskId)
@@ -373,16 +384,44 @@ export default function TaskSteps({ taskId }: TaskStepsProps) {
           updateStepsStatus(taskData.status, taskData)
 
           if (taskData.status === 'completed' || taskData.status === 'failed' || taskData.status === 'transcribed') {
-            clearInterval(interval)
+            finished = true
+            stop()
             setAutoProcess(false)
           }
         }
       } catch (error) {
         console.error('轮询失败:', error)
       }
-    }, 2000)
+    }
+
+    // 优先通过 SSE 接收增量进度；连接失败或断开后退回定时轮询
+    const unsubscribe = subscribeTaskEvents(taskId, {
+      onProgress: (event) => {
+        streamedMarkdown = streamedMarkdown.slice(0, event.offset) + event.text
+        updateTaskRef.current(taskId, {
+          partialMarkdown: streamedMarkdown,
+          progressMessage: event.message,
+        })
+      },
+      onStatus: () => {
+        refresh()
+      },
+      onError: () => {
+        if (!finished && !interval) {
+          interval = setInterval(refresh, 2000)
+        }
+      },
+    })
+
+    const stop = () => {
+      unsubscribe()
+      if (interval) {
+        clearInterval(interval)
+        interval = null
+      }
+    }
 
-    return () => clearInterval(interval)
+    return stop
   }, [taskId, autoProcess, task?.status])
 
   const updateStepsStatus = (status: string, taskData: any) => {
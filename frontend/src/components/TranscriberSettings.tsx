@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import { Cpu, Gauge, Loader2, Save, SlidersHorizontal } from 'lucide-react'
+import { Cpu, Gauge, Layers, Loader2, Save, SlidersHorizontal, Timer } from 'lucide-react'
 import toast from 'react-hot-toast'
 import { getTranscriberConfig, saveTranscriberConfig, testTranscriberConfig } from '../services/api'
 
@@ -8,6 +8,8 @@ interface TranscriberConfig {
   model_size: string
   device: string
   compute_type: string
+  parallel_workers: number
+  chunk_seconds: number
 }
 
 const DEFAULT_CONFIG: TranscriberConfig = {
@@ -15,6 +17,8 @@ const DEFAULT_CONFIG: TranscriberConfig = {
   model_size: 'base',
   device: 'cpu',
   compute_type: 'int8',
+  parallel_workers: 1,
+  chunk_seconds: 600,
 }
 
 const MODEL_SIZES = ['tiny', 'base', 'small', 'medium', 'large-v3']
@@ -48,7 +52,7 @@ export default function TranscriberSettings() {
     load()
   }, [])
 
-  const update = (field: keyof TranscriberConfig, value: string) => {
+  const update = (field: keyof TranscriberConfig, value: string | number) => {
     setConfig((prev) => ({ ...prev, [field]: value }))
   }
 
@@ -57,6 +61,8 @@ export default function TranscriberSettings() {
     model_size: config.model_size,
     device: config.device,
     compute_type: config.compute_type,
+    parallel_workers: Number(config.parallel_workers) || 1,
+    chunk_seconds: Number(config.chunk_seconds) || 600,
   })
 
   const handleSave = async () => {
@@ -172,6 +178,41 @@ export default function TranscriberSettings() {
             </div>
           </div>
 
+          <div className="grid grid-cols-1 sm:grid-cols-2 gap-4">
+            <div>
+              <label className="block text-sm font-medium text-slate-700 mb-2">
+                <Layers className="w-4 h-4 inline mr-1" />
+                并行转写进程数
+              </label>
+              <input
+                type="number"
+                min={1}
+                max={64}
+                value={config.parallel_workers}
+                onChange={(e) => update('parallel_workers', Number(e.target.value))}
+                className="w-full px-3 py-2 border border-slate-300 rounded-lg bg-white focus:ring-2 focus:ring-blue-500 focus:border-blue-500"
+              />
+              <p className="text-xs text-slate-500 mt-1">仅 CPU 生效。长音频按静音切分后由多个进程同时转写，1 表示不并行；每个进程会各自加载一份模型。</p>
+            </div>
+
+            <div>
+              <label className="block text-sm font-medium text-slate-700 mb-2">
+                <Timer className="w-4 h-4 inline mr-1" />
+                切分时长（秒）
+              </label>
+              <input
+                type="number"
+                min={60}
+                max={3600}
+                step={60}
+                value={config.chunk_seconds}
+                onChange={(e) => update('chunk_seconds', Number(e.target.value))}
+                className="w-full px-3 py-2 border border-slate-300 rounded-lg bg-white focus:ring-2 focus:ring-blue-500 focus:border-blue-500"
+              />
+              <p className="text-xs text-slate-500 mt-1">每个并行窗口的目标长度，会在附近的静音处切开。</p>
+            </div>
+          </div>
+
           <div className="pt-4 border-t border-slate-100 flex flex-col sm:flex-row gap-3">
             <button
               onClick={handleTest}
@@ -1,4 +1,5 @@
 import { useEffect, useRef, useState, useCallback } from 'react'
+import { VideoDownloadState } from '../services/biliApi'
 
 export interface BiliLogMessage {
     type: 'log' | 'progress' | 'status' | 'connected'
@@ -12,6 +13,11 @@ export interface BiliLogMessage {
         total: number
         completed: number
         progress: number
+        downloaded_bytes?: number
+        total_bytes?: number | null
+        failed?: number
+        overall_progress?: number
+        videos?: VideoDownloadState[]
     }
 }
 
@@ -21,6 +27,11 @@ export interface DownloadProgress {
     total: number
     completed: number
     progress: number
+    downloaded_bytes?: number
+    total_bytes?: number | null
+    failed?: number
+    overall_progress?: number
+    videos?: VideoDownloadState[]
 }
 
 interface UseBiliWebSocketReturn {
@@ -97,6 +108,11 @@ export function useBiliWebSocket(): UseBiliWebSocketReturn {
                                 total: message.data.total,
                                 completed: message.data.completed,
                                 progress: message.data.progress,
+                                downloaded_bytes: message.data.downloaded_bytes,
+                                total_bytes: message.data.total_bytes,
+                                failed: message.data.failed,
+                                overall_progress: message.data.overall_progress,
+                                videos: message.data.videos,
                             })
                         }
                         break
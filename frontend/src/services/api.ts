@@ -56,8 +56,57 @@ export const uploadVideo = async (
 
 
 // 获取任务状态
-export const getTaskStatus = async (taskId: string) => {
-  return await api.get(`/task/${taskId}`)
+// fields: 逗号分隔的 status,progress,markdown,transcript；不传返回全部
+export const getTaskStatus = async (taskId: string, fields?: string) => {
+  return await api.get(`/task/${taskId}`, { params: fields ? { fields } : undefined })
+}
+
+// 按时间范围分页获取转写片段
+export const getTaskTranscript = async (
+  taskId: string,
+  params: { start?: number; end?: number; offset?: number; limit?: number } = {}
+) => {
+  return await api.get(`/task/${taskId}/transcript`, { params })
+}
+
+export interface TaskProgressEvent {
+  seq: number
+  message: string
+  offset: number
+  text: string
+}
+
+export interface TaskStatusEvent {
+  status: string
+  error_message?: string | null
+}
+
+// 订阅任务进度（SSE）：progress 事件只带增量，需把已有笔记截断到 offset 再拼接 text
+export const subscribeTaskEvents = (
+  taskId: string,
+  handlers: {
+    onProgress: (event: TaskProgressEvent) => void
+    onStatus: (event: TaskStatusEvent) => void
+    onError: () => void
+  }
+) => {
+  if (typeof EventSource === 'undefined') {
+    handlers.onError()
+    return () => {}
+  }
+  const source = new EventSource(`${API_BASE_URL}/task/${taskId}/events`)
+  source.addEventListener('progress', (event) => {
+    handlers.onProgress(JSON.parse((event as MessageEvent).data))
+  })
+  source.addEventListener('status', (event) => {
+    handlers.onStatus(JSON.parse((event as MessageEvent).data))
+  })
+  source.onerror = () => {
+    // 服务端在任务结束后主动关闭连接也会触发 error，不让浏览器自动重连
+    source.close()
+    handlers.onError()
+  }
+  return () => source.close()
 }
 
 // 获取任务列表
@@ -65,6 +114,29 @@ export const getTasks = async (limit: number = 50) => {
   return await api.get(`/tasks?limit=${limit}`)
 }
 
+// 游标分页获取任务列表；next_cursor 为 null 表示没有更多
+export const getTaskPage = async (
+  params: {
+    limit?: number
+    cursor?: string | null
+    status?: string
+    source?: string
+    createdFrom?: string
+    createdTo?: string
+  } = {}
+) => {
+  return await api.get('/tasks/page', {
+    params: {
+      limit: params.limit,
+      cursor: params.cursor || undefined,
+      status: params.status,
+      source: params.source,
+      created_from: params.createdFrom,
+      created_to: params.createdTo,
+    },
+  })
+}
+
 // 确认步骤
 export const confirmStep = async (taskId: string, step: string, noteStyle?: string) => {
   const modelConfig = step === 'summarize' ? getSelectedModelConfig(noteStyle || 'simple') : null
@@ -76,13 +148,15 @@ export const confirmStep = async (taskId: string, step: string, noteStyle?: stri
 }
 
 // 重新生成笔记
-export const regenerateNote = async (taskId: string, noteStyle?: string) => {
+// bypassCache 为 true 时不复用分段摘要缓存，所有提示词都重新请求模型
+export const regenerateNote = async (taskId: string, noteStyle?: string, bypassCache = false) => {
   const modelConfig = getSelectedModelConfig(noteStyle || 'simple')
 
   // 将模型配置作为请求体传递（使用驼峰命名）
   return await api.post(`/task/${taskId}/regenerate`, {
     modelConfig: modelConfig,
-    noteStyle: noteStyle
+    noteStyle: noteStyle,
+    bypassCache: bypassCache
   })
 }
 
@@ -126,6 +200,8 @@ export const saveTranscriberConfig = async (config: {
   model_size?: string
   device?: string
   compute_type?: string
+  parallel_workers?: number
+  chunk_seconds?: number
 }) => {
   return await api.post('/transcriber/config', config)
 }
@@ -135,6 +211,8 @@ export const testTranscriberConfig = async (config: {
   model_size?: string
   device?: string
   compute_type?: string
+  parallel_workers?: number
+  chunk_seconds?: number
 }) => {
   return await api.post('/transcriber/test', config)
 }
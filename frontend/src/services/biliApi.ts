@@ -12,7 +12,8 @@ const api = axios.create({
 export interface BiliConfig {
     video_quality: number
     download_path: string
-    download_interval: number
+    max_concurrent_downloads: number
+    api_rate_limit: number
     headless: boolean
 }
 
@@ -59,6 +60,14 @@ export const clearBiliVideos = async () => {
 
 // ==================== 下载控制 ====================
 
+export interface VideoDownloadState {
+    video: string
+    status: 'pending' | 'running' | 'completed' | 'failed'
+    progress: number
+    downloaded_bytes: number
+    total_bytes: number | null
+}
+
 export interface DownloadStatus {
     status: 'idle' | 'running' | 'paused' | 'stopped'
     task_id: string | null
@@ -66,6 +75,11 @@ export interface DownloadStatus {
     total: number
     completed: number
     progress: number
+    downloaded_bytes?: number
+    total_bytes?: number | null
+    failed?: number
+    overall_progress?: number
+    videos?: VideoDownloadState[]
 }
 
 export const startDownload = async (videoIds?: number[]) => {